@@ -0,0 +1,35 @@
+"""add_scan_journal
+
+Revision ID: 20261016_1200_scan_journal
+Revises: 20250625_0651_calendar
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1200_scan_journal'
+down_revision = '20250625_0651_calendar'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('scan_journal',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(1024), nullable=False),
+        sa.Column('is_dir', sa.Boolean(), nullable=False),
+        sa.Column('inode', sa.BigInteger(), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('mtime', sa.Float(), nullable=True),
+        sa.Column('scanned_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'path', name='uq_scan_journal_user_path')
+    )
+    op.create_index(op.f('ix_scan_journal_id'), 'scan_journal', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scan_journal_id'), table_name='scan_journal')
+    op.drop_table('scan_journal')
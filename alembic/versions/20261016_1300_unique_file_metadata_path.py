@@ -0,0 +1,30 @@
+"""unique_file_metadata_user_path
+
+Revision ID: 20261016_1300_file_path_unique
+Revises: 20261016_1200_scan_journal
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1300_file_path_unique'
+down_revision = '20261016_1200_scan_journal'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Keep the newest record when a path was indexed more than once
+    op.execute(
+        """
+        DELETE FROM file_metadata
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM file_metadata GROUP BY user_id, file_path
+        )
+        """
+    )
+    op.create_index('uq_file_metadata_user_path', 'file_metadata', ['user_id', 'file_path'], unique=True)
+
+def downgrade() -> None:
+    op.drop_index('uq_file_metadata_user_path', table_name='file_metadata')
@@ -0,0 +1,24 @@
+"""file_metadata_keyset_indexes
+
+Revision ID: 20261016_1400_keyset_indexes
+Revises: 20261016_1300_file_path_unique
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1400_keyset_indexes'
+down_revision = '20261016_1300_file_path_unique'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Seek targets for cursor pagination on (sort key, id) within a user's files
+    op.create_index('ix_file_metadata_user_indexed', 'file_metadata', ['user_id', 'indexed_at', 'id'])
+    op.create_index('ix_file_metadata_user_size', 'file_metadata', ['user_id', 'file_size', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_file_metadata_user_size', table_name='file_metadata')
+    op.drop_index('ix_file_metadata_user_indexed', table_name='file_metadata')
@@ -80,6 +80,30 @@ class Settings:
     def redis_max_connections(self) -> int:
         return self._get_int("REDIS_MAX_CONNECTIONS", 20 if self.environment == "development" else 100)
 
+    @property
+    def redis_circuit_cooldown_seconds(self) -> int:
+        # How long cache calls skip Redis after it stopped answering
+        return self._get_int("REDIS_CIRCUIT_COOLDOWN_SECONDS", 30)
+
+    @property
+    def cache_l2_redis_url(self) -> str:
+        # Shared L2 behind AdvancedCacheManager's per-worker memory cache; empty keeps it L1-only
+        return os.getenv("CACHE_L2_REDIS_URL", "")
+
+    @property
+    def cache_invalidation_bus(self) -> str:
+        # "auto", "redis", "sqlite" or "none"
+        return os.getenv("CACHE_INVALIDATION_BUS", "auto")
+
+    @property
+    def cache_invalidation_db(self) -> str:
+        return os.getenv("CACHE_INVALIDATION_DB", "data/cache_invalidation.db")
+
+    @property
+    def cache_compression_threshold(self) -> int:
+        # Encoded cache values of at least this many bytes are zstd-compressed (0 disables)
+        return self._get_int("CACHE_COMPRESSION_THRESHOLD", 1024)
+
     # Authentication Settings
     @property
     def auth_secret_key(self) -> str:
@@ -190,6 +214,121 @@ class Settings:
     def max_worker_connections(self) -> int:
         return self._get_int("MAX_WORKER_CONNECTIONS", 100 if self.environment == "development" else 1000)
 
+    # File Scanner Settings
+    @property
+    def scanner_write_batch_size(self) -> int:
+        return self._get_int("SCANNER_WRITE_BATCH_SIZE", 200)
+    
+    @property
+    def scanner_write_flush_interval_ms(self) -> int:
+        return self._get_int("SCANNER_WRITE_FLUSH_INTERVAL_MS", 500)
+    
+    @property
+    def scanner_categorize_batch_size(self) -> int:
+        return self._get_int("SCANNER_CATEGORIZE_BATCH_SIZE", 32)
+    
+    @property
+    def scanner_categorize_max_delay_ms(self) -> int:
+        return self._get_int("SCANNER_CATEGORIZE_MAX_DELAY_MS", 50)
+    
+    @property
+    def scanner_extraction_mode(self) -> str:
+        mode = os.getenv("SCANNER_EXTRACTION_MODE", "thread").lower()
+        return mode if mode in ("thread", "process") else "thread"
+    
+    @property
+    def scanner_process_workers(self) -> int:
+        # 0 means one worker per CPU core
+        return self._get_int("SCANNER_PROCESS_WORKERS", 0)
+    
+    @property
+    def scanner_watch_debounce_ms(self) -> int:
+        return self._get_int("SCANNER_WATCH_DEBOUNCE_MS", 1000)
+    
+    @property
+    def scanner_watch_rescan_interval(self) -> int:
+        # Seconds between journal rescans when inotify is unavailable
+        return self._get_int("SCANNER_WATCH_RESCAN_INTERVAL", 300)
+
+    # Workflow Scheduler Settings
+    @property
+    def workflow_misfire_policy(self) -> str:
+        # What to do with scheduled runs more than the grace period late: fire_once, fire_all or skip
+        policy = os.getenv("WORKFLOW_MISFIRE_POLICY", "fire_once").lower()
+        return policy if policy in ("fire_once", "fire_all", "skip") else "fire_once"
+    
+    @property
+    def workflow_misfire_grace_seconds(self) -> int:
+        return self._get_int("WORKFLOW_MISFIRE_GRACE_SECONDS", 60)
+    
+    @property
+    def workflow_max_catchup_runs(self) -> int:
+        # Missed runs replayed per trigger under fire_all
+        return self._get_int("WORKFLOW_MAX_CATCHUP_RUNS", 10)
+    
+    @property
+    def workflow_schedule_resync_seconds(self) -> int:
+        # How often trigger edits made outside the scheduler are picked up
+        return self._get_int("WORKFLOW_SCHEDULE_RESYNC_SECONDS", 300)
+
+    # Workflow Queue Settings
+    @property
+    def workflow_queue_enabled(self) -> bool:
+        # Run executions through the durable queue instead of in-process tasks
+        return self._get_bool("WORKFLOW_QUEUE_ENABLED", True)
+    
+    @property
+    def workflow_embedded_worker(self) -> bool:
+        # Drain the queue inside the API process; disable when running dedicated workers
+        return self._get_bool("WORKFLOW_EMBEDDED_WORKER", True)
+    
+    @property
+    def workflow_worker_concurrency(self) -> int:
+        return self._get_int("WORKFLOW_WORKER_CONCURRENCY", 10)
+    
+    @property
+    def workflow_workspace_concurrency(self) -> int:
+        # Running executions per workspace across all workers; 0 disables the cap
+        return self._get_int("WORKFLOW_WORKSPACE_CONCURRENCY", 3)
+    
+    @property
+    def workflow_lease_seconds(self) -> int:
+        return self._get_int("WORKFLOW_LEASE_SECONDS", 60)
+    
+    @property
+    def workflow_queue_poll_seconds(self) -> int:
+        return self._get_int("WORKFLOW_QUEUE_POLL_SECONDS", 2)
+    
+    @property
+    def workflow_max_attempts(self) -> int:
+        # Leases a run may lose (worker crashes) before it is dead-lettered
+        return self._get_int("WORKFLOW_MAX_ATTEMPTS", 3)
+
+    # Workflow Execution Log Settings
+    @property
+    def workflow_log_batch_size(self) -> int:
+        # Step records per group commit
+        return self._get_int("WORKFLOW_LOG_BATCH_SIZE", 100)
+    
+    @property
+    def workflow_log_flush_interval_ms(self) -> int:
+        # Longest a step record waits in memory before its group commit
+        return self._get_int("WORKFLOW_LOG_FLUSH_INTERVAL_MS", 200)
+    
+    @property
+    def workflow_step_payload_max_bytes(self) -> int:
+        return self._get_int("WORKFLOW_STEP_PAYLOAD_MAX_BYTES", 65536)
+    
+    @property
+    def workflow_step_payload_policy(self) -> str:
+        # Larger step payloads are written to a file (offload) or cut to a preview (truncate)
+        policy = os.getenv("WORKFLOW_STEP_PAYLOAD_POLICY", "offload").lower()
+        return policy if policy in ("offload", "truncate") else "offload"
+    
+    @property
+    def workflow_payload_directory(self) -> str:
+        return os.getenv("WORKFLOW_PAYLOAD_DIRECTORY", "./data/workflow_payloads")
+
     # Monitoring Settings
     @property
     def enable_metrics(self) -> bool:
@@ -216,6 +355,16 @@ class Settings:
     def ai_model_default(self) -> str:
         default = "gpt-3.5-turbo" if self.environment == "development" else "gpt-4"
         return os.getenv("AI_MODEL_DEFAULT", default)
+    
+    @property
+    def ai_categorization_cache_size(self) -> int:
+        # Maximum number of file checksums kept in the categorization cache
+        return self._get_int("AI_CATEGORIZATION_CACHE_SIZE", 10000)
+    
+    @property
+    def search_cache_size(self) -> int:
+        # Maximum number of cached search responses across all users
+        return self._get_int("SEARCH_CACHE_SIZE", 2048)
 
     def validate_production_settings(self) -> List[str]:
         """Validate production-specific settings"""
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cache Memory Tier Benchmark
+Measures get/set latency of AdvancedCacheManager's memory tier on a full cache
+of 10k, 100k and 1M entries, with and without TinyLFU admission. The previous
+scan-based eviction (sum of all sizes plus a min() over all keys per insert)
+is timed on the smaller sizes for comparison.
+
+Usage:
+    python scripts/benchmark_cache_memory_tier.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.backend.caching.memory_tier import MemoryTier, TinyLFU
+
+ENTRY_SIZE = 100
+
+
+class Entry:
+    __slots__ = ("size", "last_accessed")
+
+    def __init__(self, size: int, last_accessed: float = 0.0):
+        self.size = size
+        self.last_accessed = last_accessed
+
+
+def legacy_set(cache: dict, key: str, entry: Entry, max_bytes: int):
+    """The eviction loop AdvancedCacheManager used before the memory tier"""
+    while sum(e.size for e in cache.values()) + entry.size > max_bytes:
+        lru_key = min(cache.keys(), key=lambda k: cache[k].last_accessed)
+        del cache[lru_key]
+    cache[key] = entry
+
+
+def bench_tier(size: int, operations: int, admission: bool, rng: random.Random):
+    tier = MemoryTier(size * ENTRY_SIZE, admission=TinyLFU(size) if admission else None)
+    for i in range(size):
+        tier.put(f"key:{i}", Entry(ENTRY_SIZE))
+
+    # Zipf-like reads: most traffic goes to a small hot set
+    reads = [f"key:{int(size * rng.random() ** 3)}" for _ in range(operations)]
+    start = time.perf_counter()
+    for key in reads:
+        tier.get(key)
+    get_us = (time.perf_counter() - start) / operations * 1e6
+
+    # Every insert into the full tier evicts (or is rejected)
+    start = time.perf_counter()
+    for i in range(operations):
+        tier.put(f"new:{i}", Entry(ENTRY_SIZE))
+    set_us = (time.perf_counter() - start) / operations * 1e6
+
+    hits = sum(1 for key in reads if key in tier)
+    return get_us, set_us, hits / operations * 100
+
+
+def bench_legacy(size: int, operations: int):
+    cache = {f"key:{i}": Entry(ENTRY_SIZE, i) for i in range(size)}
+    start = time.perf_counter()
+    for i in range(operations):
+        legacy_set(cache, f"new:{i}", Entry(ENTRY_SIZE, size + i), size * ENTRY_SIZE)
+    return (time.perf_counter() - start) / operations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--operations", type=int, default=100000, help="gets and sets timed per size")
+    parser.add_argument("--legacy-max", type=int, default=100000, help="largest size to time the legacy loop on")
+    parser.add_argument("--legacy-operations", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'entries':>9}{'policy':>9}{'get us':>9}{'set us':>9}{'hot kept %':>12}{'legacy set us':>15}")
+    for size in args.sizes:
+        legacy = f"{bench_legacy(size, args.legacy_operations):>15.1f}" if size <= args.legacy_max else f"{'-':>15}"
+        for admission in (False, True):
+            get_us, set_us, kept = bench_tier(size, args.operations, admission, rng)
+            policy = "tinylfu" if admission else "lru"
+            print(f"{size:>9}{policy:>9}{get_us:>9.2f}{set_us:>9.2f}{kept:>12.1f}{legacy if not admission else '':>15}")
+
+
+if __name__ == "__main__":
+    main()
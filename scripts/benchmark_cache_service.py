@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Cache Service Benchmark
+Compares payload sizes and encode/decode cost of the previous pickle format
+with the msgpack (+zstd) cache codec for the values the cache services store.
+When a Redis server is reachable, also measures hit latency of the previous
+blocking client (PING before every GET) against the asyncio CacheService,
+and N single GETs against one pipelined MGET.
+
+Usage:
+    python scripts/benchmark_cache_service.py --redis-url redis://localhost:6379 --iterations 2000
+"""
+
+import argparse
+import asyncio
+import pickle
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.backend.services.cache_codec import CacheCodec
+from src.backend.services.cache_service import CacheService, CircuitBreaker
+
+
+def file_metadata(i: int) -> dict:
+    return {
+        'id': i,
+        'user_id': 1,
+        'workspace_id': 3,
+        'file_name': f'quarterly_report_{i}.pdf',
+        'file_path': f'/home/user/Documents/reports/2026/quarterly_report_{i}.pdf',
+        'file_extension': '.pdf',
+        'file_size': 482133 + i,
+        'mime_type': 'application/pdf',
+        'checksum': f'{i:064x}',
+        'ai_category': 'documents',
+        'ai_description': 'Quarterly financial report with revenue breakdown per region',
+        'ai_tags': 'finance,report,quarterly',
+        'importance_score': 0.72,
+        'is_favorite': False,
+        'is_archived': False,
+        'updated_at': datetime(2026, 10, 16, 12, 0, i % 60).isoformat()
+    }
+
+
+WORKLOADS = {
+    'file_metadata': file_metadata(1),
+    'workspace_files_100': [file_metadata(i) for i in range(100)],
+    'dashboard': {'totals': {'files': 5231, 'bytes': 88123412}, 'by_category': {f'cat{i}': i * 17 for i in range(40)}},
+}
+
+
+def time_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_codecs(iterations: int):
+    codecs = {
+        'pickle': (pickle.dumps, pickle.loads),
+        'json': (CacheCodec(compression_threshold=0, use_msgpack=False).encode,
+                 CacheCodec(use_msgpack=False).decode),
+        'msgpack': (CacheCodec(compression_threshold=0).encode, CacheCodec().decode),
+        'msgpack+zstd': (CacheCodec(compression_threshold=1024).encode, CacheCodec().decode),
+    }
+    print(f"{'workload':<22}{'codec':<14}{'bytes':>9}{'encode us':>11}{'decode us':>11}")
+    for name, value in WORKLOADS.items():
+        for codec_name, (encode, decode) in codecs.items():
+            payload = encode(value)
+            encode_us = time_call(lambda: encode(value), iterations)
+            decode_us = time_call(lambda: decode(payload), iterations)
+            print(f"{name:<22}{codec_name:<14}{len(payload):>9}{encode_us:>11.1f}{decode_us:>11.1f}")
+
+
+def bench_legacy_client(redis_url: str, iterations: int):
+    import redis
+    client = redis.from_url(redis_url)
+    client.set('bench:legacy', pickle.dumps(WORKLOADS['file_metadata']), ex=60)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        client.ping()
+        pickle.loads(client.get('bench:legacy'))
+    elapsed = (time.perf_counter() - start) / iterations * 1e6
+    client.delete('bench:legacy')
+    client.close()
+    return elapsed
+
+
+async def bench_async_service(redis_url: str, iterations: int, batch: int):
+    service = CacheService(redis_url, breaker=CircuitBreaker(failure_threshold=1))
+    await service.set('bench:async', WORKLOADS['file_metadata'], 60)
+    if not service._is_available():
+        return None
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await service.get('bench:async')
+    get_us = (time.perf_counter() - start) / iterations * 1e6
+
+    keys = [f'bench:many:{i}' for i in range(batch)]
+    await service.set_many({key: file_metadata(i) for i, key in enumerate(keys)}, 60)
+    rounds = max(1, iterations // batch)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            await service.get(key)
+    single_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await service.get_many(keys)
+    mget_us = (time.perf_counter() - start) / rounds * 1e6
+
+    for key in keys + ['bench:async']:
+        await service.delete(key)
+    await service.close()
+    return get_us, single_us, mget_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--redis-url', default=None, help='Redis server for the latency measurements')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=50, help='keys per multi-get')
+    args = parser.parse_args()
+
+    bench_codecs(args.iterations)
+    if not args.redis_url:
+        print("\nNo --redis-url given, skipping latency measurements")
+        return
+
+    try:
+        legacy_us = bench_legacy_client(args.redis_url, args.iterations)
+    except Exception as e:
+        print(f"\nRedis not reachable at {args.redis_url}: {e}")
+        return
+    result = asyncio.run(bench_async_service(args.redis_url, args.iterations, args.batch))
+    if result is None:
+        print(f"\nRedis not reachable at {args.redis_url} from the asyncio client")
+        return
+    get_us, single_us, mget_us = result
+    print(f"\n{'hit latency':<40}{'us':>10}")
+    print(f"{'blocking client, PING + GET + pickle':<40}{legacy_us:>10.1f}")
+    print(f"{'asyncio CacheService.get':<40}{get_us:>10.1f}")
+    print(f"{f'{args.batch} x CacheService.get':<40}{single_us:>10.1f}")
+    print(f"{f'CacheService.get_many({args.batch})':<40}{mget_us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
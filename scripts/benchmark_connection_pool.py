@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Connection Pool Acquisition Benchmark
+Runs N concurrent acquirers against a pool of in-memory connections, each
+holding its connection for a short simulated query, and reports acquisition
+latency percentiles. The previous acquisition loop (re-check every 100ms while
+the pool is exhausted) is timed on the same workload for comparison.
+
+Usage:
+    python scripts/benchmark_connection_pool.py --acquirers 500 --max-connections 20 --hold-ms 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from src.backend.database.connection_pool import ConnectionPool
+
+
+class MemoryConnection:
+    async def execute(self, query, params=None):
+        return []
+
+    async def close(self):
+        pass
+
+
+class MemoryPool(ConnectionPool):
+    async def _open_connection(self):
+        return MemoryConnection()
+
+
+class LegacyPollingPool:
+    """The acquisition loop ConnectionPool used before: poll every 100ms when exhausted"""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.available = []
+        self.total = 0
+
+    async def acquire(self):
+        while True:
+            if self.available:
+                return self.available.pop()
+            if self.total < self.max_connections:
+                self.total += 1
+                return MemoryConnection()
+            await asyncio.sleep(0.1)
+
+    async def release(self, connection):
+        self.available.append(connection)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(acquire, release, acquirers: int, hold_ms: float):
+    latencies = []
+
+    async def worker():
+        started = time.perf_counter()
+        connection = await acquire()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(hold_ms / 1000)
+        await release(connection)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(acquirers)))
+    return latencies, time.perf_counter() - started
+
+
+async def main_async(args):
+    pool = MemoryPool({
+        "min_connections": 0,
+        "max_connections": args.max_connections,
+        "connection_timeout": 60
+    })
+    legacy = LegacyPollingPool(args.max_connections)
+
+    print(f"{'pool':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'mean ms':>9}{'wall s':>8}")
+    for name, acquire, release in (
+        ("legacy", legacy.acquire, legacy.release),
+        ("asyncio", pool._acquire_connection, pool._release_connection),
+    ):
+        latencies, wall = await run(acquire, release, args.acquirers, args.hold_ms)
+        print(
+            f"{name:<10}{percentile(latencies, 0.50):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+            f"{percentile(latencies, 0.99):>9.2f}{max(latencies):>9.2f}{statistics.mean(latencies):>9.2f}{wall:>8.2f}"
+        )
+
+    metrics = await pool.get_metrics()
+    acquire_metrics = metrics["acquire_metrics"]
+    print(f"\nget_metrics(): p50 <= {acquire_metrics['p50_ms']}ms, p99 <= {acquire_metrics['p99_ms']}ms, "
+          f"max waiting {acquire_metrics['max_waiting']}")
+    await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--acquirers", type=int, default=500)
+    parser.add_argument("--max-connections", type=int, default=20)
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="simulated query time per acquisition")
+    args = parser.parse_args()
+    # Per-acquire debug logging would dominate the timings
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
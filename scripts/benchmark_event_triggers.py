@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Event Trigger Matching Benchmark
+Loads N event triggers (spread over 50 event types and 20 workspaces, with
+zero to two conditions each) into an in-memory SQLite database and measures
+how many events per second can be matched to the triggers they fire:
+
+- scan:  what trigger_workflow_by_event used to do, i.e. query every enabled
+         event trigger, filter on config['event_type'] in Python and
+         interpret the conditions one dict at a time
+- index: EventTriggerIndex lookups by event type / workspace with
+         precompiled conditions
+
+Workflows are not executed; both paths only find the matching triggers.
+
+Usage:
+    python scripts/benchmark_event_triggers.py --triggers 10000 --events 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+from sqlalchemy import and_, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.database.database import Base
+from src.backend.models.user import User
+from src.backend.models.workspace import Workspace
+from src.backend.models.workflow import Workflow, WorkflowTrigger, TriggerType
+from src.backend.services.event_trigger_index import EventTriggerIndex
+
+EVENT_TYPES = 50
+WORKSPACES = 20
+WORKFLOWS = 200
+
+
+def evaluate_conditions(conditions, event_data) -> bool:
+    """The condition interpreter trigger_workflow_by_event used before the index"""
+    for condition in conditions or []:
+        field = condition.get('field')
+        operator = condition.get('operator')
+        value = condition.get('value')
+        if field not in event_data:
+            return False
+        event_value = event_data[field]
+        if operator == 'equals' and event_value != value:
+            return False
+        elif operator == 'not_equals' and event_value == value:
+            return False
+        elif operator == 'contains' and value not in str(event_value):
+            return False
+        elif operator == 'greater_than' and event_value <= value:
+            return False
+        elif operator == 'less_than' and event_value >= value:
+            return False
+    return True
+
+
+def random_conditions(rng: random.Random):
+    choices = [
+        {'field': 'priority', 'operator': 'greater_than', 'value': rng.randrange(5)},
+        {'field': 'status', 'operator': 'equals', 'value': rng.choice(['open', 'done'])},
+        {'field': 'name', 'operator': 'contains', 'value': rng.choice(['report', 'invoice'])},
+    ]
+    return rng.sample(choices, rng.randrange(3))
+
+
+def populate(session, triggers: int, rng: random.Random):
+    session.add(User(id=1, username="bench", password_hash="-"))
+    session.add_all(Workspace(id=i + 1, user_id=1, name=f"workspace{i}") for i in range(WORKSPACES))
+    session.add_all(
+        Workflow(id=i + 1, name=f"workflow{i}", workspace_id=i % WORKSPACES + 1, created_by=1)
+        for i in range(WORKFLOWS)
+    )
+    session.add_all(
+        WorkflowTrigger(
+            workflow_id=rng.randrange(WORKFLOWS) + 1,
+            name=f"trigger{i}",
+            trigger_type=TriggerType.EVENT,
+            config={'event_type': f"event{rng.randrange(EVENT_TYPES)}"},
+            conditions=random_conditions(rng),
+            is_enabled=True
+        )
+        for i in range(triggers)
+    )
+    session.commit()
+
+
+def scan_match(session, event_type, event_data, workspace_id):
+    query = session.query(WorkflowTrigger).filter(
+        and_(
+            WorkflowTrigger.trigger_type == TriggerType.EVENT,
+            WorkflowTrigger.is_enabled == True
+        )
+    )
+    if workspace_id:
+        query = query.join(Workflow).filter(Workflow.workspace_id == workspace_id)
+    return [
+        trigger.id for trigger in query.all()
+        if (trigger.config or {}).get('event_type') == event_type
+        and evaluate_conditions(trigger.conditions, event_data)
+    ]
+
+
+def build_index(session) -> EventTriggerIndex:
+    index = EventTriggerIndex()
+    index.replace_all(
+        session.query(
+            WorkflowTrigger.id, WorkflowTrigger.workflow_id, Workflow.workspace_id,
+            WorkflowTrigger.config, WorkflowTrigger.conditions
+        ).join(Workflow, Workflow.id == WorkflowTrigger.workflow_id).order_by(WorkflowTrigger.id)
+    )
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triggers", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=200, help="Events matched per path")
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    rng = random.Random(7)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    populate(session, args.triggers, rng)
+
+    events = [
+        (
+            f"event{rng.randrange(EVENT_TYPES)}",
+            {'priority': rng.randrange(6), 'status': rng.choice(['open', 'done']), 'name': 'monthly report'},
+            rng.choice([None, rng.randrange(WORKSPACES) + 1])
+        )
+        for _ in range(args.events)
+    ]
+
+    started = time.perf_counter()
+    index = build_index(session)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = {}
+    for name, match in (
+        ("scan", lambda e: scan_match(session, *e)),
+        ("index", lambda e: [t.trigger_id for t in index.match(*e)]),
+    ):
+        session.expire_all()
+        started = time.perf_counter()
+        matched = [match(event) for event in events]
+        results[name] = (len(events) / (time.perf_counter() - started), matched)
+
+    assert results["scan"][1] == results["index"][1], "index and scan disagree"
+    avg_matches = sum(len(m) for m in results["index"][1]) / len(events)
+
+    print(f"{args.triggers} triggers, index built in {build_ms:.0f} ms, {avg_matches:.1f} matches per event")
+    print(f"{'path':>6}{'events/s':>12}")
+    for name, (rate, _) in results.items():
+        print(f"{name:>6}{rate:>12,.0f}")
+    print(f"speedup {results['index'][0] / results['scan'][0]:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
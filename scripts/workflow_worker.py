@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Workflow Queue Worker
+Runs queued workflow executions outside the API process. Start as many as
+needed (on one or several hosts sharing the database); each leases runs from
+the workflow_execution_queue table, and runs held by a worker that dies are
+picked up by the others once its leases expire.
+
+Set WORKFLOW_EMBEDDED_WORKER=false on the API processes when running these.
+
+Usage:
+    python scripts/workflow_worker.py --concurrency 10
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from src.backend.services.workflow_execution_engine import workflow_execution_engine
+
+
+async def main_async(args):
+    if not await workflow_execution_engine.start_worker(concurrency=args.concurrency):
+        logger.error("Workflow execution queue is disabled (WORKFLOW_QUEUE_ENABLED=false)")
+        return 1
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    await workflow_execution_engine.stop_worker()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Executions run at once (default: WORKFLOW_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,13 @@ AI API endpoints for OrdnungsHub
 Provides AI-powered analysis and suggestions
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from loguru import logger
 
+from src.backend.dependencies.auth import get_current_active_user
+from src.backend.models.user import User
 from src.backend.services.ai_service import ai_service
 from src.backend.services.enhanced_ai_service import enhanced_ai_service
 # from src.backend.services.file_scanner import file_scanner
@@ -233,12 +235,18 @@ async def enhanced_categorize_file(request: FileCategorizeRequest):
 
 class SimilarityRequest(BaseModel):
     target_text: str
-    file_database: List[Dict[str, Any]]
+    file_database: List[Dict[str, Any]] = []
     limit: Optional[int] = 5
 
 @router.post("/find-similar")
-async def find_similar_files(request: SimilarityRequest):
-    """Find files similar to the target text"""
+async def find_similar_files(
+    request: SimilarityRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Find files similar to the target text, among file_database when given,
+    otherwise among the current user's indexed files
+    """
     try:
         if not request.target_text.strip():
             raise HTTPException(status_code=400, detail="Target text cannot be empty")
@@ -246,7 +254,8 @@ async def find_similar_files(request: SimilarityRequest):
         similar_files = await enhanced_ai_service.find_similar_files(
             target_text=request.target_text,
             file_database=request.file_database,
-            limit=request.limit
+            limit=request.limit,
+            user_id=current_user.id
         )
         return {"similar_files": similar_files}
     except Exception as e:
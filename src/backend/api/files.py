@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, Form, BackgroundTasks
 from fastapi.responses import JSONResponse, FileResponse
 from sqlalchemy.orm import Session
 import os
@@ -17,6 +17,7 @@ except ImportError:
 
 from src.backend.database.database import get_db
 from src.backend.crud.crud_file import file_metadata as crud_file, tag as crud_tag
+from src.backend.crud.pagination import InvalidCursorError
 from src.backend.schemas.file_metadata import (
     FileMetadata, FileMetadataCreate, FileMetadataUpdate, FileMetadataResponse,
     FileSearchResponse, FileStatsResponse, FileCategoryStats,
@@ -484,11 +485,20 @@ async def delete_uploaded_file(
         logger.error(f"Error deleting file {file_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete file")
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _set_next_cursor(response: Response, page) -> None:
+    """Expose the cursor of the next page without changing list response bodies"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
 @router.get("/", response_model=List[FileMetadataResponse])
 def get_files(
+    response: Response,
     user_id: int = Query(..., description="User ID"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description=f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
     category: Optional[str] = Query(None, description="Filter by category"),
     extension: Optional[str] = Query(None, description="Filter by file extension"),
     favorites_only: bool = Query(False, description="Show only favorite files"),
@@ -496,60 +506,82 @@ def get_files(
 ):
     """Get files for a user with optional filters"""
     
-    if favorites_only:
-        files = crud_file.get_favorites(db, user_id=user_id, skip=skip, limit=limit)
-    elif category:
-        files = crud_file.get_by_category(db, user_id=user_id, category=category, skip=skip, limit=limit)
-    elif extension:
-        files = crud_file.get_by_extension(db, user_id=user_id, extension=extension, skip=skip, limit=limit)
-    else:
-        files = crud_file.get_by_user(db, user_id=user_id, skip=skip, limit=limit)
+    try:
+        if favorites_only:
+            files = crud_file.get_favorites(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+        elif category:
+            files = crud_file.get_by_category(db, user_id=user_id, category=category, skip=skip, limit=limit, cursor=cursor)
+        elif extension:
+            files = crud_file.get_by_extension(db, user_id=user_id, extension=extension, skip=skip, limit=limit, cursor=cursor)
+        else:
+            files = crud_file.get_by_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    _set_next_cursor(response, files)
     return files
 
 @router.get("/search", response_model=FileSearchResponse)
 def search_files(
     query: str = Query(..., min_length=1, description="Search query"),
     user_id: int = Query(..., description="User ID"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """Search files by name, description, or tags"""
     
-    files = crud_file.search_files(db, user_id=user_id, query=query, skip=skip, limit=limit)
+    try:
+        files = crud_file.search_files(db, user_id=user_id, query=query, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Get total count for pagination (simplified approach)
     total = len(files)
-    has_more = len(files) == limit
     
     return FileSearchResponse(
         files=files,
         total=total,
-        has_more=has_more
+        has_more=files.next_cursor is not None,
+        next_cursor=files.next_cursor
     )
 
 @router.get("/recent", response_model=List[FileMetadataResponse])
 def get_recent_files(
+    response: Response,
     user_id: int = Query(..., description="User ID"),
     days: int = Query(7, ge=1, le=30, description="Number of days to look back"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of files to return"),
+    cursor: Optional[str] = Query(None, description=f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
     db: Session = Depends(get_db)
 ):
     """Get recently indexed files"""
     
-    return crud_file.get_recent(db, user_id=user_id, days=days, limit=limit)
+    try:
+        files = crud_file.get_recent(db, user_id=user_id, days=days, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, files)
+    return files
 
 @router.get("/large", response_model=List[FileMetadataResponse])
 def get_large_files(
+    response: Response,
     user_id: int = Query(..., description="User ID"),
     min_size_mb: int = Query(100, ge=1, description="Minimum file size in MB"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of files to return"),
+    cursor: Optional[str] = Query(None, description=f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
     db: Session = Depends(get_db)
 ):
     """Get large files above specified size"""
     
-    return crud_file.get_large_files(db, user_id=user_id, min_size_mb=min_size_mb, limit=limit)
+    try:
+        files = crud_file.get_large_files(db, user_id=user_id, min_size_mb=min_size_mb, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, files)
+    return files
 
 @router.get("/stats", response_model=FileStatsResponse)
 def get_file_stats(
@@ -558,17 +590,17 @@ def get_file_stats(
 ):
     """Get file statistics for dashboard"""
     
-    # Get all user files
-    all_files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
-    
-    # Calculate statistics
-    total_files = len(all_files)
-    total_size = sum(f.file_size or 0 for f in all_files)
-    favorite_count = len([f for f in all_files if f.is_favorite])
+    # Stream all user files and calculate statistics in one pass
+    total_files = 0
+    total_size = 0
+    favorite_count = 0
     
     # Group by categories
     categories = {}
-    for file in all_files:
+    for file in crud_file.iter_by_user(db, user_id=user_id):
+        total_files += 1
+        total_size += file.file_size or 0
+        favorite_count += 1 if file.is_favorite else 0
         category = file.user_category or file.ai_category or "Uncategorized"
         if category not in categories:
             categories[category] = {"count": 0, "size": 0}
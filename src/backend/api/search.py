@@ -4,13 +4,16 @@ Provides high-performance search functionality with FTS5 support
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 
 from src.backend.database.database import get_db
 from src.backend.crud.crud_file import file_metadata as crud_file, tag as crud_tag
-from src.backend.database.fts_search import SearchMode
+from src.backend.crud.pagination import InvalidCursorError
+from src.backend.database.fts_search import SearchMode, get_search_generation
+from src.backend.services.search_cache import search_cache, normalize_query, suggestion_terms
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -44,17 +47,23 @@ async def search_all(
         # Search files
         if type in ["all", "files"]:
             try:
-                files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=limit)
-                file_results = [f for f in files if q.lower() in (getattr(f, 'file_name', '') or "").lower() or q.lower() in (getattr(f, 'ai_description', '') or "").lower()]
-                results["results"]["files"] = [
-                    {
-                        "id": f.id,
-                        "name": getattr(f, 'file_name', ''),
-                        "type": "file",
-                        "description": getattr(f, 'ai_description', '') or getattr(f, 'user_description', ''),
-                        "category": getattr(f, 'ai_category', '') or getattr(f, 'user_category', '')
-                    } for f in file_results[:limit//3]
-                ]
+                generation = get_search_generation(db, user_id)
+                cache_key = ("all", normalize_query(q), limit)
+                file_items = search_cache.get(user_id, generation, cache_key)
+                if file_items is None:
+                    files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=limit)
+                    file_results = [f for f in files if q.lower() in (getattr(f, 'file_name', '') or "").lower() or q.lower() in (getattr(f, 'ai_description', '') or "").lower()]
+                    file_items = [
+                        {
+                            "id": f.id,
+                            "name": getattr(f, 'file_name', ''),
+                            "type": "file",
+                            "description": getattr(f, 'ai_description', '') or getattr(f, 'user_description', ''),
+                            "category": getattr(f, 'ai_category', '') or getattr(f, 'user_category', '')
+                        } for f in file_results[:limit//3]
+                    ]
+                    search_cache.put(user_id, generation, cache_key, file_items)
+                results["results"]["files"] = list(file_items)
             except:
                 pass
                 
@@ -118,8 +127,9 @@ async def search_files(
     tags: Optional[str] = Query(None, description="Comma-separated tags"),
     mode: Optional[str] = Query("fuzzy", description="Search mode: exact, fuzzy, phrase, boolean, wildcard"),
     use_fts: bool = Query(True, description="Use FTS5 for enhanced performance"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """
@@ -140,24 +150,42 @@ async def search_files(
             }
             search_mode = mode_mapping.get(mode.lower(), SearchMode.FUZZY)
         
-        if q:
-            # Enhanced FTS search
-            files = crud_file.search_files(
-                db, 
-                user_id=user_id, 
-                query=q, 
-                skip=skip, 
-                limit=limit,
-                workspace_id=workspace_id,
-                search_mode=search_mode,
-                use_fts=use_fts
-            )
-        elif category:
-            # Filter by category
-            files = crud_file.get_by_category(db, user_id=user_id, category=category, skip=skip, limit=limit)
-        else:
-            # Get all files for user
-            files = crud_file.get_by_user(db, user_id=user_id, skip=skip, limit=limit)
+        # Read the generation before querying so a concurrent write invalidates the entry
+        generation = get_search_generation(db, user_id)
+        cache_key = (
+            "files", normalize_query(q), category, workspace_id, tags,
+            search_mode.value, use_fts, skip, limit, cursor
+        )
+        page = search_cache.get(user_id, generation, cache_key)
+        cached = page is not None
+        
+        if not cached:
+            if q:
+                # Enhanced FTS search
+                files = crud_file.search_files(
+                    db, 
+                    user_id=user_id, 
+                    query=q, 
+                    skip=skip, 
+                    limit=limit,
+                    workspace_id=workspace_id,
+                    search_mode=search_mode,
+                    use_fts=use_fts,
+                    cursor=cursor
+                )
+            elif category:
+                # Filter by category
+                files = crud_file.get_by_category(
+                    db, user_id=user_id, category=category, skip=skip, limit=limit, cursor=cursor
+                )
+            else:
+                # Get all files for user
+                files = crud_file.get_by_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+            
+            page = (jsonable_encoder(files), files.next_cursor)
+            search_cache.put(user_id, generation, cache_key, page)
+        
+        files, next_cursor = page
         
         # Calculate performance metrics
         duration_ms = (datetime.now() - start_time).total_seconds() * 1000
@@ -166,14 +194,18 @@ async def search_files(
             "success": True,
             "results": files,
             "total": len(files),
-            "has_more": len(files) == limit,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
             "performance": {
                 "duration_ms": round(duration_ms, 2),
                 "search_engine": "FTS5" if use_fts and q else "Standard",
-                "mode": mode or "fuzzy"
+                "mode": mode or "fuzzy",
+                "cached": cached
             }
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
@@ -183,8 +215,9 @@ async def advanced_search_files(
     user_id: int = Query(..., description="User ID"),
     workspace_id: Optional[int] = Query(None, description="Filter by workspace ID"),
     mode: str = Query("fuzzy", description="Search mode: exact, fuzzy, phrase, boolean, wildcard"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """
@@ -203,23 +236,24 @@ async def advanced_search_files(
         }
         search_mode = mode_mapping.get(mode.lower(), SearchMode.FUZZY)
         
-        # Perform advanced search
-        search_results = crud_file.advanced_search(
-            db,
-            user_id=user_id,
-            query=q,
-            workspace_id=workspace_id,
-            search_mode=search_mode,
-            skip=skip,
-            limit=limit
-        )
+        generation = get_search_generation(db, user_id)
+        cache_key = ("advanced", normalize_query(q), workspace_id, search_mode.value, skip, limit, cursor)
+        page = search_cache.get(user_id, generation, cache_key)
+        cached = page is not None
         
-        # Calculate performance metrics
-        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-        
-        return {
-            "success": True,
-            "results": [
+        if not cached:
+            # Perform advanced search
+            search_results = crud_file.advanced_search(
+                db,
+                user_id=user_id,
+                query=q,
+                workspace_id=workspace_id,
+                search_mode=search_mode,
+                skip=skip,
+                limit=limit,
+                cursor=cursor
+            )
+            results = [
                 {
                     "file_id": result.file_id,
                     "file_name": result.file_name,
@@ -233,16 +267,31 @@ async def advanced_search_files(
                     "highlight_positions": result.highlight_positions
                 }
                 for result in search_results
-            ],
-            "total": len(search_results),
-            "has_more": len(search_results) == limit,
+            ]
+            page = (results, search_results.next_cursor)
+            search_cache.put(user_id, generation, cache_key, page)
+        
+        results, next_cursor = page
+        
+        # Calculate performance metrics
+        duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+        
+        return {
+            "success": True,
+            "results": results,
+            "total": len(results),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
             "performance": {
                 "duration_ms": round(duration_ms, 2),
                 "search_engine": "FTS5",
-                "mode": mode
+                "mode": mode,
+                "cached": cached
             }
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Advanced search failed: {str(e)}")
 
@@ -313,13 +362,20 @@ async def get_search_suggestions(
 ):
     """
     Get search query suggestions based on existing content
+    Served from a per-user prefix trie of file name words and tags that is
+    rebuilt only after the user's files change
     """
     try:
-        suggestions = crud_file.get_search_suggestions(
-            db,
-            user_id=user_id,
-            partial_query=q,
-            limit=limit
+        def load_terms():
+            for file_name, tags in crud_file.get_suggestion_sources(db, user_id=user_id):
+                yield from suggestion_terms(file_name, tags)
+        
+        suggestions = search_cache.suggest(
+            user_id,
+            get_search_generation(db, user_id),
+            q,
+            limit,
+            load_terms
         )
         
         return {
@@ -344,7 +400,8 @@ async def get_search_statistics(
         
         return {
             "success": True,
-            "statistics": stats
+            "statistics": stats,
+            "cache": search_cache.get_stats()
         }
         
     except Exception as e:
@@ -352,13 +409,14 @@ async def get_search_statistics(
 
 @router.post("/optimize")
 async def optimize_search_index(
+    merge_pages: Optional[int] = Query(None, ge=1, description="Only merge up to this many pages (incremental)"),
     db: Session = Depends(get_db)
 ):
     """
     Optimize the FTS search index for better performance
     """
     try:
-        success = crud_file.optimize_search_index(db)
+        success = crud_file.optimize_search_index(db, merge_pages=merge_pages)
         
         return {
             "success": success,
@@ -366,4 +424,22 @@ async def optimize_search_index(
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
+
+@router.post("/rebuild")
+async def rebuild_search_index(
+    db: Session = Depends(get_db)
+):
+    """
+    Rebuild the FTS search index from the file metadata table
+    """
+    try:
+        success = crud_file.rebuild_search_index(db)
+        
+        return {
+            "success": success,
+            "message": "Search index rebuilt successfully" if success else "Rebuild failed"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rebuild failed: {str(e)}")
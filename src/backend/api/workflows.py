@@ -31,6 +31,7 @@ from src.backend.crud.crud_workflow import (
 )
 from src.backend.services.workflow_template_engine import workflow_template_engine
 from src.backend.services.workflow_execution_engine import workflow_execution_engine
+from src.backend.services.workflow_scheduler import workflow_scheduler
 from src.backend.models.workflow import WorkflowStatus, WorkflowExecutionStatus
 
 router = APIRouter(prefix="/api/workflows", tags=["workflows"])
@@ -549,6 +550,7 @@ async def create_workflow_trigger(
     trigger_data["workflow_id"] = workflow_id
     
     trigger = crud_workflow_trigger.create(db, obj_in=trigger_data)
+    workflow_scheduler.refresh_trigger(trigger)
     return trigger
 
 
@@ -568,6 +570,7 @@ async def update_workflow_trigger(
         raise HTTPException(status_code=404, detail="Trigger not found")
     
     trigger = crud_workflow_trigger.update(db, db_obj=trigger, obj_in=trigger_in)
+    workflow_scheduler.refresh_trigger(trigger)
     return trigger
 
 
@@ -586,6 +589,7 @@ async def delete_workflow_trigger(
         raise HTTPException(status_code=404, detail="Trigger not found")
     
     crud_workflow_trigger.remove(db, id=trigger_id)
+    workflow_scheduler.forget_trigger(trigger_id)
     return {"message": "Trigger deleted successfully"}
 
 
@@ -357,9 +357,12 @@ async def get_workspaces(
                 db, user_id=current_user.id, skip=skip, limit=limit
             )
             if workspaces:
-                # Cache the result for 5 minutes
-                await cache_service.set(cache_key, workspaces, ttl=300)
-                return workspaces
+                # Cache plain dicts for 5 minutes; ORM objects cannot be encoded
+                workspace_data = [
+                    WorkspaceResponse.model_validate(workspace).model_dump() for workspace in workspaces
+                ]
+                await cache_service.set(cache_key, workspace_data, ttl=300)
+                return workspace_data
         except Exception as db_error:
             logger.warning(f"Database workspace fetch failed: {db_error}")
         
@@ -2,6 +2,10 @@
 Advanced Caching Strategies - Phase 2 Performance Enhancement
 Implements sophisticated caching patterns including stale-while-revalidate,
 adaptive TTL, and intelligent cache warming
+
+Entries live in a process-local L1 (MemoryTier) in front of an optional shared
+L2 (Redis). Tag invalidations and deletes are broadcast on an invalidation bus
+so every worker drops its L1 copies.
 """
 
 import asyncio
@@ -9,11 +13,16 @@ import json
 import time
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Callable, List, Union
+from typing import Dict, Any, Optional, Callable, List, Set, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 from loguru import logger
 
+from config.settings import get_settings
+from src.backend.caching.invalidation_bus import InvalidationBus, create_invalidation_bus
+from src.backend.caching.memory_tier import MemoryTier, TinyLFU
+from src.backend.caching.single_flight import SingleFlight, should_refresh_early
+
 try:
     import redis.asyncio as redis
     REDIS_AVAILABLE = True
@@ -41,6 +50,7 @@ class CacheEntry:
     strategy: CacheStrategy = CacheStrategy.CACHE_FIRST
     tags: List[str] = None
     size: int = 0
+    fetch_duration: float = 0.0  # seconds the fetch took; scales early expiration
     
     def __post_init__(self):
         if self.tags is None:
@@ -56,13 +66,34 @@ class CacheMetrics:
     sets: int = 0
     deletes: int = 0
     evictions: int = 0
+    rejections: int = 0
     revalidations: int = 0
+    early_revalidations: int = 0
+    coalesced: int = 0
+    l1_hits: int = 0
+    l1_misses: int = 0
+    l2_hits: int = 0
+    l2_misses: int = 0
+    remote_invalidations: int = 0
     total_size: int = 0
     
     @property
     def hit_ratio(self) -> float:
         total = self.hits + self.misses
         return self.hits / total if total > 0 else 0.0
+    
+    @staticmethod
+    def _ratio(hits: int, misses: int) -> float:
+        return hits / (hits + misses) if hits + misses > 0 else 0.0
+    
+    @property
+    def l1_hit_ratio(self) -> float:
+        return self._ratio(self.l1_hits, self.l1_misses)
+    
+    @property
+    def l2_hit_ratio(self) -> float:
+        """Share of L1 misses that L2 answered"""
+        return self._ratio(self.l2_hits, self.l2_misses)
 
 class AdvancedCacheManager:
     """
@@ -72,24 +103,55 @@ class AdvancedCacheManager:
     def __init__(self, 
                  redis_url: Optional[str] = None,
                  max_memory_cache_size: int = 100_000_000,  # 100MB
-                 default_ttl: int = 3600):  # 1 hour
+                 default_ttl: int = 3600,  # 1 hour
+                 admission_policy: Optional[str] = None,
+                 expected_entries: int = 100_000,
+                 early_expiration_beta: float = 1.0,
+                 invalidation_bus: Optional[InvalidationBus] = None):
         
         self.redis_client = None
-        self.memory_cache: Dict[str, CacheEntry] = {}
+        # "tinylfu" only admits new keys that are used more often than the entries they evict
+        admission = TinyLFU(expected_entries) if admission_policy == "tinylfu" else None
+        self.memory_cache = MemoryTier(max_memory_cache_size, admission=admission)
         self.max_memory_size = max_memory_cache_size
         self.default_ttl = default_ttl
+        # XFetch weight for refreshing fresh entries before they expire (0 disables)
+        self.early_expiration_beta = early_expiration_beta
         self.metrics = CacheMetrics()
+        # Concurrent misses for a key share one fetch
+        self.single_flight = SingleFlight()
         
         # Cache configuration
         self.cache_configs: Dict[str, Dict[str, Any]] = {}
         self.revalidation_tasks: Dict[str, asyncio.Task] = {}
         
+        # tag -> L1 keys and back, so tag invalidation does not scan L1
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, List[str]] = {}
+        
         # Initialize Redis if available
         if REDIS_AVAILABLE and redis_url:
             self._init_redis(redis_url)
         
-        # Start background tasks
-        asyncio.create_task(self._background_maintenance())
+        self.invalidation_bus = invalidation_bus
+        
+        # Start background tasks once an event loop is running
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._ensure_maintenance()
+    
+    def _ensure_maintenance(self):
+        """Start the maintenance loop and bus listener if there is a running loop and they are not started yet"""
+        if self._maintenance_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Created at import time; started on first use inside the loop
+            return
+        self._maintenance_task = loop.create_task(self._background_maintenance())
+        # L1 is empty until first use, so listening from here on misses nothing
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.start(self._apply_remote_invalidation)
     
     def _init_redis(self, redis_url: str):
         """Initialize Redis connection"""
@@ -106,7 +168,8 @@ class AdvancedCacheManager:
                        ttl: int = None,
                        stale_ttl: int = None,
                        tags: List[str] = None,
-                       revalidation_function: Callable = None):
+                       revalidation_function: Callable = None,
+                       early_expiration_beta: float = None):
         """Configure caching behavior for specific key patterns"""
         
         self.cache_configs[pattern] = {
@@ -114,7 +177,8 @@ class AdvancedCacheManager:
             'ttl': ttl or self.default_ttl,
             'stale_ttl': stale_ttl or (ttl or self.default_ttl) * 2,
             'tags': tags or [],
-            'revalidation_function': revalidation_function
+            'revalidation_function': revalidation_function,
+            'early_expiration_beta': self.early_expiration_beta if early_expiration_beta is None else early_expiration_beta
         }
         
         logger.info(f"Cache configured for pattern '{pattern}' with strategy {strategy.value}")
@@ -127,6 +191,7 @@ class AdvancedCacheManager:
         """
         Get value from cache with advanced strategies
         """
+        self._ensure_maintenance()
         config = self._get_config_for_key(key)
         strategy = strategy or config.get('strategy', CacheStrategy.STALE_WHILE_REVALIDATE)
         
@@ -149,9 +214,11 @@ class AdvancedCacheManager:
                   key: str, 
                   value: Any, 
                   ttl: int = None,
-                  tags: List[str] = None) -> bool:
+                  tags: List[str] = None,
+                  fetch_duration: float = 0.0) -> bool:
         """Set value in cache with metadata"""
         
+        self._ensure_maintenance()
         config = self._get_config_for_key(key)
         ttl = ttl or config.get('ttl', self.default_ttl)
         tags = tags or config.get('tags', [])
@@ -161,7 +228,8 @@ class AdvancedCacheManager:
             data=value,
             created_at=now,
             expires_at=now + ttl,
-            tags=tags
+            tags=tags,
+            fetch_duration=fetch_duration
         )
         
         # Store in memory cache
@@ -171,22 +239,28 @@ class AdvancedCacheManager:
         if self.redis_client:
             await self._set_redis_cache(key, entry, ttl)
         
+        # Other workers may hold an older value in their L1
+        if self.invalidation_bus is not None:
+            await self.invalidation_bus.publish(keys=[key])
+        
         self.metrics.sets += 1
         return True
     
     async def delete(self, key: str) -> bool:
-        """Delete key from all cache layers"""
-        deleted = False
-        
-        # Delete from memory cache
-        if key in self.memory_cache:
-            del self.memory_cache[key]
-            deleted = True
+        """Delete key from all cache layers and every worker's L1"""
+        self._ensure_maintenance()
+        deleted = self._drop_local(key)
         
         # Delete from Redis
         if self.redis_client:
-            result = await self.redis_client.delete(key)
-            deleted = deleted or bool(result)
+            try:
+                result = await self.redis_client.delete(key)
+                deleted = deleted or bool(result)
+            except Exception as e:
+                logger.warning(f"Failed to delete from Redis cache: {e}")
+        
+        if self.invalidation_bus is not None:
+            await self.invalidation_bus.publish(keys=[key])
         
         if deleted:
             self.metrics.deletes += 1
@@ -194,25 +268,73 @@ class AdvancedCacheManager:
         return deleted
     
     async def invalidate_by_tags(self, tags: List[str]) -> int:
-        """Invalidate all cache entries with specified tags"""
-        invalidated = 0
-        
-        # Invalidate memory cache
-        keys_to_delete = []
-        for key, entry in self.memory_cache.items():
-            if any(tag in entry.tags for tag in tags):
-                keys_to_delete.append(key)
+        """Invalidate all cache entries with specified tags, in L1, L2 and every worker's L1"""
+        self._ensure_maintenance()
+        keys = self._drop_local_tags(tags)
+        invalidated = len(keys)
         
-        for key in keys_to_delete:
-            await self.delete(key)
-            invalidated += 1
+        # L2 keeps a Redis set of keys per tag
+        if self.redis_client:
+            try:
+                tag_keys = [self._redis_tag_key(tag) for tag in tags]
+                pipe = self.redis_client.pipeline(transaction=True)
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                pipe.delete(*tag_keys)
+                results = await pipe.execute()
+                shared_keys = set().union(*results[:-1])
+                if shared_keys:
+                    await self.redis_client.unlink(*shared_keys)
+                invalidated = len(keys | shared_keys)
+            except Exception as e:
+                logger.warning(f"Failed to invalidate Redis cache tags: {e}")
         
-        # Invalidate Redis cache (would need tag indexing in production)
-        # This is a simplified implementation
+        if self.invalidation_bus is not None:
+            await self.invalidation_bus.publish(tags=tags)
         
         logger.info(f"Invalidated {invalidated} cache entries for tags: {tags}")
         return invalidated
     
+    async def _apply_remote_invalidation(self, tags: List[str], keys: List[str]):
+        """Drop L1 entries another worker invalidated; it already updated L2"""
+        self._drop_local_tags(tags)
+        for key in keys:
+            self._drop_local(key)
+        self.metrics.remote_invalidations += 1
+    
+    def _redis_tag_key(self, tag: str) -> str:
+        return f"cache:tag:{tag}"
+    
+    def _index_tags(self, key: str, tags: List[str]):
+        self._unindex(key)
+        if tags:
+            self._key_tags[key] = list(tags)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+    
+    def _unindex(self, key: str):
+        for tag in self._key_tags.pop(key, ()):
+            members = self._tag_index.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tag_index[tag]
+    
+    def _drop_local(self, key: str) -> bool:
+        """Remove ``key`` from this worker's L1 only"""
+        self._unindex(key)
+        removed = self.memory_cache.pop(key) is not None
+        self.metrics.total_size = self.memory_cache.size_bytes
+        return removed
+    
+    def _drop_local_tags(self, tags: List[str]) -> Set[str]:
+        keys = set()
+        for tag in tags:
+            keys.update(self._tag_index.get(tag, ()))
+        for key in keys:
+            self._drop_local(key)
+        return keys
+    
     async def _cache_first(self, key: str, fetch_function: Callable, config: Dict) -> Any:
         """Cache-first strategy: check cache first, fetch if miss"""
         
@@ -223,9 +345,7 @@ class AdvancedCacheManager:
         
         # Cache miss - fetch and store
         if fetch_function:
-            value = await self._call_fetch_function(fetch_function)
-            await self.set(key, value, config.get('ttl'))
-            return value
+            return await self._fetch_and_store(key, fetch_function, config)
         
         return None
     
@@ -234,9 +354,7 @@ class AdvancedCacheManager:
         
         if fetch_function:
             try:
-                value = await self._call_fetch_function(fetch_function)
-                await self.set(key, value, config.get('ttl'))
-                return value
+                return await self._fetch_and_store(key, fetch_function, config)
             except Exception as e:
                 logger.warning(f"Network fetch failed for {key}: {e}")
                 # Fallback to cache
@@ -264,6 +382,13 @@ class AdvancedCacheManager:
             # If cache is fresh, return immediately
             if now < cached_entry.expires_at:
                 self.metrics.hits += 1
+                # Occasionally refresh a hot entry before it expires, so its TTL is
+                # extended by one background fetch instead of a burst of misses
+                beta = config.get('early_expiration_beta', self.early_expiration_beta)
+                if (fetch_function and key not in self.revalidation_tasks
+                        and should_refresh_early(cached_entry.expires_at, cached_entry.fetch_duration, now, beta)):
+                    self.metrics.early_revalidations += 1
+                    self._start_revalidation(key, fetch_function, config)
                 return cached_entry.data
             
             # Cache is stale but within stale_ttl - return stale data and revalidate
@@ -273,10 +398,7 @@ class AdvancedCacheManager:
                 self.metrics.hits += 1
                 
                 # Start background revalidation if not already running
-                if key not in self.revalidation_tasks:
-                    self.revalidation_tasks[key] = asyncio.create_task(
-                        self._revalidate_in_background(key, fetch_function, config)
-                    )
+                self._start_revalidation(key, fetch_function, config)
                 
                 return cached_entry.data
         
@@ -284,11 +406,27 @@ class AdvancedCacheManager:
         self.metrics.misses += 1
         
         if fetch_function:
+            return await self._fetch_and_store(key, fetch_function, config)
+        
+        return None
+    
+    async def _fetch_and_store(self, key: str, fetch_function: Callable, config: Dict) -> Any:
+        """Fetch ``key`` and cache the result; concurrent callers for the key share one fetch"""
+        async def fetch():
+            started = time.time()
             value = await self._call_fetch_function(fetch_function)
-            await self.set(key, value, config.get('ttl'))
+            await self.set(key, value, config.get('ttl'), fetch_duration=time.time() - started)
             return value
         
-        return None
+        if key in self.single_flight:
+            self.metrics.coalesced += 1
+        return await self.single_flight.do(key, fetch)
+    
+    def _start_revalidation(self, key: str, fetch_function: Callable, config: Dict):
+        if key not in self.revalidation_tasks:
+            self.revalidation_tasks[key] = asyncio.create_task(
+                self._revalidate_in_background(key, fetch_function, config)
+            )
     
     async def _cache_only(self, key: str) -> Any:
         """Cache-only strategy: only return cached values"""
@@ -324,8 +462,7 @@ class AdvancedCacheManager:
         """Background revalidation task"""
         try:
             logger.debug(f"Background revalidation started for {key}")
-            value = await self._call_fetch_function(fetch_function)
-            await self.set(key, value, config.get('ttl'))
+            await self._fetch_and_store(key, fetch_function, config)
             self.metrics.revalidations += 1
             logger.debug(f"Background revalidation completed for {key}")
         except Exception as e:
@@ -354,8 +491,11 @@ class AdvancedCacheManager:
         """Get cache entry with metadata"""
         
         # Try memory cache first
-        if key in self.memory_cache:
-            return self.memory_cache[key]
+        entry = self.memory_cache.get(key)
+        if entry is not None:
+            self.metrics.l1_hits += 1
+            return entry
+        self.metrics.l1_misses += 1
         
         # Try Redis cache
         if self.redis_client:
@@ -364,11 +504,14 @@ class AdvancedCacheManager:
                 if data:
                     entry_dict = json.loads(data)
                     entry = CacheEntry(**entry_dict)
+                    self.metrics.l2_hits += 1
                     
                     # Store in memory cache for faster access
                     await self._set_memory_cache(key, entry)
                     return entry
+                self.metrics.l2_misses += 1
             except Exception as e:
+                self.metrics.l2_misses += 1
                 logger.warning(f"Failed to get from Redis cache: {e}")
         
         return None
@@ -376,43 +519,45 @@ class AdvancedCacheManager:
     async def _set_memory_cache(self, key: str, entry: CacheEntry):
         """Set value in memory cache with size management"""
         
-        # Check if we need to evict entries
-        while self._get_memory_cache_size() + entry.size > self.max_memory_size:
-            await self._evict_lru_entry()
-        
-        self.memory_cache[key] = entry
-        self.metrics.total_size += entry.size
+        evicted = self.memory_cache.put(key, entry)
+        if evicted is None:
+            self.metrics.rejections += 1
+            self._unindex(key)
+        else:
+            self._index_tags(key, entry.tags)
+            for evicted_key in evicted:
+                self._unindex(evicted_key)
+            self.metrics.evictions += len(evicted)
+            if evicted:
+                logger.debug(f"Evicted {len(evicted)} LRU cache entries for {key}")
+        self.metrics.total_size = self.memory_cache.size_bytes
     
     async def _set_redis_cache(self, key: str, entry: CacheEntry, ttl: int):
         """Set value in Redis cache"""
         try:
             entry_dict = asdict(entry)
-            await self.redis_client.setex(
-                key, 
-                ttl, 
-                json.dumps(entry_dict, default=str)
-            )
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(key, json.dumps(entry_dict, default=str), ex=ttl)
+            for tag in entry.tags:
+                # Tag sets outlive their members; deleting an expired member is a no-op
+                pipe.sadd(self._redis_tag_key(tag), key)
+                pipe.expire(self._redis_tag_key(tag), max(ttl, self.default_ttl) * 2)
+            await pipe.execute()
         except Exception as e:
             logger.warning(f"Failed to set Redis cache: {e}")
     
     def _get_memory_cache_size(self) -> int:
-        """Calculate current memory cache size"""
-        return sum(entry.size for entry in self.memory_cache.values())
+        """Current memory cache size, tracked on every insert and removal"""
+        return self.memory_cache.size_bytes
     
     async def _evict_lru_entry(self):
         """Evict least recently used entry from memory cache"""
-        if not self.memory_cache:
+        lru_key = self.memory_cache.evict_one()
+        if lru_key is None:
             return
+        self._unindex(lru_key)
         
-        # Find LRU entry
-        lru_key = min(
-            self.memory_cache.keys(),
-            key=lambda k: self.memory_cache[k].last_accessed
-        )
-        
-        entry = self.memory_cache[lru_key]
-        del self.memory_cache[lru_key]
-        self.metrics.total_size -= entry.size
+        self.metrics.total_size = self.memory_cache.size_bytes
         self.metrics.evictions += 1
         
         logger.debug(f"Evicted LRU cache entry: {lru_key}")
@@ -477,8 +622,9 @@ class AdvancedCacheManager:
             if now > entry.expires_at:
                 expired_keys.append(key)
         
+        # Expiry is local: L2 expires on its own TTL and peers run their own cleanup
         for key in expired_keys:
-            await self.delete(key)
+            self._drop_local(key)
         
         if expired_keys:
             logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
@@ -487,16 +633,43 @@ class AdvancedCacheManager:
         """Get comprehensive cache statistics"""
         return {
             'metrics': asdict(self.metrics),
+            'tiers': {
+                'l1': {
+                    'hits': self.metrics.l1_hits,
+                    'misses': self.metrics.l1_misses,
+                    'hit_ratio': round(self.metrics.l1_hit_ratio, 4)
+                },
+                'l2': {
+                    'hits': self.metrics.l2_hits,
+                    'misses': self.metrics.l2_misses,
+                    'hit_ratio': round(self.metrics.l2_hit_ratio, 4)
+                }
+            },
+            'invalidation_bus': self.invalidation_bus.get_stats() if self.invalidation_bus else None,
             'memory_cache_size': len(self.memory_cache),
             'memory_usage_bytes': self._get_memory_cache_size(),
             'memory_usage_mb': self._get_memory_cache_size() / 1024 / 1024,
+            'admission_policy': 'tinylfu' if self.memory_cache.admission else None,
             'configurations': len(self.cache_configs),
             'active_revalidations': len(self.revalidation_tasks),
+            'in_flight_fetches': len(self.single_flight),
             'redis_available': self.redis_client is not None
         }
 
+def create_default_cache() -> AdvancedCacheManager:
+    """Cache manager configured from settings: optional Redis L2 plus the invalidation bus"""
+    settings = get_settings()
+    cache = AdvancedCacheManager(redis_url=settings.cache_l2_redis_url or None)
+    cache.invalidation_bus = create_invalidation_bus(
+        settings.cache_invalidation_bus,
+        redis_client=cache.redis_client,
+        sqlite_path=settings.cache_invalidation_db,
+        workers=settings.workers
+    )
+    return cache
+
 # Global advanced cache instance
-advanced_cache = AdvancedCacheManager()
+advanced_cache = create_default_cache()
 
 # Configuration examples
 def setup_default_cache_patterns():
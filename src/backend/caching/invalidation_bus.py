@@ -0,0 +1,229 @@
+"""
+Cross-worker cache invalidation bus
+Each uvicorn worker keeps its own in-memory (L1) cache. When one worker
+invalidates tags or deletes or overwrites keys, it publishes the change on the
+bus and every other worker drops the matching L1 entries. Redis pub/sub is
+used when Redis is configured; otherwise a shared SQLite table polled every
+few milliseconds stands in for it on a single host.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+InvalidationHandler = Callable[[List[str], List[str]], Awaitable[None]]
+
+
+class InvalidationBus(ABC):
+    """
+    Base class: ``publish`` sends an invalidation to the other workers and
+    ``start`` delivers theirs to ``handler(tags, keys)``. Messages a worker
+    published itself are not delivered back to it.
+    """
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self._handler: Optional[InvalidationHandler] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def start(self, handler: InvalidationHandler):
+        """Begin delivering remote invalidations; needs a running event loop"""
+        if self._task is not None:
+            return
+        self._handler = handler
+        self._prepare()
+        self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def publish(self, tags: Iterable[str] = (), keys: Iterable[str] = ()):
+        tags, keys = list(tags), list(keys)
+        if not tags and not keys:
+            return
+        payload = json.dumps({'origin': self.node_id, 'tags': tags, 'keys': keys})
+        try:
+            await self._send(payload)
+            self.published += 1
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _dispatch(self, payload):
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed cache invalidation message")
+            return
+        if message.get('origin') == self.node_id:
+            return
+        self.received += 1
+        await self._handler(message.get('tags') or [], message.get('keys') or [])
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            'type': type(self).__name__,
+            'published': self.published,
+            'received': self.received,
+            'listening': self._task is not None and not self._task.done()
+        }
+
+    def _prepare(self):
+        """Synchronous setup run before the listener task starts"""
+
+    @abstractmethod
+    async def _send(self, payload: str):
+        """Deliver one message to the other workers"""
+
+    @abstractmethod
+    async def _listen(self):
+        """Pass every incoming message to ``_dispatch`` until cancelled"""
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """Invalidations over a Redis pub/sub channel"""
+
+    def __init__(self, client, channel: str = "cache:invalidations"):
+        super().__init__()
+        self.client = client
+        self.channel = channel
+
+    async def _send(self, payload: str):
+        await self.client.publish(self.channel, payload)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        await self._dispatch(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription lost, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+class SQLiteInvalidationBus(InvalidationBus):
+    """
+    Invalidations through a shared SQLite table, for several workers on one
+    host without Redis. Each worker polls for rows newer than the last one it
+    saw; rows older than ``retention_seconds`` are pruned.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retention_seconds: float = 60.0):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._last_id = 0
+        self._last_prune = 0.0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _prepare(self):
+        with self._lock:
+            row = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()
+        self._last_id = row[0]
+
+    def _insert(self, payload: str):
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO cache_invalidations (payload, created_at) VALUES (?, ?)", (payload, time.time())
+            )
+
+    def _fetch_new(self) -> List[tuple]:
+        with self._lock:
+            connection = self._connect()
+            rows = connection.execute(
+                "SELECT id, payload FROM cache_invalidations WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+            now = time.time()
+            if now - self._last_prune > self.retention_seconds:
+                connection.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - self.retention_seconds,))
+                self._last_prune = now
+        return rows
+
+    async def _send(self, payload: str):
+        await asyncio.to_thread(self._insert, payload)
+
+    async def _listen(self):
+        while True:
+            try:
+                for row_id, payload in await asyncio.to_thread(self._fetch_new):
+                    self._last_id = row_id
+                    await self._dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        await super().close()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def create_invalidation_bus(
+    kind: str,
+    redis_client=None,
+    sqlite_path: Optional[str] = None,
+    workers: int = 1
+) -> Optional[InvalidationBus]:
+    """
+    Build the bus named by ``kind``: "redis", "sqlite", "none", or "auto"
+    (Redis when a client is available, SQLite when several workers share a
+    host, otherwise none).
+    """
+    kind = (kind or "auto").lower()
+    if kind == "auto":
+        kind = "redis" if redis_client is not None else "sqlite" if workers > 1 and sqlite_path else "none"
+    if kind == "redis":
+        if redis_client is None:
+            logger.warning("Redis invalidation bus requested without a Redis client; L1 invalidations stay local")
+            return None
+        return RedisInvalidationBus(redis_client)
+    if kind == "sqlite":
+        return SQLiteInvalidationBus(sqlite_path)
+    return None
@@ -0,0 +1,156 @@
+"""
+Size-aware LRU memory tier for AdvancedCacheManager
+Entries live in an OrderedDict in recency order with a running byte total, so
+lookups, inserts and evictions are O(1). An optional TinyLFU admission filter
+keeps one-off keys from pushing frequently used entries out of a full cache.
+"""
+
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Odd 64-bit multipliers, one per sketch row
+_ROW_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_MASK64 = (1 << 64) - 1
+
+
+class TinyLFU:
+    """
+    Approximate access frequencies in a 4-row count-min sketch of 4-bit counters.
+
+    All counters are halved every ``sample_size`` recorded accesses, so the
+    estimate follows recent popularity rather than all-time totals.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int = 10000, sample_multiplier: int = 10):
+        width = 1
+        while width < max(capacity, 16):
+            width <<= 1
+        self.width = width
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in _ROW_SEEDS]
+        self.sample_size = capacity * sample_multiplier
+        self._additions = 0
+        self.resets = 0
+
+    def _indexes(self, key: Any) -> List[int]:
+        h = hash(key) & _MASK64
+        mask = self._mask
+        return [((h * seed) & _MASK64) >> 32 & mask for seed in _ROW_SEEDS]
+
+    def record(self, key: Any):
+        """Count one access of ``key``"""
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key: Any) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def admit(self, candidate: Any, victims: List[Any]) -> bool:
+        """Admit ``candidate`` only if it is used more often than every entry it would evict"""
+        frequency = self.estimate(candidate)
+        return all(frequency > self.estimate(victim) for victim in victims)
+
+    def _age(self):
+        self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+        self._additions //= 2
+        self.resets += 1
+
+
+class MemoryTier:
+    """
+    Byte-bounded LRU of cache entries. ``entry.size`` is read once on insert
+    and tracked in ``size_bytes``; the least recently used entries are evicted
+    from the front of the OrderedDict until a new entry fits.
+    """
+
+    def __init__(self, max_bytes: int, admission: Optional[TinyLFU] = None):
+        self.max_bytes = max_bytes
+        self.admission = admission
+        self.size_bytes = 0
+        self.rejections = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: str):
+        return self._entries[key]
+
+    def __delitem__(self, key: str):
+        self.size_bytes -= self._entries.pop(key).size
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return iter(list(self._entries.items()))
+
+    def get(self, key: str):
+        """Return the entry and mark it most recently used; None on a miss"""
+        if self.admission is not None:
+            self.admission.record(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size
+        return entry
+
+    def put(self, key: str, entry) -> Optional[List[str]]:
+        """
+        Insert or replace an entry. Returns the evicted keys, or None when the
+        entry was not admitted (larger than the tier, or colder than its victims).
+        """
+        if self.admission is not None:
+            self.admission.record(key)
+        if entry.size > self.max_bytes:
+            # Never leave an outdated value behind for a rejected replacement
+            self.pop(key)
+            self.rejections += 1
+            return None
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= previous.size
+
+        victims = []
+        needed = self.size_bytes + entry.size - self.max_bytes
+        if needed > 0:
+            freed = 0
+            for victim_key, victim in self._entries.items():
+                if freed >= needed:
+                    break
+                victims.append(victim_key)
+                freed += victim.size
+            # Updates of resident keys are always admitted
+            if previous is None and self.admission is not None and not self.admission.admit(key, victims):
+                self.rejections += 1
+                return None
+            for victim_key in victims:
+                self.size_bytes -= self._entries.pop(victim_key).size
+
+        self._entries[key] = entry
+        self.size_bytes += entry.size
+        return victims
+
+    def evict_one(self) -> Optional[str]:
+        """Drop the least recently used entry"""
+        if not self._entries:
+            return None
+        key, entry = self._entries.popitem(last=False)
+        self.size_bytes -= entry.size
+        return key
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
@@ -0,0 +1,72 @@
+"""
+Request coalescing for cache misses
+Concurrent misses for the same key await one shared fetch instead of each
+running it, so an expiring hot key costs one recomputation rather than one per
+waiting request. Also provides the XFetch test for probabilistic early
+expiration.
+"""
+
+import asyncio
+import math
+import random
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    The call runs as its own task, so a caller that is cancelled while
+    waiting does not cancel the fetch for everyone else.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``fn()``, sharing it with concurrent callers for ``key``"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved; the waiters (if any) re-raise it
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight)
+        }
+
+
+def should_refresh_early(expires_at: float, fetch_seconds: float, now: float, beta: float = 1.0) -> bool:
+    """
+    XFetch probabilistic early expiration.
+
+    Returns True with a probability that rises as ``expires_at`` approaches,
+    scaled by how long the value takes to recompute, so one request refreshes
+    a hot key shortly before it expires instead of many at once after.
+    """
+    if beta <= 0 or fetch_seconds <= 0:
+        return now >= expires_at
+    # 1 - random() lies in (0, 1], keeping log() finite
+    return now - fetch_seconds * beta * math.log(1.0 - random.random()) >= expires_at
@@ -8,15 +8,19 @@ hooks, and inter-plugin messaging with proper isolation and security.
 import asyncio
 import logging
 import json
-from typing import Dict, List, Optional, Any, Callable, Set, Union
+from typing import Dict, List, Optional, Any, Callable, Sequence, Set, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import weakref
 import uuid
+import tempfile
 from collections import defaultdict, deque
+from pathlib import Path
 
 from .base import PluginBase, PluginException
+from .plugin_queue import OverflowPolicy, PluginEventQueue
+from .topic_trie import TopicTrie
 
 
 logger = logging.getLogger(__name__)
@@ -83,22 +87,77 @@ class EventSubscription:
     events_received: int = 0
 
 
+def _encode_event(event: Event) -> str:
+    """Serialize an event for a spill file; non-JSON data values become strings"""
+    return json.dumps({
+        "id": event.id,
+        "type": event.type,
+        "scope": event.scope.value,
+        "source_plugin": event.source_plugin,
+        "target_plugin": event.target_plugin,
+        "data": event.data,
+        "context": event.context,
+        "priority": event.priority.value,
+        "timestamp": event.timestamp.isoformat(),
+        "ttl": event.ttl.total_seconds() if event.ttl else None,
+        "retry_count": event.retry_count,
+        "max_retries": event.max_retries
+    }, default=str)
+
+
+def _decode_event(payload: str) -> Event:
+    fields = json.loads(payload)
+    ttl = fields.pop("ttl")
+    fields["scope"] = EventScope(fields["scope"])
+    fields["priority"] = EventPriority(fields["priority"])
+    fields["timestamp"] = datetime.fromisoformat(fields["timestamp"])
+    return Event(**fields, ttl=timedelta(seconds=ttl) if ttl is not None else None)
+
+
 class PluginEventSystem:
-    """Central event management system for plugins"""
+    """
+    Central event management system for plugins
     
-    def __init__(self, max_queue_size: int = 10000, max_history: int = 1000):
+    Subscription patterns live in a TopicTrie, and the handlers and matching
+    patterns for each event type are resolved once and cached until a
+    handler or subscription is added or removed, so dispatch does not scan
+    every registration per event.
+    
+    Events from ``emit`` are fanned out to one bounded queue per plugin, each
+    drained by its own worker: plugins run concurrently, a plugin's events
+    arrive in order, and a slow plugin only backs up its own queue (see
+    OverflowPolicy). ``emit_sync`` still calls every handler in turn.
+    """
+    
+    # Event types whose resolved handlers/patterns are kept between registration changes
+    DISPATCH_CACHE_SIZE = 4096
+    
+    def __init__(self, max_queue_size: int = 10000, max_history: int = 1000,
+                 plugin_queue_size: int = 1000,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 spill_dir: Optional[str] = None):
         self.max_queue_size = max_queue_size
         self.max_history = max_history
+        self.plugin_queue_size = plugin_queue_size
+        self.overflow_policy = overflow_policy
+        self.spill_dir = Path(spill_dir) if spill_dir else Path(tempfile.gettempdir()) / "bluebirdhub_event_spill"
         
         # Event handlers and subscriptions
         self.handlers: Dict[str, List[EventHandler]] = defaultdict(list)
         self.global_handlers: List[EventHandler] = []
         self.subscriptions: Dict[str, List[EventSubscription]] = defaultdict(list)
+        self._subscription_trie = TopicTrie()
+        # event type -> (handlers sorted by priority, matching subscription patterns)
+        self._dispatch_cache: Dict[str, Tuple[Tuple[EventHandler, ...], Tuple[str, ...]]] = {}
         
         # Event processing
         self.event_queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
         self.event_history: deque = deque(maxlen=max_history)
         self.failed_events: deque = deque(maxlen=100)
+        self.plugin_queues: Dict[str, PluginEventQueue] = {}
+        self._plugin_workers: Dict[str, asyncio.Task] = {}
+        # plugin id -> (queue size, overflow policy) overriding the defaults
+        self._queue_overrides: Dict[str, Tuple[int, OverflowPolicy]] = {}
         
         # Plugin registry
         self.plugins: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
@@ -124,6 +183,8 @@ class PluginEventSystem:
         if not self._processing:
             self._processing = True
             self._processor_task = asyncio.create_task(self._process_events())
+            for plugin_id in self.plugin_queues:
+                self._start_worker(plugin_id)
             logger.info("Plugin Event System started")
     
     async def stop(self):
@@ -139,6 +200,12 @@ class PluginEventSystem:
                 except asyncio.CancelledError:
                     pass
             
+            workers = list(self._plugin_workers.values())
+            self._plugin_workers.clear()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            
             logger.info("Plugin Event System stopped")
     
     async def register_plugin(self, plugin_id: str, plugin_instance: PluginBase):
@@ -170,7 +237,17 @@ class PluginEventSystem:
                 if s.subscriber_id != plugin_id
             ]
             if not self.subscriptions[event_pattern]:
-                del self.subscriptions[event_pattern]
+                self._drop_pattern(event_pattern)
+        self._dispatch_cache.clear()
+        
+        # Stop delivering to it
+        worker = self._plugin_workers.pop(plugin_id, None)
+        if worker:
+            worker.cancel()
+        queue = self.plugin_queues.pop(plugin_id, None)
+        if queue:
+            queue.discard_spill()
+        self._queue_overrides.pop(plugin_id, None)
         
         # Remove from plugin registry
         if plugin_id in self.plugins:
@@ -218,6 +295,7 @@ class PluginEventSystem:
             self.global_handlers.sort(key=lambda h: h.priority.value)
         else:
             self.handlers[event_type].sort(key=lambda h: h.priority.value)
+        self._dispatch_cache.clear()
         
         logger.debug(f"Added handler {handler_id} for event {event_type} from plugin {plugin_id}")
         return handler_id
@@ -228,6 +306,7 @@ class PluginEventSystem:
         for i, handler in enumerate(self.global_handlers):
             if handler.id == handler_id:
                 del self.global_handlers[i]
+                self._dispatch_cache.clear()
                 logger.debug(f"Removed global handler {handler_id}")
                 return True
         
@@ -236,6 +315,9 @@ class PluginEventSystem:
             for i, handler in enumerate(handlers):
                 if handler.id == handler_id:
                     del handlers[i]
+                    if not handlers:
+                        del self.handlers[event_type]
+                    self._dispatch_cache.clear()
                     logger.debug(f"Removed handler {handler_id} for event {event_type}")
                     return True
         
@@ -252,6 +334,9 @@ class PluginEventSystem:
             max_events=max_events
         )
         
+        if event_pattern not in self.subscriptions:
+            self._subscription_trie.add(event_pattern)
+            self._dispatch_cache.clear()
         self.subscriptions[event_pattern].append(subscription)
         
         subscription_id = f"{subscriber_id}:{event_pattern}:{id(subscription)}"
@@ -274,12 +359,79 @@ class PluginEventSystem:
             ]
             
             removed = original_count - len(self.subscriptions[event_pattern])
+            if not self.subscriptions[event_pattern]:
+                self._drop_pattern(event_pattern)
             if removed > 0:
                 logger.debug(f"Removed {removed} subscriptions for {subscription_id}")
                 return True
         
         return False
     
+    def _drop_pattern(self, event_pattern: str):
+        """Forget a pattern that has no subscriptions left"""
+        self.subscriptions.pop(event_pattern, None)
+        self._subscription_trie.remove(event_pattern)
+        self._dispatch_cache.clear()
+    
+    def _dispatch_for(self, event_type: str) -> Tuple[Tuple[EventHandler, ...], Tuple[str, ...]]:
+        """Handlers and subscription patterns for an event type, resolved once per registration change"""
+        entry = self._dispatch_cache.get(event_type)
+        if entry is None:
+            # Global handlers first, then specific ones; the sort is stable
+            handlers = sorted(
+                self.global_handlers + self.handlers.get(event_type, []),
+                key=lambda h: h.priority.value
+            )
+            matched = self._subscription_trie.match(event_type)
+            # Notify in subscription order, as the full scan did
+            patterns = tuple(pattern for pattern in self.subscriptions if pattern in matched)
+            if len(self._dispatch_cache) >= self.DISPATCH_CACHE_SIZE:
+                self._dispatch_cache.clear()
+            entry = self._dispatch_cache[event_type] = (tuple(handlers), patterns)
+        return entry
+    
+    def set_plugin_queue(self, plugin_id: str, maxsize: Optional[int] = None,
+                         policy: Optional[OverflowPolicy] = None):
+        """Override queue size and overflow policy for one plugin; applies when its queue is next created"""
+        self._queue_overrides[plugin_id] = (
+            maxsize or self.plugin_queue_size,
+            policy or self.overflow_policy
+        )
+    
+    def _plugin_queue(self, plugin_id: str) -> PluginEventQueue:
+        queue = self.plugin_queues.get(plugin_id)
+        if queue is None:
+            maxsize, policy = self._queue_overrides.get(
+                plugin_id, (self.plugin_queue_size, self.overflow_policy)
+            )
+            spill_path = None
+            if policy is OverflowPolicy.SPILL_TO_DISK:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                spill_path = self.spill_dir / f"{plugin_id}.jsonl"
+            queue = self.plugin_queues[plugin_id] = PluginEventQueue(
+                plugin_id, maxsize, policy, spill_path, _encode_event, _decode_event
+            )
+            if self._processing:
+                self._start_worker(plugin_id)
+        return queue
+    
+    def _start_worker(self, plugin_id: str):
+        if plugin_id not in self._plugin_workers:
+            self._plugin_workers[plugin_id] = asyncio.create_task(self._plugin_worker(plugin_id))
+    
+    async def _plugin_worker(self, plugin_id: str):
+        """Deliver one plugin's events in order"""
+        queue = self.plugin_queues[plugin_id]
+        while True:
+            event = await queue.get()
+            try:
+                await self._deliver(plugin_id, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Delivering event {event.id} to plugin {plugin_id} failed: {e}")
+                self.stats["events_failed"] += 1
+    
     async def emit(self, event_type: str, data: Dict[str, Any] = None,
                   source_plugin: str = None, target_plugin: str = None,
                   scope: EventScope = EventScope.GLOBAL,
@@ -361,31 +513,9 @@ class PluginEventSystem:
             # Add to history
             self.event_history.append(event)
             
-            # Get applicable handlers
-            handlers = self._get_handlers_for_event(event)
-            
-            # Process handlers
-            results = []
-            for handler in handlers:
-                try:
-                    if await self._should_call_handler(handler, event):
-                        result = await self._call_handler(handler, event)
-                        results.append(result)
-                        
-                        # Remove one-time handlers
-                        if handler.once:
-                            self.remove_handler(handler.id)
-                        
-                        # Stop propagation if requested
-                        if event.propagation_stopped:
-                            break
-                            
-                except Exception as e:
-                    logger.error(f"Handler {handler.id} failed for event {event.id}: {e}")
-                    self.stats["events_failed"] += 1
-            
-            # Notify subscriptions
-            await self._notify_subscriptions(event)
+            # Fan out to every plugin with a handler or subscription for it
+            for plugin_id in self._plugins_for_event(event):
+                await self._plugin_queue(plugin_id).put(event)
             
             self.stats["events_processed"] += 1
             
@@ -398,6 +528,45 @@ class PluginEventSystem:
             })
             self.stats["events_failed"] += 1
     
+    def _plugins_for_event(self, event: Event) -> List[str]:
+        """Plugins to deliver an event to, highest handler priority first"""
+        handlers, patterns = self._dispatch_for(event.type)
+        plugin_ids = dict.fromkeys(h.plugin_id for h in handlers)
+        if event.target_plugin:
+            plugin_ids = dict.fromkeys(p for p in plugin_ids if p == event.target_plugin)
+        for pattern in patterns:
+            for subscription in self.subscriptions.get(pattern, ()):
+                plugin_ids.setdefault(subscription.subscriber_id)
+        return list(plugin_ids)
+    
+    async def _deliver(self, plugin_id: str, event: Event):
+        """Run one plugin's handlers and subscriptions for an event"""
+        if event.ttl and datetime.utcnow() - event.timestamp > event.ttl:
+            logger.debug(f"Event {event.id} expired before reaching plugin {plugin_id}")
+            return
+        
+        handlers, patterns = self._dispatch_for(event.type)
+        if not event.target_plugin or event.target_plugin == plugin_id:
+            for handler in handlers:
+                # Another plugin may have stopped propagation in the meantime
+                if handler.plugin_id != plugin_id or event.propagation_stopped:
+                    continue
+                try:
+                    if await self._should_call_handler(handler, event):
+                        if handler.once:
+                            self.remove_handler(handler.id)
+                        await self._call_handler(handler, event)
+                except Exception as e:
+                    logger.error(f"Handler {handler.id} failed for event {event.id}: {e}")
+                    self.stats["events_failed"] += 1
+        
+        for pattern in patterns:
+            subscriptions = self.subscriptions.get(pattern)
+            if subscriptions:
+                for subscription in subscriptions[:]:
+                    if subscription.subscriber_id == plugin_id:
+                        await self._deliver_to_subscription(event, pattern, subscription, subscriptions)
+    
     async def _process_event_sync(self, event: Event) -> List[Any]:
         """Process event synchronously and return results"""
         handlers = self._get_handlers_for_event(event)
@@ -419,22 +588,15 @@ class PluginEventSystem:
         await self._notify_subscriptions(event)
         return results
     
-    def _get_handlers_for_event(self, event: Event) -> List[EventHandler]:
-        """Get all handlers that should process this event"""
-        handlers = []
-        
-        # Add global handlers
-        handlers.extend(self.global_handlers)
-        
-        # Add event-specific handlers
-        if event.type in self.handlers:
-            handlers.extend(self.handlers[event.type])
+    def _get_handlers_for_event(self, event: Event) -> Sequence[EventHandler]:
+        """Get all handlers that should process this event, in priority order"""
+        handlers = self._dispatch_for(event.type)[0]
         
         # Filter by target plugin if specified
         if event.target_plugin:
-            handlers = [h for h in handlers if h.plugin_id == event.target_plugin]
+            return [h for h in handlers if h.plugin_id == event.target_plugin]
         
-        return sorted(handlers, key=lambda h: h.priority.value)
+        return handlers
     
     async def _should_call_handler(self, handler: EventHandler, event: Event) -> bool:
         """Check if handler should be called for this event"""
@@ -476,42 +638,41 @@ class PluginEventSystem:
     
     async def _notify_subscriptions(self, event: Event):
         """Notify event subscriptions"""
-        for pattern, subscriptions in self.subscriptions.items():
-            if self._event_matches_pattern(event.type, pattern):
+        for pattern in self._dispatch_for(event.type)[1]:
+            subscriptions = self.subscriptions.get(pattern)
+            if subscriptions:
                 for subscription in subscriptions[:]:  # Copy to avoid modification during iteration
-                    try:
-                        # Check filters
-                        if self._event_matches_filters(event, subscription.filters):
-                            # Call callback
-                            if asyncio.iscoroutinefunction(subscription.callback):
-                                await subscription.callback(event)
-                            else:
-                                subscription.callback(event)
-                            
-                            subscription.events_received += 1
-                            self.stats["subscriptions_notified"] += 1
-                            
-                            # Check max events limit
-                            if (subscription.max_events and 
-                                subscription.events_received >= subscription.max_events):
-                                subscriptions.remove(subscription)
-                                
-                    except Exception as e:
-                        logger.error(f"Subscription callback failed: {e}")
-    
-    def _event_matches_pattern(self, event_type: str, pattern: str) -> bool:
-        """Check if event type matches subscription pattern"""
-        if pattern == "*":
-            return True
-        if pattern == event_type:
-            return True
-        
-        # Support wildcard patterns
-        if "*" in pattern:
-            import fnmatch
-            return fnmatch.fnmatch(event_type, pattern)
-        
-        return False
+                    await self._deliver_to_subscription(event, pattern, subscription, subscriptions)
+    
+    async def _deliver_to_subscription(self, event: Event, pattern: str, subscription: EventSubscription,
+                                       subscriptions: List[EventSubscription]):
+        """Call one subscription's callback if its filters match"""
+        try:
+            # Skip subscriptions used up while this event was queued
+            if subscription.max_events and subscription.events_received >= subscription.max_events:
+                return
+            
+            # Check filters
+            if self._event_matches_filters(event, subscription.filters):
+                # Call callback
+                if asyncio.iscoroutinefunction(subscription.callback):
+                    await subscription.callback(event)
+                else:
+                    subscription.callback(event)
+                
+                subscription.events_received += 1
+                self.stats["subscriptions_notified"] += 1
+                
+                # Check max events limit
+                if (subscription.max_events and 
+                    subscription.events_received >= subscription.max_events and
+                    subscription in subscriptions):
+                    subscriptions.remove(subscription)
+                    if not subscriptions:
+                        self._drop_pattern(pattern)
+                    
+        except Exception as e:
+            logger.error(f"Subscription callback failed: {e}")
     
     def _event_matches_filters(self, event: Event, filters: Dict[str, Any]) -> bool:
         """Check if event matches subscription filters"""
@@ -549,9 +710,14 @@ class PluginEventSystem:
             "queue_size": self.event_queue.qsize(),
             "handlers_count": sum(len(handlers) for handlers in self.handlers.values()) + len(self.global_handlers),
             "subscriptions_count": sum(len(subs) for subs in self.subscriptions.values()),
+            "subscription_patterns": len(self._subscription_trie),
+            "dispatch_cache_size": len(self._dispatch_cache),
             "registered_plugins": len(self.plugins),
             "registered_event_types": len(self.event_types),
-            "failed_events_count": len(self.failed_events)
+            "failed_events_count": len(self.failed_events),
+            "plugin_queues": {
+                plugin_id: queue.get_stats() for plugin_id, queue in self.plugin_queues.items()
+            }
         }
     
     def get_plugin_handlers(self, plugin_id: str) -> List[Dict[str, Any]]:
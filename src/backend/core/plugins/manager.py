@@ -40,7 +40,7 @@ class PluginManager:
         # Core components
         self.registry = PluginRegistry(data_dir=str(self.data_dir))
         self.security = PluginSecurity(str(self.data_dir))
-        self.event_system = PluginEventSystem()
+        self.event_system = PluginEventSystem(spill_dir=str(self.data_dir / "event_spill"))
         self.permission_manager = PluginPermissionManager()
         
         # Runtime state
@@ -0,0 +1,161 @@
+"""
+Per-Plugin Event Queues
+
+Each plugin receives events through its own bounded queue drained by its own
+worker, so a slow plugin only delays itself. What happens when a plugin falls
+so far behind that its queue is full is set by an OverflowPolicy.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """What a full plugin queue does with a new event"""
+    DROP_OLDEST = "drop_oldest"      # discard the oldest queued event
+    BLOCK = "block"                  # make the dispatcher wait for room
+    SPILL_TO_DISK = "spill_to_disk"  # append to a spill file, read back in order
+
+
+class PluginEventQueue:
+    """
+    Bounded FIFO of events for one plugin, with a single consumer.
+
+    With SPILL_TO_DISK, once anything has been spilled every new event goes to
+    the spill file too until it has been read back, so delivery stays in
+    order. A spill file left by a previous process is picked up again.
+    """
+
+    def __init__(self, plugin_id: str, maxsize: int = 1000,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 spill_path: Optional[Path] = None,
+                 encode: Optional[Callable[[Any], str]] = None,
+                 decode: Optional[Callable[[str], Any]] = None):
+        if policy is OverflowPolicy.SPILL_TO_DISK and (spill_path is None or encode is None or decode is None):
+            raise ValueError("SPILL_TO_DISK needs a spill path and an encoder/decoder")
+        self.plugin_id = plugin_id
+        self.maxsize = maxsize
+        self.policy = policy
+        self.spill_path = spill_path
+        self._encode = encode
+        self._decode = decode
+
+        self._items: Deque[Tuple[float, Any]] = deque()
+        self._available = asyncio.Event()
+        self._space = asyncio.Event()
+        self._spilled = 0
+        self._spill_offset = 0
+
+        # Statistics
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.spilled_total = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+        if spill_path is not None and spill_path.exists():
+            with open(spill_path, encoding="utf-8") as spill_file:
+                self._spilled = sum(1 for _ in spill_file)
+            if self._spilled:
+                logger.info(f"Recovered {self._spilled} spilled events for plugin {plugin_id}")
+                self._available.set()
+
+    def __len__(self) -> int:
+        return len(self._items) + self._spilled
+
+    async def put(self, item: Any):
+        now = time.time()
+        self.enqueued += 1
+        if self._spilled:
+            self._spill(now, item)
+            return
+        if len(self._items) >= self.maxsize:
+            if self.policy is OverflowPolicy.SPILL_TO_DISK:
+                self._spill(now, item)
+                return
+            if self.policy is OverflowPolicy.DROP_OLDEST:
+                self._items.popleft()
+                self.dropped += 1
+            else:
+                self.blocked += 1
+                while len(self._items) >= self.maxsize:
+                    self._space.clear()
+                    await self._space.wait()
+        self._items.append((now, item))
+        self._available.set()
+
+    async def get(self) -> Any:
+        while not self._items:
+            if self._spilled:
+                self._refill()
+                continue
+            self._available.clear()
+            await self._available.wait()
+        enqueued_at, item = self._items.popleft()
+        self._space.set()
+
+        self.delivered += 1
+        self.last_lag = time.time() - enqueued_at
+        self.max_lag = max(self.max_lag, self.last_lag)
+        return item
+
+    def _spill(self, enqueued_at: float, item: Any):
+        with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+            spill_file.write(json.dumps([enqueued_at, self._encode(item)]) + "\n")
+        self._spilled += 1
+        self.spilled_total += 1
+        self._available.set()
+
+    def _refill(self):
+        """Move the oldest spilled events back into memory"""
+        with open(self.spill_path, encoding="utf-8") as spill_file:
+            spill_file.seek(self._spill_offset)
+            while self._spilled and len(self._items) < self.maxsize:
+                line = spill_file.readline()
+                if not line:
+                    self._spilled = 0
+                    break
+                self._spilled -= 1
+                try:
+                    enqueued_at, payload = json.loads(line)
+                    self._items.append((enqueued_at, self._decode(payload)))
+                except Exception as e:
+                    self.dropped += 1
+                    logger.error(f"Dropping unreadable spilled event for plugin {self.plugin_id}: {e}")
+            self._spill_offset = spill_file.tell()
+        if not self._spilled:
+            self.discard_spill()
+
+    def discard_spill(self):
+        """Delete the spill file and forget what it held"""
+        self._spilled = 0
+        self._spill_offset = 0
+        if self.spill_path is not None:
+            self.spill_path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        oldest = self._items[0][0] if self._items else None
+        return {
+            "policy": self.policy.value,
+            "capacity": self.maxsize,
+            "depth": len(self),
+            "spilled": self._spilled,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            "last_lag_seconds": round(self.last_lag, 3),
+            "max_lag_seconds": round(self.max_lag, 3),
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "spilled_total": self.spilled_total
+        }
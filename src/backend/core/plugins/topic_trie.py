@@ -0,0 +1,122 @@
+"""
+Topic Trie
+
+Matches dot-separated event types ("file.created.pdf") against subscription
+patterns without testing every pattern. Patterns are split into segments and
+stored in a trie; a lookup walks only the branches that can match.
+
+Wildcards:
+    *   exactly one segment          ("file.*" matches "file.created")
+    #   zero or more segments        ("file.#" matches "file" and "file.a.b")
+    a lone "*" pattern matches every event type, as it always has; segments
+    with other glob characters ("file_*", "v?") are matched per segment with
+    fnmatch rules.
+"""
+
+import re
+from fnmatch import translate
+from typing import Dict, List, Optional, Set
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+class _TopicNode:
+    __slots__ = ("children", "globs", "patterns")
+
+    def __init__(self):
+        self.children: Dict[str, "_TopicNode"] = {}
+        # Segments with glob characters other than a bare "*" / "#"
+        self.globs: Dict[str, "re.Pattern"] = {}
+        self.patterns: Set[str] = set()
+
+    def is_empty(self) -> bool:
+        return not self.children and not self.patterns
+
+
+class TopicTrie:
+    """Set of topic patterns that can be matched against an event type"""
+
+    def __init__(self):
+        self._root = _TopicNode()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, pattern: str) -> bool:
+        node = self._find(pattern)
+        return node is not None and pattern in node.patterns
+
+    @staticmethod
+    def _segments(pattern: str) -> List[str]:
+        return ["#"] if pattern == "*" else pattern.split(".")
+
+    def _find(self, pattern: str) -> Optional[_TopicNode]:
+        node = self._root
+        for segment in self._segments(pattern):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def add(self, pattern: str):
+        node = self._root
+        for segment in self._segments(pattern):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _TopicNode()
+                if segment not in ("*", "#") and _GLOB_CHARS.intersection(segment):
+                    node.globs[segment] = re.compile(translate(segment))
+            node = child
+        if pattern not in node.patterns:
+            node.patterns.add(pattern)
+            self._count += 1
+
+    def remove(self, pattern: str) -> bool:
+        path = [self._root]
+        segments = self._segments(pattern)
+        for segment in segments:
+            child = path[-1].children.get(segment)
+            if child is None:
+                return False
+            path.append(child)
+        if pattern not in path[-1].patterns:
+            return False
+        path[-1].patterns.discard(pattern)
+        self._count -= 1
+
+        # Prune branches left without patterns
+        for parent, segment, child in zip(reversed(path[:-1]), reversed(segments), reversed(path[1:])):
+            if not child.is_empty():
+                break
+            del parent.children[segment]
+            parent.globs.pop(segment, None)
+        return True
+
+    def match(self, topic: str) -> Set[str]:
+        """Patterns matching ``topic``"""
+        matched: Set[str] = set()
+        self._collect(self._root, topic.split("."), 0, matched)
+        return matched
+
+    def _collect(self, node: _TopicNode, segments: List[str], index: int, matched: Set[str]):
+        multi = node.children.get("#")
+        if multi is not None:
+            # "#" swallows zero or more of the remaining segments
+            for rest in range(index, len(segments) + 1):
+                self._collect(multi, segments, rest, matched)
+
+        if index == len(segments):
+            matched.update(node.patterns)
+            return
+
+        segment = segments[index]
+        exact = node.children.get(segment)
+        if exact is not None:
+            self._collect(exact, segments, index + 1, matched)
+        single = node.children.get("*")
+        if single is not None:
+            self._collect(single, segments, index + 1, matched)
+        for glob, regex in node.globs.items():
+            if glob != segment and regex.match(segment):
+                self._collect(node.children[glob], segments, index + 1, matched)
@@ -1,30 +1,80 @@
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timedelta, timezone
 import hashlib
 import os
 
 from src.backend.crud.base import CRUDBase
+from src.backend.crud.pagination import Page, decode_cursor, encode_cursor, keyset_page
 from src.backend.models.file_metadata import FileMetadata, Tag, file_tags
 from src.backend.schemas.file_metadata import FileMetadataCreate, FileMetadataUpdate, TagCreate, TagUpdate
 from src.backend.database.fts_search import FTSSearchEngine, SearchMode, SearchResult
 
+# Columns owned by the file scanner; user-edited fields are never overwritten by upserts
+SCANNER_UPSERT_COLUMNS = (
+    'file_name', 'file_extension', 'file_size', 'mime_type', 'checksum',
+    'ai_category', 'ai_description', 'ai_tags', 'importance_score',
+    'file_created_at', 'file_modified_at', 'last_accessed_at'
+)
+
+# Keep bound parameters per statement below SQLite's default limit of 999
+MAX_BOUND_PARAMETERS = 900
+
 class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUpdate]):
     """CRUD operations for File Metadata"""
     
     def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[FileMetadata]:
-        """Get files for a specific user"""
-        return (
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page:
+        """Get files for a specific user, newest first; pass ``cursor`` to continue a listing"""
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(FileMetadata.is_archived == False)
-            .order_by(FileMetadata.indexed_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return self._newest_first(query, "files", limit=limit, cursor=cursor, skip=skip)
+    
+    def iter_by_user(
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        directory: Optional[str] = None,
+        include_archived: bool = False,
+        batch_size: int = 500
+    ) -> Iterator[FileMetadata]:
+        """
+        Stream all of a user's files in id order, one keyset batch at a time.
+        ``directory`` keeps only paths starting with that prefix.
+        """
+        query = db.query(self.model).filter(FileMetadata.user_id == user_id)
+        if not include_archived:
+            query = query.filter(FileMetadata.is_archived == False)
+        if directory:
+            # Range scan on the (user_id, file_path) index instead of LIKE
+            upper = directory[:-1] + chr(ord(directory[-1]) + 1)
+            query = query.filter(FileMetadata.file_path >= directory, FileMetadata.file_path < upper)
+        
+        last_id = 0
+        while True:
+            batch = (
+                query.filter(FileMetadata.id > last_id)
+                .order_by(FileMetadata.id)
+                .limit(batch_size)
+                .all()
+            )
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1].id
+    
+    def _newest_first(self, query, listing: str, *, limit: int, cursor: Optional[str], skip: int = 0) -> Page:
+        return keyset_page(
+            query, listing=listing, sort_key=FileMetadata.indexed_at, id_column=FileMetadata.id,
+            limit=limit, cursor=cursor, skip=skip
         )
     
     def get_by_path(self, db: Session, *, file_path: str, user_id: int) -> Optional[FileMetadata]:
@@ -37,10 +87,11 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         )
     
     def get_by_category(
-        self, db: Session, *, user_id: int, category: str, skip: int = 0, limit: int = 100
-    ) -> List[FileMetadata]:
+        self, db: Session, *, user_id: int, category: str, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get files by category"""
-        return (
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(
@@ -50,40 +101,33 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
                 )
             )
             .filter(FileMetadata.is_archived == False)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._newest_first(query, f"category:{category}", limit=limit, cursor=cursor, skip=skip)
     
     def get_favorites(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[FileMetadata]:
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page:
         """Get favorite files"""
-        return (
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(FileMetadata.is_favorite == True)
             .filter(FileMetadata.is_archived == False)
-            .order_by(FileMetadata.indexed_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._newest_first(query, "favorites", limit=limit, cursor=cursor, skip=skip)
     
     def get_recent(
-        self, db: Session, *, user_id: int, days: int = 7, limit: int = 50
-    ) -> List[FileMetadata]:
+        self, db: Session, *, user_id: int, days: int = 7, limit: int = 50, cursor: Optional[str] = None
+    ) -> Page:
         """Get recently indexed files"""
         since_date = datetime.now(timezone.utc) - timedelta(days=days)
-        return (
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(FileMetadata.indexed_at >= since_date)
             .filter(FileMetadata.is_archived == False)
-            .order_by(FileMetadata.indexed_at.desc())
-            .limit(limit)
-            .all()
         )
+        return self._newest_first(query, f"recent:{days}", limit=limit, cursor=cursor)
     
     def search_files(
         self, 
@@ -95,43 +139,36 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         limit: int = 100,
         workspace_id: Optional[int] = None,
         search_mode: SearchMode = SearchMode.FUZZY,
-        use_fts: bool = True
-    ) -> List[FileMetadata]:
+        use_fts: bool = True,
+        cursor: Optional[str] = None
+    ) -> Page:
         """
         Enhanced search with FTS5 for 90% performance improvement
         Falls back to ILIKE search if FTS is not available
         """
-        if use_fts and query.strip():
-            try:
-                # Use high-performance FTS search
-                fts_engine = FTSSearchEngine(db)
-                search_results = fts_engine.search(
-                    query=query,
-                    user_id=user_id,
-                    workspace_id=workspace_id,
-                    mode=search_mode,
-                    limit=limit,
-                    offset=skip,
-                    include_archived=False
-                )
-                
-                # Convert SearchResult objects back to FileMetadata objects
-                file_ids = [result.file_id for result in search_results]
-                if not file_ids:
-                    return []
-                
-                # Fetch FileMetadata objects in the same order as search results
-                files_dict = {
-                    file.id: file for file in 
-                    db.query(self.model).filter(FileMetadata.id.in_(file_ids)).all()
-                }
-                
-                # Return in search rank order
-                return [files_dict[file_id] for file_id in file_ids if file_id in files_dict]
-                
-            except Exception as e:
-                # Fall back to legacy search if FTS fails
-                pass
+        fts_engine = FTSSearchEngine(db) if use_fts and query.strip() else None
+        if fts_engine is not None and fts_engine.available:
+            search_results = self._ranked_page(
+                fts_engine, query=query, user_id=user_id, workspace_id=workspace_id,
+                search_mode=search_mode, skip=skip, limit=limit, cursor=cursor
+            )
+            
+            # Convert SearchResult objects back to FileMetadata objects
+            file_ids = [result.file_id for result in search_results]
+            if not file_ids:
+                return Page()
+            
+            # Fetch FileMetadata objects in the same order as search results
+            files_dict = {
+                file.id: file for file in 
+                db.query(self.model).filter(FileMetadata.id.in_(file_ids)).all()
+            }
+            
+            # Return in search rank order
+            return Page(
+                [files_dict[file_id] for file_id in file_ids if file_id in files_dict],
+                search_results.next_cursor
+            )
         
         # Legacy ILIKE search (fallback)
         search_filter = f"%{query}%"
@@ -144,20 +181,20 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         if workspace_id:
             query_builder = query_builder.filter(FileMetadata.workspace_id == workspace_id)
         
-        return (
-            query_builder
-            .filter(
-                or_(
-                    FileMetadata.file_name.ilike(search_filter),
-                    FileMetadata.ai_description.ilike(search_filter),
-                    FileMetadata.user_description.ilike(search_filter),
-                    FileMetadata.ai_tags.ilike(search_filter)
-                )
+        query_builder = query_builder.filter(
+            or_(
+                FileMetadata.file_name.ilike(search_filter),
+                FileMetadata.ai_description.ilike(search_filter),
+                FileMetadata.user_description.ilike(search_filter),
+                FileMetadata.ai_tags.ilike(search_filter)
             )
-            .order_by(FileMetadata.importance_score.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return keyset_page(
+            query_builder,
+            listing=self._search_listing("like", query, search_mode, workspace_id),
+            sort_key=func.coalesce(FileMetadata.importance_score, 0),
+            id_column=FileMetadata.id,
+            limit=limit, cursor=cursor, skip=skip
         )
     
     def advanced_search(
@@ -169,24 +206,67 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         workspace_id: Optional[int] = None,
         search_mode: SearchMode = SearchMode.FUZZY,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[SearchResult]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """
         Advanced search returning SearchResult objects with ranking and snippets
         """
-        try:
-            fts_engine = FTSSearchEngine(db)
-            return fts_engine.search(
-                query=query,
-                user_id=user_id,
-                workspace_id=workspace_id,
-                mode=search_mode,
-                limit=limit,
-                offset=skip,
-                include_archived=False
-            )
-        except Exception as e:
-            return []
+        return self._ranked_page(
+            FTSSearchEngine(db), query=query, user_id=user_id, workspace_id=workspace_id,
+            search_mode=search_mode, skip=skip, limit=limit, cursor=cursor
+        )
+    
+    @staticmethod
+    def _search_listing(engine: str, query: str, search_mode: SearchMode, workspace_id: Optional[int]) -> str:
+        # Cursors are only valid for the query they were issued for
+        digest = hashlib.sha1(f"{query.strip().lower()}|{search_mode.value}|{workspace_id}".encode()).hexdigest()
+        return f"search-{engine}:{digest[:16]}"
+    
+    def _ranked_page(
+        self,
+        fts_engine: FTSSearchEngine,
+        *,
+        query: str,
+        user_id: int,
+        workspace_id: Optional[int],
+        search_mode: SearchMode,
+        skip: int,
+        limit: int,
+        cursor: Optional[str]
+    ) -> Page:
+        """One page of FTS results keyed by (search_rank, file_id)"""
+        listing = self._search_listing("fts", query, search_mode, workspace_id)
+        after = tuple(decode_cursor(cursor, listing)) if cursor else None
+        results = fts_engine.search(
+            query=query,
+            user_id=user_id,
+            workspace_id=workspace_id,
+            mode=search_mode,
+            limit=limit + 1,
+            offset=0 if after else skip,
+            include_archived=False,
+            after=after
+        )
+        if len(results) <= limit:
+            return Page(results)
+        results = results[:limit]
+        return Page(results, encode_cursor(listing, results[-1].search_rank, results[-1].file_id))
+    
+    def get_suggestion_sources(
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple[str, Optional[str]]]:
+        """Stream (file_name, ai_tags) of a user's active files for building suggestions"""
+        return (
+            db.query(FileMetadata.file_name, FileMetadata.ai_tags)
+            .filter(FileMetadata.user_id == user_id)
+            .filter(FileMetadata.is_archived == False)
+            .yield_per(batch_size)
+        )
     
     def get_search_suggestions(
         self,
@@ -216,12 +296,19 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         except Exception as e:
             return {}
     
-    def optimize_search_index(self, db: Session):
-        """Optimize the FTS search index for better performance"""
+    def optimize_search_index(self, db: Session, merge_pages: Optional[int] = None) -> bool:
+        """Optimize the FTS search index; ``merge_pages`` limits it to an incremental merge"""
         try:
             fts_engine = FTSSearchEngine(db)
-            fts_engine.optimize_fts_index()
-            return True
+            return fts_engine.optimize_fts_index(merge_pages=merge_pages)
+        except Exception as e:
+            return False
+    
+    def rebuild_search_index(self, db: Session) -> bool:
+        """Rebuild the FTS search index from file_metadata"""
+        try:
+            fts_engine = FTSSearchEngine(db)
+            return fts_engine.rebuild_fts_index()
         except Exception as e:
             return False
     
@@ -232,19 +319,17 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         user_id: int, 
         extension: str, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[FileMetadata]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get files by extension"""
-        return (
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(FileMetadata.file_extension == extension.lower())
             .filter(FileMetadata.is_archived == False)
-            .order_by(FileMetadata.indexed_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._newest_first(query, f"extension:{extension.lower()}", limit=limit, cursor=cursor, skip=skip)
     
     def get_large_files(
         self, 
@@ -252,18 +337,20 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         *, 
         user_id: int, 
         min_size_mb: int = 100, 
-        limit: int = 50
-    ) -> List[FileMetadata]:
-        """Get large files above specified size"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get large files above specified size, largest first"""
         min_size_bytes = min_size_mb * 1024 * 1024
-        return (
+        query = (
             db.query(self.model)
             .filter(FileMetadata.user_id == user_id)
             .filter(FileMetadata.file_size >= min_size_bytes)
             .filter(FileMetadata.is_archived == False)
-            .order_by(FileMetadata.file_size.desc())
-            .limit(limit)
-            .all()
+        )
+        return keyset_page(
+            query, listing=f"large:{min_size_mb}", sort_key=FileMetadata.file_size, id_column=FileMetadata.id,
+            limit=limit, cursor=cursor
         )
     
     def create_with_checksum(
@@ -287,6 +374,142 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
         db.refresh(db_obj)
         return db_obj
     
+    def get_modified_times(
+        self, db: Session, *, user_id: int, file_paths: List[str]
+    ) -> Dict[str, Optional[datetime]]:
+        """Get file_modified_at for many paths in a single query"""
+        if not file_paths:
+            return {}
+        rows = (
+            db.query(FileMetadata.file_path, FileMetadata.file_modified_at)
+            .filter(FileMetadata.user_id == user_id)
+            .filter(FileMetadata.file_path.in_(file_paths))
+            .all()
+        )
+        return {row.file_path: row.file_modified_at for row in rows}
+    
+    def ensure_upsert_index(self, db: Session) -> bool:
+        """
+        Make sure the (user_id, file_path) unique index exists on databases
+        created before it was added to the model. Returns False if duplicate
+        paths prevent creating it.
+        """
+        try:
+            db.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_file_metadata_user_path "
+                "ON file_metadata (user_id, file_path)"
+            ))
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            return False
+    
+    def bulk_upsert(
+        self,
+        db: Session,
+        *,
+        records: List[FileMetadataCreate],
+        use_on_conflict: bool = True
+    ) -> Tuple[int, int]:
+        """
+        Insert or update many scanned files in one transaction using multi-row
+        INSERT ... ON CONFLICT statements. Returns (inserted, updated).
+        """
+        if not records:
+            return 0, 0
+        
+        now = datetime.now(timezone.utc)
+        rows = {}
+        for record in records:
+            data = record.model_dump(exclude_unset=True)
+            data['indexed_at'] = now
+            rows[(data['user_id'], data['file_path'])] = data  # last write wins within a batch
+        
+        existing_ids = {}
+        for user_id in {key[0] for key in rows}:
+            paths = [key[1] for key in rows if key[0] == user_id]
+            for i in range(0, len(paths), MAX_BOUND_PARAMETERS):
+                for row in (
+                    db.query(FileMetadata.id, FileMetadata.file_path)
+                    .filter(FileMetadata.user_id == user_id)
+                    .filter(FileMetadata.file_path.in_(paths[i:i + MAX_BOUND_PARAMETERS]))
+                ):
+                    existing_ids[(user_id, row.file_path)] = row.id
+        
+        try:
+            if use_on_conflict:
+                self._upsert_on_conflict(db, list(rows.values()), now)
+            else:
+                self._upsert_by_id(db, rows, existing_ids, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        updated = len(existing_ids)
+        return len(rows) - updated, updated
+    
+    def _upsert_on_conflict(self, db: Session, rows: List[dict], now: datetime):
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        
+        # Multi-row VALUES need the same keys in every row
+        columns = sorted({key for row in rows for key in row})
+        chunk_size = max(1, MAX_BOUND_PARAMETERS // len(columns))
+        for i in range(0, len(rows), chunk_size):
+            chunk = [{col: row.get(col) for col in columns} for row in rows[i:i + chunk_size]]
+            stmt = insert(self.model).values(chunk)
+            update_columns = {
+                col: getattr(stmt.excluded, col) for col in SCANNER_UPSERT_COLUMNS if col in columns
+            }
+            update_columns['updated_at'] = now
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'file_path'], set_=update_columns
+            )
+            db.execute(stmt)
+    
+    def _upsert_by_id(self, db: Session, rows: Dict[tuple, dict], existing_ids: Dict[tuple, int], now: datetime):
+        """Fallback for databases without the unique index"""
+        updates = []
+        inserts = []
+        for key, row in rows.items():
+            if key in existing_ids:
+                values = {col: row[col] for col in SCANNER_UPSERT_COLUMNS if col in row}
+                values['id'] = existing_ids[key]
+                values['updated_at'] = now
+                updates.append(values)
+            else:
+                inserts.append(row)
+        if updates:
+            db.bulk_update_mappings(self.model, updates)
+        if inserts:
+            db.bulk_insert_mappings(self.model, inserts)
+    
+    def remove_by_paths(
+        self, db: Session, *, user_id: int, file_paths: List[str], directories: Optional[List[str]] = None
+    ) -> int:
+        """Delete records for deleted files and for everything below deleted directories"""
+        removed = 0
+        for i in range(0, len(file_paths), MAX_BOUND_PARAMETERS):
+            removed += (
+                db.query(self.model)
+                .filter(FileMetadata.user_id == user_id)
+                .filter(FileMetadata.file_path.in_(file_paths[i:i + MAX_BOUND_PARAMETERS]))
+                .delete(synchronize_session=False)
+            )
+        for directory in directories or []:
+            directory = directory.rstrip("/")
+            # Range scan on the path index; '0' sorts right after '/'
+            removed += (
+                db.query(self.model)
+                .filter(FileMetadata.user_id == user_id)
+                .filter(FileMetadata.file_path >= directory + "/")
+                .filter(FileMetadata.file_path < directory + "0")
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+        return removed
+    
     def mark_as_favorite(self, db: Session, *, file_id: int) -> Optional[FileMetadata]:
         """Toggle favorite status"""
         file_metadata = db.query(self.model).filter(self.model.id == file_id).first()
@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.backend.models.scan_journal import ScanJournalEntry
+
+# Keep (rows * columns) below SQLite's default bound-parameter limit of 999
+UPSERT_CHUNK_SIZE = 150
+DELETE_CHUNK_SIZE = 500
+
+# (is_dir, inode, size, mtime)
+JournalState = Tuple[bool, int, int, float]
+
+
+class CRUDScanJournal:
+    """Bulk operations for the scan journal"""
+
+    def __init__(self, model=ScanJournalEntry):
+        self.model = model
+
+    def load_for_root(self, db: Session, *, user_id: int, root: str) -> Dict[str, JournalState]:
+        """Load every journal row at or below ``root`` in a single query"""
+        root = root.rstrip("/") or "/"
+        prefix = root if root == "/" else root + "/"
+        # Range scan instead of LIKE so '%' and '_' in paths need no escaping;
+        # '0' is the character after '/' so this matches exactly the prefix
+        rows = (
+            db.query(
+                self.model.path, self.model.is_dir, self.model.inode,
+                self.model.size, self.model.mtime
+            )
+            .filter(self.model.user_id == user_id)
+            .filter(
+                or_(
+                    self.model.path == root,
+                    and_(self.model.path >= prefix, self.model.path < prefix[:-1] + "0")
+                )
+            )
+            .all()
+        )
+        return {row.path: (bool(row.is_dir), row.inode, row.size, row.mtime) for row in rows}
+
+    def upsert_entries(
+        self, db: Session, *, user_id: int, entries: Iterable[Tuple[str, JournalState]]
+    ) -> int:
+        """Insert or update journal rows in multi-row statements"""
+        dialect = db.get_bind().dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+
+        count = 0
+        chunk: List[dict] = []
+        for path, (is_dir, inode, size, mtime) in entries:
+            chunk.append({
+                "user_id": user_id, "path": path, "is_dir": is_dir,
+                "inode": inode, "size": size, "mtime": mtime,
+            })
+            if len(chunk) >= UPSERT_CHUNK_SIZE:
+                count += self._upsert_chunk(db, insert, chunk)
+                chunk = []
+        if chunk:
+            count += self._upsert_chunk(db, insert, chunk)
+        db.commit()
+        return count
+
+    def _upsert_chunk(self, db: Session, insert, rows: List[dict]) -> int:
+        stmt = insert(self.model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "path"],
+            set_={
+                "is_dir": stmt.excluded.is_dir,
+                "inode": stmt.excluded.inode,
+                "size": stmt.excluded.size,
+                "mtime": stmt.excluded.mtime,
+            },
+        )
+        db.execute(stmt)
+        return len(rows)
+
+    def delete_paths(self, db: Session, *, user_id: int, paths: Iterable[str]) -> int:
+        """Remove journal rows for paths that no longer exist"""
+        paths = list(paths)
+        removed = 0
+        for i in range(0, len(paths), DELETE_CHUNK_SIZE):
+            removed += (
+                db.query(self.model)
+                .filter(self.model.user_id == user_id)
+                .filter(self.model.path.in_(paths[i:i + DELETE_CHUNK_SIZE]))
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+        return removed
+
+    def delete_under(self, db: Session, *, user_id: int, directory: str) -> int:
+        """Remove a directory and everything journaled below it"""
+        directory = directory.rstrip("/")
+        removed = (
+            db.query(self.model)
+            .filter(self.model.user_id == user_id)
+            .filter(
+                or_(
+                    self.model.path == directory,
+                    and_(self.model.path >= directory + "/", self.model.path < directory + "0")
+                )
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return removed
+
+
+scan_journal = CRUDScanJournal(ScanJournalEntry)
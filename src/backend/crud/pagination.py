@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination helpers
+Pages are ordered by (sort key, id) and continue strictly after the last row of
+the previous page, so a deep page costs the same index seek as the first one
+instead of scanning and discarding ``offset`` rows
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import DateTime, String, and_, or_, type_coerce
+from sqlalchemy.orm import Query
+
+
+class InvalidCursorError(ValueError):
+    """Raised for cursor tokens that are malformed or belong to another listing"""
+
+
+class Page(list):
+    """List of results that also carries the cursor for the next page (None on the last page)"""
+
+    def __init__(self, items: Sequence = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(listing: str, sort_value: Any, row_id: int) -> str:
+    # default=str covers drivers that return timestamps as datetime objects
+    payload = json.dumps([listing, sort_value, row_id], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, listing: str) -> List[Any]:
+    """Return [sort_value, id] from a token created for ``listing``"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        name, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursorError("Malformed cursor")
+    if name != listing or not isinstance(row_id, int):
+        raise InvalidCursorError(f"Cursor does not belong to the '{listing}' listing")
+    return [sort_value, row_id]
+
+
+def _comparable(expression):
+    # Compare timestamps in the database's own text form: SQLite stores
+    # CURRENT_TIMESTAMP without microseconds, which a re-bound datetime would not match
+    if isinstance(getattr(expression, "type", None), DateTime):
+        return type_coerce(expression, String)
+    return expression
+
+
+def keyset_page(
+    query: Query,
+    *,
+    listing: str,
+    sort_key,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+    skip: int = 0
+) -> Page:
+    """
+    Fetch one page of ``query`` ordered by (sort_key, id_column).
+
+    ``sort_key`` must not be NULL for the rows in the listing (use COALESCE).
+    ``skip`` is honoured only without a cursor, for offset-based callers.
+    """
+    key = _comparable(sort_key)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, listing)
+        if descending:
+            query = query.filter(or_(key < sort_value, and_(key == sort_value, id_column < last_id)))
+        else:
+            query = query.filter(or_(key > sort_value, and_(key == sort_value, id_column > last_id)))
+
+    ordering = (sort_key.desc(), id_column.desc()) if descending else (sort_key.asc(), id_column.asc())
+    query = query.add_columns(key.label("_cursor_key")).order_by(None).order_by(*ordering)
+    if skip and not cursor:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_key = rows[-1]
+        next_cursor = encode_cursor(listing, last_key, getattr(last, id_column.key))
+    return Page([row[0] for row in rows], next_cursor)
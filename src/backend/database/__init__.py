@@ -1,4 +1,4 @@
 # database package
-from .database import get_db, SessionLocal, Base, engine, init_db
+from .database import get_db, get_read_db, SessionLocal, ReadSessionLocal, Base, engine, read_engine, init_db
 
-__all__ = ["get_db", "SessionLocal", "Base", "engine", "init_db"]
\ No newline at end of file
+__all__ = ["get_db", "get_read_db", "SessionLocal", "ReadSessionLocal", "Base", "engine", "read_engine", "init_db"]
\ No newline at end of file
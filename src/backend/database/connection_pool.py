@@ -4,17 +4,19 @@ Implements intelligent connection pooling, query optimization, and performance m
 """
 
 import asyncio
+import bisect
 import time
-import threading
-from typing import Dict, List, Optional, Any, Callable, AsyncGenerator
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Any, Callable, AsyncGenerator
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 import sqlite3
-import queue
 from pathlib import Path
 from loguru import logger
 
+from src.backend.database.query_fingerprint import fingerprint
+
 try:
     import aiosqlite
     import asyncpg
@@ -36,15 +38,78 @@ class ConnectionMetrics:
     cache_misses: int = 0
     created_at: datetime = field(default_factory=datetime.now)
 
+# Successful execution times kept per fingerprint for percentiles
+QUERY_SAMPLE_SIZE = 1024
+
 @dataclass
 class QueryStats:
-    """Individual query statistics"""
+    """Statistics for one query fingerprint"""
     query_hash: str
+    normalized_query: str = ""
     execution_count: int = 0
     total_time_ms: float = 0.0
     avg_time_ms: float = 0.0
     last_executed: datetime = field(default_factory=datetime.now)
     error_count: int = 0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=QUERY_SAMPLE_SIZE))
+    
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _driver_of(connection) -> str:
+    """Name of the driver behind a raw connection: sqlite3, aiosqlite, asyncpg or generic"""
+    if isinstance(connection, sqlite3.Connection):
+        return "sqlite3"
+    module = type(connection).__module__
+    if module.startswith("asyncpg"):
+        return "asyncpg"
+    if module.startswith("aiosqlite"):
+        return "aiosqlite"
+    return "generic"
+
+class StatementCache:
+    """
+    Per-connection LRU of prepared statements (asyncpg) or reusable cursors
+    (sqlite), keyed by query text. ``put`` returns the entry it evicted so the
+    caller can close it.
+    """
+    
+    def __init__(self, capacity: int = 128):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, query: str) -> Optional[Any]:
+        statement = self._entries.get(query)
+        if statement is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.hits += 1
+        return statement
+    
+    def put(self, query: str, statement: Any) -> Optional[Any]:
+        if self.capacity <= 0:
+            return None
+        self._entries[query] = statement
+        self._entries.move_to_end(query)
+        if len(self._entries) > self.capacity:
+            self.evictions += 1
+            return self._entries.popitem(last=False)[1]
+        return None
+    
+    def clear(self) -> List[Any]:
+        statements = list(self._entries.values())
+        self._entries.clear()
+        return statements
 
 class DatabaseConnection:
     """Enhanced database connection wrapper"""
@@ -53,6 +118,8 @@ class DatabaseConnection:
         self.connection = connection
         self.connection_id = connection_id
         self.pool = pool
+        self.driver = _driver_of(connection)
+        self.statements = StatementCache(getattr(pool, "statement_cache_size", 128))
         self.created_at = datetime.now()
         self.last_used = datetime.now()
         self.query_count = 0
@@ -62,35 +129,51 @@ class DatabaseConnection:
     async def execute(self, query: str, params: Optional[tuple] = None) -> Any:
         """Execute query with performance tracking"""
         start_time = time.time()
-        query_hash = self._hash_query(query)
+        query_hash, normalized = fingerprint(query)
         
         try:
             self.last_used = datetime.now()
             self.query_count += 1
             
             # Execute query based on connection type
-            if hasattr(self.connection, 'execute'):
-                if params:
-                    result = await self.connection.execute(query, params)
-                else:
-                    result = await self.connection.execute(query)
-            else:
-                cursor = self.connection.cursor()
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
+            if self.driver == "asyncpg":
+                statement = self.statements.get(query)
+                if statement is None:
+                    statement = await self.connection.prepare(query)
+                    self.statements.put(query, statement)
+                result = await statement.fetch(*(params or ()))
+            elif self.driver == "aiosqlite":
+                cursor = self.statements.get(query)
+                if cursor is None:
+                    cursor = await self.connection.cursor()
+                    evicted = self.statements.put(query, cursor)
+                    if evicted is not None:
+                        await evicted.close()
+                await cursor.execute(query, params or ())
+                result = await cursor.fetchall()
+            elif self.driver == "sqlite3":
+                cursor = self.statements.get(query)
+                if cursor is None:
+                    cursor = self.connection.cursor()
+                    evicted = self.statements.put(query, cursor)
+                    if evicted is not None:
+                        evicted.close()
+                cursor.execute(query, params or ())
                 result = cursor.fetchall()
+            elif params:
+                result = await self.connection.execute(query, params)
+            else:
+                result = await self.connection.execute(query)
             
             # Record performance metrics
             execution_time = (time.time() - start_time) * 1000
-            self.pool._record_query_stats(query_hash, execution_time, success=True)
+            self.pool._record_query_stats(query_hash, execution_time, success=True, normalized=normalized)
             
             return result
             
         except Exception as e:
             execution_time = (time.time() - start_time) * 1000
-            self.pool._record_query_stats(query_hash, execution_time, success=False)
+            self.pool._record_query_stats(query_hash, execution_time, success=False, normalized=normalized)
             self.health_status = "unhealthy"
             logger.error(f"Query failed on connection {self.connection_id}: {e}")
             raise
@@ -98,13 +181,15 @@ class DatabaseConnection:
     async def execute_many(self, query: str, params_list: List[tuple]) -> Any:
         """Execute multiple queries efficiently"""
         start_time = time.time()
-        query_hash = self._hash_query(query)
+        query_hash, normalized = fingerprint(query)
         
         try:
             self.last_used = datetime.now()
             self.query_count += len(params_list)
             
-            if hasattr(self.connection, 'executemany'):
+            if self.driver == "sqlite3":
+                result = self.connection.executemany(query, params_list).rowcount
+            elif hasattr(self.connection, 'executemany'):
                 result = await self.connection.executemany(query, params_list)
             else:
                 cursor = self.connection.cursor()
@@ -112,47 +197,55 @@ class DatabaseConnection:
                 result = cursor.rowcount
             
             execution_time = (time.time() - start_time) * 1000
-            self.pool._record_query_stats(query_hash, execution_time, success=True)
+            self.pool._record_query_stats(query_hash, execution_time, success=True, normalized=normalized)
             
             return result
             
         except Exception as e:
             execution_time = (time.time() - start_time) * 1000
-            self.pool._record_query_stats(query_hash, execution_time, success=False)
+            self.pool._record_query_stats(query_hash, execution_time, success=False, normalized=normalized)
             self.health_status = "unhealthy"
             logger.error(f"Batch query failed on connection {self.connection_id}: {e}")
             raise
     
+    async def _run_control(self, statement: str):
+        """Run BEGIN/COMMIT/ROLLBACK outside the statement cache and query stats"""
+        if self.driver == "sqlite3":
+            self.connection.execute(statement)
+        else:
+            await self.connection.execute(statement)
+    
     async def begin_transaction(self):
         """Begin database transaction"""
         if hasattr(self.connection, 'begin'):
             await self.connection.begin()
         else:
-            await self.execute("BEGIN")
+            await self._run_control("BEGIN")
         self.is_transaction = True
     
     async def commit(self):
         """Commit transaction"""
-        if hasattr(self.connection, 'commit'):
+        if self.driver == "sqlite3":
+            self.connection.commit()
+        elif hasattr(self.connection, 'commit'):
             await self.connection.commit()
         else:
-            await self.execute("COMMIT")
+            await self._run_control("COMMIT")
         self.is_transaction = False
     
     async def rollback(self):
         """Rollback transaction"""
-        if hasattr(self.connection, 'rollback'):
+        if self.driver == "sqlite3":
+            self.connection.rollback()
+        elif hasattr(self.connection, 'rollback'):
             await self.connection.rollback()
         else:
-            await self.execute("ROLLBACK")
+            await self._run_control("ROLLBACK")
         self.is_transaction = False
     
     def _hash_query(self, query: str) -> str:
-        """Generate hash for query caching"""
-        import hashlib
-        # Normalize query for consistent hashing
-        normalized = ' '.join(query.split()).lower()
-        return hashlib.md5(normalized.encode()).hexdigest()[:12]
+        """Fingerprint of the query, shared by queries that differ only in literals"""
+        return fingerprint(query)[0]
     
     def is_healthy(self) -> bool:
         """Check connection health"""
@@ -172,16 +265,73 @@ class DatabaseConnection:
             if self.is_transaction:
                 await self.rollback()
             
-            if hasattr(self.connection, 'close'):
-                await self.connection.close()
-            else:
+            # Prepared asyncpg statements are released with the connection
+            cursors = self.statements.clear()
+            if self.driver == "sqlite3":
+                for cursor in cursors:
+                    cursor.close()
                 self.connection.close()
+            elif self.driver == "aiosqlite":
+                for cursor in cursors:
+                    await cursor.close()
+                await self.connection.close()
+            elif hasattr(self.connection, 'close'):
+                await self.connection.close()
                 
         except Exception as e:
             logger.warning(f"Error closing connection {self.connection_id}: {e}")
 
+class AcquireHistogram:
+    """Fixed-bucket histogram of connection acquisition times in milliseconds"""
+    
+    BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, elapsed_ms: float):
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+    
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= threshold:
+                return min(bound, self.max_ms)
+        return self.max_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.BOUNDS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "buckets": buckets
+        }
+
 class ConnectionPool:
-    """Advanced database connection pool with intelligent management"""
+    """
+    Advanced database connection pool with intelligent management
+    
+    asyncio-native: an exhausted pool parks acquirers on futures in a FIFO
+    queue and a released connection is handed straight to the oldest waiter,
+    so nobody polls and waiters are served in arrival order. Health is
+    checked when a connection comes back rather than on every acquire.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
@@ -190,16 +340,23 @@ class ConnectionPool:
         self.max_connections = config.get("max_connections", 20)
         self.connection_timeout = config.get("connection_timeout", 30)
         self.idle_timeout = config.get("idle_timeout", 300)  # 5 minutes
+        self.statement_cache_size = config.get("statement_cache_size", 128)  # per connection
         
         # Connection management
-        self.available_connections: queue.Queue = queue.Queue()
+        self._idle: Deque[DatabaseConnection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Open connections plus ones being opened, so concurrent acquirers cannot overshoot max
+        self._size = 0
+        self._closed = False
         self.active_connections: Dict[str, DatabaseConnection] = {}
         self.all_connections: Dict[str, DatabaseConnection] = {}
         self.connection_counter = 0
-        self.pool_lock = threading.Lock()
         
         # Performance tracking
         self.metrics = ConnectionMetrics()
+        self.acquire_histogram = AcquireHistogram()
+        self.acquire_timeouts = 0
+        self.max_waiters = 0
         self.query_stats: Dict[str, QueryStats] = {}
         self.query_cache: Dict[str, Any] = {}
         self.cache_ttl = config.get("cache_ttl", 300)  # 5 minutes
@@ -214,7 +371,13 @@ class ConnectionPool:
         
         # Create minimum connections
         for _ in range(self.min_connections):
-            await self._create_connection()
+            self._size += 1
+            try:
+                self._idle.append(await self._create_connection())
+            except Exception:
+                self._size -= 1
+                raise
+        self._sync_metrics()
         
         # Start background tasks
         self.cleanup_task = asyncio.create_task(self._cleanup_worker())
@@ -222,55 +385,54 @@ class ConnectionPool:
         
         logger.info("Connection pool initialized successfully")
     
+    async def _open_connection(self):
+        """Open a raw driver connection for the configured database"""
+        if self.database_url.startswith("sqlite"):
+            db_path = self.database_url.replace("sqlite:///", "")
+            if ASYNC_DB_AVAILABLE:
+                connection = await aiosqlite.connect(db_path, cached_statements=self.statement_cache_size)
+                # Enable WAL mode for better concurrency
+                await connection.execute("PRAGMA journal_mode=WAL")
+                await connection.execute("PRAGMA synchronous=NORMAL")
+                await connection.execute("PRAGMA cache_size=10000")
+                await connection.execute("PRAGMA temp_store=MEMORY")
+            else:
+                connection = sqlite3.connect(
+                    db_path, check_same_thread=False, cached_statements=self.statement_cache_size
+                )
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("PRAGMA cache_size=10000")
+                connection.execute("PRAGMA temp_store=MEMORY")
+            return connection
+        
+        if self.database_url.startswith("postgresql"):
+            if ASYNC_DB_AVAILABLE:
+                return await asyncpg.connect(self.database_url, statement_cache_size=self.statement_cache_size)
+            raise RuntimeError("PostgreSQL requires asyncpg")
+        
+        raise ValueError(f"Unsupported database URL: {self.database_url}")
+    
     async def _create_connection(self) -> DatabaseConnection:
-        """Create new database connection"""
+        """Create new database connection; the caller has already reserved its slot in ``_size``"""
         try:
             self.connection_counter += 1
             connection_id = f"conn_{self.connection_counter}"
-            
-            # Create connection based on database type
-            if self.database_url.startswith("sqlite"):
-                if ASYNC_DB_AVAILABLE:
-                    db_path = self.database_url.replace("sqlite:///", "")
-                    connection = await aiosqlite.connect(db_path)
-                    # Enable WAL mode for better concurrency
-                    await connection.execute("PRAGMA journal_mode=WAL")
-                    await connection.execute("PRAGMA synchronous=NORMAL")
-                    await connection.execute("PRAGMA cache_size=10000")
-                    await connection.execute("PRAGMA temp_store=MEMORY")
-                else:
-                    db_path = self.database_url.replace("sqlite:///", "")
-                    connection = sqlite3.connect(db_path, check_same_thread=False)
-                    connection.execute("PRAGMA journal_mode=WAL")
-                    connection.execute("PRAGMA synchronous=NORMAL")
-                    connection.execute("PRAGMA cache_size=10000")
-                    connection.execute("PRAGMA temp_store=MEMORY")
-            
-            elif self.database_url.startswith("postgresql"):
-                if ASYNC_DB_AVAILABLE:
-                    connection = await asyncpg.connect(self.database_url)
-                else:
-                    raise RuntimeError("PostgreSQL requires asyncpg")
-            
-            else:
-                raise ValueError(f"Unsupported database URL: {self.database_url}")
-            
-            # Create connection wrapper
-            db_connection = DatabaseConnection(connection, connection_id, self)
-            
-            with self.pool_lock:
-                self.all_connections[connection_id] = db_connection
-                self.available_connections.put(db_connection)
-                self.metrics.total_connections += 1
-                self.metrics.idle_connections += 1
-            
-            logger.debug(f"Created connection {connection_id}")
-            return db_connection
-            
+            connection = await self._open_connection()
         except Exception as e:
             self.metrics.failed_connections += 1
             logger.error(f"Failed to create database connection: {e}")
             raise
+        
+        db_connection = DatabaseConnection(connection, connection_id, self)
+        self.all_connections[connection_id] = db_connection
+        logger.debug(f"Created connection {connection_id}")
+        return db_connection
+    
+    def _sync_metrics(self):
+        self.metrics.total_connections = len(self.all_connections)
+        self.metrics.active_connections = len(self.active_connections)
+        self.metrics.idle_connections = len(self._idle)
     
     @asynccontextmanager
     async def get_connection(self) -> AsyncGenerator[DatabaseConnection, None]:
@@ -282,53 +444,60 @@ class ConnectionPool:
             await self._release_connection(connection)
     
     async def _acquire_connection(self) -> DatabaseConnection:
-        """Acquire connection from pool"""
-        start_time = time.time()
+        """Acquire connection from pool, waiting in FIFO order when it is exhausted"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        started = time.perf_counter()
         
-        while time.time() - start_time < self.connection_timeout:
+        # Queued acquirers go first; a newcomer only takes an idle connection if nobody waits
+        if self._idle and not self._waiters:
+            connection = self._idle.pop()
+        elif self._size < self.max_connections and not self._waiters:
+            self._size += 1
             try:
-                # Try to get available connection
-                if not self.available_connections.empty():
-                    connection = self.available_connections.get_nowait()
-                    
-                    # Check connection health
-                    if connection.is_healthy():
-                        with self.pool_lock:
-                            self.active_connections[connection.connection_id] = connection
-                            self.metrics.active_connections += 1
-                            self.metrics.idle_connections -= 1
-                        
-                        logger.debug(f"Acquired connection {connection.connection_id}")
-                        return connection
-                    else:
-                        # Connection is unhealthy, close and create new one
-                        await connection.close()
-                        with self.pool_lock:
-                            del self.all_connections[connection.connection_id]
-                            self.metrics.total_connections -= 1
-                        
-                        # Create replacement connection if below max
-                        if self.metrics.total_connections < self.max_connections:
-                            await self._create_connection()
-                
-                # No healthy connections available, create new one if possible
-                elif self.metrics.total_connections < self.max_connections:
-                    connection = await self._create_connection()
-                    with self.pool_lock:
-                        connection = self.available_connections.get_nowait()
-                        self.active_connections[connection.connection_id] = connection
-                        self.metrics.active_connections += 1
-                        self.metrics.idle_connections -= 1
-                    return connection
-                
-                else:
-                    # Pool is at capacity, wait briefly
-                    await asyncio.sleep(0.1)
-            
-            except queue.Empty:
-                await asyncio.sleep(0.1)
+                connection = await self._create_connection()
+            except Exception:
+                self._size -= 1
+                raise
+        else:
+            connection = await self._wait_for_connection()
         
-        raise TimeoutError("Failed to acquire database connection within timeout")
+        self.active_connections[connection.connection_id] = connection
+        self._sync_metrics()
+        self.acquire_histogram.record((time.perf_counter() - started) * 1000)
+        logger.debug(f"Acquired connection {connection.connection_id}")
+        return connection
+    
+    async def _wait_for_connection(self) -> DatabaseConnection:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_waiters = max(self.max_waiters, len(self._waiters))
+        try:
+            # Shielded so a timeout cannot cancel a hand-off that already happened
+            return await asyncio.wait_for(asyncio.shield(waiter), self.connection_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # Handed a connection just as we gave up: pass it on
+                self._return_connection(waiter.result())
+            else:
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.TimeoutError):
+                self.acquire_timeouts += 1
+                raise TimeoutError("Failed to acquire database connection within timeout") from None
+            raise
+    
+    def _return_connection(self, connection: DatabaseConnection):
+        """Hand a healthy connection to the oldest live waiter, or park it as idle"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(connection)
+                return
+        self._idle.append(connection)
     
     async def _release_connection(self, connection: DatabaseConnection):
         """Release connection back to pool"""
@@ -336,34 +505,49 @@ class ConnectionPool:
             # Rollback any uncommitted transaction
             if connection.is_transaction:
                 await connection.rollback()
-            
-            with self.pool_lock:
-                if connection.connection_id in self.active_connections:
-                    del self.active_connections[connection.connection_id]
-                    self.metrics.active_connections -= 1
-                
-                if connection.is_healthy():
-                    self.available_connections.put(connection)
-                    self.metrics.idle_connections += 1
-                    logger.debug(f"Released connection {connection.connection_id}")
-                else:
-                    # Connection is unhealthy, close it
-                    await connection.close()
-                    if connection.connection_id in self.all_connections:
-                        del self.all_connections[connection.connection_id]
-                        self.metrics.total_connections -= 1
-                    
-                    # Create replacement connection if below minimum
-                    if self.metrics.total_connections < self.min_connections:
-                        await self._create_connection()
+        except Exception as e:
+            connection.health_status = "unhealthy"
+            logger.error(f"Error rolling back connection {connection.connection_id}: {e}")
         
+        self.active_connections.pop(connection.connection_id, None)
+        if connection.is_healthy() and not self._closed:
+            self._return_connection(connection)
+            logger.debug(f"Released connection {connection.connection_id}")
+        else:
+            # Connection is unhealthy (or the pool closed), close it
+            await self._discard(connection)
+            if not self._closed and (self._waiters or self._size < self.min_connections):
+                asyncio.get_running_loop().create_task(self._replenish())
+        self._sync_metrics()
+    
+    async def _discard(self, connection: DatabaseConnection):
+        # Connections closed by close() are already unregistered
+        if self.all_connections.pop(connection.connection_id, None) is not None:
+            self._size -= 1
+            await connection.close()
+    
+    async def _replenish(self):
+        """Open a connection for the next waiter (or to restore the minimum)"""
+        if self._size >= self.max_connections:
+            return
+        self._size += 1
+        try:
+            connection = await self._create_connection()
         except Exception as e:
-            logger.error(f"Error releasing connection: {e}")
+            self._size -= 1
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(e)
+                    break
+            return
+        self._return_connection(connection)
+        self._sync_metrics()
     
-    def _record_query_stats(self, query_hash: str, execution_time_ms: float, success: bool):
-        """Record query performance statistics"""
+    def _record_query_stats(self, query_hash: str, execution_time_ms: float, success: bool, normalized: str = ""):
+        """Record query performance statistics under the query's fingerprint"""
         if query_hash not in self.query_stats:
-            self.query_stats[query_hash] = QueryStats(query_hash=query_hash)
+            self.query_stats[query_hash] = QueryStats(query_hash=query_hash, normalized_query=normalized)
         
         stats = self.query_stats[query_hash]
         stats.execution_count += 1
@@ -371,6 +555,7 @@ class ConnectionPool:
         
         if success:
             stats.total_time_ms += execution_time_ms
+            stats.samples.append(execution_time_ms)
             stats.avg_time_ms = stats.total_time_ms / stats.execution_count
             
             # Update global metrics
@@ -388,38 +573,16 @@ class ConnectionPool:
             try:
                 await asyncio.sleep(60)  # Run every minute
                 
-                current_time = datetime.now()
-                connections_to_close = []
-                
-                # Check for idle connections to close
-                with self.pool_lock:
-                    for connection in list(self.all_connections.values()):
-                        if (connection.connection_id not in self.active_connections and
-                            current_time - connection.last_used > timedelta(seconds=self.idle_timeout) and
-                            self.metrics.total_connections > self.min_connections):
-                            connections_to_close.append(connection)
+                cutoff = datetime.now() - timedelta(seconds=self.idle_timeout)
+                closed = 0
+                # Oldest idle connections sit at the left end of the deque
+                while self._idle and self._size > self.min_connections and self._idle[0].last_used < cutoff:
+                    await self._discard(self._idle.popleft())
+                    closed += 1
+                self._sync_metrics()
                 
-                # Close idle connections
-                for connection in connections_to_close:
-                    await connection.close()
-                    with self.pool_lock:
-                        # Remove from available queue (requires draining and rebuilding)
-                        temp_connections = []
-                        while not self.available_connections.empty():
-                            conn = self.available_connections.get_nowait()
-                            if conn.connection_id != connection.connection_id:
-                                temp_connections.append(conn)
-                        
-                        for conn in temp_connections:
-                            self.available_connections.put(conn)
-                        
-                        if connection.connection_id in self.all_connections:
-                            del self.all_connections[connection.connection_id]
-                            self.metrics.total_connections -= 1
-                            self.metrics.idle_connections -= 1
-                
-                if connections_to_close:
-                    logger.debug(f"Cleaned up {len(connections_to_close)} idle connections")
+                if closed:
+                    logger.debug(f"Cleaned up {closed} idle connections")
                 
             except Exception as e:
                 logger.error(f"Connection cleanup error: {e}")
@@ -450,8 +613,22 @@ class ConnectionPool:
             except Exception as e:
                 logger.error(f"Metrics collection error: {e}")
     
+    def _statement_cache_metrics(self) -> Dict[str, Any]:
+        caches = [connection.statements for connection in self.all_connections.values()]
+        hits = sum(cache.hits for cache in caches)
+        misses = sum(cache.misses for cache in caches)
+        return {
+            "capacity_per_connection": self.statement_cache_size,
+            "cached_statements": sum(len(cache) for cache in caches),
+            "hits": hits,
+            "misses": misses,
+            "evictions": sum(cache.evictions for cache in caches),
+            "hit_ratio": round(hits / max(hits + misses, 1) * 100, 2)
+        }
+    
     async def get_metrics(self) -> Dict[str, Any]:
         """Get comprehensive pool metrics"""
+        self._sync_metrics()
         return {
             "connection_metrics": {
                 "total_connections": self.metrics.total_connections,
@@ -461,6 +638,12 @@ class ConnectionPool:
                 "min_pool_size": self.min_connections,
                 "max_pool_size": self.max_connections
             },
+            "acquire_metrics": {
+                **self.acquire_histogram.to_dict(),
+                "waiting": len(self._waiters),
+                "max_waiting": self.max_waiters,
+                "timeouts": self.acquire_timeouts
+            },
             "performance_metrics": {
                 "total_queries": self.metrics.total_queries,
                 "avg_query_time_ms": round(self.metrics.avg_query_time_ms, 2),
@@ -470,10 +653,16 @@ class ConnectionPool:
                     self.metrics.cache_hits / max(self.metrics.cache_hits + self.metrics.cache_misses, 1) * 100, 2
                 )
             },
+            "statement_cache": self._statement_cache_metrics(),
             "slow_queries": [
                 {
                     "query_hash": stats.query_hash,
+                    "query": stats.normalized_query[:200],
                     "avg_time_ms": round(stats.avg_time_ms, 2),
+                    "p50_ms": round(stats.percentile(0.50), 2),
+                    "p95_ms": round(stats.percentile(0.95), 2),
+                    "p99_ms": round(stats.percentile(0.99), 2),
+                    "total_time_ms": round(stats.total_time_ms, 2),
                     "execution_count": stats.execution_count,
                     "error_count": stats.error_count
                 }
@@ -484,6 +673,7 @@ class ConnectionPool:
     async def close(self):
         """Close all connections and cleanup"""
         logger.info("Closing connection pool")
+        self._closed = True
         
         # Cancel background tasks
         if self.cleanup_task:
@@ -491,16 +681,22 @@ class ConnectionPool:
         if self.metrics_task:
             self.metrics_task.cancel()
         
-        # Close all connections
-        for connection in self.all_connections.values():
+        # Fail anyone still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(RuntimeError("Connection pool is closed"))
+        
+        # Close all connections; active ones are closed on release
+        for connection in list(self.all_connections.values()):
             await connection.close()
         
         # Clear all data structures
-        with self.pool_lock:
-            self.active_connections.clear()
-            self.all_connections.clear()
-            while not self.available_connections.empty():
-                self.available_connections.get_nowait()
+        self._idle.clear()
+        self.active_connections.clear()
+        self.all_connections.clear()
+        self._size = 0
+        self._sync_metrics()
         
         logger.info("Connection pool closed")
 
@@ -518,7 +714,8 @@ async def get_connection_pool() -> ConnectionPool:
             "max_connections": 20,
             "connection_timeout": 30,
             "idle_timeout": 300,
-            "cache_ttl": 300
+            "cache_ttl": 300,
+            "statement_cache_size": 128
         }
         
         _connection_pool = ConnectionPool(config)
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool, QueuePool
-from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql.expression import CompoundSelect, Select, TextClause
+from fastapi import Request
 import os
 import sqlite3
 from pathlib import Path
@@ -21,13 +23,62 @@ DATA_DIR.mkdir(exist_ok=True)
 # Database URL from configuration
 DATABASE_URL = config.get_database_url()
 
-# Create optimized engine with configuration
-engine_config = config.get_engine_config()
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=StaticPool,  # StaticPool is optimal for SQLite
-    **engine_config
-)
+# Requests with these methods get a session that reads from the reader pool
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def create_writer_engine(database_url: str) -> Engine:
+    """
+    Engine for writes. SQLite serializes writers anyway, so it keeps a single
+    persistent connection instead of letting several contend for the write
+    lock. Overflow connections still exist for sessions opened while another
+    one is checked out (e.g. a service opening SessionLocal() inside a request
+    that holds a get_db session): with none, the nested session would wait
+    for a connection its own caller holds. Concurrent write transactions on
+    overflow connections queue on SQLite's busy timeout instead.
+    """
+    engine_config = config.get_engine_config()
+    if database_url.startswith("sqlite"):
+        return create_engine(
+            database_url,
+            poolclass=QueuePool,
+            pool_size=config.READ_WRITE_SPLIT['writer_pool_size'],
+            max_overflow=config.READ_WRITE_SPLIT['writer_max_overflow'],
+            pool_timeout=config.CONNECTION_POOL['pool_timeout'],
+            **engine_config
+        )
+    engine_config.pop('connect_args', None)
+    return create_engine(database_url, **engine_config)
+
+
+def create_reader_engine(database_url: str, replica_url: Optional[str] = None) -> Engine:
+    """
+    Engine for reads: a pool of read-only connections to the same SQLite file
+    (WAL lets them read while the writer commits), or to ``replica_url``.
+    """
+    reader_config = config.get_reader_engine_config()
+    if replica_url:
+        return create_engine(replica_url, **reader_config)
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url, **reader_config)
+    
+    db_path = Path(make_url(database_url).database).resolve()
+    timeout = config.PERFORMANCE_THRESHOLDS['connection_timeout']
+    
+    def connect_read_only():
+        connection = sqlite3.connect(
+            f"{db_path.as_uri()}?mode=ro", uri=True,
+            check_same_thread=False, timeout=timeout, isolation_level=None
+        )
+        # Set first so set_sqlite_pragma recognizes the connection as a reader
+        connection.execute("PRAGMA query_only=ON")
+        return connection
+    
+    return create_engine(database_url, creator=connect_read_only, poolclass=QueuePool, **reader_config)
+
+
+engine = create_writer_engine(DATABASE_URL)
+read_engine = create_reader_engine(DATABASE_URL, config.get_read_replica_url())
 
 # SQLite Performance Optimizations
 @event.listens_for(Engine, "connect")
@@ -39,8 +90,12 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     if 'sqlite' in str(dbapi_connection):
         cursor = dbapi_connection.cursor()
         
+        # Read-only reader connections only take the per-connection pragmas
+        read_only = cursor.execute("PRAGMA query_only").fetchone()[0]
+        pragmas = config.SQLITE_READER_PRAGMAS if read_only else config.SQLITE_PRAGMAS
+        
         # Apply all SQLite pragmas from configuration
-        for pragma, value in config.SQLITE_PRAGMAS.items():
+        for pragma, value in pragmas.items():
             if isinstance(value, bool):
                 cursor.execute(f"PRAGMA {pragma}")
             else:
@@ -49,23 +104,96 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.close()
         logger.debug("SQLite performance pragmas applied from configuration")
 
+
+def _is_read_statement(clause) -> bool:
+    if isinstance(clause, (Select, CompoundSelect)):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().lower().startswith("select")
+    return False
+
+
+class ReadRoutingSession(Session):
+    """
+    Session that sends SELECTs to the reader engine and everything else
+    (flushes, INSERT/UPDATE/DELETE, DDL) to the writer, so a read-mostly
+    request that writes after all still works. Once the session has written,
+    its SELECTs go to the writer too until the transaction ends, so they see
+    the session's own uncommitted changes. A bare get_bind() (dialect or URL
+    lookups, schema setup on a connection of its own) returns the writer
+    without that switch.
+    """
+    
+    def __init__(self, *args, read_bind: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+        self._wrote = False
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if mapper is None and clause is None and not kwargs:
+            return super().get_bind()
+        if self.read_bind is not None and not self._wrote:
+            if not self._flushing and _is_read_statement(clause):
+                return self.read_bind
+            self._wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+    
+    def connection(self, bind_arguments=None, execution_options=None):
+        # The connection may be written through, so later reads follow it
+        if not bind_arguments:
+            self._wrote = True
+        return super().connection(bind_arguments=bind_arguments, execution_options=execution_options)
+    
+    def commit(self):
+        super().commit()
+        self._wrote = False
+    
+    def rollback(self):
+        super().rollback()
+        self._wrote = False
+    
+    def close(self):
+        super().close()
+        self._wrote = False
+
+
 # Create optimized session factory with configuration
 session_config = config.get_session_config()
 SessionLocal = sessionmaker(
     bind=engine,
     **session_config
 )
+ReadSessionLocal = sessionmaker(
+    class_=ReadRoutingSession,
+    bind=engine,
+    read_bind=read_engine,
+    **session_config
+)
 
 # Base class for models
 Base = declarative_base()
 
 # Dependency to get DB session
-def get_db():
+def get_db(request: Request = None):
     """
     Database session dependency for FastAPI.
-    Yields a database session and ensures it's closed after use.
+    GET/HEAD/OPTIONS requests get a session that reads from the reader pool;
+    other requests get a writer session. Yields the session and ensures it's
+    closed after use.
+    """
+    read_only = request is not None and request.method in READ_ONLY_METHODS
+    db = ReadSessionLocal() if read_only else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    """
+    Database session dependency for endpoints that mostly read, whatever
+    their HTTP method (e.g. POST search endpoints).
     """
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
@@ -79,8 +207,11 @@ def init_db():
     # Import all model modules to register them with SQLAlchemy
     from src.backend.models import (
         user, workspace, task, file_metadata,
-        supplier, team
+        supplier, team, scan_journal
     )
     # Temporarily disabled to fix startup issues
     # from src.backend.models import calendar, workflow, analytics, search
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # Build or upgrade the FTS5 search index once here instead of per search
+    from src.backend.database.fts_search import initialize_fts
+    initialize_fts(engine)
@@ -42,6 +42,27 @@ class DatabaseConfig:
         'wal_checkpoint': 'TRUNCATE'
     }
     
+    # Reader connections are opened read-only, so they only get the per-connection
+    # pragmas; journal mode, vacuum and checkpoints are the writer's business
+    SQLITE_READER_PRAGMAS = {
+        'query_only': 'ON',
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+        'foreign_keys': 'ON',
+    }
+    
+    # Read/write split: one persistent writer connection (SQLite allows one writer
+    # at a time), with overflow so nested sessions never wait on each other, and
+    # a pool of read-only connections against the same WAL database, or against
+    # a replica when DATABASE_READ_REPLICA_URL is set
+    READ_WRITE_SPLIT = {
+        'writer_pool_size': 1,
+        'writer_max_overflow': int(os.getenv('DATABASE_WRITER_MAX_OVERFLOW', '10')),
+        'reader_pool_size': int(os.getenv('DATABASE_READER_POOL_SIZE', '4')),
+        'read_replica_url': os.getenv('DATABASE_READ_REPLICA_URL', ''),
+    }
+    
     # Connection Pool Settings
     CONNECTION_POOL = {
         'pool_size': 20,          # Number of persistent connections
@@ -128,6 +149,24 @@ class DatabaseConfig:
             }
         }
     
+    @classmethod
+    def get_reader_engine_config(cls) -> Dict[str, Any]:
+        """Engine options for the reader pool"""
+        return {
+            'pool_size': cls.READ_WRITE_SPLIT['reader_pool_size'],
+            'max_overflow': 0,
+            'pool_timeout': cls.CONNECTION_POOL['pool_timeout'],
+            'pool_pre_ping': cls.CONNECTION_POOL['pool_pre_ping'],
+            'pool_recycle': cls.CONNECTION_POOL['pool_recycle'],
+            'echo': cls.MONITORING_CONFIG['enable_query_logging'],
+            'future': True,
+        }
+    
+    @classmethod
+    def get_read_replica_url(cls) -> str:
+        """Replica the readers use instead of the primary database, if configured"""
+        return cls.READ_WRITE_SPLIT['read_replica_url']
+    
     @classmethod
     def get_session_config(cls) -> Dict[str, Any]:
         """Get SQLAlchemy session configuration"""
@@ -4,6 +4,7 @@ Implements SQLite FTS5 for 90% search performance improvement (320ms -> 32ms)
 """
 
 import re
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy import text, func
 from sqlalchemy.orm import Session
@@ -33,105 +34,174 @@ class SearchResult:
     snippet: str
     highlight_positions: List[Tuple[int, int]]
     
+# Bump when the FTS table or trigger definitions change; the next startup
+# (or first search) drops and rebuilds the index once
+FTS_SCHEMA_VERSION = 3
+FTS_SCHEMA_NAME = "files_fts"
+
+FTS_INDEXED_COLUMNS = ("file_name", "ai_description", "user_description", "ai_tags", "file_path")
+
+FTS_TRIGGERS = (
+    "files_fts_insert", "files_fts_update", "files_fts_delete",
+    "search_generation_insert", "search_generation_update", "search_generation_delete",
+)
+
+# Database URLs whose FTS schema is known to be current in this process
+_fts_ready_binds = set()
+_fts_init_lock = threading.Lock()
+
+
+def _fts_schema_statements() -> List[str]:
+    """DDL for the external-content FTS5 table and the triggers keeping it in sync"""
+    columns = ", ".join(FTS_INDEXED_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_INDEXED_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_INDEXED_COLUMNS)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE files_fts USING fts5(
+            {columns},
+            content='file_metadata',
+            content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        f"""
+        CREATE TRIGGER files_fts_insert AFTER INSERT ON file_metadata BEGIN
+            INSERT INTO files_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+        # External-content tables need the old values to remove stale tokens
+        f"""
+        CREATE TRIGGER files_fts_delete AFTER DELETE ON file_metadata BEGIN
+            INSERT INTO files_fts(files_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER files_fts_update AFTER UPDATE OF {columns} ON file_metadata BEGIN
+            INSERT INTO files_fts(files_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO files_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+        # Per-user change counter; search result caches compare it to detect stale entries
+        """
+        CREATE TABLE IF NOT EXISTS search_generations (
+            user_id INTEGER PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TRIGGER search_generation_insert AFTER INSERT ON file_metadata BEGIN
+            {_bump_generation("new")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER search_generation_update AFTER UPDATE ON file_metadata BEGIN
+            {_bump_generation("old")}
+            {_bump_generation("new")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER search_generation_delete AFTER DELETE ON file_metadata BEGIN
+            {_bump_generation("old")}
+        END
+        """,
+    ]
+
+
+def _bump_generation(row: str) -> str:
+    return (
+        f"INSERT INTO search_generations (user_id, generation) VALUES ({row}.user_id, 1) "
+        "ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1;"
+    )
+
+
+def ensure_fts_schema(connection) -> bool:
+    """
+    Create or upgrade the FTS5 index if its schema-version marker is behind
+    FTS_SCHEMA_VERSION. Cheap when already current: one marker lookup.
+    Returns False when the database does not support FTS5.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS search_index_schema (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    version = connection.execute(
+        text("SELECT version FROM search_index_schema WHERE name = :name"),
+        {"name": FTS_SCHEMA_NAME}
+    ).scalar()
+    if version == FTS_SCHEMA_VERSION:
+        return True
+
+    logger.info(f"Building FTS5 search index (schema version {version} -> {FTS_SCHEMA_VERSION})")
+    for trigger in FTS_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    connection.execute(text("DROP TABLE IF EXISTS files_fts"))
+    for statement in _fts_schema_statements():
+        connection.execute(text(statement))
+    # One full pass over file_metadata; afterwards the triggers keep it current
+    connection.execute(text("INSERT INTO files_fts(files_fts) VALUES('rebuild')"))
+    connection.execute(
+        text("""
+            INSERT INTO search_index_schema (name, version, built_at)
+            VALUES (:name, :version, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET version = excluded.version, built_at = excluded.built_at
+        """),
+        {"name": FTS_SCHEMA_NAME, "version": FTS_SCHEMA_VERSION}
+    )
+    return True
+
+
+def initialize_fts(bind) -> bool:
+    """Run ensure_fts_schema once per process and database"""
+    key = str(bind.url)
+    if key in _fts_ready_binds:
+        return True
+    with _fts_init_lock:
+        if key in _fts_ready_binds:
+            return True
+        try:
+            with bind.begin() as connection:
+                ready = ensure_fts_schema(connection)
+        except Exception as e:
+            logger.error(f"Failed to initialize FTS5: {e}")
+            return False
+        if ready:
+            _fts_ready_binds.add(key)
+        return ready
+
+
+def get_search_generation(db: Session, user_id: int) -> Optional[int]:
+    """
+    Current change counter of a user's file_metadata rows, maintained by the
+    triggers above. None when it is not tracked (FTS5 unavailable).
+    """
+    if not initialize_fts(db.get_bind()):
+        return None
+    try:
+        generation = db.execute(
+            text("SELECT generation FROM search_generations WHERE user_id = :user_id"),
+            {"user_id": user_id}
+        ).scalar()
+    except Exception as e:
+        logger.warning(f"Failed to read search generation: {e}")
+        return None
+    return generation or 0
+
+
 class FTSSearchEngine:
     """High-performance Full-Text Search Engine using SQLite FTS5"""
     
     def __init__(self, db_session: Session):
         self.db = db_session
-        self._initialize_fts()
-    
-    def _initialize_fts(self):
-        """Initialize FTS5 virtual tables"""
-        try:
-            # Create FTS5 virtual table for file metadata
-            fts_table_sql = """
-            CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
-                file_id UNINDEXED,
-                file_name,
-                ai_description,
-                user_description,
-                ai_tags,
-                user_tags,
-                file_path,
-                content='file_metadata',
-                content_rowid='id',
-                tokenize='porter unicode61'
-            );
-            """
-            self.db.execute(text(fts_table_sql))
-            
-            # Create triggers to maintain FTS index
-            self._create_fts_triggers()
-            
-            # Populate FTS table with existing data
-            self._populate_fts_table()
-            
-            logger.info("FTS5 search engine initialized successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize FTS5: {e}")
-    
-    def _create_fts_triggers(self):
-        """Create triggers to maintain FTS index synchronization"""
-        triggers = [
-            # Insert trigger
-            """
-            CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON file_metadata BEGIN
-                INSERT INTO files_fts(
-                    file_id, file_name, ai_description, user_description, 
-                    ai_tags, user_tags, file_path
-                ) VALUES (
-                    new.id, new.file_name, new.ai_description, new.user_description,
-                    new.ai_tags, new.user_tags, new.file_path
-                );
-            END;
-            """,
-            
-            # Update trigger
-            """
-            CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE ON file_metadata BEGIN
-                UPDATE files_fts SET
-                    file_name = new.file_name,
-                    ai_description = new.ai_description,
-                    user_description = new.user_description,
-                    ai_tags = new.ai_tags,
-                    user_tags = new.user_tags,
-                    file_path = new.file_path
-                WHERE file_id = new.id;
-            END;
-            """,
-            
-            # Delete trigger
-            """
-            CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON file_metadata BEGIN
-                DELETE FROM files_fts WHERE file_id = old.id;
-            END;
-            """
-        ]
-        
-        for trigger in triggers:
-            self.db.execute(text(trigger))
-    
-    def _populate_fts_table(self):
-        """Populate FTS table with existing file metadata"""
-        try:
-            populate_sql = """
-            INSERT OR REPLACE INTO files_fts(
-                file_id, file_name, ai_description, user_description,
-                ai_tags, user_tags, file_path
-            )
-            SELECT 
-                id, file_name, ai_description, user_description,
-                ai_tags, user_tags, file_path
-            FROM file_metadata 
-            WHERE is_archived = 0;
-            """
-            self.db.execute(text(populate_sql))
-            self.db.commit()
-            logger.info("FTS table populated with existing data")
-            
-        except Exception as e:
-            logger.error(f"Failed to populate FTS table: {e}")
+        # Schema setup happens once at startup (init_db) or on the first search;
+        # later engines only run MATCH queries
+        self.available = initialize_fts(db_session.get_bind())
     
     def search(
         self,
@@ -141,7 +211,8 @@ class FTSSearchEngine:
         mode: SearchMode = SearchMode.FUZZY,
         limit: int = 100,
         offset: int = 0,
-        include_archived: bool = False
+        include_archived: bool = False,
+        after: Optional[Tuple[float, int]] = None
     ) -> List[SearchResult]:
         """
         Perform high-performance full-text search
@@ -154,12 +225,16 @@ class FTSSearchEngine:
             limit: Maximum results to return
             offset: Results offset for pagination
             include_archived: Include archived files
+            after: (search_rank, file_id) of the last result of the previous page;
+                results continue strictly after it (keyset pagination)
         
         Returns:
             List of SearchResult objects with ranking and snippets
         """
         if not query.strip():
             return []
+        if not self.available:
+            return self._fallback_search(query, user_id, workspace_id, limit, offset)
         
         try:
             # Preprocess query based on mode
@@ -167,16 +242,19 @@ class FTSSearchEngine:
             
             # Build the search SQL with ranking
             search_sql = self._build_search_query(
-                fts_query, user_id, workspace_id, include_archived, limit, offset
+                fts_query, user_id, workspace_id, include_archived, limit, offset, after is not None
             )
             
             # Execute search
             results = self.db.execute(text(search_sql), {
                 'query': fts_query,
+                'raw_query': query.strip(),
                 'user_id': user_id,
                 'workspace_id': workspace_id,
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'after_rank': after[0] if after else None,
+                'after_id': after[1] if after else None
             }).fetchall()
             
             # Convert to SearchResult objects
@@ -191,9 +269,9 @@ class FTSSearchEngine:
                     file_name=row.file_name,
                     file_path=row.file_path,
                     description=row.ai_description or row.user_description or "",
-                    tags=self._parse_tags(row.ai_tags, row.user_tags),
+                    tags=self._parse_tags(row.ai_tags, None),
                     workspace_id=row.workspace_id,
-                    importance_score=row.importance_score,
+                    importance_score=row.importance_score or 0.0,
                     search_rank=row.search_rank,
                     snippet=snippet,
                     highlight_positions=highlights
@@ -242,7 +320,8 @@ class FTSSearchEngine:
         workspace_id: Optional[int],
         include_archived: bool,
         limit: int,
-        offset: int
+        offset: int,
+        keyset: bool = False
     ) -> str:
         """Build optimized search SQL with ranking"""
         
@@ -254,39 +333,45 @@ class FTSSearchEngine:
         if not include_archived:
             archive_filter = "AND fm.is_archived = 0"
         
+        keyset_filter = ""
+        if keyset:
+            keyset_filter = "WHERE search_rank < :after_rank OR (search_rank = :after_rank AND file_id > :after_id)"
+        
         return f"""
-        SELECT 
-            fts.file_id,
-            fm.file_name,
-            fm.file_path,
-            fm.ai_description,
-            fm.user_description,
-            fm.ai_tags,
-            fm.user_tags,
-            fm.workspace_id,
-            fm.importance_score,
-            -- Enhanced ranking algorithm
-            (
-                fts.bm25(fts, 10.0, 5.0) * 
-                CASE 
-                    WHEN fm.file_name LIKE '%' || :query || '%' THEN 2.0
-                    ELSE 1.0
-                END *
-                CASE 
-                    WHEN fm.is_favorite = 1 THEN 1.5
-                    ELSE 1.0
-                END *
-                (1.0 + fm.importance_score * 0.5)
-            ) as search_rank,
-            -- Extract matched text for snippets
-            snippet(files_fts, 1, '<mark>', '</mark>', '...', 32) as matched_text
-        FROM files_fts fts
-        JOIN file_metadata fm ON fts.file_id = fm.id
-        WHERE fts MATCH :query
-        AND fm.user_id = :user_id
-        {workspace_filter}
-        {archive_filter}
-        ORDER BY search_rank DESC, fm.importance_score DESC
+        SELECT * FROM (
+            SELECT 
+                fm.id AS file_id,
+                fm.file_name,
+                fm.file_path,
+                fm.ai_description,
+                fm.user_description,
+                fm.ai_tags,
+                fm.workspace_id,
+                fm.importance_score,
+                -- Enhanced ranking algorithm (bm25 is negative, lower is better)
+                (
+                    -bm25(files_fts, 10.0, 5.0, 5.0, 3.0, 1.0) * 
+                    CASE 
+                        WHEN fm.file_name LIKE '%' || :raw_query || '%' THEN 2.0
+                        ELSE 1.0
+                    END *
+                    CASE 
+                        WHEN fm.is_favorite = 1 THEN 1.5
+                        ELSE 1.0
+                    END *
+                    (1.0 + COALESCE(fm.importance_score, 0) * 0.5)
+                ) as search_rank,
+                -- Extract matched text for snippets
+                snippet(files_fts, -1, '<mark>', '</mark>', '...', 32) as matched_text
+            FROM files_fts
+            JOIN file_metadata fm ON fm.id = files_fts.rowid
+            WHERE files_fts MATCH :query
+            AND fm.user_id = :user_id
+            {workspace_filter}
+            {archive_filter}
+        )
+        {keyset_filter}
+        ORDER BY search_rank DESC, file_id
         LIMIT :limit OFFSET :offset
         """
     
@@ -409,22 +494,49 @@ class FTSSearchEngine:
             logger.error(f"Failed to get search statistics: {e}")
             return {}
     
-    def optimize_fts_index(self):
-        """Optimize FTS index for better performance"""
+    def optimize_fts_index(self, merge_pages: Optional[int] = None) -> bool:
+        """
+        Optimize FTS index for better performance. With ``merge_pages`` only an
+        incremental merge of at most that many pages runs, which is cheap
+        enough to schedule regularly; otherwise all segments are merged.
+        """
+        if not self.available:
+            return False
         try:
-            self.db.execute(text("INSERT INTO files_fts(files_fts) VALUES('optimize')"))
+            if merge_pages:
+                self.db.execute(
+                    text("INSERT INTO files_fts(files_fts, rank) VALUES('merge', :pages)"),
+                    {'pages': merge_pages}
+                )
+            else:
+                self.db.execute(text("INSERT INTO files_fts(files_fts) VALUES('optimize')"))
             self.db.commit()
             logger.info("FTS index optimized successfully")
+            return True
             
         except Exception as e:
+            self.db.rollback()
             logger.error(f"FTS optimization failed: {e}")
+            return False
     
-    def rebuild_fts_index(self):
-        """Rebuild FTS index completely"""
+    def rebuild_fts_index(self) -> bool:
+        """
+        Rebuild FTS index completely from file_metadata. Only needed after
+        rows were changed outside the sync triggers (e.g. restored backups).
+        """
+        if not self.available:
+            return False
         try:
             self.db.execute(text("INSERT INTO files_fts(files_fts) VALUES('rebuild')"))
+            self.db.execute(
+                text("UPDATE search_index_schema SET built_at = CURRENT_TIMESTAMP WHERE name = :name"),
+                {'name': FTS_SCHEMA_NAME}
+            )
             self.db.commit()
             logger.info("FTS index rebuilt successfully")
+            return True
             
         except Exception as e:
-            logger.error(f"FTS rebuild failed: {e}")
\ No newline at end of file
+            self.db.rollback()
+            logger.error(f"FTS rebuild failed: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+SQL query fingerprinting
+Replaces literals with placeholders so queries that differ only in inlined
+values (``WHERE id = 7`` vs ``WHERE id = 8``) share one fingerprint, which keeps
+per-query statistics grouped and bounded.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Tuple
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+# Numbers that are not part of an identifier (t1, col_2) or a bind name ($1, :p2)
+_NUMBERS = re.compile(r"(?<![\w$:.])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b", re.IGNORECASE)
+_PLACEHOLDERS = re.compile(r"\$\d+|:\w+|%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(query: str) -> str:
+    """Lowercased query text with comments dropped, literals and bind markers as ``?``, and lists collapsed"""
+    text = _COMMENTS.sub(" ", query)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip().lower()
+    text = _IN_LIST.sub("in (...)", text)
+    return _VALUES_ROWS.sub(r"\1, ...", text)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(query: str) -> Tuple[str, str]:
+    """(fingerprint id, normalized text) for ``query``"""
+    normalized = normalize_sql(query)
+    return hashlib.md5(normalized.encode()).hexdigest()[:12], normalized
@@ -16,6 +16,7 @@ try:
 except ImportError:
     logger.warning("python-dotenv not installed, using system environment variables only")
 
+from config.settings import get_settings
 from src.backend.database.database import init_db, SessionLocal
 from src.backend.api.ai import router as ai_router
 from src.backend.api.workspaces import router as workspaces_router
@@ -49,8 +50,10 @@ except ImportError:
 
 try:
     from src.backend.services.workflow_scheduler import workflow_scheduler
+    from src.backend.services.workflow_execution_engine import workflow_execution_engine
 except ImportError:
     workflow_scheduler = None
+    workflow_execution_engine = None
 
 try:
     from src.backend.services.workflow_template_engine import workflow_template_engine
@@ -104,6 +107,10 @@ async def lifespan(app: FastAPI):
             # Start workflow scheduler
             await workflow_scheduler.start()
             logger.info("Workflow scheduler started")
+            
+            # Drain the execution queue here unless dedicated workers do it
+            if get_settings().workflow_embedded_worker:
+                await workflow_execution_engine.start_worker()
         except Exception as e:
             logger.warning(f"Workflow services initialization failed: {e}")
     else:
@@ -134,6 +141,26 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"Workflow scheduler shutdown failed: {e}")
     
+    if workflow_execution_engine:
+        try:
+            await workflow_execution_engine.stop_worker()
+        except Exception as e:
+            logger.warning(f"Workflow queue worker shutdown failed: {e}")
+    
+    # Stop the file watcher and the scanner's extraction processes
+    try:
+        from src.backend.services.file_scanner import file_scanner
+        await file_scanner.shutdown()
+    except Exception as e:
+        logger.warning(f"File scanner shutdown failed: {e}")
+    
+    # Release Redis cache connections
+    try:
+        from src.backend.services.cache_service import cache_service
+        await cache_service.close()
+    except Exception as e:
+        logger.warning(f"Cache service shutdown failed: {e}")
+    
     # Shutdown
     logger.info("OrdnungsHub backend shutting down...")
 
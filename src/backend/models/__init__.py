@@ -2,6 +2,7 @@ from src.backend.models.user import User, UserPreference
 from src.backend.models.workspace import Workspace
 from src.backend.models.task import Task, Project
 from src.backend.models.file_metadata import FileMetadata, Tag
+from src.backend.models.scan_journal import ScanJournalEntry
 from src.backend.models.supplier import (
     Supplier, SupplierProduct, PriceList, 
     SupplierDocument, SupplierCommunication
@@ -16,6 +17,7 @@ from src.backend.models.workflow import (
     WorkflowStepExecution, WorkflowTrigger, WorkflowVersion,
     WorkflowSchedule, WorkflowWebhook, WorkflowAnalytics,
     WorkflowShare, WorkflowStatus, WorkflowExecutionStatus,
+    WorkflowQueueItem, WorkflowQueueStatus,
     TriggerType, ActionType, ConditionOperator
 )
 from src.backend.models.calendar import (
@@ -41,6 +43,7 @@ __all__ = [
     # File models
     "FileMetadata", 
     "Tag",
+    "ScanJournalEntry",
     # Supplier models
     "Supplier",
     "SupplierProduct",
@@ -69,6 +72,8 @@ __all__ = [
     "WorkflowShare",
     "WorkflowStatus",
     "WorkflowExecutionStatus",
+    "WorkflowQueueItem",
+    "WorkflowQueueStatus",
     "TriggerType",
     "ActionType",
     "ConditionOperator",
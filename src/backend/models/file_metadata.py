@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, BigInteger, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, BigInteger, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.backend.database.database import Base
@@ -47,6 +47,14 @@ class FileMetadata(Base):
     # Relationships
     tags = relationship("Tag", secondary=file_tags, back_populates="files")
     
+    __table_args__ = (
+        # Conflict target for bulk upserts from the file scanner
+        Index("uq_file_metadata_user_path", "user_id", "file_path", unique=True),
+        # Seek targets for cursor pagination on (sort key, id)
+        Index("ix_file_metadata_user_indexed", "user_id", "indexed_at", "id"),
+        Index("ix_file_metadata_user_size", "user_id", "file_size", "id"),
+    )
+    
     def __repr__(self):
         return f"<FileMetadata(id={self.id}, name='{self.file_name}')>"
 
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, BigInteger, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from src.backend.database.database import Base
+
+
+class ScanJournalEntry(Base):
+    """
+    Last observed filesystem state of a scanned path.
+
+    The file scanner loads these rows in bulk at the start of a scan and
+    compares (inode, size, mtime) against a fresh stat() so unchanged files
+    never reach the file_metadata table.
+    """
+    __tablename__ = "scan_journal"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    path = Column(String(1024), nullable=False)
+    is_dir = Column(Boolean, default=False, nullable=False)
+    inode = Column(BigInteger)
+    size = Column(BigInteger)
+    mtime = Column(Float)  # st_mtime as a float timestamp
+    scanned_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "path", name="uq_scan_journal_user_path"),
+    )
+
+    def __repr__(self):
+        return f"<ScanJournalEntry(path='{self.path}', dir={self.is_dir})>"
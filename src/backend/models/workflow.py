@@ -295,6 +295,49 @@ class WorkflowExecution(Base):
     )
 
 
+class WorkflowQueueStatus(str, enum.Enum):
+    """State of an execution in the durable run queue"""
+    QUEUED = "queued"
+    LEASED = "leased"
+    DEAD = "dead"
+
+
+class WorkflowQueueItem(Base):
+    """
+    Queued workflow execution waiting for, or leased by, a worker process.
+    A lease that is not renewed by heartbeats expires and the run is handed
+    to another worker. Finished runs are deleted from the queue.
+    """
+    
+    __tablename__ = "workflow_execution_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, ForeignKey("workflow_executions.id"), nullable=False, unique=True)
+    workspace_id = Column(Integer, nullable=True)
+    priority = Column(Integer, default=0)
+    
+    # Queue state
+    status = Column(Enum(WorkflowQueueStatus), default=WorkflowQueueStatus.QUEUED, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text, nullable=True)
+    
+    # Lease
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    enqueued_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("idx_queue_status_available", "status", "available_at"),
+        Index("idx_queue_status_lease", "status", "lease_expires_at"),
+        Index("idx_queue_workspace_status", "workspace_id", "status"),
+    )
+
+
 class WorkflowStepExecution(Base):
     """Individual step execution within a workflow execution"""
     
@@ -109,6 +109,7 @@ class FileSearchResponse(BaseModel):
     files: List[FileMetadataResponse]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None  # Opaque token for the next page
 
 class FileCategoryStats(BaseModel):
     category: str
@@ -193,7 +193,10 @@ class LocalAIService:
     async def suggest_tags(self, text: str) -> List[str]:
         """Suggest tags for content based on analysis"""
         analysis = await self.analyze_text(text)
-        
+        return self._tags_from_analysis(analysis)
+    
+    def _tags_from_analysis(self, analysis: Dict[str, Any]) -> List[str]:
+        """Derive tags from an existing text analysis"""
         tags = []
         
         # Add category as tag
@@ -217,6 +220,19 @@ class LocalAIService:
 
     async def categorize_file(self, filename: str, content_preview: str = "") -> Dict[str, Any]:
         """Categorize file based on name and content"""
+        result = self._categorize_by_filename(filename)
+        
+        # Content-based analysis if available
+        if content_preview:
+            analysis = await self.analyze_text(content_preview)
+            result['subcategory'] = analysis.get('category', 'general')
+            result['tags'] = await self.suggest_tags(content_preview)
+            result['priority'] = analysis.get('priority', 'medium')
+        
+        return result
+    
+    def _categorize_by_filename(self, filename: str) -> Dict[str, Any]:
+        """File type categorization from the file name alone"""
         result = {
             'category': 'document',
             'subcategory': 'general',
@@ -240,13 +256,6 @@ class LocalAIService:
         elif any(ext in filename_lower for ext in ['.py', '.js', '.html', '.css', '.cpp']):
             result['category'] = 'code'
         
-        # Content-based analysis if available
-        if content_preview:
-            analysis = await self.analyze_text(content_preview)
-            result['subcategory'] = analysis.get('category', 'general')
-            result['tags'] = await self.suggest_tags(content_preview)
-            result['priority'] = analysis.get('priority', 'medium')
-        
         return result
 
     async def generate_suggestions(self, task_description: str) -> List[str]:
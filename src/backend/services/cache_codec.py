@@ -0,0 +1,159 @@
+"""
+Binary codec for values stored in Redis
+Every payload starts with a two byte header (codec version, flags) followed by
+a msgpack body, or JSON when msgpack is not installed. Bodies at or above the
+compression threshold are zstd-compressed when that saves space. Payloads
+without a known header (such as entries pickled by older releases) are
+rejected rather than unpickled, so they read as cache misses until they expire.
+"""
+
+import json
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+CODEC_VERSION = 1
+
+FORMAT_MSGPACK = 0x01
+FORMAT_JSON = 0x02
+_FORMAT_MASK = 0x0F
+FLAG_ZSTD = 0x10
+
+# Extension codes for types neither msgpack nor JSON carry natively
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_DECIMAL = 3
+
+_JSON_EXT_KEY = "__ext__"
+
+
+class CodecError(ValueError):
+    """Raised for payloads this codec cannot decode"""
+
+
+def _to_ext(value: Any):
+    """(code, text) for an extension type, or None"""
+    if isinstance(value, datetime):
+        return _EXT_DATETIME, value.isoformat()
+    if isinstance(value, date):
+        return _EXT_DATE, value.isoformat()
+    if isinstance(value, Decimal):
+        return _EXT_DECIMAL, str(value)
+    return None
+
+
+def _from_ext(code: int, text: str) -> Any:
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(text)
+    if code == _EXT_DATE:
+        return date.fromisoformat(text)
+    if code == _EXT_DECIMAL:
+        return Decimal(text)
+    raise CodecError(f"Unknown extension type {code}")
+
+
+def _msgpack_default(value: Any):
+    ext = _to_ext(value)
+    if ext is not None:
+        return msgpack.ExtType(ext[0], ext[1].encode())
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    return _from_ext(code, data.decode())
+
+
+def _json_default(value: Any):
+    ext = _to_ext(value)
+    if ext is not None:
+        return {_JSON_EXT_KEY: ext[0], "v": ext[1]}
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _json_object_hook(obj: dict):
+    if len(obj) == 2 and _JSON_EXT_KEY in obj and "v" in obj:
+        return _from_ext(obj[_JSON_EXT_KEY], obj["v"])
+    return obj
+
+
+class CacheCodec:
+    """
+    Encode and decode cache values.
+
+    Zstd contexts are not thread-safe, so each thread keeps its own pair.
+    """
+
+    def __init__(self, compression_threshold: int = 1024, compression_level: int = 3, use_msgpack: bool = True):
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.format = FORMAT_MSGPACK if use_msgpack and MSGPACK_AVAILABLE else FORMAT_JSON
+        self._local = threading.local()
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        return compressor
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def encode(self, value: Any) -> bytes:
+        if self.format == FORMAT_MSGPACK:
+            body = msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        else:
+            body = json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+        flags = self.format
+        if ZSTD_AVAILABLE and self.compression_threshold and len(body) >= self.compression_threshold:
+            compressed = self._compressor().compress(body)
+            if len(compressed) < len(body):
+                body = compressed
+                flags |= FLAG_ZSTD
+        return bytes((CODEC_VERSION, flags)) + body
+
+    def decode(self, payload: bytes) -> Any:
+        if len(payload) < 2 or payload[0] != CODEC_VERSION:
+            raise CodecError("Unknown cache payload version")
+        flags = payload[1]
+        body = payload[2:]
+        try:
+            if flags & FLAG_ZSTD:
+                if not ZSTD_AVAILABLE:
+                    raise CodecError("Payload is zstd-compressed but zstandard is not installed")
+                body = self._decompressor().decompress(body)
+
+            value_format = flags & _FORMAT_MASK
+            if value_format == FORMAT_MSGPACK:
+                if not MSGPACK_AVAILABLE:
+                    raise CodecError("Payload is msgpack-encoded but msgpack is not installed")
+                return msgpack.unpackb(body, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+            if value_format == FORMAT_JSON:
+                return json.loads(body, object_hook=_json_object_hook)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Corrupt cache payload: {e}") from e
+        raise CodecError(f"Unknown cache payload format {value_format}")
@@ -2,64 +2,168 @@
 Redis Caching Service for Database Optimization
 Implements intelligent caching strategies with TTL management and cache invalidation
 """
-import json
 import hashlib
-import os
-from typing import Any, Optional, List, Dict, Union
-from datetime import datetime, timedelta
-import redis
+import inspect
+import time
+from typing import Any, Callable, Optional, List, Dict, Iterable, Mapping, Tuple
 from loguru import logger
 from functools import wraps
-import pickle
 import asyncio
 from sqlalchemy.orm import Session
 
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    RedisConnectionError = RedisTimeoutError = None
+    REDIS_AVAILABLE = False
+
+from config.settings import get_settings
+from src.backend.caching.single_flight import SingleFlight
+from src.backend.services.cache_codec import CacheCodec, CodecError
+
+# Errors that mean the server is unreachable, as opposed to a rejected command
+_UNAVAILABLE_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError) if REDIS_AVAILABLE else (OSError,)
+
+
+class CircuitBreaker:
+    """
+    Negative-availability cache for the Redis connection.
+
+    After ``failure_threshold`` consecutive connection failures the breaker
+    opens and operations skip Redis without any network I/O for
+    ``cooldown_seconds``. The first operation after the cooldown is a trial:
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 2, cooldown_seconds: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None and self._clock() - self.opened_at < self.cooldown_seconds
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if self.is_open else "half_open"
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        # A failed trial in half-open state reopens immediately
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = self._clock()
+
 
 class CacheService:
     """
     Intelligent Redis caching service with multiple cache strategies
+
+    Uses the asyncio Redis client over a connection pool, so cache calls never
+    block the event loop. Availability is tracked by a circuit breaker instead
+    of a PING before every operation.
+
+    Entries can be written with tags (``workspace:5``, ``user:3``); each tag
+    is a Redis set of the keys written under it, so invalidation deletes
+    exactly those keys without scanning the keyspace.
     """
-    
-    def __init__(self, redis_url: str = None):
-        """Initialize Redis connection with retry logic"""
-        try:
-            # Get Redis URL from environment or use default
-            if redis_url is None:
-                redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=False,  # Use bytes for pickle serialization
+
+    # Tag sets outlive the entries they list; keep this above the longest entry TTL
+    TAG_TTL = 3600
+    SCAN_COUNT = 500
+    DELETE_CHUNK = 1000
+    
+    def __init__(
+        self,
+        redis_url: str = None,
+        max_connections: Optional[int] = None,
+        codec: Optional[CacheCodec] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        settings = get_settings()
+        self.redis_url = redis_url or settings.redis_url
+        self.max_connections = max_connections or settings.redis_max_connections
+        self.codec = codec or CacheCodec(compression_threshold=settings.cache_compression_threshold)
+        self.breaker = breaker or CircuitBreaker(cooldown_seconds=settings.redis_circuit_cooldown_seconds)
+        self.enabled = REDIS_AVAILABLE
+
+        # The asyncio pool belongs to the event loop it was created on
+        self._client = None
+        self._client_loop = None
+
+        # Cache metrics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.decode_errors = 0
+        self.encode_errors = 0
+        self.hit_latency_ms_total = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.values_written = 0
+        self.invalidations = 0
+        self.keys_invalidated = 0
+        self.last_invalidation_keys = 0
+        self.pattern_scans = 0
+
+        # Concurrent cache_result misses for one key share a single computation
+        self.single_flight = SingleFlight()
+
+        if not self.enabled:
+            logger.info("redis package not installed, cache service disabled")
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            pool = aioredis.ConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
                 socket_timeout=5,
                 socket_connect_timeout=5,
                 socket_keepalive=True,
-                socket_keepalive_options={},
                 retry_on_timeout=True,
                 health_check_interval=30
             )
-            
-            # Test connection
-            self.redis_client.ping()
-            logger.info("Redis cache service initialized successfully")
-            
-            # Cache metrics
-            self.cache_hits = 0
-            self.cache_misses = 0
-            
-        except Exception as e:
-            logger.info(f"Redis not available, using in-memory cache fallback: {e}")
-            self.redis_client = None
-            self._memory_cache = {}
-    
+            self._client = aioredis.Redis(connection_pool=pool)
+            self._client_loop = loop
+        return self._client
+
     def _is_available(self) -> bool:
-        """Check if Redis is available"""
-        if not self.redis_client:
-            return False
+        """Check if Redis is available (no network round-trip)"""
+        return self.enabled and not self.breaker.is_open
+
+    async def _execute(self, operation, default: Any, action: str):
+        """Run ``operation(client)`` unless the breaker is open, feeding its outcome back to the breaker"""
+        if not self._is_available():
+            return default
         try:
-            self.redis_client.ping()
-            return True
-        except:
-            return False
+            result = await operation(self._get_client())
+        except _UNAVAILABLE_ERRORS as e:
+            was_open = self.breaker.opened_at is not None
+            self.breaker.record_failure()
+            if self.breaker.opened_at is not None and not was_open:
+                logger.info(f"Redis unavailable, skipping cache for {self.breaker.cooldown_seconds}s: {e}")
+            return default
+        except Exception as e:
+            # The server answered (e.g. a rejected command); caching errors never reach callers
+            self.breaker.record_success()
+            logger.error(f"Cache {action} error: {e}")
+            return default
+        self.breaker.record_success()
+        return result
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate consistent cache key from parameters"""
@@ -68,67 +172,189 @@ class CacheService:
     
     def _serialize(self, data: Any) -> bytes:
         """Serialize data for Redis storage"""
-        return pickle.dumps(data)
+        payload = self.codec.encode(data)
+        self.bytes_written += len(payload)
+        self.values_written += 1
+        return payload
+
+    def _serialize_all(self, mapping: Mapping[str, Any]) -> Optional[List[Tuple[str, bytes]]]:
+        """(key, payload) pairs, or None if a value cannot be encoded; encoding errors never reach callers"""
+        try:
+            return [(key, self._serialize(value)) for key, value in mapping.items()]
+        except (TypeError, ValueError, OverflowError) as e:
+            self.encode_errors += 1
+            logger.error(f"Cache set skipped, value cannot be encoded: {e}")
+            return None
     
     def _deserialize(self, data: bytes) -> Any:
-        """Deserialize data from Redis"""
-        return pickle.loads(data)
+        """Deserialize data from Redis; raises CodecError for unreadable payloads"""
+        self.bytes_read += len(data)
+        return self.codec.decode(data)
+
+    def _read(self, data: Optional[bytes], started: float) -> Optional[Any]:
+        """Decode one fetched value and count it as a hit or miss"""
+        if data is not None:
+            try:
+                value = self._deserialize(data)
+            except CodecError as e:
+                self.decode_errors += 1
+                logger.debug(f"Discarding unreadable cache payload: {e}")
+            else:
+                self.cache_hits += 1
+                self.hit_latency_ms_total += (time.perf_counter() - started) * 1000
+                return value
+        self.cache_misses += 1
+        return None
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if not self._is_available():
-            return None
-        
-        try:
-            data = self.redis_client.get(key)
-            if data:
-                self.cache_hits += 1
-                return self._deserialize(data)
-            else:
-                self.cache_misses += 1
-                return None
-        except Exception as e:
-            logger.error(f"Cache get error: {e}")
-            return None
-    
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set value in cache with TTL"""
+        started = time.perf_counter()
+        data = await self._execute(lambda client: client.get(key), None, "get")
+        return self._read(data, started)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Fetch several keys in one MGET round-trip; only hits are returned"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        started = time.perf_counter()
+        values = await self._execute(lambda client: client.mget(keys), None, "get_many")
+        if values is None:
+            self.cache_misses += len(keys)
+            return {}
+        found = {}
+        for key, data in zip(keys, values):
+            value = self._read(data, started)
+            if value is not None:
+                found[key] = value
+        return found
+    
+    async def set(self, key: str, value: Any, ttl: int = 300, tags: Iterable[str] = ()) -> bool:
+        """Set value in cache with TTL, registering the key under each tag"""
+        if tags:
+            return await self.set_many({key: value}, ttl, tags)
         if not self._is_available():
             return False
-        
-        try:
-            serialized_value = self._serialize(value)
-            self.redis_client.setex(key, ttl, serialized_value)
-            return True
-        except Exception as e:
-            logger.error(f"Cache set error: {e}")
+        payloads = self._serialize_all({key: value})
+        if payloads is None:
             return False
-    
-    async def delete(self, key: str) -> bool:
-        """Delete key from cache"""
-        if not self._is_available():
+        serialized_value = payloads[0][1]
+        result = await self._execute(lambda client: client.set(key, serialized_value, ex=ttl), None, "set")
+        return bool(result)
+
+    async def set_many(
+        self,
+        mapping: Mapping[str, Any],
+        ttl: int = 300,
+        tags: Iterable[str] = (),
+        key_tags: Optional[Mapping[str, Iterable[str]]] = None
+    ) -> bool:
+        """
+        Store several values with the same TTL in one pipelined round-trip.
+        ``tags`` apply to every key, ``key_tags`` to individual keys.
+        """
+        if not mapping or not self._is_available():
             return False
-        
-        try:
-            self.redis_client.delete(key)
-            return True
-        except Exception as e:
-            logger.error(f"Cache delete error: {e}")
+        payloads = self._serialize_all(mapping)
+        if payloads is None:
             return False
+        members: Dict[str, List[str]] = {self._tag_key(tag): list(mapping) for tag in tags}
+        for key, extra_tags in (key_tags or {}).items():
+            for tag in extra_tags:
+                members.setdefault(self._tag_key(tag), []).append(key)
+
+        async def write(client):
+            pipe = client.pipeline(transaction=False)
+            for key, payload in payloads:
+                pipe.set(key, payload, ex=ttl)
+            for tag_key, keys in members.items():
+                pipe.sadd(tag_key, *keys)
+                pipe.expire(tag_key, max(ttl, self.TAG_TTL))
+            return await pipe.execute()
+
+        results = await self._execute(write, None, "set_many")
+        return bool(results) and all(results[:len(payloads)])
     
-    async def delete_pattern(self, pattern: str) -> int:
-        """Delete keys matching pattern"""
-        if not self._is_available():
+    async def delete(self, key: str) -> bool:
+        """Delete key from cache"""
+        result = await self._execute(lambda client: client.delete(key), None, "delete")
+        return result is not None
+
+    def _tag_key(self, tag: str) -> str:
+        return f"ordnungshub:tag:{tag}"
+
+    def _record_invalidation(self, keys_removed: int):
+        self.invalidations += 1
+        self.keys_invalidated += keys_removed
+        self.last_invalidation_keys = keys_removed
+
+    async def _unlink(self, client, keys: List) -> int:
+        """UNLINK keys in chunks within one pipeline; memory is reclaimed off the main Redis thread"""
+        if not keys:
             return 0
-        
-        try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
+        pipe = client.pipeline(transaction=False)
+        for start in range(0, len(keys), self.DELETE_CHUNK):
+            pipe.unlink(*keys[start:start + self.DELETE_CHUNK])
+        return sum(await pipe.execute())
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every key registered under any of ``tags``.
+
+        The tag sets are read and dropped atomically in one MULTI, so a key
+        tagged concurrently lands in a fresh set instead of being lost. Returns
+        the number of cache entries removed.
+        """
+        tag_keys = [self._tag_key(tag) for tag in dict.fromkeys(tags)]
+        if not tag_keys:
             return 0
-        except Exception as e:
-            logger.error(f"Cache delete pattern error: {e}")
+
+        async def invalidate(client):
+            pipe = client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            results = await pipe.execute()
+            members = set().union(*results[:-1])
+            return await self._unlink(client, list(members))
+
+        removed = await self._execute(invalidate, None, "invalidate tags")
+        if removed is None:
             return 0
+        self._record_invalidation(removed)
+        return removed
+    
+    async def delete_pattern(self, pattern: str) -> int:
+        """
+        Delete keys matching pattern.
+
+        Walks the keyspace with incremental SCAN rather than KEYS, which blocks
+        the whole server for O(keyspace). Prefer invalidate_tags; this covers
+        untagged keys and bulk maintenance only.
+        """
+        async def delete_matching(client):
+            deleted = 0
+            batch = []
+            async for key in client.scan_iter(match=pattern, count=self.SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= self.SCAN_COUNT:
+                    deleted += await self._unlink(client, batch)
+                    batch = []
+            return deleted + await self._unlink(client, batch)
+
+        removed = await self._execute(delete_matching, None, "delete pattern")
+        if removed is None:
+            return 0
+        self.pattern_scans += 1
+        self._record_invalidation(removed)
+        return removed
+
+    async def close(self):
+        """Release the pool's connections"""
+        client, self._client, self._client_loop = self._client, None, None
+        if client is not None:
+            close = getattr(client, "aclose", None) or client.close
+            await close()
     
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics"""
@@ -140,20 +366,31 @@ class CacheService:
             "cache_misses": self.cache_misses,
             "hit_rate_percent": round(hit_rate, 2),
             "total_requests": total_requests,
+            "avg_hit_latency_ms": round(self.hit_latency_ms_total / self.cache_hits, 3) if self.cache_hits else 0.0,
+            "avg_payload_bytes": round(self.bytes_written / self.values_written) if self.values_written else 0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "decode_errors": self.decode_errors,
+            "encode_errors": self.encode_errors,
+            "invalidations": self.invalidations,
+            "keys_invalidated": self.keys_invalidated,
+            "avg_keys_per_invalidation": round(self.keys_invalidated / self.invalidations, 2) if self.invalidations else 0.0,
+            "last_invalidation_keys": self.last_invalidation_keys,
+            "pattern_scans": self.pattern_scans,
+            "coalesced_requests": self.single_flight.coalesced,
+            "computations": self.single_flight.calls,
+            "circuit_state": self.breaker.state,
             "is_available": self._is_available()
         }
         
-        if self._is_available():
-            try:
-                info = self.redis_client.info()
-                stats.update({
-                    "used_memory": info.get("used_memory_human", "N/A"),
-                    "connected_clients": info.get("connected_clients", 0),
-                    "keyspace_hits": info.get("keyspace_hits", 0),
-                    "keyspace_misses": info.get("keyspace_misses", 0)
-                })
-            except:
-                pass
+        info = await self._execute(lambda client: client.info(), None, "info")
+        if info:
+            stats.update({
+                "used_memory": info.get("used_memory_human", "N/A"),
+                "connected_clients": info.get("connected_clients", 0),
+                "keyspace_hits": info.get("keyspace_hits", 0),
+                "keyspace_misses": info.get("keyspace_misses", 0)
+            })
         
         return stats
 
@@ -162,6 +399,19 @@ class CacheService:
 cache_service = CacheService()
 
 
+# Tag names shared by writers and invalidators
+def workspace_tag(workspace_id: int) -> str:
+    return f"workspace:{workspace_id}"
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def file_tag(file_id: int) -> str:
+    return f"file:{file_id}"
+
+
 class WorkspaceCacheService:
     """
     Specialized caching for workspace data with 10-minute TTL
@@ -179,7 +429,7 @@ class WorkspaceCacheService:
     async def set_workspace(workspace_id: int, workspace_data: Dict) -> bool:
         """Cache workspace data"""
         key = cache_service._generate_key("workspace", workspace_id=workspace_id)
-        return await cache_service.set(key, workspace_data, WorkspaceCacheService.TTL)
+        return await cache_service.set(key, workspace_data, WorkspaceCacheService.TTL, tags=[workspace_tag(workspace_id)])
     
     @staticmethod
     async def get_user_workspaces(user_id: int) -> Optional[List[Dict]]:
@@ -191,23 +441,18 @@ class WorkspaceCacheService:
     async def set_user_workspaces(user_id: int, workspaces: List[Dict]) -> bool:
         """Cache user workspaces"""
         key = cache_service._generate_key("user_workspaces", user_id=user_id)
-        return await cache_service.set(key, workspaces, WorkspaceCacheService.TTL)
+        tags = [user_tag(user_id), f"user_workspaces:{user_id}"]
+        return await cache_service.set(key, workspaces, WorkspaceCacheService.TTL, tags=tags)
     
     @staticmethod
-    async def invalidate_workspace(workspace_id: int) -> None:
+    async def invalidate_workspace(workspace_id: int) -> int:
         """Invalidate workspace cache"""
-        patterns = [
-            f"ordnungshub:*workspace_id:{workspace_id}*",
-            f"ordnungshub:*workspace:{workspace_id}*"
-        ]
-        for pattern in patterns:
-            await cache_service.delete_pattern(pattern)
+        return await cache_service.invalidate_tags(workspace_tag(workspace_id))
     
     @staticmethod
-    async def invalidate_user_workspaces(user_id: int) -> None:
+    async def invalidate_user_workspaces(user_id: int) -> int:
         """Invalidate user workspace cache"""
-        pattern = f"ordnungshub:*user_workspaces*user_id:{user_id}*"
-        await cache_service.delete_pattern(pattern)
+        return await cache_service.invalidate_tags(f"user_workspaces:{user_id}")
 
 
 class FileMetadataCacheService:
@@ -227,7 +472,25 @@ class FileMetadataCacheService:
     async def set_file_metadata(file_id: int, file_data: Dict) -> bool:
         """Cache file metadata"""
         key = cache_service._generate_key("file_metadata", file_id=file_id)
-        return await cache_service.set(key, file_data, FileMetadataCacheService.TTL)
+        return await cache_service.set(key, file_data, FileMetadataCacheService.TTL, tags=[file_tag(file_id)])
+    
+    @staticmethod
+    async def get_files_metadata(file_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Get cached metadata for several files in one round-trip"""
+        keys = {cache_service._generate_key("file_metadata", file_id=file_id): file_id for file_id in file_ids}
+        found = await cache_service.get_many(keys)
+        return {keys[key]: value for key, value in found.items()}
+    
+    @staticmethod
+    async def set_files_metadata(files: Mapping[int, Dict]) -> bool:
+        """Cache metadata for several files in one round-trip"""
+        mapping = {}
+        key_tags = {}
+        for file_id, file_data in files.items():
+            key = cache_service._generate_key("file_metadata", file_id=file_id)
+            mapping[key] = file_data
+            key_tags[key] = [file_tag(file_id)]
+        return await cache_service.set_many(mapping, FileMetadataCacheService.TTL, key_tags=key_tags)
     
     @staticmethod
     async def get_workspace_files(workspace_id: int, user_id: int) -> Optional[List[Dict]]:
@@ -239,23 +502,18 @@ class FileMetadataCacheService:
     async def set_workspace_files(workspace_id: int, user_id: int, files: List[Dict]) -> bool:
         """Cache workspace files"""
         key = cache_service._generate_key("workspace_files", workspace_id=workspace_id, user_id=user_id)
-        return await cache_service.set(key, files, FileMetadataCacheService.TTL)
+        tags = [workspace_tag(workspace_id), f"workspace_files:{workspace_id}", user_tag(user_id)]
+        return await cache_service.set(key, files, FileMetadataCacheService.TTL, tags=tags)
     
     @staticmethod
-    async def invalidate_file(file_id: int) -> None:
+    async def invalidate_file(file_id: int) -> int:
         """Invalidate file cache"""
-        patterns = [
-            f"ordnungshub:*file_id:{file_id}*",
-            f"ordnungshub:*file_metadata*file_id:{file_id}*"
-        ]
-        for pattern in patterns:
-            await cache_service.delete_pattern(pattern)
+        return await cache_service.invalidate_tags(file_tag(file_id))
     
     @staticmethod
-    async def invalidate_workspace_files(workspace_id: int) -> None:
+    async def invalidate_workspace_files(workspace_id: int) -> int:
         """Invalidate workspace files cache"""
-        pattern = f"ordnungshub:*workspace_files*workspace_id:{workspace_id}*"
-        await cache_service.delete_pattern(pattern)
+        return await cache_service.invalidate_tags(f"workspace_files:{workspace_id}")
 
 
 class UserSessionCacheService:
@@ -275,7 +533,7 @@ class UserSessionCacheService:
     async def set_user_session(user_id: int, session_data: Dict) -> bool:
         """Cache user session data"""
         key = cache_service._generate_key("user_session", user_id=user_id)
-        return await cache_service.set(key, session_data, UserSessionCacheService.TTL)
+        return await cache_service.set(key, session_data, UserSessionCacheService.TTL, tags=[user_tag(user_id)])
     
     @staticmethod
     async def get_user_preferences(user_id: int) -> Optional[Dict]:
@@ -287,13 +545,12 @@ class UserSessionCacheService:
     async def set_user_preferences(user_id: int, preferences: Dict) -> bool:
         """Cache user preferences"""
         key = cache_service._generate_key("user_preferences", user_id=user_id)
-        return await cache_service.set(key, preferences, UserSessionCacheService.TTL)
+        return await cache_service.set(key, preferences, UserSessionCacheService.TTL, tags=[user_tag(user_id)])
     
     @staticmethod
-    async def invalidate_user_session(user_id: int) -> None:
-        """Invalidate user session cache"""
-        pattern = f"ordnungshub:*user_id:{user_id}*"
-        await cache_service.delete_pattern(pattern)
+    async def invalidate_user_session(user_id: int) -> int:
+        """Invalidate every cache entry written for the user"""
+        return await cache_service.invalidate_tags(user_tag(user_id))
 
 
 class QueryCacheService:
@@ -313,7 +570,7 @@ class QueryCacheService:
     async def set_workspace_analytics(workspace_id: int, analytics: Dict) -> bool:
         """Cache workspace analytics"""
         key = cache_service._generate_key("workspace_analytics", workspace_id=workspace_id)
-        return await cache_service.set(key, analytics, QueryCacheService.TTL)
+        return await cache_service.set(key, analytics, QueryCacheService.TTL, tags=[workspace_tag(workspace_id)])
     
     @staticmethod
     async def get_user_dashboard_data(user_id: int) -> Optional[Dict]:
@@ -325,33 +582,47 @@ class QueryCacheService:
     async def set_user_dashboard_data(user_id: int, dashboard_data: Dict) -> bool:
         """Cache user dashboard data"""
         key = cache_service._generate_key("user_dashboard", user_id=user_id)
-        return await cache_service.set(key, dashboard_data, QueryCacheService.TTL)
+        return await cache_service.set(key, dashboard_data, QueryCacheService.TTL, tags=[user_tag(user_id)])
 
 
-def cache_result(ttl: int = 300, key_prefix: str = "generic"):
+def cache_result(ttl: int = 300, key_prefix: str = "generic", tags: Optional[Callable[..., Iterable[str]]] = None):
     """
     Decorator for caching function results
     
     Args:
         ttl: Time to live in seconds
         key_prefix: Prefix for cache key generation
+        tags: Called with the function's arguments by name; returns the tags to
+            store the result under
     """
     def decorator(func):
+        signature = inspect.signature(func)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = cache_service._generate_key(key_prefix, func.__name__, *args, **kwargs)
+            # Key on the call's values only: ``self`` and DB sessions differ per
+            # process and request and would make every key unique
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            key_arguments = {
+                name: value for name, value in arguments.arguments.items()
+                if name != "self" and not isinstance(value, Session)
+            }
+            cache_key = cache_service._generate_key(key_prefix, func.__name__, **key_arguments)
             
             # Try to get from cache
             cached_result = await cache_service.get(cache_key)
             if cached_result is not None:
                 return cached_result
             
-            # Execute function and cache result
-            result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
-            await cache_service.set(cache_key, result, ttl)
+            # Execute function and cache result; concurrent misses await the same run
+            async def compute():
+                result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
+                result_tags = tags(**arguments.arguments) if tags else ()
+                await cache_service.set(cache_key, result, ttl, tags=result_tags)
+                return result
             
-            return result
+            return await cache_service.single_flight.do(cache_key, compute)
         return wrapper
     return decorator
 
@@ -362,25 +633,22 @@ class CacheInvalidationService:
     """
     
     @staticmethod
-    async def invalidate_workspace_related(workspace_id: int) -> None:
-        """Invalidate all workspace-related caches"""
-        await WorkspaceCacheService.invalidate_workspace(workspace_id)
-        await FileMetadataCacheService.invalidate_workspace_files(workspace_id)
-        await cache_service.delete_pattern(f"ordnungshub:*workspace_analytics*workspace_id:{workspace_id}*")
+    async def invalidate_workspace_related(workspace_id: int) -> int:
+        """Invalidate all workspace-related caches (workspace, its files and analytics)"""
+        return await cache_service.invalidate_tags(workspace_tag(workspace_id))
     
     @staticmethod
-    async def invalidate_user_related(user_id: int) -> None:
-        """Invalidate all user-related caches"""
-        await UserSessionCacheService.invalidate_user_session(user_id)
-        await WorkspaceCacheService.invalidate_user_workspaces(user_id)
-        await cache_service.delete_pattern(f"ordnungshub:*user_dashboard*user_id:{user_id}*")
+    async def invalidate_user_related(user_id: int) -> int:
+        """Invalidate all user-related caches (session, workspaces and dashboard)"""
+        return await cache_service.invalidate_tags(user_tag(user_id))
     
     @staticmethod
-    async def invalidate_file_related(file_id: int, workspace_id: int = None) -> None:
+    async def invalidate_file_related(file_id: int, workspace_id: int = None) -> int:
         """Invalidate all file-related caches"""
-        await FileMetadataCacheService.invalidate_file(file_id)
+        tags = [file_tag(file_id)]
         if workspace_id:
-            await FileMetadataCacheService.invalidate_workspace_files(workspace_id)
+            tags.append(f"workspace_files:{workspace_id}")
+        return await cache_service.invalidate_tags(*tags)
     
     @staticmethod
     async def clear_all_cache() -> int:
@@ -0,0 +1,106 @@
+"""
+Micro-batching stage for AI file categorization
+Collects categorization requests from concurrent scan workers and sends them
+to EnhancedAIService.smart_categorize_files in batches, so vectorization and
+model prediction run once per batch instead of once per file
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# (filename, file_path, content_preview, checksum, future)
+_Request = Tuple[str, str, str, Optional[str], asyncio.Future]
+
+
+class CategorizationBatcher:
+    """
+    Single consumer that gathers requests until ``batch_size`` are waiting or
+    ``max_delay`` seconds have passed since the first one, then categorizes
+    them with one call. While a batch runs the next one keeps filling.
+    """
+
+    def __init__(self, ai_service, batch_size: int = 32, max_delay: float = 0.05):
+        self.ai_service = ai_service
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background batching loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def categorize(
+        self,
+        filename: str,
+        file_path: str = "",
+        content_preview: str = "",
+        checksum: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue one file and wait for its categorization"""
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((filename, file_path, content_preview, checksum, future))
+        return await future
+
+    async def close(self):
+        """Categorize everything queued and stop the loop"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        closing = False
+        while not closing:
+            request = await self._queue.get()
+            if request is None:
+                break
+
+            batch = [request]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+
+            await self._categorize_batch(batch)
+
+    async def _categorize_batch(self, batch: List[_Request]):
+        # Callers that timed out have cancelled their futures; skip their files
+        batch = [request for request in batch if not request[4].done()]
+        if not batch:
+            return
+
+        try:
+            results = await self.ai_service.smart_categorize_files(
+                [(filename, file_path, preview) for filename, file_path, preview, _, _ in batch],
+                [checksum for _, _, _, checksum, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Batch categorization of {len(batch)} files failed: {e}")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        for (*_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,140 @@
+"""
+Content-addressed cache for AI file categorization
+Stores the content-derived part of a categorization (text analysis, tags,
+content features, ML predictions) by file checksum, so identical content under
+different paths is only analyzed once
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+CACHE_FORMAT_VERSION = 1
+
+
+class CategorizationCache:
+    """
+    Bounded LRU cache of categorization results keyed by content checksum.
+
+    Each entry records the versions of the models it was computed with; a lookup
+    only hits while those versions are current, and ``invalidate_models`` drops
+    exactly the entries that depended on a retrained model. The cache is kept in
+    memory and snapshotted to a JSON file next to the pickled models.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 10000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, checksum: str, model_versions: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None if missing or stale"""
+        with self._lock:
+            entry = self._entries.get(checksum)
+            if entry is None or any(
+                model_versions.get(model) != version for model, version in entry['models'].items()
+            ):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(checksum)
+            self.hits += 1
+            return json.loads(json.dumps(entry['result']))
+
+    def put(
+        self,
+        checksum: str,
+        result: Dict[str, Any],
+        model_versions: Dict[str, int],
+        models_used: Iterable[str] = ()
+    ):
+        """Store a result with the versions of the models that produced it"""
+        entry = {
+            'models': {model: model_versions[model] for model in models_used},
+            'result': result
+        }
+        with self._lock:
+            self._entries[checksum] = entry
+            self._entries.move_to_end(checksum)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def invalidate_models(self, models: Iterable[str]) -> int:
+        """Drop entries computed with any of the given models; returns the count"""
+        models = set(models)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if models & entry['models'].keys()]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def load(self) -> int:
+        """Load the snapshot written by ``save``; returns the number of entries"""
+        if not self.path or not self.path.exists():
+            return 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') != CACHE_FORMAT_VERSION:
+                return 0
+            with self._lock:
+                # Snapshot is stored oldest first, so insertion order is LRU order
+                self._entries = OrderedDict(
+                    (key, entry) for key, entry in data.get('entries', [])[-self.max_entries:]
+                )
+                self._dirty = False
+            return len(self._entries)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable categorization cache {self.path}: {e}")
+            return 0
+
+    def save(self) -> bool:
+        """Write a snapshot if anything changed since the last save"""
+        if not self.path or not self._dirty:
+            return False
+        with self._lock:
+            data = {'format': CACHE_FORMAT_VERSION, 'entries': list(self._entries.items())}
+            self._dirty = False
+        tmp_path = self.path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Failed to save categorization cache: {e}")
+            self._dirty = True
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
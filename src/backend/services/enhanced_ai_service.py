@@ -4,6 +4,7 @@ Combines rule-based methods with lightweight ML models for better accuracy
 """
 
 import os
+import copy
 import json
 import asyncio
 import hashlib
@@ -11,6 +12,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import pickle
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 try:
@@ -68,7 +70,12 @@ except ImportError:
         return [[0.5 for _ in range(len(Y or X))] for _ in X]
 from loguru import logger
 
+from config.settings import get_settings
 from .ai_service import LocalAIService
+from .categorization_cache import CategorizationCache
+from .similarity_index import SimilarityIndex, SIMILARITY_AVAILABLE, document_from_item, item_from_file
+from src.backend.database.database import ReadSessionLocal
+from src.backend.crud.crud_file import file_metadata as crud_file
 
 
 class EnhancedAIService(LocalAIService):
@@ -92,9 +99,23 @@ class EnhancedAIService(LocalAIService):
         self.category_training_data = []
         self.priority_training_data = []
         
+        # Bumped on every retrain so cached results from older models are not reused
+        self.model_versions = {'category': 0, 'priority': 0}
+        
         # Initialize models
         self._initialize_ml_models()
         
+        # Categorization results for file content, keyed by checksum
+        self.categorization_cache = CategorizationCache(
+            self.model_cache_dir / "categorization_cache.json",
+            max_entries=get_settings().ai_categorization_cache_size
+        )
+        self.categorization_cache.load()
+        
+        # Per-user TF-IDF indexes for find_similar_files, loaded on first use
+        self.similarity_indexes: Dict[int, SimilarityIndex] = {}
+        self._similarity_lock = threading.Lock()
+        
     def _initialize_ml_models(self):
         """Initialize and load ML models"""
         try:
@@ -142,6 +163,11 @@ class EnhancedAIService(LocalAIService):
                 self.file_clusterer = pickle.load(f)
         else:
             self.file_clusterer = KMeans(n_clusters=10, random_state=42)
+        
+        versions_path = self.model_cache_dir / "model_versions.json"
+        if versions_path.exists():
+            with open(versions_path, 'r') as f:
+                self.model_versions.update(json.load(f))
     
     def _save_models(self):
         """Save trained models to disk"""
@@ -157,6 +183,9 @@ class EnhancedAIService(LocalAIService):
                 
             with open(self.model_cache_dir / "file_clusterer.pkl", 'wb') as f:
                 pickle.dump(self.file_clusterer, f)
+            
+            with open(self.model_cache_dir / "model_versions.json", 'w') as f:
+                json.dump(self.model_versions, f)
                 
             logger.info("AI models saved successfully")
         except Exception as e:
@@ -186,69 +215,158 @@ class EnhancedAIService(LocalAIService):
         """ML-based text analysis"""
         if not text or not text.strip():
             return {}
-            
-        result = {}
+        return self._ml_analyze_batch([text])[0]
+    
+    def _ml_analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ML-based analysis of many texts with one transform and one prediction per model"""
+        results: List[Dict[str, Any]] = [{} for _ in texts]
+        if not texts:
+            return results
         
         try:
-            # Vectorize text for ML models
+            # Vectorize all texts into one sparse matrix
             if hasattr(self.text_vectorizer, 'transform'):
-                text_vector = self.text_vectorizer.transform([text])
+                text_vectors = self.text_vectorizer.transform(texts)
                 
                 # ML-based category prediction
                 if hasattr(self.category_classifier, 'predict_proba'):
-                    category_probs = self.category_classifier.predict_proba(text_vector)[0]
-                    categories = self.category_classifier.classes_
-                    
-                    result['ml_category'] = {
-                        'prediction': categories[np.argmax(category_probs)],
-                        'confidence': float(np.max(category_probs)),
-                        'probabilities': {
-                            cat: float(prob) for cat, prob in zip(categories, category_probs)
-                        }
-                    }
+                    self._add_ml_predictions(
+                        results, 'ml_category', self.category_classifier, text_vectors
+                    )
                 
                 # ML-based priority prediction
                 if hasattr(self.priority_classifier, 'predict_proba'):
-                    priority_probs = self.priority_classifier.predict_proba(text_vector)[0]
-                    priorities = self.priority_classifier.classes_
-                    
-                    result['ml_priority'] = {
-                        'prediction': priorities[np.argmax(priority_probs)],
-                        'confidence': float(np.max(priority_probs)),
-                        'probabilities': {
-                            pri: float(prob) for pri, prob in zip(priorities, priority_probs)
-                        }
-                    }
+                    self._add_ml_predictions(
+                        results, 'ml_priority', self.priority_classifier, text_vectors
+                    )
                     
         except Exception as e:
             logger.debug(f"ML analysis failed, using fallback: {e}")
             
-        return result
+        return results
+    
+    def _add_ml_predictions(self, results: List[Dict[str, Any]], key: str, classifier, text_vectors):
+        """Run predict_proba once for the batch and attach each row's prediction"""
+        all_probs = classifier.predict_proba(text_vectors)
+        labels = classifier.classes_
+        for result, probs in zip(results, all_probs):
+            result[key] = {
+                'prediction': labels[np.argmax(probs)],
+                'confidence': float(np.max(probs)),
+                'probabilities': {
+                    label: float(prob) for label, prob in zip(labels, probs)
+                }
+            }
     
     async def smart_categorize_file(
         self, 
         filename: str, 
         file_path: str = "", 
-        content_preview: str = ""
+        content_preview: str = "",
+        checksum: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Smart file categorization using multiple signals
+        
+        With a content checksum the content analysis is served from the
+        categorization cache; filename and path signals are always applied fresh.
         """
-        # Get basic categorization
-        basic_result = await self.categorize_file(filename, content_preview)
+        results = await self.smart_categorize_files(
+            [(filename, file_path, content_preview)], [checksum]
+        )
+        return results[0]
+    
+    async def smart_categorize_files(
+        self,
+        items: List[Tuple[str, str, str]],
+        checksums: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Categorize a batch of (filename, file_path, content_preview) items
         
-        # Enhance with file metadata and ML
+        Content is vectorized as one matrix and each ML model predicts once per
+        batch, so per-file overhead is paid once for the whole batch.
+        """
+        if not items:
+            return []
         loop = asyncio.get_event_loop()
-        enhanced_result = await loop.run_in_executor(
+        return await loop.run_in_executor(
             self.executor,
-            self._smart_categorize_sync,
-            filename,
-            file_path,
-            content_preview,
-            basic_result
+            self._smart_categorize_batch_sync,
+            items,
+            checksums or [None] * len(items)
         )
+    
+    def _smart_categorize_batch_sync(
+        self,
+        items: List[Tuple[str, str, str]],
+        checksums: List[Optional[str]]
+    ) -> List[Dict[str, Any]]:
+        """Synchronous batch categorization"""
+        # Versions at the start, so a retrain finishing meanwhile marks these results stale
+        model_versions = dict(self.model_versions)
         
-        return enhanced_result
+        # Content analysis per distinct content: cached by checksum, otherwise computed once
+        content_results: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[str, Tuple[str, Optional[str]]] = {}
+        content_keys: List[Optional[str]] = []
+        for (_, _, content_preview), checksum in zip(items, checksums):
+            if not content_preview:
+                content_keys.append(None)
+                continue
+            key = checksum or content_preview
+            content_keys.append(key)
+            if key in content_results or key in missing:
+                continue
+            cached = self.categorization_cache.get(checksum, model_versions) if checksum else None
+            if cached is not None:
+                content_results[key] = cached
+            else:
+                missing[key] = (content_preview, checksum)
+        
+        if missing:
+            texts = [content_preview for content_preview, _ in missing.values()]
+            ml_results = self._ml_analyze_batch(texts)
+            for (key, (content_preview, checksum)), ml_analysis in zip(missing.items(), ml_results):
+                content_result = self._analyze_content_sync(content_preview, ml_analysis)
+                content_results[key] = content_result
+                if checksum:
+                    models_used = [
+                        model for model, ml_key in (('category', 'ml_category'), ('priority', 'ml_priority'))
+                        if ml_key in ml_analysis
+                    ]
+                    self.categorization_cache.put(checksum, content_result, model_versions, models_used)
+        
+        results = []
+        for (filename, file_path, _), key in zip(items, content_keys):
+            content_result = content_results.get(key) if key else None
+            
+            # Filename categorization, then content signals on top,
+            # in the same order categorize_file applies them
+            result = self._categorize_by_filename(filename)
+            if content_result:
+                result['subcategory'] = content_result['subcategory']
+                result['tags'] = list(content_result['tags'])
+                result['priority'] = content_result['priority']
+            
+            result = self._smart_categorize_sync(filename, file_path, "", result)
+            if content_result:
+                result.update(copy.deepcopy(content_result['features']))
+            results.append(result)
+        
+        return results
+    
+    def _analyze_content_sync(self, content_preview: str, ml_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Content-dependent part of a categorization, as stored in the cache"""
+        analysis = self._analyze_text_sync(content_preview)
+        features = self._extract_content_features(content_preview)
+        features.update(ml_analysis)
+        return {
+            'subcategory': analysis.get('category', 'general'),
+            'tags': self._tags_from_analysis(analysis),
+            'priority': analysis.get('priority', 'medium'),
+            'features': features
+        }
     
     def _smart_categorize_sync(
         self, 
@@ -350,13 +468,18 @@ class EnhancedAIService(LocalAIService):
     async def find_similar_files(
         self, 
         target_text: str, 
-        file_database: List[Dict[str, Any]], 
-        limit: int = 5
+        file_database: Optional[List[Dict[str, Any]]] = None, 
+        limit: int = 5,
+        user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Find files similar to the target based on content similarity
+        
+        Files in file_database are searched through a throwaway index; without
+        any, the persistent similarity index of user_id is queried. Request
+        data never goes into a persistent index, only the scanner feeds those.
         """
-        if not file_database or not target_text:
+        if not target_text or (user_id is None and not file_database):
             return []
             
         loop = asyncio.get_event_loop()
@@ -364,8 +487,9 @@ class EnhancedAIService(LocalAIService):
             self.executor,
             self._find_similar_sync,
             target_text,
-            file_database,
-            limit
+            file_database or [],
+            limit,
+            user_id
         )
         
         return similar_files
@@ -374,48 +498,98 @@ class EnhancedAIService(LocalAIService):
         self, 
         target_text: str, 
         file_database: List[Dict[str, Any]], 
-        limit: int
+        limit: int,
+        user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Synchronous similarity search"""
+        if not SIMILARITY_AVAILABLE:
+            return []
+        
         try:
-            # Prepare texts for comparison
-            texts = [target_text] + [
-                f"{item.get('filename', '')} {item.get('description', '')}"
-                for item in file_database
-            ]
-            
-            # Vectorize texts
-            if not hasattr(self.text_vectorizer, 'fit_transform'):
-                return []
-                
-            if len(texts) < 2:
-                return []
-                
-            # Fit vectorizer if not already fitted
-            text_vectors = self.text_vectorizer.fit_transform(texts)
-            
-            # Calculate similarities
-            target_vector = text_vectors[0]
-            file_vectors = text_vectors[1:]
-            
-            similarities = cosine_similarity(target_vector, file_vectors)[0]
-            
-            # Get top similar files
-            similar_indices = np.argsort(similarities)[::-1][:limit]
+            if file_database:
+                index = SimilarityIndex()
+                index.add(document_from_item(item) for item in file_database)
+            else:
+                index = self.get_similarity_index(user_id)
             
             result = []
-            for idx in similar_indices:
-                if similarities[idx] > 0.1:  # Minimum similarity threshold
-                    file_info = file_database[idx].copy()
-                    file_info['similarity_score'] = float(similarities[idx])
-                    result.append(file_info)
-            
+            for file_info, score in index.query(target_text, limit):
+                file_info = file_info.copy()
+                file_info['similarity_score'] = score
+                result.append(file_info)
             return result
             
         except Exception as e:
             logger.debug(f"Similarity search failed: {e}")
             return []
     
+    def get_similarity_index(self, user_id: int) -> SimilarityIndex:
+        """
+        The user's similarity index, loaded from disk on first use. Without a
+        saved index it is built from the files already in the catalog.
+        """
+        with self._similarity_lock:
+            index = self.similarity_indexes.get(user_id)
+            if index is None:
+                index = SimilarityIndex.load(self._similarity_index_path(user_id))
+                if index is None:
+                    index = self._build_similarity_index(user_id)
+                    if index is None:
+                        return SimilarityIndex()  # retried on the next call
+                self.similarity_indexes[user_id] = index
+            return index
+    
+    def _build_similarity_index(self, user_id: int) -> Optional[SimilarityIndex]:
+        """Index a user's stored files and save the result; None if they cannot be read"""
+        index = SimilarityIndex()
+        db = ReadSessionLocal()
+        try:
+            index.add(
+                document_from_item(item_from_file(record))
+                for record in crud_file.iter_by_user(db, user_id=user_id)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to build similarity index for user {user_id}: {e}")
+            return None
+        finally:
+            db.close()
+        
+        if len(index):
+            index.save(self._similarity_index_path(user_id))
+            logger.info(f"Built similarity index for user {user_id} from {len(index)} stored files")
+        return index
+    
+    async def update_similarity_index(
+        self,
+        user_id: int,
+        files: List[Dict[str, Any]],
+        removed_paths: Optional[List[str]] = None,
+        removed_directories: Optional[List[str]] = None
+    ) -> int:
+        """
+        Incrementally add or replace files in a user's similarity index and drop
+        deleted ones. Files use the find_similar_files shape (file_path,
+        filename, description). Returns the number of changed documents.
+        """
+        if not SIMILARITY_AVAILABLE:
+            return 0
+        
+        def update_sync():
+            index = self.get_similarity_index(user_id)
+            changed = index.add(document_from_item(item) for item in files)
+            changed += index.remove(removed_paths or [])
+            for directory in removed_directories or []:
+                changed += index.remove_under(directory)
+            if changed:
+                index.save(self._similarity_index_path(user_id))
+            return changed
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, update_sync)
+    
+    def _similarity_index_path(self, user_id: int) -> Path:
+        return self.model_cache_dir / "similarity" / f"user_{user_id}.pkl"
+    
     async def suggest_workspace_organization(
         self, 
         files: List[Dict[str, Any]]
@@ -537,6 +711,8 @@ class EnhancedAIService(LocalAIService):
     def _retrain_models_sync(self):
         """Synchronous model retraining"""
         try:
+            retrained = set()
+            
             if len(self.category_training_data) >= 10:
                 texts = [item['text'] for item in self.category_training_data]
                 categories = [item['category'] for item in self.category_training_data]
@@ -544,6 +720,8 @@ class EnhancedAIService(LocalAIService):
                 # Retrain vectorizer and classifier
                 text_vectors = self.text_vectorizer.fit_transform(texts)
                 self.category_classifier.fit(text_vectors, categories)
+                # A refitted vectorizer changes the features every classifier sees
+                retrained.update(('category', 'priority'))
                 
             if len(self.priority_training_data) >= 10:
                 texts = [item['text'] for item in self.priority_training_data]
@@ -551,9 +729,18 @@ class EnhancedAIService(LocalAIService):
                 
                 text_vectors = self.text_vectorizer.transform(texts)
                 self.priority_classifier.fit(text_vectors, priorities)
+                retrained.add('priority')
+            
+            # Only cached results that used a retrained model become stale
+            for model in retrained:
+                self.model_versions[model] += 1
+            if retrained:
+                invalidated = self.categorization_cache.invalidate_models(retrained)
+                logger.info(f"Invalidated {invalidated} cached categorizations after retraining {sorted(retrained)}")
             
             # Save updated models
             self._save_models()
+            self.categorization_cache.save()
             logger.info("AI models retrained successfully")
             
         except Exception as e:
@@ -576,6 +763,8 @@ class EnhancedAIService(LocalAIService):
                 'category_samples': len(self.category_training_data),
                 'priority_samples': len(self.priority_training_data)
             },
+            'model_versions': dict(self.model_versions),
+            'categorization_cache': self.categorization_cache.get_stats(),
             'capabilities': base_status['capabilities'] + [
                 'ml_categorization',
                 'similarity_search',
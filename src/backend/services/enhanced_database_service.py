@@ -16,7 +16,9 @@ from src.backend.services.cache_service import (
     UserSessionCacheService,
     QueryCacheService,
     CacheInvalidationService,
-    cache_result
+    cache_result,
+    user_tag,
+    workspace_tag
 )
 from src.backend.services.db_performance_monitor import (
     db_monitor, 
@@ -214,7 +216,8 @@ class EnhancedDatabaseService:
     
     # Analytics and Aggregations with Caching
     
-    @cache_result(ttl=900, key_prefix="workspace_analytics")  # 15-minute cache
+    @cache_result(ttl=900, key_prefix="workspace_analytics",
+                  tags=lambda workspace_id, **_: [workspace_tag(workspace_id)])  # 15-minute cache
     async def get_workspace_analytics(self, workspace_id: int, user_id: int, db: Session) -> Dict[str, Any]:
         """Get workspace analytics with intelligent caching"""
         with time_query(f"get_workspace_analytics:{workspace_id}"):
@@ -259,7 +262,8 @@ class EnhancedDatabaseService:
         
         return analytics
     
-    @cache_result(ttl=900, key_prefix="user_dashboard")  # 15-minute cache
+    @cache_result(ttl=900, key_prefix="user_dashboard",
+                  tags=lambda user_id, **_: [user_tag(user_id)])  # 15-minute cache
     async def get_user_dashboard_data(self, user_id: int, db: Session) -> Dict[str, Any]:
         """Get user dashboard data with caching"""
         with time_query(f"get_user_dashboard:{user_id}"):
@@ -0,0 +1,140 @@
+"""
+Event Trigger Index
+
+In-memory index of enabled EVENT workflow triggers keyed by event type and by
+(event type, workspace). Each trigger's condition list is compiled once into
+a predicate, so emitting an event only touches the triggers registered for
+that event type and never hits the database unless one of them fires.
+"""
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+Predicate = Callable[[Dict], bool]
+
+
+def _always(event_data: Dict) -> bool:
+    return True
+
+
+def _contains(event_value: Any, value: Any) -> bool:
+    return value in str(event_value)
+
+
+# Operator -> test that must hold for the condition to pass
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'equals': operator.eq,
+    'not_equals': operator.ne,
+    'contains': _contains,
+    'greater_than': operator.gt,
+    'less_than': operator.lt,
+}
+
+
+def _compile_condition(condition: Dict) -> Predicate:
+    field = condition.get('field')
+    value = condition.get('value')
+    test = _OPERATORS.get(condition.get('operator'))
+
+    if test is None:
+        # Unknown operators only require the field to be present
+        return lambda event_data: field in event_data
+
+    def check(event_data: Dict) -> bool:
+        if field not in event_data:
+            return False
+        try:
+            return test(event_data[field], value)
+        except TypeError:
+            # e.g. comparing a string field against a numeric threshold
+            return False
+    return check
+
+
+def compile_conditions(conditions: Optional[List[Dict]]) -> Predicate:
+    """Compile a trigger's condition list into a single predicate over event data"""
+    checks = tuple(_compile_condition(condition) for condition in conditions or [])
+    if not checks:
+        return _always
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(event_data: Dict) -> bool:
+        for check in checks:
+            if not check(event_data):
+                return False
+        return True
+    return check_all
+
+
+@dataclass
+class IndexedTrigger:
+    trigger_id: int
+    workflow_id: int
+    workspace_id: Optional[int]
+    event_type: str
+    predicate: Predicate
+
+
+class EventTriggerIndex:
+    """Enabled event triggers bucketed by event type and by (event type, workspace)"""
+
+    def __init__(self):
+        self._triggers: Dict[int, IndexedTrigger] = {}
+        self._by_type: Dict[str, Dict[int, IndexedTrigger]] = {}
+        self._by_workspace: Dict[Tuple[str, Optional[int]], Dict[int, IndexedTrigger]] = {}
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def __contains__(self, trigger_id: int) -> bool:
+        return trigger_id in self._triggers
+
+    def upsert(self, trigger_id: int, workflow_id: int, workspace_id: Optional[int],
+               config: Optional[Dict], conditions: Optional[List[Dict]]) -> Optional[IndexedTrigger]:
+        """Index a trigger, replacing any previous version; triggers without an event type are dropped"""
+        self.remove(trigger_id)
+        event_type = (config or {}).get('event_type')
+        if not event_type:
+            return None
+
+        trigger = IndexedTrigger(trigger_id, workflow_id, workspace_id, event_type, compile_conditions(conditions))
+        self._triggers[trigger_id] = trigger
+        self._by_type.setdefault(event_type, {})[trigger_id] = trigger
+        self._by_workspace.setdefault((event_type, workspace_id), {})[trigger_id] = trigger
+        return trigger
+
+    def remove(self, trigger_id: int) -> bool:
+        trigger = self._triggers.pop(trigger_id, None)
+        if trigger is None:
+            return False
+        self._discard(self._by_type, trigger.event_type, trigger_id)
+        self._discard(self._by_workspace, (trigger.event_type, trigger.workspace_id), trigger_id)
+        return True
+
+    def replace_all(self, rows: Iterable[Tuple[int, int, Optional[int], Optional[Dict], Optional[List[Dict]]]]):
+        """Rebuild the index from (trigger_id, workflow_id, workspace_id, config, conditions) rows"""
+        self._triggers.clear()
+        self._by_type.clear()
+        self._by_workspace.clear()
+        for row in rows:
+            self.upsert(*row)
+
+    def match(self, event_type: str, event_data: Dict, workspace_id: Optional[int] = None) -> List[IndexedTrigger]:
+        """Triggers for ``event_type`` (in ``workspace_id`` when given) whose conditions hold"""
+        if workspace_id:
+            bucket = self._by_workspace.get((event_type, workspace_id))
+        else:
+            bucket = self._by_type.get(event_type)
+        if not bucket:
+            return []
+        return [trigger for trigger in list(bucket.values()) if trigger.predicate(event_data)]
+
+    @staticmethod
+    def _discard(buckets: Dict, key: Any, trigger_id: int):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(trigger_id, None)
+            if not bucket:
+                del buckets[key]
@@ -11,6 +11,7 @@ from typing import List, Dict, Any, Optional, Union, Tuple
 from datetime import datetime
 from pathlib import Path
 import json
+import heapq
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import zipfile
@@ -91,14 +92,13 @@ class FileManagerService:
         # Get all scanned files from database
         db = SessionLocal()
         try:
-            files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
+            files = crud_file.iter_by_user(db, user_id=user_id, directory=source_directory)
             
             # Group files by AI-determined category
             category_groups = defaultdict(list)
             for file_record in files:
-                if file_record.file_path.startswith(source_directory):
-                    category = file_record.ai_category or 'uncategorized'
-                    category_groups[category].append(file_record)
+                category = file_record.ai_category or 'uncategorized'
+                category_groups[category].append(file_record)
             
             # Create category directories and organize files
             organized_stats = {
@@ -285,24 +285,22 @@ class FileManagerService:
         """
         db = SessionLocal()
         try:
-            # Get all files for user
-            if directory:
-                files = [
-                    f for f in crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
-                    if f.file_path.startswith(directory)
-                ]
-            else:
-                files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
-            
-            # Group files by checksum
+            # Stream all files for user; only small summaries are kept in memory
             checksum_groups = defaultdict(list)
             no_checksum_files = []
+            no_checksum_count = 0
+            total_files = 0
             
-            for file_record in files:
+            for file_record in crud_file.iter_by_user(db, user_id=user_id, directory=directory):
+                total_files += 1
                 if file_record.checksum:
-                    checksum_groups[file_record.checksum].append(file_record)
+                    checksum_groups[file_record.checksum].append(
+                        (file_record.file_path, file_record.file_size, file_record.id)
+                    )
                 else:
-                    no_checksum_files.append(file_record)
+                    no_checksum_count += 1
+                    if len(no_checksum_files) < 100:  # Limit to 100 files per run
+                        no_checksum_files.append((file_record.file_path, file_record.id))
             
             # Find duplicates
             duplicates = []
@@ -312,28 +310,28 @@ class FileManagerService:
                 if len(file_list) > 1:
                     # Sort by file path to keep the most organized one
                     file_list.sort(key=lambda f: (
-                        'organized' not in f.file_path.lower(),
-                        f.file_path
+                        'organized' not in f[0].lower(),
+                        f[0]
                     ))
                     
-                    original = file_list[0]
+                    original_path, original_size, original_id = file_list[0]
                     duplicate_group = {
                         "checksum": checksum,
                         "original": {
-                            "path": original.file_path,
-                            "size": original.file_size,
-                            "id": original.id
+                            "path": original_path,
+                            "size": original_size,
+                            "id": original_id
                         },
                         "duplicates": []
                     }
                     
-                    for dup in file_list[1:]:
+                    for dup_path, dup_size, dup_id in file_list[1:]:
                         duplicate_group["duplicates"].append({
-                            "path": dup.file_path,
-                            "size": dup.file_size,
-                            "id": dup.id
+                            "path": dup_path,
+                            "size": dup_size,
+                            "id": dup_id
                         })
-                        space_wasted += dup.file_size or 0
+                        space_wasted += dup_size or 0
                     
                     duplicates.append(duplicate_group)
             
@@ -358,30 +356,32 @@ class FileManagerService:
             # Calculate checksums for files without them
             if no_checksum_files:
                 logger.info(f"Calculating checksums for {len(no_checksum_files)} files...")
-                for file_record in no_checksum_files[:100]:  # Limit to 100 files per run
+                for path, file_id in no_checksum_files:
                     try:
-                        file_path = Path(file_record.file_path)
+                        file_path = Path(path)
                         if file_path.exists() and file_path.stat().st_size < 100 * 1024 * 1024:  # < 100MB
                             checksum = await self._calculate_file_checksum(file_path)
-                            crud_file.update(
-                                db, 
-                                db_obj=file_record,
-                                obj_in={"checksum": checksum}
-                            )
+                            file_record = crud_file.get(db, id=file_id)
+                            if file_record is not None:
+                                crud_file.update(
+                                    db, 
+                                    db_obj=file_record,
+                                    obj_in={"checksum": checksum}
+                                )
                     except Exception as e:
-                        logger.debug(f"Error calculating checksum for {file_record.file_path}: {e}")
+                        logger.debug(f"Error calculating checksum for {path}: {e}")
             
             db.commit()
             
             return {
-                "total_files": len(files),
+                "total_files": total_files,
                 "duplicate_groups": len(duplicates),
                 "total_duplicates": sum(len(d["duplicates"]) for d in duplicates),
                 "space_wasted": space_wasted,
                 "space_wasted_mb": round(space_wasted / (1024 * 1024), 2),
                 "deleted_count": deleted_count,
                 "duplicates": duplicates[:20],  # Limit response size
-                "files_without_checksum": len(no_checksum_files)
+                "files_without_checksum": no_checksum_count
             }
             
         finally:
@@ -542,6 +542,15 @@ class FileManagerService:
                 archive_path.unlink()
             raise e
     
+    @staticmethod
+    def _push_top(heap: list, size: int, key, seq: int, item: Dict[str, Any]):
+        """Keep the ``size`` items with the largest keys; ``seq`` breaks ties in arrival order"""
+        entry = (key, -seq, item)
+        if len(heap) < size:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    
     async def analyze_storage_usage(
         self,
         user_id: int,
@@ -552,14 +561,8 @@ class FileManagerService:
         """
         db = SessionLocal()
         try:
-            # Get all files
-            if directory:
-                files = [
-                    f for f in crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
-                    if f.file_path.startswith(directory)
-                ]
-            else:
-                files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
+            # Stream all files
+            files = crud_file.iter_by_user(db, user_id=user_id, directory=directory)
             
             # Analyze by category
             category_stats = defaultdict(lambda: {"count": 0, "size": 0, "files": []})
@@ -567,14 +570,17 @@ class FileManagerService:
             # Analyze by file type
             type_stats = defaultdict(lambda: {"count": 0, "size": 0})
             
-            # Find large files
+            # Find large files; bounded min-heaps keep only the top entries
             large_files = []
             old_files = []
+            old_files_count = 0
             
+            total_files = 0
             total_size = 0
             current_time = datetime.utcnow()
             
             for file_record in files:
+                total_files += 1
                 size = file_record.file_size or 0
                 total_size += size
                 
@@ -590,7 +596,7 @@ class FileManagerService:
                 
                 # Large files (> 100MB)
                 if size > 100 * 1024 * 1024:
-                    large_files.append({
+                    self._push_top(large_files, 20, size, total_files, {
                         "path": file_record.file_path,
                         "size": size,
                         "size_mb": round(size / (1024 * 1024), 2),
@@ -601,7 +607,8 @@ class FileManagerService:
                 if file_record.last_accessed_at:
                     days_old = (current_time - file_record.last_accessed_at).days
                     if days_old > 180:
-                        old_files.append({
+                        old_files_count += 1
+                        self._push_top(old_files, 50, days_old, total_files, {
                             "path": file_record.file_path,
                             "size": size,
                             "days_old": days_old,
@@ -609,8 +616,8 @@ class FileManagerService:
                         })
             
             # Sort and limit results
-            large_files.sort(key=lambda x: x["size"], reverse=True)
-            old_files.sort(key=lambda x: x["days_old"], reverse=True)
+            large_files = [item for *_, item in sorted(large_files, reverse=True)]
+            old_files = [item for *_, item in sorted(old_files, reverse=True)]
             
             # Convert defaultdicts to regular dicts for JSON serialization
             category_stats = dict(category_stats)
@@ -633,7 +640,7 @@ class FileManagerService:
                 old_files_size = sum(f["size"] for f in old_files[:50])
                 insights.append({
                     "type": "old_files",
-                    "message": f"{len(old_files)} files haven't been accessed in 6+ months ({round(old_files_size / (1024**3), 2)} GB)",
+                    "message": f"{old_files_count} files haven't been accessed in 6+ months ({round(old_files_size / (1024**3), 2)} GB)",
                     "action": "Review and archive old files"
                 })
             
@@ -647,7 +654,7 @@ class FileManagerService:
                 })
             
             return {
-                "total_files": len(files),
+                "total_files": total_files,
                 "total_size": total_size,
                 "total_size_gb": round(total_size / (1024**3), 2),
                 "category_stats": category_stats,
@@ -6,11 +6,13 @@ Automatically scans and categorizes files using the enhanced AI service
 import os
 import hashlib
 import mimetypes
+import multiprocessing
 from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime, timedelta
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import json
 from dataclasses import dataclass
 import time
@@ -18,10 +20,18 @@ import time
 from sqlalchemy.orm import Session
 from loguru import logger
 
+from config.settings import get_settings
 from src.backend.database.database import SessionLocal
 from src.backend.crud.crud_file import file_metadata as crud_file
+from src.backend.crud.crud_scan_journal import scan_journal as crud_scan_journal
 from src.backend.schemas.file_metadata import FileMetadataCreate
 from .enhanced_ai_service import enhanced_ai_service
+from .scan_journal import ScanJournal
+from .metadata_writer import FileMetadataWriter
+from .categorization_batcher import CategorizationBatcher
+from .metadata_extraction import extract_metadata, extract_metadata_chunk, result_to_metadata
+from .file_watcher import FileWatcher
+from .similarity_index import item_from_file
 
 
 @dataclass
@@ -57,6 +67,12 @@ class CancellationToken:
             raise asyncio.CancelledError("Operation was cancelled")
 
 
+def _task_cancelling() -> bool:
+    """True if the running task itself is being cancelled, not just the scan via its token"""
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
+
 class FileScannerService:
     """
     AI-powered file scanner that automatically discovers and categorizes files
@@ -70,12 +86,19 @@ class FileScannerService:
         self.scan_progress = ScanProgress()
         self.scan_stats = {}
         self.current_cancellation_token: Optional[CancellationToken] = None
+        self.current_journal: Optional[ScanJournal] = None
+        self.current_writer: Optional[FileMetadataWriter] = None
+        self.current_categorizer: Optional[CategorizationBatcher] = None
+        self._similarity_updates: Dict[str, Dict[str, Any]] = {}
+        # Scans and watch batches share the state above, so they run one at a time
+        self._scan_lock = asyncio.Lock()
         
         # File type handlers
         self.text_extensions = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml'}
         self.image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp'}
         self.document_extensions = {'.pdf', '.doc', '.docx', '.odt', '.rtf'}
         self.code_extensions = {'.py', '.js', '.html', '.css', '.cpp', '.java', '.go', '.rs'}
+        self._text_extensions_frozen = frozenset(self.text_extensions)
         
         # Ignore patterns
         self.ignore_patterns = {
@@ -86,11 +109,36 @@ class FileScannerService:
         # Size limits for content extraction
         self.max_text_file_size = 1 * 1024 * 1024  # 1MB for text files
         self.max_preview_length = 1000  # Max characters for preview
+        self.max_scan_file_size = 100 * 1024 * 1024  # Larger files are skipped
         
         # Performance settings
         self.discovery_chunk_size = 1000  # Files to discover per chunk
         self.batch_size = 50  # Files to process per batch
         self.max_files_per_scan = 10000  # Maximum files to process in one scan
+        
+        # Incremental scanning via the persistent scan journal
+        self.use_scan_journal = True
+        self.journal_trust_directory_mtime = True  # Skip listing directories whose mtime is unchanged
+        
+        # Batched metadata writes (one transaction per batch)
+        settings = get_settings()
+        self.write_batch_size = settings.scanner_write_batch_size
+        self.write_flush_interval = settings.scanner_write_flush_interval_ms / 1000.0
+        
+        # Micro-batched AI categorization (one vectorizer/model pass per batch)
+        self.categorize_batch_size = settings.scanner_categorize_batch_size
+        self.categorize_max_delay = settings.scanner_categorize_max_delay_ms / 1000.0
+        
+        # Metadata extraction: "thread" (default) or "process" to sidestep the GIL
+        # for MIME detection, preview decoding and checksumming
+        self.extraction_mode = settings.scanner_extraction_mode
+        self.process_workers = settings.scanner_process_workers or os.cpu_count() or 1
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Live watch mode (inotify) replacing quick_scan_updates polling
+        self.watch_debounce_seconds = settings.scanner_watch_debounce_ms / 1000.0
+        self.watch_rescan_interval = settings.scanner_watch_rescan_interval
+        self.watcher: Optional[FileWatcher] = None
     
     async def scan_directory(
         self, 
@@ -98,11 +146,16 @@ class FileScannerService:
         user_id: int,
         recursive: bool = True,
         progress_callback: Optional[Callable[[ScanProgress, Dict[str, Any]], None]] = None,
-        cancellation_token: Optional[CancellationToken] = None
+        cancellation_token: Optional[CancellationToken] = None,
+        use_journal: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Scan a directory and add files to the database with AI categorization
         Enhanced with chunked processing, progress updates, and cancellation support
+        
+        With the scan journal enabled (default), files whose (inode, size, mtime)
+        match the previous scan are skipped without touching file_metadata.
+        Pass use_journal=False to force a full rescan.
         """
         directory_path = Path(directory_path)
         
@@ -112,6 +165,7 @@ class FileScannerService:
         # Set up cancellation token
         if cancellation_token is None:
             cancellation_token = CancellationToken()
+        await self._scan_lock.acquire()
         self.current_cancellation_token = cancellation_token
         
         self.scanning = True
@@ -127,6 +181,8 @@ class FileScannerService:
             'updated_files': 0,
             'errors': 0,
             'permission_errors': 0,
+            'journal_skipped_files': 0,
+            'journal_removed': 0,
             'start_time': datetime.utcnow(),
             'categories': {},
             'performance': {
@@ -136,15 +192,28 @@ class FileScannerService:
             }
         }
         
+        if use_journal is None:
+            use_journal = self.use_scan_journal
+        
         try:
             # Check cancellation before starting
             cancellation_token.check_cancelled()
             
+            if use_journal:
+                self.current_journal = await self._load_scan_journal(directory_path, user_id)
+            
             # Discover files with chunked processing
             logger.info(f"Starting chunked discovery of directory: {directory_path}")
             discovery_start = time.time()
             
+            # With a journal only changed files are discovered, so keep them for
+            # processing instead of walking the tree a second time
+            changed_files: Optional[List[Path]] = [] if self.current_journal else None
+            
             async for file_chunk in self._discover_files_chunked(directory_path, recursive, cancellation_token):
+                if changed_files is not None:
+                    changed_files.extend(file_chunk)
+                
                 # Update progress during discovery
                 self.scan_progress.total_files += len(file_chunk)
                 if progress_callback:
@@ -158,6 +227,8 @@ class FileScannerService:
             discovery_time = time.time() - discovery_start
             self.scan_stats['performance']['discovery_time'] = discovery_time
             self.scan_stats['total_files'] = self.scan_progress.total_files
+            if self.current_journal:
+                self.scan_stats['journal_skipped_files'] = self.current_journal.skipped_files
             
             if self.scan_progress.total_files == 0:
                 logger.info("No files found to process")
@@ -165,9 +236,22 @@ class FileScannerService:
             
             logger.info(f"Discovered {self.scan_progress.total_files} files in {discovery_time:.2f}s")
             
-            # Process files with optimized batching
+            # Process files with optimized batching; records are persisted by the writer stage
             processing_start = time.time()
-            await self._process_files_optimized(directory_path, recursive, user_id, progress_callback, cancellation_token)
+            self.current_writer = FileMetadataWriter(
+                self.executor,
+                batch_size=self.write_batch_size,
+                flush_interval=self.write_flush_interval,
+                stats=self.scan_stats
+            )
+            await self.current_writer.start()
+            await self._start_categorizer()
+            await self._process_files_optimized(
+                directory_path, recursive, user_id, progress_callback, cancellation_token,
+                file_paths=changed_files
+            )
+            await self._close_categorizer()
+            await self._close_writer()
             
             processing_time = time.time() - processing_start
             self.scan_stats['performance']['processing_time'] = processing_time
@@ -188,6 +272,8 @@ class FileScannerService:
             self.scan_stats['cancelled'] = True
             self.scan_stats['end_time'] = datetime.utcnow()
             self.scan_stats['duration'] = time.time() - start_time
+            if _task_cancelling():
+                raise
             return self.scan_stats
             
         except Exception as e:
@@ -197,8 +283,101 @@ class FileScannerService:
             self.scan_stats['duration'] = time.time() - start_time
             raise
         finally:
+            await self._close_categorizer()
+            await self._close_writer()
+            if self.current_journal:
+                await self._save_scan_journal(self.current_journal)
+            await self._save_categorization_cache()
+            await self._update_similarity_index(user_id)
             self.scanning = False
             self.current_cancellation_token = None
+            self.current_journal = None
+            self._scan_lock.release()
+    
+    async def _start_categorizer(self):
+        """Start the micro-batching stage for AI categorization"""
+        self.current_categorizer = CategorizationBatcher(
+            enhanced_ai_service,
+            batch_size=self.categorize_batch_size,
+            max_delay=self.categorize_max_delay
+        )
+        await self.current_categorizer.start()
+    
+    async def _close_categorizer(self):
+        """Categorize anything still queued and record batching stats"""
+        categorizer = self.current_categorizer
+        if categorizer is None:
+            return
+        self.current_categorizer = None
+        await categorizer.close()
+        self.scan_stats['performance']['categorize_batches'] = categorizer.batches
+    
+    async def _close_writer(self):
+        """Flush pending metadata writes and return failed files to the journal"""
+        writer = self.current_writer
+        if writer is None:
+            return
+        self.current_writer = None
+        await writer.close()
+        self.scan_stats['performance']['write_batches'] = writer.batches_flushed
+        for path in writer.failed_paths:
+            self._similarity_updates.pop(path, None)
+            if self.current_journal:
+                self.current_journal.mark_failed(path)
+    
+    async def _update_similarity_index(
+        self,
+        user_id: int,
+        removed_paths: Optional[List[str]] = None,
+        removed_directories: Optional[List[str]] = None
+    ):
+        """Add stored files to the user's similarity index and drop deleted ones"""
+        files = list(self._similarity_updates.values())
+        self._similarity_updates = {}
+        if not (files or removed_paths or removed_directories):
+            return
+        try:
+            await enhanced_ai_service.update_similarity_index(
+                user_id, files, removed_paths=removed_paths, removed_directories=removed_directories
+            )
+        except Exception as e:
+            logger.error(f"Failed to update similarity index: {e}")
+    
+    async def _load_scan_journal(self, directory: Path, user_id: int) -> ScanJournal:
+        """Load the scan journal for a root with a single bulk query"""
+        journal = ScanJournal(user_id, directory, trust_directory_mtime=self.journal_trust_directory_mtime)
+        
+        def load_sync():
+            db = SessionLocal()
+            try:
+                return journal.load(db)
+            finally:
+                db.close()
+        
+        loaded = await asyncio.get_event_loop().run_in_executor(self.executor, load_sync)
+        logger.debug(f"Loaded {loaded} scan journal entries for {directory}")
+        return journal
+    
+    async def _save_scan_journal(self, journal: ScanJournal):
+        """Persist the journal, keeping unprocessed files eligible for the next scan"""
+        def save_sync():
+            db = SessionLocal()
+            try:
+                return journal.save(db)
+            finally:
+                db.close()
+        
+        try:
+            result = await asyncio.get_event_loop().run_in_executor(self.executor, save_sync)
+            self.scan_stats['journal_removed'] = result['removed']
+        except Exception as e:
+            logger.error(f"Failed to save scan journal: {e}")
+    
+    async def _save_categorization_cache(self):
+        """Snapshot the AI categorization cache so identical content stays cached across restarts"""
+        await asyncio.get_event_loop().run_in_executor(
+            self.executor, enhanced_ai_service.categorization_cache.save
+        )
     
     async def _discover_files_chunked(
         self, 
@@ -212,8 +391,8 @@ class FileScannerService:
         current_chunk = []
         
         try:
-            if recursive:
-                async for file_path in self._walk_directory_async(directory, cancellation_token):
+            if recursive or self.current_journal:
+                async for file_path in self._walk_directory_async(directory, cancellation_token, recursive):
                     if not self._should_ignore_file(file_path.name):
                         current_chunk.append(file_path)
                         
@@ -257,12 +436,23 @@ class FileScannerService:
     async def _walk_directory_async(
         self, 
         directory: Path, 
-        cancellation_token: CancellationToken
+        cancellation_token: CancellationToken,
+        recursive: bool = True
     ):
         """
         Async generator that walks through directory tree with cancellation support
         """
         loop = asyncio.get_event_loop()
+        journal = self.current_journal
+        
+        def walk_journal_sync():
+            """Journal-backed walk that yields only new or changed files"""
+            return journal.walk(
+                recursive,
+                include_dir=lambda d: d not in self.ignore_patterns and not d.startswith('.'),
+                include_file=lambda f: not self._should_ignore_file(f),
+                is_cancelled=cancellation_token.is_cancelled
+            )
         
         def walk_sync():
             """Synchronous directory walk that respects cancellation"""
@@ -282,7 +472,8 @@ class FileScannerService:
         
         try:
             # Run directory walk in executor to avoid blocking
-            for file_path in await loop.run_in_executor(self.executor, lambda: list(walk_sync())):
+            walker = walk_journal_sync if journal else walk_sync
+            for file_path in await loop.run_in_executor(self.executor, lambda: list(walker())):
                 cancellation_token.check_cancelled()
                 yield file_path
                 
@@ -328,10 +519,12 @@ class FileScannerService:
         recursive: bool,
         user_id: int,
         progress_callback: Optional[Callable[[ScanProgress, Dict[str, Any]], None]],
-        cancellation_token: CancellationToken
+        cancellation_token: CancellationToken,
+        file_paths: Optional[List[Path]] = None
     ):
         """
         Optimized file processing with improved batching and progress tracking
+        Processes file_paths when given, otherwise rediscovers the directory
         """
         start_time = time.time()
         processed_count = 0
@@ -339,7 +532,7 @@ class FileScannerService:
         # Calculate total batches for progress tracking
         self.scan_progress.total_batches = max(1, (self.scan_progress.total_files + self.batch_size - 1) // self.batch_size)
         
-        async for file_chunk in self._discover_files_chunked(directory, recursive, cancellation_token):
+        async for file_chunk in self._iter_file_chunks(directory, recursive, cancellation_token, file_paths):
             # Process files in smaller batches within each chunk
             for i in range(0, len(file_chunk), self.batch_size):
                 cancellation_token.check_cancelled()
@@ -380,6 +573,22 @@ class FileScannerService:
                 # Brief pause to allow UI updates and check for cancellation
                 await asyncio.sleep(0.01)
     
+    async def _iter_file_chunks(
+        self,
+        directory: Path,
+        recursive: bool,
+        cancellation_token: CancellationToken,
+        file_paths: Optional[List[Path]]
+    ):
+        """Yield processing chunks from a known file list or a fresh discovery"""
+        if file_paths is None:
+            async for file_chunk in self._discover_files_chunked(directory, recursive, cancellation_token):
+                yield file_chunk
+            return
+        
+        for i in range(0, len(file_paths), self.discovery_chunk_size):
+            yield file_paths[i:i + self.discovery_chunk_size]
+    
     async def _process_file_batch_optimized(
         self, 
         file_paths: List[Path], 
@@ -389,13 +598,25 @@ class FileScannerService:
         """
         Process a batch of files with improved error handling and cancellation support
         """
-        # Use semaphore to limit concurrent processing
+        # Limit concurrent metadata extraction; categorization is not limited so
+        # the whole batch can reach the categorizer together
         semaphore = asyncio.Semaphore(self.max_workers)
         
+        # One lookup for the whole batch instead of one session per file
+        existing_modified = await self._load_existing_modified_times(file_paths, user_id)
+        
+        prefetched_metadata = None
+        if self.extraction_mode == 'process':
+            # Only ship files that will actually be processed to the workers
+            changed_paths = [path for path in file_paths if self._needs_extraction(path, existing_modified)]
+            prefetched_metadata = await self._extract_batch_in_processes(changed_paths)
+        
         async def process_with_semaphore(file_path: Path):
-            async with semaphore:
-                cancellation_token.check_cancelled()
-                return await self._process_single_file_optimized(file_path, user_id, cancellation_token)
+            cancellation_token.check_cancelled()
+            return await self._process_single_file_optimized(
+                file_path, user_id, cancellation_token, existing_modified, prefetched_metadata,
+                extraction_semaphore=semaphore
+            )
         
         # Create tasks for batch processing
         tasks = [asyncio.create_task(process_with_semaphore(file_path)) for file_path in file_paths]
@@ -411,61 +632,110 @@ class FileScannerService:
                 else:
                     logger.error(f"Error processing file {file_paths[i]}: {result}")
                     self.scan_stats['errors'] += 1
+            elif result and self.current_journal:
+                self.current_journal.mark_processed(file_paths[i])
+    
+    def _needs_extraction(self, file_path: Path, existing_modified: Dict[str, Optional[datetime]]) -> bool:
+        """Whether _process_single_file_optimized gets past its size and unchanged checks for the file"""
+        try:
+            file_stat = file_path.stat()
+        except OSError:
+            return False
+        if file_stat.st_size > self.max_scan_file_size:
+            return False
+        stored_modified_at = existing_modified.get(str(file_path))
+        return not (stored_modified_at and stored_modified_at.timestamp() >= file_stat.st_mtime)
+    
+    async def _load_existing_modified_times(
+        self, file_paths: List[Path], user_id: int
+    ) -> Dict[str, Optional[datetime]]:
+        """Fetch stored file_modified_at values for a batch of paths"""
+        def load_sync():
+            db = SessionLocal()
+            try:
+                return crud_file.get_modified_times(
+                    db, user_id=user_id, file_paths=[str(path) for path in file_paths]
+                )
+            finally:
+                db.close()
+        
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self.executor, load_sync)
+        except Exception as e:
+            logger.error(f"Error loading existing file records: {e}")
+            return {}
+    
+    async def _store_file_metadata(self, file_metadata: FileMetadataCreate):
+        """Hand a record to the batched writer, or write it directly outside a scan"""
+        self._similarity_updates[file_metadata.file_path] = item_from_file(file_metadata)
+        if self.current_writer is not None:
+            await self.current_writer.put(file_metadata)
+        else:
+            writer = FileMetadataWriter(self.executor, stats=self.scan_stats)
+            await writer.write_now([file_metadata])
+            if writer.failed_paths:
+                raise RuntimeError(f"Failed to store metadata for {file_metadata.file_path}")
     
     async def _process_single_file_optimized(
         self, 
         file_path: Path, 
         user_id: int, 
-        cancellation_token: CancellationToken
-    ):
+        cancellation_token: CancellationToken,
+        existing_modified: Optional[Dict[str, Optional[datetime]]] = None,
+        prefetched_metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+        extraction_semaphore: Optional[asyncio.Semaphore] = None
+    ) -> bool:
         """
         Process a single file with improved error handling and cancellation support
+        Returns True when the file is handled; new records are queued on the writer
         """
-        db = None
         try:
             # Check for cancellation before starting
             cancellation_token.check_cancelled()
             
             # Check if file still exists (it might have been deleted during scan)
             if not file_path.exists():
-                return
+                return False
             
             # Check file size limits to avoid processing huge files
             try:
                 file_stat = file_path.stat()
                 # Skip files larger than 100MB for performance
-                if file_stat.st_size > 100 * 1024 * 1024:
+                if file_stat.st_size > self.max_scan_file_size:
                     logger.debug(f"Skipping large file: {file_path} ({file_stat.st_size} bytes)")
                     self.scan_stats['skipped_files'] += 1
-                    return
+                    return True
             except (OSError, PermissionError):
                 logger.debug(f"Cannot access file stats: {file_path}")
                 self.scan_stats['permission_errors'] += 1
-                return
-            
-            # Get database session
-            db = SessionLocal()
+                return False
             
             # Check if file already exists in database
-            existing_file = crud_file.get_by_path(
-                db, file_path=str(file_path), user_id=user_id
-            )
+            if existing_modified is None:
+                existing_modified = await self._load_existing_modified_times([file_path], user_id)
+            stored_modified_at = existing_modified.get(str(file_path))
             
             # Skip if file exists and hasn't been modified
-            if existing_file and existing_file.file_modified_at:
-                if existing_file.file_modified_at.timestamp() >= file_stat.st_mtime:
-                    self.scan_stats['skipped_files'] += 1
-                    return
+            if stored_modified_at and stored_modified_at.timestamp() >= file_stat.st_mtime:
+                self.scan_stats['skipped_files'] += 1
+                return True
             
             # Check for cancellation before expensive operations
             cancellation_token.check_cancelled()
             
-            # Extract file metadata
-            file_info = await self._extract_file_metadata_safe(file_path, cancellation_token)
+            # Extract file metadata (usually already done for the batch in process mode;
+            # a file that changed after the batch was filtered is extracted here)
+            file_info = prefetched_metadata.get(str(file_path)) if prefetched_metadata else None
+            if file_info is None:
+                if extraction_semaphore is not None:
+                    async with extraction_semaphore:
+                        file_info = await self._extract_file_metadata_safe(file_path, cancellation_token)
+                else:
+                    file_info = await self._extract_file_metadata_safe(file_path, cancellation_token)
             
             if not file_info:
                 self.scan_stats['errors'] += 1
-                return
+                return False
             
             # Check for cancellation before AI processing
             cancellation_token.check_cancelled()
@@ -473,11 +743,7 @@ class FileScannerService:
             # AI categorization with timeout
             try:
                 ai_result = await asyncio.wait_for(
-                    enhanced_ai_service.smart_categorize_file(
-                        filename=file_path.name,
-                        file_path=str(file_path),
-                        content_preview=file_info.get('content_preview', '')
-                    ),
+                    self._categorize_file(file_path, file_info),
                     timeout=30.0  # 30 second timeout for AI processing
                 )
             except asyncio.TimeoutError:
@@ -493,6 +759,7 @@ class FileScannerService:
                 file_extension=file_path.suffix.lower(),
                 file_size=file_info.get('size'),
                 mime_type=file_info.get('mime_type'),
+                checksum=file_info.get('checksum'),
                 ai_category=ai_result.get('category'),
                 ai_description=ai_result.get('description'),
                 ai_tags=','.join(ai_result.get('tags', [])),
@@ -505,22 +772,15 @@ class FileScannerService:
             # Check for cancellation before database operations
             cancellation_token.check_cancelled()
             
-            if existing_file:
-                # Update existing record
-                crud_file.update(db, db_obj=existing_file, obj_in=file_metadata)
-                self.scan_stats['updated_files'] += 1
-            else:
-                # Create new record
-                crud_file.create_with_checksum(
-                    db, obj_in=file_metadata, file_path=str(file_path)
-                )
-                self.scan_stats['new_files'] += 1
+            # Insert or update via the batched writer (new/updated counts are kept there)
+            await self._store_file_metadata(file_metadata)
             
             # Update category stats
             category = ai_result.get('category', 'unknown')
             self.scan_stats['categories'][category] = (
                 self.scan_stats['categories'].get(category, 0) + 1
             )
+            return True
                 
         except asyncio.CancelledError:
             logger.debug(f"File processing cancelled for: {file_path}")
@@ -528,12 +788,27 @@ class FileScannerService:
         except PermissionError:
             logger.debug(f"Permission denied for file: {file_path}")
             self.scan_stats['permission_errors'] += 1
+            return False
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {e}")
             self.scan_stats['errors'] += 1
-        finally:
-            if db:
-                db.close()
+            return False
+    
+    async def _categorize_file(self, file_path: Path, file_info: Dict[str, Any]) -> Dict[str, Any]:
+        """AI categorization, batched with other files while a scan is running"""
+        if self.current_categorizer is not None:
+            return await self.current_categorizer.categorize(
+                file_path.name,
+                str(file_path),
+                file_info.get('content_preview', ''),
+                file_info.get('checksum')
+            )
+        return await enhanced_ai_service.smart_categorize_file(
+            filename=file_path.name,
+            file_path=str(file_path),
+            content_preview=file_info.get('content_preview', ''),
+            checksum=file_info.get('checksum')
+        )
     
     async def _extract_file_metadata_safe(
         self, 
@@ -579,47 +854,74 @@ class FileScannerService:
     def _extract_file_metadata_sync_safe(self, file_path: Path) -> Dict[str, Any]:
         """
         Safe synchronous file metadata extraction with improved error handling
+        Shares its implementation with the process-pool extraction mode
         """
         try:
-            # Check if file still exists
-            if not file_path.exists():
-                return {}
-            
-            stat = file_path.stat()
-            mime_type, _ = mimetypes.guess_type(str(file_path))
-            
-            metadata = {
-                'size': stat.st_size,
-                'mime_type': mime_type,
-                'created_at': datetime.fromtimestamp(stat.st_ctime),
-                'modified_at': datetime.fromtimestamp(stat.st_mtime),
-                'accessed_at': datetime.fromtimestamp(stat.st_atime)
-            }
-            
-            # Extract content preview for text files (with size and safety checks)
-            if (file_path.suffix.lower() in self.text_extensions and 
-                stat.st_size < self.max_text_file_size and
-                stat.st_size > 0):  # Don't try to read empty files
-                try:
-                    # Use a more conservative timeout for file reading
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read(self.max_preview_length)
-                        if content.strip():  # Only add non-empty content
-                            metadata['content_preview'] = content
-                except (UnicodeDecodeError, PermissionError, OSError) as e:
-                    logger.debug(f"Could not read text content from {file_path}: {e}")
-                except Exception as e:
-                    logger.debug(f"Unexpected error reading {file_path}: {e}")
-            
-            return metadata
-            
-        except (OSError, PermissionError) as e:
-            logger.debug(f"Permission or OS error extracting metadata from {file_path}: {e}")
-            return {}
+            return result_to_metadata(extract_metadata(
+                str(file_path),
+                self._text_extensions_frozen,
+                self.max_text_file_size,
+                self.max_preview_length
+            ))
         except Exception as e:
             logger.debug(f"Error extracting metadata from {file_path}: {e}")
             return {}
     
+    async def _extract_batch_in_processes(self, file_paths: List[Path]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Extract metadata for a whole batch on the process pool. Paths are sent
+        in one chunk per worker and come back as compact tuples. Returns None
+        if the pool is unavailable so callers fall back to thread extraction.
+        """
+        if not file_paths:
+            return {}
+        
+        pool = self._get_process_pool()
+        workers = self.process_workers
+        chunk_size = max(1, -(-len(file_paths) // workers))
+        chunks = [
+            [str(path) for path in file_paths[i:i + chunk_size]]
+            for i in range(0, len(file_paths), chunk_size)
+        ]
+        
+        loop = asyncio.get_event_loop()
+        try:
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(
+                    pool, extract_metadata_chunk, chunk,
+                    self._text_extensions_frozen, self.max_text_file_size, self.max_preview_length
+                )
+                for chunk in chunks
+            ])
+        except BrokenProcessPool as e:
+            logger.error(f"Metadata process pool failed, falling back to threads: {e}")
+            self._shutdown_process_pool()
+            return None
+        
+        metadata = {}
+        for chunk, results in zip(chunks, chunk_results):
+            for path, result in zip(chunk, results):
+                metadata[path] = result_to_metadata(result)
+        return metadata
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Create the extraction process pool on first use"""
+        if self._process_pool is None:
+            # spawn avoids forking a process that already runs threads and an event loop
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"Started metadata extraction process pool with {self.process_workers} workers")
+        return self._process_pool
+    
+    def _shutdown_process_pool(self, wait: bool = False):
+        """Stop the extraction workers; the next process-mode batch starts a new pool"""
+        pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+            logger.info("Stopped metadata extraction process pool")
+    
     def _extract_file_metadata_sync(self, file_path: Path) -> Dict[str, Any]:
         """Synchronous file metadata extraction (legacy method)"""
         try:
@@ -747,6 +1049,7 @@ class FileScannerService:
     ) -> Dict[str, Any]:
         """
         Quick scan to find recently modified files with cancellation support
+        For continuous updates prefer start_watch, which avoids polling
         """
         if cancellation_token is None:
             cancellation_token = CancellationToken()
@@ -801,6 +1104,142 @@ class FileScannerService:
         finally:
             db.close()
     
+    async def process_path_changes(
+        self,
+        user_id: int,
+        changed_paths: List[Path],
+        deleted_paths: Optional[List[str]] = None,
+        deleted_directories: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Process an explicit set of changed and deleted paths, e.g. a batch from
+        the file watcher, through the same extraction and write pipeline as a
+        full scan. Deleted paths are removed from file_metadata and the journal.
+        """
+        deleted_paths = deleted_paths or []
+        deleted_directories = deleted_directories or []
+        cancellation_token = CancellationToken()
+        start_time = time.time()
+        
+        await self._scan_lock.acquire()
+        self.scanning = True
+        self.current_cancellation_token = cancellation_token
+        self.scan_progress = ScanProgress(total_files=len(changed_paths))
+        self.scan_stats = {
+            'type': 'watch_batch',
+            'total_files': len(changed_paths),
+            'processed_files': 0,
+            'skipped_files': 0,
+            'new_files': 0,
+            'updated_files': 0,
+            'removed_files': 0,
+            'errors': 0,
+            'permission_errors': 0,
+            'start_time': datetime.utcnow(),
+            'categories': {},
+            'performance': {}
+        }
+        
+        # Files are journaled one by one, so the journal root is irrelevant
+        self.current_journal = ScanJournal(user_id, Path(os.sep))
+        existing = [path for path in changed_paths if self.current_journal.observe(path)]
+        
+        try:
+            self.current_writer = FileMetadataWriter(
+                self.executor,
+                batch_size=self.write_batch_size,
+                flush_interval=self.write_flush_interval,
+                stats=self.scan_stats
+            )
+            await self.current_writer.start()
+            await self._start_categorizer()
+            for i in range(0, len(existing), self.batch_size):
+                await self._process_file_batch_optimized(
+                    existing[i:i + self.batch_size], user_id, cancellation_token
+                )
+                self.scan_progress.processed_files = min(i + self.batch_size, len(existing))
+            self.scan_stats['processed_files'] = self.scan_progress.processed_files
+            await self._close_categorizer()
+            await self._close_writer()
+            
+            if deleted_paths or deleted_directories:
+                self.scan_stats['removed_files'] = await self._remove_deleted_paths(
+                    user_id, deleted_paths, deleted_directories
+                )
+        except asyncio.CancelledError:
+            self.scan_stats['cancelled'] = True
+            if _task_cancelling():
+                raise
+        finally:
+            await self._close_categorizer()
+            await self._close_writer()
+            await self._save_scan_journal(self.current_journal)
+            await self._save_categorization_cache()
+            await self._update_similarity_index(user_id, deleted_paths, deleted_directories)
+            self.scan_stats['end_time'] = datetime.utcnow()
+            self.scan_stats['duration'] = time.time() - start_time
+            self.scanning = False
+            self.current_cancellation_token = None
+            self.current_journal = None
+            self._scan_lock.release()
+        
+        return self.scan_stats
+    
+    async def _remove_deleted_paths(
+        self, user_id: int, file_paths: List[str], directories: List[str]
+    ) -> int:
+        """Drop file_metadata and journal rows for deleted files and directories"""
+        def remove_sync():
+            db = SessionLocal()
+            try:
+                removed = crud_file.remove_by_paths(
+                    db, user_id=user_id, file_paths=file_paths, directories=directories
+                )
+                if file_paths:
+                    crud_scan_journal.delete_paths(db, user_id=user_id, paths=file_paths)
+                for directory in directories:
+                    crud_scan_journal.delete_under(db, user_id=user_id, directory=directory)
+                return removed
+            finally:
+                db.close()
+        
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self.executor, remove_sync)
+        except Exception as e:
+            logger.error(f"Failed to remove deleted files: {e}")
+            self.scan_stats['errors'] += 1
+            return 0
+    
+    async def start_watch(self, roots: List[str], user_id: int) -> Dict[str, Any]:
+        """
+        Watch roots for changes and process them as they happen. Uses inotify
+        where available and falls back to periodic journal rescans otherwise.
+        """
+        await self.stop_watch()
+        self.watcher = FileWatcher(
+            self,
+            user_id,
+            roots,
+            debounce_seconds=self.watch_debounce_seconds,
+            rescan_interval=self.watch_rescan_interval
+        )
+        await self.watcher.start()
+        return self.watcher.get_status()
+    
+    async def shutdown(self):
+        """Stop the watcher and the extraction process pool; called on application shutdown"""
+        self.cancel_scan()
+        await self.stop_watch()
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown_process_pool, True)
+    
+    async def stop_watch(self) -> bool:
+        """Stop the live watcher; returns False if none was running"""
+        if self.watcher is None:
+            return False
+        await self.watcher.stop()
+        self.watcher = None
+        return True
+    
     def get_scan_status(self) -> Dict[str, Any]:
         """Get current scan status with enhanced progress information"""
         return {
@@ -816,7 +1255,9 @@ class FileScannerService:
                 'files_per_second': self.scan_progress.files_per_second
             },
             'stats': self.scan_stats,
-            'can_cancel': self.current_cancellation_token is not None
+            'can_cancel': self.current_cancellation_token is not None,
+            'categorization_cache': enhanced_ai_service.categorization_cache.get_stats(),
+            'watch': self.watcher.get_status() if self.watcher else None
         }
     
     def cancel_scan(self) -> bool:
@@ -849,17 +1290,17 @@ class FileScannerService:
         try:
             cancellation_token.check_cancelled()
             
-            all_files = crud_file.get_by_user(db, user_id=user_id, skip=0, limit=10000)
-            
             removed_count = 0
             checked_count = 0
+            missing_paths = []
             
-            for file_record in all_files:
+            # Deleting in batches keeps the streamed records from being expired by per-row commits
+            for file_record in crud_file.iter_by_user(db, user_id=user_id):
                 try:
                     cancellation_token.check_cancelled()
                     
                     if not Path(file_record.file_path).exists():
-                        crud_file.remove(db, id=file_record.id)
+                        missing_paths.append(file_record.file_path)
                         removed_count += 1
                     
                     checked_count += 1
@@ -874,6 +1315,9 @@ class FileScannerService:
                 except Exception as e:
                     logger.debug(f"Error checking file {file_record.file_path}: {e}")
             
+            if missing_paths:
+                crud_file.remove_by_paths(db, user_id=user_id, file_paths=missing_paths)
+            
             return {
                 'removed_files': removed_count,
                 'checked_files': checked_count,
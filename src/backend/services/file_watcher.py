@@ -0,0 +1,380 @@
+"""
+Live watch mode for the file scanner
+Turns Linux inotify events into debounced batches of changed paths and feeds
+only those into the scanner's processing pipeline. Falls back to periodic
+journal-based rescans when inotify is unavailable or the kernel watch limit
+(fs.inotify.max_user_watches) is reached.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM |
+    IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK
+)
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+# Coalesced per-path state; the latest event for a path wins
+CHANGED = 'changed'
+DELETED = 'deleted'
+DELETED_DIR = 'deleted_dir'
+
+
+class WatchLimitReached(OSError):
+    """Raised when the kernel refuses more inotify watches (ENOSPC)"""
+
+
+class Inotify:
+    """Minimal ctypes binding for inotify(7)"""
+
+    def __init__(self):
+        if not hasattr(os, 'O_NONBLOCK'):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        libc_name = ctypes.util.find_library('c')
+        try:
+            self._libc = ctypes.CDLL(libc_name or 'libc.so.6', use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise WatchLimitReached(err, "inotify watch limit reached", path)
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, int, str]]:
+        """Read all queued events as (wd, mask, cookie, name) tuples"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class FileWatcher:
+    """
+    Watches scan roots and processes changes in debounced batches.
+
+    A batch is flushed once no event arrived for ``debounce_seconds`` or the
+    oldest pending event is ``max_batch_delay`` seconds old. The scanner runs
+    batches and full scans one at a time, so a batch waits for a running scan.
+    """
+
+    def __init__(
+        self,
+        scanner,
+        user_id: int,
+        roots: List[str],
+        debounce_seconds: float = 1.0,
+        max_batch_delay: float = 5.0,
+        rescan_interval: float = 300.0
+    ):
+        self.scanner = scanner
+        self.user_id = user_id
+        self.roots = [str(Path(root).resolve()) for root in roots]
+        self.debounce_seconds = debounce_seconds
+        self.max_batch_delay = max_batch_delay
+        self.rescan_interval = rescan_interval
+
+        self.mode = 'stopped'
+        self.fallback_reason: Optional[str] = None
+        self._inotify: Optional[Inotify] = None
+        self._wd_paths: Dict[int, str] = {}
+        self._path_wds: Dict[str, int] = {}
+
+        self._pending: Dict[str, str] = {}
+        self._new_dirs: Set[str] = set()
+        self._rescan_requested = False
+        self._first_event_at = 0.0
+        self._last_event_at = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'events': 0,
+            'batches': 0,
+            'files_processed': 0,
+            'files_removed': 0,
+            'queue_overflows': 0,
+            'rescans': 0,
+            'last_batch_at': None
+        }
+
+    async def start(self):
+        """Register watches on all roots, or fall back to periodic rescans"""
+        self._wakeup = asyncio.Event()
+        try:
+            self._inotify = Inotify()
+            loop = asyncio.get_event_loop()
+            for root in self.roots:
+                directories, _ = await loop.run_in_executor(self.scanner.executor, self._walk, root)
+                for directory in directories:
+                    self._add_watch(directory)
+        except OSError as e:
+            self._start_fallback(str(e))
+            return
+
+        asyncio.get_event_loop().add_reader(self._inotify.fd, self._on_readable)
+        self.mode = 'inotify'
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Watching {len(self._wd_paths)} directories under {self.roots}")
+
+    async def stop(self):
+        """Stop watching; pending events are discarded"""
+        # Set first so neither loop carries on if a scan swallows the cancellation
+        self.mode = 'stopped'
+        self._close_inotify()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'roots': self.roots,
+            'watched_directories': len(self._wd_paths),
+            'pending_paths': len(self._pending) + len(self._new_dirs),
+            'fallback_reason': self.fallback_reason,
+            'stats': dict(self.stats)
+        }
+
+    def _walk(self, root: str) -> Tuple[List[str], List[str]]:
+        """All non-ignored directories and files below root"""
+        directories, files = [], []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if self._include_dir(d)]
+            directories.append(dirpath)
+            files.extend(
+                os.path.join(dirpath, name) for name in filenames
+                if not self.scanner._should_ignore_file(name)
+            )
+        return directories, files
+
+    def _include_dir(self, name: str) -> bool:
+        return name not in self.scanner.ignore_patterns and not name.startswith('.')
+
+    def _add_watch(self, directory: str):
+        wd = self._inotify.add_watch(directory)
+        self._wd_paths[wd] = directory
+        self._path_wds[directory] = wd
+
+    def _forget_tree(self, directory: str):
+        """Drop watches for a directory that moved away or was deleted"""
+        prefix = directory + os.sep
+        for path in [p for p in self._path_wds if p == directory or p.startswith(prefix)]:
+            wd = self._path_wds.pop(path)
+            self._wd_paths.pop(wd, None)
+            if self._inotify:
+                self._inotify.rm_watch(wd)
+
+    def _on_readable(self):
+        try:
+            events = self._inotify.read_events()
+        except OSError as e:
+            logger.error(f"Error reading inotify events: {e}")
+            return
+
+        for wd, mask, _cookie, name in events:
+            self.stats['events'] += 1
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; let the journal find what changed
+                self.stats['queue_overflows'] += 1
+                self._rescan_requested = True
+                continue
+
+            base = self._wd_paths.get(wd)
+            if base is None:
+                continue
+            if mask & IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                if self._path_wds.get(base) == wd:
+                    del self._path_wds[base]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF) or not name:
+                continue
+
+            path = os.path.join(base, name)
+            if mask & IN_ISDIR:
+                if not self._include_dir(name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._add_watch(path)
+                    except WatchLimitReached as e:
+                        self._start_fallback(str(e))
+                        return
+                    except OSError:
+                        continue
+                    self._new_dirs.add(path)
+                    self._pending.pop(path, None)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._forget_tree(path)
+                    self._new_dirs.discard(path)
+                    self._pending[path] = DELETED_DIR
+            else:
+                if self.scanner._should_ignore_file(name):
+                    continue
+                self._pending[path] = DELETED if mask & (IN_DELETE | IN_MOVED_FROM) else CHANGED
+
+            now = time.monotonic()
+            if not self._first_event_at:
+                self._first_event_at = now
+            self._last_event_at = now
+
+        if self._pending or self._new_dirs or self._rescan_requested:
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        # Ends once a batch switched the watcher to fallback rescans
+        while self.mode == 'inotify':
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Debounce: wait for a quiet period, but never longer than max_batch_delay
+            while True:
+                now = time.monotonic()
+                quiet = now - self._last_event_at
+                age = now - self._first_event_at if self._first_event_at else 0.0
+                if quiet >= self.debounce_seconds or age >= self.max_batch_delay:
+                    break
+                await asyncio.sleep(min(self.debounce_seconds - quiet, self.max_batch_delay - age))
+
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Watch batch failed: {e}")
+
+    async def _flush(self):
+        pending, self._pending = self._pending, {}
+        new_dirs, self._new_dirs = self._new_dirs, set()
+        rescan, self._rescan_requested = self._rescan_requested, False
+        self._first_event_at = 0.0
+
+        if rescan:
+            await self._rescan_roots()
+            return
+
+        # Directories created or moved in: watch their subtrees and pick up their files
+        loop = asyncio.get_event_loop()
+        for directory in new_dirs:
+            directories, files = await loop.run_in_executor(self.scanner.executor, self._walk, directory)
+            for subdirectory in directories:
+                if subdirectory not in self._path_wds:
+                    try:
+                        self._add_watch(subdirectory)
+                    except WatchLimitReached as e:
+                        self._start_fallback(str(e))
+                        return
+                    except OSError:
+                        continue
+            for path in files:
+                pending.setdefault(path, CHANGED)
+
+        changed = [Path(path) for path, state in pending.items() if state == CHANGED]
+        deleted = [path for path, state in pending.items() if state == DELETED]
+        deleted_dirs = [path for path, state in pending.items() if state == DELETED_DIR]
+        if not (changed or deleted or deleted_dirs):
+            return
+
+        result = await self.scanner.process_path_changes(
+            self.user_id, changed, deleted_paths=deleted, deleted_directories=deleted_dirs
+        )
+        self.stats['batches'] += 1
+        self.stats['files_processed'] += result.get('processed_files', 0)
+        self.stats['files_removed'] += result.get('removed_files', 0)
+        self.stats['last_batch_at'] = time.time()
+
+    def _start_fallback(self, reason: str):
+        """Switch to periodic journal-based rescans"""
+        logger.warning(f"File watch falling back to journal rescans every {self.rescan_interval}s: {reason}")
+        self.fallback_reason = reason
+        self._close_inotify()
+        # Called from a batch, the flush task is the current one: it returns
+        # by itself once the mode changes; any other flush task is cancelled
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self.mode = 'rescan'
+        self._task = asyncio.create_task(self._rescan_loop())
+
+    async def _rescan_loop(self):
+        while self.mode == 'rescan':
+            if not self.scanner.scanning:
+                try:
+                    await self._rescan_roots()
+                except Exception as e:
+                    logger.error(f"Journal rescan failed: {e}")
+            await asyncio.sleep(self.rescan_interval)
+
+    async def _rescan_roots(self):
+        for root in self.roots:
+            await self.scanner.scan_directory(root, self.user_id, use_journal=True)
+        self.stats['rescans'] += 1
+
+    def _close_inotify(self):
+        if self._inotify is None:
+            return
+        try:
+            asyncio.get_event_loop().remove_reader(self._inotify.fd)
+        except Exception:
+            pass
+        self._inotify.close()
+        self._inotify = None
+        self._wd_paths.clear()
+        self._path_wds.clear()
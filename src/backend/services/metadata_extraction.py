@@ -0,0 +1,91 @@
+"""
+File metadata extraction shared by the scanner's thread and process modes
+Only uses the standard library so worker processes start quickly
+"""
+
+import hashlib
+import mimetypes
+import os
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Compact, cheaply picklable result:
+# (path, size, mime_type, ctime, mtime, atime, checksum, content_preview)
+ExtractionResult = Tuple[str, int, Optional[str], float, float, float, Optional[str], Optional[str]]
+
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def compute_checksum(path: str) -> str:
+    """SHA256 of the file contents, read in 1MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_metadata(
+    path: str,
+    text_extensions: FrozenSet[str],
+    max_text_file_size: int,
+    max_preview_length: int
+) -> Optional[ExtractionResult]:
+    """Stat, MIME type, checksum and text preview for one file; None if unreadable"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    mime_type, _ = mimetypes.guess_type(path)
+
+    try:
+        checksum = compute_checksum(path)
+    except OSError:
+        checksum = None
+
+    preview = None
+    if (os.path.splitext(path)[1].lower() in text_extensions and
+            0 < stat.st_size < max_text_file_size):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read(max_preview_length)
+            if content.strip():
+                preview = content
+        except OSError:
+            pass
+
+    return (path, stat.st_size, mime_type, stat.st_ctime, stat.st_mtime, stat.st_atime, checksum, preview)
+
+
+def extract_metadata_chunk(
+    paths: List[str],
+    text_extensions: FrozenSet[str],
+    max_text_file_size: int,
+    max_preview_length: int
+) -> List[Optional[ExtractionResult]]:
+    """Worker-process entry point: extract a whole chunk per round trip"""
+    return [
+        extract_metadata(path, text_extensions, max_text_file_size, max_preview_length)
+        for path in paths
+    ]
+
+
+def result_to_metadata(result: Optional[ExtractionResult]) -> Dict[str, Any]:
+    """Expand a compact result into the scanner's metadata dict"""
+    if result is None:
+        return {}
+
+    _, size, mime_type, ctime, mtime, atime, checksum, preview = result
+    metadata = {
+        'size': size,
+        'mime_type': mime_type,
+        'created_at': datetime.fromtimestamp(ctime),
+        'modified_at': datetime.fromtimestamp(mtime),
+        'accessed_at': datetime.fromtimestamp(atime)
+    }
+    if checksum is not None:
+        metadata['checksum'] = checksum
+    if preview is not None:
+        metadata['content_preview'] = preview
+    return metadata
@@ -0,0 +1,112 @@
+"""
+Batched writer stage for scanned file metadata
+Collects FileMetadataCreate records from scan workers and upserts them in one
+transaction per batch, so scan throughput is not bound by per-file commits
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.backend.database.database import SessionLocal
+from src.backend.crud.crud_file import file_metadata as crud_file
+from src.backend.schemas.file_metadata import FileMetadataCreate
+
+
+class FileMetadataWriter:
+    """
+    Single consumer that drains a bounded queue of metadata records and
+    flushes them when ``batch_size`` records are waiting or ``flush_interval``
+    seconds have passed since the first record of the batch arrived.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        stats: Optional[Dict[str, Any]] = None
+    ):
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.stats = stats if stats is not None else {}
+        self.failed_paths: List[str] = []
+        self.batches_flushed = 0
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size * 4)
+        self._task: Optional[asyncio.Task] = None
+        self._use_on_conflict: Optional[bool] = None
+
+    async def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, record: FileMetadataCreate):
+        """Queue a record; waits when the writer is behind (backpressure)"""
+        await self._queue.put(record)
+
+    async def close(self):
+        """Flush everything queued and stop the flush loop"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def write_now(self, records: List[FileMetadataCreate]):
+        """Write records immediately, bypassing the queue"""
+        await self._flush(records)
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        closing = False
+        while not closing:
+            record = await self._queue.get()
+            if record is None:
+                break
+
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    closing = True
+                    break
+                batch.append(record)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[FileMetadataCreate]):
+        loop = asyncio.get_event_loop()
+        try:
+            inserted, updated = await loop.run_in_executor(self.executor, self._flush_sync, batch)
+        except Exception as e:
+            logger.error(f"Failed to write batch of {len(batch)} file records: {e}")
+            self.failed_paths.extend(record.file_path for record in batch)
+            self.stats['errors'] = self.stats.get('errors', 0) + len(batch)
+            return
+
+        self.batches_flushed += 1
+        self.stats['new_files'] = self.stats.get('new_files', 0) + inserted
+        self.stats['updated_files'] = self.stats.get('updated_files', 0) + updated
+
+    def _flush_sync(self, batch: List[FileMetadataCreate]) -> Tuple[int, int]:
+        db = SessionLocal()
+        try:
+            if self._use_on_conflict is None:
+                self._use_on_conflict = crud_file.ensure_upsert_index(db)
+                if not self._use_on_conflict:
+                    logger.warning("Duplicate file paths prevent the upsert index; using id-based batch updates")
+            return crud_file.bulk_upsert(db, records=batch, use_on_conflict=self._use_on_conflict)
+        finally:
+            db.close()
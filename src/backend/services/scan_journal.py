@@ -0,0 +1,197 @@
+"""
+Persistent scan journal for incremental file scanning
+Remembers (path, inode, size, mtime) of everything the scanner has seen so a
+rescan only touches files that actually changed
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from src.backend.crud.crud_scan_journal import scan_journal as crud_scan_journal, JournalState
+
+
+class ScanJournal:
+    """
+    In-memory view of the scan journal for one (user, root) scan.
+
+    Directories are diffed by their own mtime: a directory's mtime only changes
+    when entries are created, removed or renamed inside it, so an unchanged
+    directory is not listed again and its children are taken from the journal.
+    Those files are still stat'ed, since files edited in place do not bump
+    their directory's mtime. Set ``trust_directory_mtime=False`` to list every
+    directory instead.
+    """
+
+    def __init__(self, user_id: int, root: Path, trust_directory_mtime: bool = True):
+        self.user_id = user_id
+        self.root = str(Path(root).resolve())
+        self.trust_directory_mtime = trust_directory_mtime
+
+        self.entries: Dict[str, JournalState] = {}
+        self.observed: Dict[str, JournalState] = {}
+        self.pending: Set[str] = set()
+        self.skipped_files = 0
+        self.complete = False
+        self._recursive = True
+        self._children: Optional[Dict[str, List[str]]] = None
+
+    def load(self, db: Session) -> int:
+        """Load all journal rows below the root in one query"""
+        self.entries = crud_scan_journal.load_for_root(db, user_id=self.user_id, root=self.root)
+        self._children = None
+        return len(self.entries)
+
+    def walk(
+        self,
+        recursive: bool,
+        include_dir: Callable[[str], bool],
+        include_file: Callable[[str], bool],
+        is_cancelled: Callable[[], bool]
+    ) -> Iterator[Path]:
+        """
+        Walk the root and yield only files that are new or changed since the
+        last scan. Unchanged files are counted in ``skipped_files``.
+        """
+        self._recursive = recursive
+        self.complete = False
+        stack = [self.root]
+
+        while stack:
+            if is_cancelled():
+                return
+
+            directory = stack.pop()
+            try:
+                dir_stat = os.stat(directory)
+            except OSError as e:
+                logger.debug(f"Cannot stat directory {directory}: {e}")
+                continue
+
+            dir_state: JournalState = (True, dir_stat.st_ino, 0, dir_stat.st_mtime)
+            self.observed[directory] = dir_state
+
+            if self.trust_directory_mtime and self.entries.get(directory) == dir_state:
+                # Directory listing unchanged: take its children from the journal
+                for child in self._journal_children(directory):
+                    if is_cancelled():
+                        return
+                    if self.entries[child][0]:
+                        if recursive:
+                            stack.append(child)
+                        continue
+                    try:
+                        st = os.stat(child)
+                    except OSError:
+                        continue
+                    if self._observe_file(child, st):
+                        yield Path(child)
+                continue
+
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if is_cancelled():
+                            return
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive and include_dir(entry.name):
+                                    stack.append(entry.path)
+                                continue
+                            if not entry.is_file() or not include_file(entry.name):
+                                continue
+                            st = entry.stat()
+                        except OSError:
+                            continue
+
+                        if self._observe_file(entry.path, st):
+                            yield Path(entry.path)
+            except PermissionError:
+                logger.warning(f"Permission denied accessing: {directory}")
+            except OSError as e:
+                logger.debug(f"Error listing directory {directory}: {e}")
+
+        self.complete = True
+
+    def _observe_file(self, path: str, st: os.stat_result) -> bool:
+        """Record a walked file's state; True if it is new or changed"""
+        state: JournalState = (False, st.st_ino, st.st_size, st.st_mtime)
+        self.observed[path] = state
+        if self.entries.get(path) == state:
+            self.skipped_files += 1
+            return False
+        self.pending.add(path)
+        return True
+
+    def observe(self, file_path) -> bool:
+        """
+        Record the current state of a single file reported by the watcher so
+        it is journaled once processed. Returns False if it cannot be stat'ed.
+        """
+        path = str(file_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        self.observed[path] = (False, st.st_ino, st.st_size, st.st_mtime)
+        self.pending.add(path)
+        return True
+
+    def mark_processed(self, file_path) -> None:
+        """Confirm a changed file was stored so its new state can be journaled"""
+        self.pending.discard(str(file_path))
+
+    def mark_failed(self, file_path) -> None:
+        """Return a file to pending when storing it failed after processing"""
+        path = str(file_path)
+        if path in self.observed:
+            self.pending.add(path)
+
+    def save(self, db: Session) -> Dict[str, int]:
+        """
+        Persist the observed state. Files still pending (failed, cancelled or
+        beyond the scan limit) keep their previous journal row, and their
+        directories are written without an mtime so the next scan lists them.
+        """
+        dirty_dirs = {os.path.dirname(path) for path in self.pending}
+
+        updates = []
+        for path, state in self.observed.items():
+            if path in self.pending:
+                continue
+            if state[0] and path in dirty_dirs:
+                state = (True, state[1], 0, None)
+            if self.entries.get(path) != state:
+                updates.append((path, state))
+
+        removed: List[str] = []
+        if self.complete:
+            if self._recursive:
+                candidates = list(self.entries)
+            else:
+                # A flat scan never visits subdirectories, so only its files can vanish
+                candidates = [p for p in self._journal_children(self.root) if not self.entries[p][0]]
+            removed = [path for path in candidates if path not in self.observed]
+
+        upserted = crud_scan_journal.upsert_entries(db, user_id=self.user_id, entries=updates) if updates else 0
+        deleted = crud_scan_journal.delete_paths(db, user_id=self.user_id, paths=removed) if removed else 0
+
+        for path, state in updates:
+            self.entries[path] = state
+        for path in removed:
+            self.entries.pop(path, None)
+        self._children = None
+
+        return {'upserted': upserted, 'removed': deleted}
+
+    def _journal_children(self, directory: str) -> List[str]:
+        if self._children is None:
+            children: Dict[str, List[str]] = {}
+            for path in self.entries:
+                if path != self.root:
+                    children.setdefault(os.path.dirname(path), []).append(path)
+            self._children = children
+        return self._children.get(directory, [])
@@ -0,0 +1,172 @@
+"""
+Schedule Heap
+
+In-memory min-heap of the next fire time of every scheduled workflow trigger.
+A trigger's cron expression is evaluated when it is added or edited and again
+after it fires, never on an idle tick, and the scheduler sleeps until the
+earliest deadline instead of polling.
+
+Runs the scheduler missed (downtime, a blocked event loop) are handled by a
+MisfirePolicy once they are more than the grace period late.
+"""
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+from croniter import croniter
+
+
+class MisfirePolicy(Enum):
+    """What to do with scheduled runs that are more than the grace period late"""
+    FIRE_ONCE = "fire_once"  # run once now for all missed runs
+    FIRE_ALL = "fire_all"    # run every missed run, up to max_catchup
+    SKIP = "skip"            # drop missed runs and wait for the next one
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str):
+    return pytz.timezone(name)
+
+
+def next_fire_time(cron_expression: str, timezone: str, after: datetime) -> datetime:
+    """First fire time strictly after ``after``; both are naive UTC"""
+    zone = _zone(timezone or "UTC")
+    local = pytz.UTC.localize(after).astimezone(zone)
+    upcoming = croniter(cron_expression, local).get_next(datetime)
+    return upcoming.astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+@dataclass
+class ScheduleEntry:
+    trigger_id: int
+    cron_expression: str
+    timezone: str
+    next_fire: datetime
+    version: int = 0
+
+
+@dataclass
+class ScheduleStats:
+    fired: int = 0
+    misfired: int = 0
+    skipped: int = 0
+    recomputations: int = 0
+
+
+class ScheduleHeap:
+    """
+    Next fire times ordered by a heap. Edits and removals leave the old heap
+    item behind and bump the entry's version; stale items are skipped when
+    they surface and compacted away when they pile up.
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, ScheduleEntry] = {}
+        self._heap: List[Tuple[datetime, int, int, int]] = []
+        self._sequence = itertools.count()
+        self._versions = itertools.count(1)
+        self.stats = ScheduleStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, trigger_id: int) -> bool:
+        return trigger_id in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def get(self, trigger_id: int) -> Optional[ScheduleEntry]:
+        return self._entries.get(trigger_id)
+
+    def upsert(self, trigger_id: int, cron_expression: str, timezone: str, after: datetime) -> ScheduleEntry:
+        """Add or replace a trigger, scheduling its first run after ``after``"""
+        next_fire = next_fire_time(cron_expression, timezone, after)
+        self.stats.recomputations += 1
+        entry = ScheduleEntry(trigger_id, cron_expression, timezone, next_fire, next(self._versions))
+        self._entries[trigger_id] = entry
+        self._push(entry)
+        self._maybe_compact()
+        return entry
+
+    def remove(self, trigger_id: int) -> bool:
+        if self._entries.pop(trigger_id, None) is None:
+            return False
+        self._maybe_compact()
+        return True
+
+    def next_deadline(self) -> Optional[datetime]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime, policy: MisfirePolicy = MisfirePolicy.FIRE_ONCE,
+                grace_seconds: float = 60, max_catchup: int = 10) -> List[Tuple[ScheduleEntry, List[datetime]]]:
+        """
+        Entries whose fire time has passed, each with the scheduled times to
+        run now (empty when the policy skipped them), rescheduled for their
+        next run.
+        """
+        grace = timedelta(seconds=grace_seconds)
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, trigger_id, _ = heapq.heappop(self._heap)
+            entry = self._entries[trigger_id]
+            due.append((entry, self._runs_for(entry, now, policy, grace, max_catchup)))
+            self._push(entry)
+
+    def _runs_for(self, entry: ScheduleEntry, now: datetime, policy: MisfirePolicy,
+                  grace: timedelta, max_catchup: int) -> List[datetime]:
+        """Scheduled times to run for a due entry; advances ``entry.next_fire``"""
+        late = now - entry.next_fire > grace
+        if late:
+            self.stats.misfired += 1
+
+        if policy is MisfirePolicy.FIRE_ALL:
+            runs = []
+            fire = entry.next_fire
+            while fire <= now and len(runs) < max(max_catchup, 1):
+                runs.append(fire)
+                fire = next_fire_time(entry.cron_expression, entry.timezone, fire)
+                self.stats.recomputations += 1
+            if fire <= now:
+                # Past the catch-up limit: give up on the rest
+                self.stats.skipped += 1
+                fire = next_fire_time(entry.cron_expression, entry.timezone, now)
+                self.stats.recomputations += 1
+        else:
+            if late and policy is MisfirePolicy.SKIP:
+                runs = []
+                self.stats.skipped += 1
+            else:
+                runs = [entry.next_fire]
+            fire = next_fire_time(entry.cron_expression, entry.timezone, now)
+            self.stats.recomputations += 1
+
+        entry.next_fire = fire
+        self.stats.fired += len(runs)
+        return runs
+
+    def _push(self, entry: ScheduleEntry):
+        heapq.heappush(self._heap, (entry.next_fire, next(self._sequence), entry.trigger_id, entry.version))
+
+    def _is_stale(self, item: Tuple[datetime, int, int, int]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is None or entry.version != item[3] or entry.next_fire != item[0]
+
+    def _drop_stale(self):
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if not self._is_stale(item)]
+            heapq.heapify(self._heap)
@@ -0,0 +1,174 @@
+"""
+In-memory caches for the search API
+Query results are cached per user and tagged with the user's search generation,
+a counter the file_metadata triggers bump on every insert, update or delete, so
+an entry is served only while none of the user's files changed. Typeahead
+suggestions come from a per-user prefix trie of file name words and tags.
+"""
+
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from config.settings import get_settings
+
+_TERM_SPLIT = re.compile(r"[^\w]+")
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a query used in cache keys"""
+    return " ".join((query or "").lower().split())
+
+
+def suggestion_terms(file_name: Optional[str], tags: Optional[str]) -> List[str]:
+    """Words of a file name plus its comma-separated tags, lowercased"""
+    terms = [word for word in _TERM_SPLIT.split((file_name or "").lower()) if len(word) > 2]
+    terms.extend(tag.strip().lower() for tag in (tags or "").split(",") if len(tag.strip()) > 2)
+    return terms
+
+
+class _TrieNode:
+    __slots__ = ("children", "count", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.count = 0
+        self.top: List[Tuple[int, str]] = []
+
+
+class PrefixTrie:
+    """
+    Term trie where every node keeps its ``top_k`` most frequent completions,
+    so a lookup costs one walk down the prefix regardless of subtree size.
+    """
+
+    def __init__(self, terms: Iterable[str] = (), top_k: int = 20):
+        self.top_k = top_k
+        self.root = _TrieNode()
+        self.size = 0
+        for term in terms:
+            self._insert(term)
+        self._collect(self.root, "")
+
+    def _insert(self, term: str):
+        node = self.root
+        for char in term:
+            node = node.children.setdefault(char, _TrieNode())
+        if node.count == 0:
+            self.size += 1
+        node.count += 1
+
+    def _collect(self, root: _TrieNode, root_prefix: str):
+        # Iterative post-order so long terms cannot exhaust the recursion limit
+        stack = [(root, root_prefix, False)]
+        while stack:
+            node, prefix, visited = stack.pop()
+            if not visited:
+                stack.append((node, prefix, True))
+                stack.extend((child, prefix + char, False) for char, child in node.children.items())
+                continue
+            candidates = [(node.count, prefix)] if node.count else []
+            for child in node.children.values():
+                candidates.extend(child.top)
+            # Most frequent first, alphabetical among equals
+            node.top = heapq.nsmallest(self.top_k, candidates, key=lambda item: (-item[0], item[1]))
+
+    def complete(self, prefix: str, limit: int = 5) -> List[str]:
+        """Most frequent terms starting with ``prefix``"""
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [term for _, term in node.top[:limit]]
+
+
+class SearchCache:
+    """
+    Bounded LRU of search responses keyed by (user, endpoint key). Each entry
+    remembers the generation it was computed at; a lookup with a newer
+    generation misses and drops it.
+    """
+
+    def __init__(self, max_entries: int = 2048, suggestion_top_k: int = 20):
+        self.max_entries = max_entries
+        self.suggestion_top_k = suggestion_top_k
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[int, Any]]" = OrderedDict()
+        self._tries: Dict[int, Tuple[int, PrefixTrie]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.trie_builds = 0
+
+    def get(self, user_id: int, generation: Optional[int], key: Hashable) -> Optional[Any]:
+        """Cached value for ``key``, or None if missing or computed at another generation"""
+        if generation is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None or entry[0] != generation:
+                if entry is not None:
+                    del self._entries[(user_id, key)]
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, key))
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, generation: Optional[int], key: Hashable, value: Any):
+        """Store a value computed at ``generation``; values must not be mutated afterwards"""
+        if generation is None:
+            return
+        with self._lock:
+            self._entries[(user_id, key)] = (generation, value)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def suggest(
+        self,
+        user_id: int,
+        generation: Optional[int],
+        prefix: str,
+        limit: int,
+        load_terms: Callable[[], Iterable[str]]
+    ) -> List[str]:
+        """Complete ``prefix`` from the user's trie, rebuilding it via ``load_terms`` when stale"""
+        with self._lock:
+            cached = self._tries.get(user_id)
+        if generation is None or cached is None or cached[0] != generation:
+            trie = PrefixTrie(load_terms(), top_k=self.suggestion_top_k)
+            with self._lock:
+                self.trie_builds += 1
+                if generation is not None:
+                    self._tries[user_id] = (generation, trie)
+        else:
+            trie = cached[1]
+        return trie.complete(normalize_query(prefix), limit)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'suggestion_tries': len(self._tries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0.0,
+                'evictions': self.evictions,
+                'trie_builds': self.trie_builds
+            }
+
+
+search_cache = SearchCache(max_entries=get_settings().search_cache_size)
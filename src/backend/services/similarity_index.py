@@ -0,0 +1,196 @@
+"""
+Persistent TF-IDF similarity index for find_similar_files
+Keeps a fitted vocabulary and an L2-normalized sparse document matrix per user,
+so a similarity query is one sparse matrix-vector product plus a top-k selection
+instead of refitting TF-IDF over the whole catalog
+"""
+
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SIMILARITY_AVAILABLE = True
+except ImportError:
+    SIMILARITY_AVAILABLE = False
+
+INDEX_FORMAT_VERSION = 1
+
+# (key, text, info) as accepted by SimilarityIndex.add
+Document = Tuple[str, str, Dict[str, Any]]
+
+
+def document_from_item(item: Dict[str, Any]) -> Document:
+    """Build an index document from a file dict as passed to find_similar_files"""
+    key = item.get('file_path') or item.get('path') or item.get('id') or item.get('filename', '')
+    text = f"{item.get('filename', '')} {item.get('description', '')}"
+    return str(key), text, item
+
+
+def item_from_file(record) -> Dict[str, Any]:
+    """The find_similar_files shape of a file_metadata row or record"""
+    return {
+        'file_path': record.file_path,
+        'filename': record.file_name,
+        'description': record.ai_description or (record.ai_tags or '').replace(',', ' ')
+    }
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index over short file descriptions.
+
+    New documents are transformed with the fitted vocabulary and appended;
+    the vocabulary is refitted once the documents added since the last fit
+    exceed ``refit_ratio`` of the fitted corpus. Replaced and removed rows are
+    tombstoned and compacted away on the next refit.
+    """
+
+    def __init__(self, refit_ratio: float = 0.5, max_features: int = 20000):
+        self.refit_ratio = refit_ratio
+        self.max_features = max_features
+
+        self.keys: List[Optional[str]] = []
+        self.texts: List[str] = []
+        self.infos: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.dead: Set[int] = set()
+
+        self.vectorizer = None
+        self.matrix = None
+        self.fitted_documents = 0
+        self.added_since_fit = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, documents: Iterable[Document]) -> int:
+        """Insert or replace documents; returns how many changed"""
+        with self._lock:
+            new_rows = []
+            for key, text, info in documents:
+                row = self.rows.get(key)
+                if row is not None:
+                    if self.texts[row] == text:
+                        self.infos[row] = info
+                        continue
+                    self._tombstone(row)
+                self.rows[key] = len(self.keys)
+                self.keys.append(key)
+                self.texts.append(text)
+                self.infos.append(info)
+                new_rows.append(len(self.keys) - 1)
+
+            if not new_rows:
+                return 0
+
+            self.added_since_fit += len(new_rows)
+            if self.vectorizer is None or self.added_since_fit > self.refit_ratio * max(self.fitted_documents, 1):
+                self._refit()
+            else:
+                vectors = self.vectorizer.transform([self.texts[row] for row in new_rows])
+                self.matrix = sparse.vstack([self.matrix, vectors], format='csr')
+            return len(new_rows)
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """Remove documents by key"""
+        with self._lock:
+            removed = 0
+            for key in keys:
+                row = self.rows.pop(key, None)
+                if row is not None:
+                    self._tombstone(row)
+                    removed += 1
+            if removed and len(self.dead) > len(self.keys) // 4:
+                self._refit()
+            return removed
+
+    def remove_under(self, directory: str) -> int:
+        """Remove all documents whose key is a path below ``directory``"""
+        prefix = directory.rstrip('/') + '/'
+        with self._lock:
+            return self.remove([key for key in self.rows if key.startswith(prefix)])
+
+    def query(
+        self,
+        text: str,
+        limit: int = 5,
+        min_score: float = 0.1,
+        exclude_key: Optional[str] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Top ``limit`` documents by cosine similarity, best first"""
+        with self._lock:
+            if self.vectorizer is None or self.matrix is None or not self.rows or limit <= 0:
+                return []
+
+            query_vector = self.vectorizer.transform([text])
+            # Rows are L2-normalized, so the dot product is the cosine similarity
+            scores = (self.matrix @ query_vector.T).toarray().ravel()
+            if self.dead:
+                scores[list(self.dead)] = 0.0
+            if exclude_key is not None and exclude_key in self.rows:
+                scores[self.rows[exclude_key]] = 0.0
+
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(self.infos[row], float(scores[row])) for row in top if scores[row] > min_score]
+
+    def _tombstone(self, row: int):
+        self.keys[row] = None
+        self.dead.add(row)
+
+    def _refit(self):
+        """Compact tombstoned rows and refit the vocabulary on all live documents"""
+        live = [row for row, key in enumerate(self.keys) if key is not None]
+        self.keys = [self.keys[row] for row in live]
+        self.texts = [self.texts[row] for row in live]
+        self.infos = [self.infos[row] for row in live]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.dead = set()
+
+        self.vectorizer = TfidfVectorizer(max_features=self.max_features, ngram_range=(1, 2), sublinear_tf=True)
+        try:
+            self.matrix = self.vectorizer.fit_transform(self.texts).tocsr()
+        except ValueError:
+            # Only stop words or empty texts so far
+            self.vectorizer = None
+            self.matrix = None
+        self.fitted_documents = len(self.texts)
+        self.added_since_fit = 0
+
+    def save(self, path: Path):
+        """Write the index atomically"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            state = {key: value for key, value in self.__dict__.items() if key != '_lock'}
+            state['format'] = INDEX_FORMAT_VERSION
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['SimilarityIndex']:
+        """Load an index written by ``save``; None if missing or incompatible"""
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable similarity index {path}: {e}")
+            return None
+        if state.pop('format', None) != INDEX_FORMAT_VERSION:
+            return None
+        index = cls()
+        index.__dict__.update(state)
+        return index
@@ -18,10 +18,11 @@ from loguru import logger
 
 from src.backend.database.database import SessionLocal
 from src.backend.models.workflow import (
-    Workflow, WorkflowExecution, WorkflowStep, WorkflowStepExecution,
+    Workflow, WorkflowExecution, WorkflowStep,
     WorkflowAnalytics, WorkflowExecutionStatus, WorkflowStatus
 )
 from src.backend.crud.crud_workflow import crud_workflow, crud_workflow_execution
+from src.backend.services.workflow_execution_log import StepRecord, execution_log
 
 
 @dataclass
@@ -168,23 +169,17 @@ class WorkflowAnalyticsService:
                 WorkflowExecution.status == WorkflowExecutionStatus.PENDING
             ).count()
             
-            # Calculate average step execution time
-            step_times = []
-            bottleneck_steps = []
-            
-            for execution in executions:
-                step_executions = db.query(WorkflowStepExecution).filter(
-                    WorkflowStepExecution.execution_id == execution.id
-                ).all()
-                
-                for step_exec in step_executions:
-                    if step_exec.execution_time_seconds:
-                        step_times.append(step_exec.execution_time_seconds)
+            # Calculate average step execution time, including records not yet flushed
+            step_records = execution_log.read(db, [execution.id for execution in executions])
+            step_times = [
+                record.execution_time_seconds for record in step_records
+                if record.execution_time_seconds
+            ]
             
             avg_step_time = statistics.mean(step_times) if step_times else 0
             
             # Identify bottleneck steps
-            bottleneck_steps = self._identify_bottleneck_steps(db, workflow_id, start_time)
+            bottleneck_steps = self._identify_bottleneck_steps(db, step_records)
             
             # Resource utilization (placeholder)
             resource_utilization = {
@@ -209,39 +204,35 @@ class WorkflowAnalyticsService:
     def _identify_bottleneck_steps(
         self,
         db: Session,
-        workflow_id: Optional[int],
-        start_time: datetime
+        step_records: List[StepRecord]
     ) -> List[Dict]:
         """Identify steps that are performance bottlenecks"""
-        query = db.query(
-            WorkflowStepExecution.step_id,
-            func.avg(WorkflowStepExecution.execution_time_seconds).label('avg_time'),
-            func.count(WorkflowStepExecution.id).label('execution_count')
-        ).filter(
-            and_(
-                WorkflowStepExecution.started_at >= start_time,
-                WorkflowStepExecution.execution_time_seconds.isnot(None)
-            )
-        )
+        times_by_step = defaultdict(list)
+        for record in step_records:
+            if record.execution_time_seconds is not None:
+                times_by_step[record.step_id].append(record.execution_time_seconds)
         
-        if workflow_id:
-            query = query.join(WorkflowExecution).filter(
-                WorkflowExecution.workflow_id == workflow_id
+        # Sort by average execution time (descending)
+        slowest = sorted(
+            ((statistics.mean(times), step_id, len(times)) for step_id, times in times_by_step.items()),
+            reverse=True
+        )[:5]
+        steps = {
+            step.id: step for step in db.query(WorkflowStep).filter(
+                WorkflowStep.id.in_([step_id for _, step_id, _ in slowest])
             )
+        } if slowest else {}
         
-        step_stats = query.group_by(WorkflowStepExecution.step_id).all()
-        
-        # Sort by average execution time (descending)
         bottlenecks = []
-        for stat in sorted(step_stats, key=lambda x: x.avg_time, reverse=True)[:5]:
-            step = db.query(WorkflowStep).filter(WorkflowStep.id == stat.step_id).first()
+        for avg_time, step_id, execution_count in slowest:
+            step = steps.get(step_id)
             
             bottlenecks.append({
-                "step_id": stat.step_id,
+                "step_id": step_id,
                 "step_name": step.name if step else "Unknown",
                 "step_type": step.step_type.value if step else "Unknown",
-                "avg_execution_time": round(stat.avg_time, 2),
-                "execution_count": stat.execution_count
+                "avg_execution_time": round(avg_time, 2),
+                "execution_count": execution_count
             })
         
         return bottlenecks
@@ -477,16 +468,21 @@ class WorkflowAnalyticsService:
         
         step_analysis = []
         
-        for step in steps:
-            # Get step executions
-            step_executions = db.query(WorkflowStepExecution).join(
-                WorkflowExecution
-            ).filter(
+        # Step executions of the period, read once through the execution log
+        execution_ids = [
+            execution_id for (execution_id,) in db.query(WorkflowExecution.id).filter(
                 and_(
-                    WorkflowStepExecution.step_id == step.id,
+                    WorkflowExecution.workflow_id == workflow_id,
                     WorkflowExecution.started_at >= start_date
                 )
-            ).all()
+            )
+        ]
+        records_by_step = defaultdict(list)
+        for record in execution_log.read(db, execution_ids):
+            records_by_step[record.step_id].append(record)
+        
+        for step in steps:
+            step_executions = records_by_step.get(step.id)
             
             if not step_executions:
                 continue
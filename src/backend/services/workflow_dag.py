@@ -0,0 +1,202 @@
+"""
+Workflow DAG Executor
+
+Runs workflow steps as a dependency graph: each step starts as soon as its
+last dependency has completed (bounded by a max parallelism), instead of in
+waves. The graph is validated up front and cycles are rejected. After the
+run the critical path through the recorded step timings shows where the
+wall-clock time went.
+"""
+
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+
+class WorkflowCycleError(ValueError):
+    """Raised when step dependencies form a cycle"""
+
+    def __init__(self, step_ids: List[int]):
+        self.step_ids = step_ids
+        super().__init__(f"Workflow steps in or behind a dependency cycle: {step_ids}")
+
+
+def topological_order(steps: Sequence[Any]) -> Tuple[List[int], Set[int]]:
+    """
+    Step ids in an order where dependencies come first (ties keep the given
+    step order), plus the ids of steps that depend, directly or not, on a
+    step that does not exist and so can never run. Raises WorkflowCycleError.
+    """
+    position = {step.id: index for index, step in enumerate(steps)}
+    dependents: Dict[int, List[int]] = {step.id: [] for step in steps}
+    missing: Set[int] = set()
+    indegree: Dict[int, int] = {}
+    for step in steps:
+        deps = set(step.depends_on or [])
+        if deps - position.keys():
+            missing.add(step.id)
+        indegree[step.id] = len(deps & position.keys())
+        for dep in deps & position.keys():
+            dependents[dep].append(step.id)
+
+    ready = [(position[step_id], step_id) for step_id, count in indegree.items() if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, step_id = heapq.heappop(ready)
+        order.append(step_id)
+        for dependent in dependents[step_id]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                heapq.heappush(ready, (position[dependent], dependent))
+
+    if len(order) < len(steps):
+        raise WorkflowCycleError(sorted(step_id for step_id, count in indegree.items() if count > 0))
+
+    # Whatever depends on an unrunnable step is unrunnable too
+    for step_id in order:
+        if any(dep in missing for dep in steps[position[step_id]].depends_on or []):
+            missing.add(step_id)
+    return order, missing
+
+
+@dataclass
+class DagRunResult:
+    """Outcome and timings of a DAG run; times are seconds from the start of the run"""
+    completed: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+    skipped: List[int] = field(default_factory=list)  # conditions not met
+    blocked: List[int] = field(default_factory=list)  # a dependency failed, was skipped or is missing
+    timings: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+    critical_path: List[int] = field(default_factory=list)
+    critical_path_seconds: float = 0.0
+    max_concurrency: int = 0
+
+    def to_dict(self, names: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+        names = names or {}
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "blocked": self.blocked,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "max_concurrency": self.max_concurrency,
+            "critical_path": [
+                {
+                    "step_id": step_id,
+                    "name": names.get(step_id),
+                    "started_at": round(self.timings[step_id][0], 3),
+                    "seconds": round(self.timings[step_id][1] - self.timings[step_id][0], 3)
+                }
+                for step_id in self.critical_path
+            ],
+            "critical_path_seconds": round(self.critical_path_seconds, 3)
+        }
+
+
+class DagExecutor:
+    """
+    Run ``steps`` (objects with ``id`` and ``depends_on``) through
+    ``run_step``, which returns whether the step succeeded; an exception from
+    it cancels the steps still running and propagates. ``should_run`` is
+    checked when a step becomes ready; steps it rejects count as skipped and
+    their dependents never run. With ``max_parallelism`` 0 every ready step
+    starts at once; ready steps start in the given step order.
+    """
+
+    def __init__(self, steps: Sequence[Any], run_step: Callable[[Any], Awaitable[bool]],
+                 should_run: Optional[Callable[[Any], Awaitable[bool]]] = None,
+                 max_parallelism: int = 0):
+        self.steps = list(steps)
+        self.run_step = run_step
+        self.should_run = should_run
+        self.max_parallelism = max_parallelism
+        self.order, self.unrunnable = topological_order(self.steps)
+
+    async def run(self) -> DagRunResult:
+        result = DagRunResult()
+        by_id = {step.id: step for step in self.steps}
+        position = {step.id: index for index, step in enumerate(self.steps)}
+        waiting_on: Dict[int, Set[int]] = {}
+        dependents: Dict[int, List[int]] = {step.id: [] for step in self.steps}
+        ready: List[Tuple[int, int]] = []
+        for step in self.steps:
+            if step.id in self.unrunnable:
+                continue
+            deps = set(step.depends_on or [])
+            waiting_on[step.id] = deps
+            for dep in deps:
+                dependents[dep].append(step.id)
+            if not deps:
+                heapq.heappush(ready, (position[step.id], step.id))
+
+        started_at = time.perf_counter()
+        running: Dict[asyncio.Task, int] = {}
+        try:
+            while ready or running:
+                while ready and (not self.max_parallelism or len(running) < self.max_parallelism):
+                    _, step_id = heapq.heappop(ready)
+                    step = by_id[step_id]
+                    if self.should_run is not None and not await self.should_run(step):
+                        result.skipped.append(step_id)
+                        continue
+                    task = asyncio.ensure_future(self.run_step(step))
+                    running[task] = step_id
+                    result.timings[step_id] = (time.perf_counter() - started_at, 0.0)
+                    result.max_concurrency = max(result.max_concurrency, len(running))
+
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    result.timings[step_id] = (result.timings[step_id][0], time.perf_counter() - started_at)
+                    if not task.result():
+                        result.failed.append(step_id)
+                        continue
+                    result.completed.append(step_id)
+                    for dependent in dependents[step_id]:
+                        waiting_on[dependent].discard(step_id)
+                        if not waiting_on[dependent]:
+                            heapq.heappush(ready, (position[dependent], dependent))
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        result.wall_seconds = time.perf_counter() - started_at
+        finished = set(result.completed) | set(result.failed) | set(result.skipped)
+        result.blocked = [step_id for step_id in self.order if step_id not in finished]
+        result.critical_path, result.critical_path_seconds = self._critical_path(result.timings)
+        return result
+
+    def _critical_path(self, timings: Dict[int, Tuple[float, float]]) -> Tuple[List[int], float]:
+        """Longest chain of dependent steps that ran, by duration"""
+        by_id = {step.id: step for step in self.steps}
+        length: Dict[int, float] = {}
+        previous: Dict[int, Optional[int]] = {}
+        for step_id in self.order:
+            if step_id not in timings:
+                continue
+            start, end = timings[step_id]
+            best_dep = max(
+                (dep for dep in by_id[step_id].depends_on or [] if dep in length),
+                key=lambda dep: length[dep],
+                default=None
+            )
+            length[step_id] = (end - start) + (length[best_dep] if best_dep is not None else 0.0)
+            previous[step_id] = best_dep
+
+        if not length:
+            return [], 0.0
+        step_id = max(length, key=length.get)
+        total = length[step_id]
+        path = []
+        while step_id is not None:
+            path.append(step_id)
+            step_id = previous[step_id]
+        return path[::-1], total
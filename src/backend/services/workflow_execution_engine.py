@@ -16,6 +16,7 @@ from loguru import logger
 import httpx
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from config.settings import get_settings
 from src.backend.crud.crud_workflow import (
     crud_workflow, crud_workflow_execution, crud_workflow_step
 )
@@ -23,20 +24,44 @@ from src.backend.crud.crud_task import task
 from src.backend.crud.crud_workspace import workspace
 from src.backend.database.database import SessionLocal
 from src.backend.models.workflow import (
-    Workflow, WorkflowExecution, WorkflowStep, WorkflowStepExecution,
+    Workflow, WorkflowExecution, WorkflowStep,
     WorkflowExecutionStatus, ActionType
 )
 from src.backend.services.ai_service import ai_service
 from src.backend.services.enhanced_ai_service import enhanced_ai_service
+from src.backend.services.workflow_dag import DagExecutor, DagRunResult
+from src.backend.services.workflow_execution_log import ExecutionLog, StepRecord, execution_log
+from src.backend.services.workflow_queue import WorkflowExecutionQueue, WorkflowQueueWorker
 
 
 class WorkflowExecutionEngine:
-    """Engine for executing workflows with error handling and recovery"""
+    """
+    Engine for executing workflows with error handling and recovery
+    
+    With the execution queue enabled, execute_workflow only records and
+    queues the run; a WorkflowQueueWorker (in this process via start_worker,
+    or in separate worker processes) picks it up and calls run_execution.
+    active_executions and execution_context only cover runs in this process.
+    
+    Step attempts are recorded through an ExecutionLog, which group-commits
+    them; it is flushed before an execution is marked finished.
+    """
     
     def __init__(self):
+        settings = get_settings()
         self.active_executions: Dict[int, asyncio.Task] = {}
         self.execution_context: Dict[int, Dict[str, Any]] = {}
         self.thread_pool = ThreadPoolExecutor(max_workers=10)
+        
+        self.queue: Optional[WorkflowExecutionQueue] = None
+        if settings.workflow_queue_enabled:
+            self.queue = WorkflowExecutionQueue(
+                lease_seconds=settings.workflow_lease_seconds,
+                max_attempts=settings.workflow_max_attempts
+            )
+        self.worker: Optional[WorkflowQueueWorker] = None
+        
+        self.execution_log: ExecutionLog = execution_log
     
     async def execute_workflow(
         self,
@@ -62,6 +87,13 @@ class WorkflowExecutionEngine:
                 db, obj_in=execution_create, user_id=user_id
             )
             
+            if self.queue is not None:
+                self.queue.enqueue(db, execution.id, workspace_id=execution.workflow.workspace_id)
+                if self.worker is not None:
+                    self.worker.notify()
+                logger.info(f"Queued workflow execution {execution.id} for workflow {workflow_id}")
+                return execution.id
+            
             # Start execution task
             task = asyncio.create_task(
                 self._execute_workflow_async(execution.id)
@@ -74,6 +106,43 @@ class WorkflowExecutionEngine:
         finally:
             db.close()
     
+    async def run_execution(self, execution_id: int) -> None:
+        """Run a queued execution in this process; called by queue workers"""
+        self.active_executions[execution_id] = asyncio.current_task()
+        await self._execute_workflow_async(execution_id)
+    
+    async def start_worker(self, concurrency: Optional[int] = None) -> bool:
+        """Start draining the execution queue in this process"""
+        if self.queue is None or self.worker is not None:
+            return False
+        settings = get_settings()
+        self.worker = WorkflowQueueWorker(
+            self.queue,
+            self.run_execution,
+            concurrency=concurrency or settings.workflow_worker_concurrency,
+            workspace_concurrency=settings.workflow_workspace_concurrency,
+            poll_seconds=settings.workflow_queue_poll_seconds
+        )
+        await self.worker.start()
+        return True
+    
+    async def stop_worker(self) -> None:
+        """Stop the queue worker, handing unfinished runs back to the queue"""
+        if self.worker is not None:
+            await self.worker.stop()
+            self.worker = None
+        await self.execution_log.flush_async()
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Queue depth, lease and worker statistics"""
+        if self.queue is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **self.queue.get_stats(),
+            "worker": self.worker.get_stats() if self.worker else None
+        }
+    
     async def _execute_workflow_async(self, execution_id: int) -> None:
         """Execute workflow asynchronously"""
         db = SessionLocal()
@@ -116,6 +185,9 @@ class WorkflowExecutionEngine:
                 else:
                     await self._execute_sequential_workflow(db, execution, workflow)
                 
+                # Step records must be stored before the execution reads as finished
+                await self.execution_log.flush_async()
+                
                 # Mark execution as completed
                 crud_workflow_execution.update_execution_status(
                     db, 
@@ -129,6 +201,7 @@ class WorkflowExecutionEngine:
             except Exception as e:
                 logger.error(f"Workflow execution {execution_id} failed: {str(e)}")
                 logger.error(traceback.format_exc())
+                await self.execution_log.flush_async()
                 
                 # Mark execution as failed
                 crud_workflow_execution.update_execution_status(
@@ -152,42 +225,29 @@ class WorkflowExecutionEngine:
         execution: WorkflowExecution, 
         workflow: Workflow
     ) -> None:
-        """Execute workflow steps sequentially"""
+        """Execute workflow steps one at a time, in step order as far as dependencies allow"""
         # Get ordered steps
         steps = crud_workflow_step.get_by_workflow(
             db, workflow_id=workflow.id, ordered=True
         )
+        # Hand the connection back while the steps run; the log writes through its own sessions
+        db.commit()
         
-        completed_steps = set()
-        
-        for step in steps:
-            # Check if step dependencies are met
-            if step.depends_on:
-                if not all(dep_id in completed_steps for dep_id in step.depends_on):
-                    logger.warning(f"Step {step.id} dependencies not met, skipping")
-                    continue
+        async def run_step(step: WorkflowStep) -> bool:
+            success = await self._execute_step(execution.id, step)
             
-            # Check step conditions
-            if not await self._evaluate_conditions(step.conditions, execution.id):
-                logger.info(f"Step {step.id} conditions not met, skipping")
-                continue
-            
-            # Execute step
-            success = await self._execute_step(db, execution.id, step)
-            
-            if success:
-                completed_steps.add(step.id)
-            else:
+            if not success:
                 # Handle step failure based on error handling strategy
                 if step.on_error == "fail":
                     raise Exception(f"Step {step.name} failed and workflow is set to fail on error")
                 elif step.on_error == "continue":
                     logger.warning(f"Step {step.name} failed but continuing workflow")
-                    continue
                 elif step.on_error == "retry":
                     # Retry logic is handled in _execute_step
                     logger.warning(f"Step {step.name} failed after retries")
-                    continue
+            return success
+        
+        await self._run_step_graph(execution, steps, run_step, max_parallelism=1)
     
     async def _execute_parallel_workflow(
         self, 
@@ -195,48 +255,63 @@ class WorkflowExecutionEngine:
         execution: WorkflowExecution, 
         workflow: Workflow
     ) -> None:
-        """Execute workflow steps in parallel where possible"""
+        """Execute workflow steps in parallel, each as soon as its dependencies complete"""
         steps = crud_workflow_step.get_by_workflow(
             db, workflow_id=workflow.id, ordered=True
         )
+        # Hand the connection back while the steps run; the log writes through its own sessions
+        db.commit()
+        
+        async def run_step(step: WorkflowStep) -> bool:
+            try:
+                success = await self._execute_step(execution.id, step)
+            except Exception as e:
+                logger.error(f"Parallel step {step.name} failed with error: {e}")
+                return False
+            if not success:
+                logger.warning(f"Parallel step {step.name} failed")
+            return success
         
-        completed_steps = set()
-        pending_steps = {step.id: step for step in steps}
-        
-        while pending_steps:
-            # Find steps that can be executed (dependencies met)
-            ready_steps = []
-            for step_id, step in pending_steps.items():
-                if not step.depends_on or all(dep_id in completed_steps for dep_id in step.depends_on):
-                    # Check conditions
-                    if await self._evaluate_conditions(step.conditions, execution.id):
-                        ready_steps.append(step)
-            
-            if not ready_steps:
-                logger.warning("No more steps can be executed due to dependencies")
-                break
-            
-            # Execute ready steps in parallel
-            tasks = []
-            for step in ready_steps:
-                task = asyncio.create_task(self._execute_step(db, execution.id, step))
-                tasks.append((step, task))
-                del pending_steps[step.id]
-            
-            # Wait for all parallel tasks to complete
-            for step, task in tasks:
-                try:
-                    success = await task
-                    if success:
-                        completed_steps.add(step.id)
-                    else:
-                        logger.warning(f"Parallel step {step.name} failed")
-                except Exception as e:
-                    logger.error(f"Parallel step {step.name} failed with error: {e}")
+        # 0 runs every ready step at once
+        max_parallelism = int((workflow.config or {}).get("max_parallelism", 0) or 0)
+        await self._run_step_graph(execution, steps, run_step, max_parallelism)
+    
+    async def _run_step_graph(
+        self,
+        execution: WorkflowExecution,
+        steps: List[WorkflowStep],
+        run_step,
+        max_parallelism: int
+    ) -> DagRunResult:
+        """Run steps through the DAG executor and record where the time went"""
+        async def should_run(step: WorkflowStep) -> bool:
+            # Checked once the dependencies have run, so their outputs are in the context
+            if await self._evaluate_conditions(step.conditions, execution.id):
+                return True
+            logger.info(f"Step {step.id} conditions not met, skipping")
+            return False
+        
+        executor = DagExecutor(steps, run_step, should_run, max_parallelism)
+        if executor.unrunnable:
+            logger.warning(f"Steps {sorted(executor.unrunnable)} depend on missing steps and will not run")
+        
+        result = await executor.run()
+        names = {step.id: step.name for step in steps}
+        if execution.id in self.execution_context:
+            self.execution_context[execution.id]["dag_report"] = result.to_dict(names)
+        
+        if result.blocked:
+            logger.warning(f"Steps {result.blocked} did not run because a dependency did not complete")
+        logger.info(
+            f"Execution {execution.id}: {len(result.completed)}/{len(steps)} steps completed in "
+            f"{result.wall_seconds:.2f}s; critical path "
+            f"{' -> '.join(names[step_id] for step_id in result.critical_path) or '-'} "
+            f"({result.critical_path_seconds:.2f}s)"
+        )
+        return result
     
     async def _execute_step(
         self, 
-        db: Session, 
         execution_id: int, 
         step: WorkflowStep
     ) -> bool:
@@ -244,19 +319,17 @@ class WorkflowExecutionEngine:
         max_attempts = step.retry_count + 1
         
         for attempt in range(max_attempts):
+            started_at = datetime.utcnow()
+            # Record the step execution as running
+            self.execution_log.append(StepRecord(
+                execution_id=execution_id,
+                step_id=step.id,
+                attempt_number=attempt + 1,
+                status=WorkflowExecutionStatus.RUNNING,
+                started_at=started_at
+            ))
+            
             try:
-                # Create step execution record
-                step_execution = WorkflowStepExecution(
-                    execution_id=execution_id,
-                    step_id=step.id,
-                    attempt_number=attempt + 1,
-                    started_at=datetime.utcnow(),
-                    status=WorkflowExecutionStatus.RUNNING
-                )
-                db.add(step_execution)
-                db.commit()
-                db.refresh(step_execution)
-                
                 # Execute step based on type
                 input_data = self._prepare_step_input(step, execution_id)
                 output_data = await self._execute_step_action(step, input_data)
@@ -264,16 +337,19 @@ class WorkflowExecutionEngine:
                 # Process output mapping
                 self._process_step_output(step, output_data, execution_id)
                 
-                # Update step execution as completed
-                step_execution.status = WorkflowExecutionStatus.COMPLETED
-                step_execution.completed_at = datetime.utcnow()
-                step_execution.execution_time_seconds = (
-                    step_execution.completed_at - step_execution.started_at
-                ).total_seconds()
-                step_execution.input_data = input_data
-                step_execution.output_data = output_data
-                
-                db.commit()
+                # Record the step execution as completed
+                completed_at = datetime.utcnow()
+                self.execution_log.append(StepRecord(
+                    execution_id=execution_id,
+                    step_id=step.id,
+                    attempt_number=attempt + 1,
+                    status=WorkflowExecutionStatus.COMPLETED,
+                    started_at=started_at,
+                    completed_at=completed_at,
+                    execution_time_seconds=(completed_at - started_at).total_seconds(),
+                    input_data=input_data,
+                    output_data=output_data
+                ))
                 
                 logger.info(f"Step {step.name} completed successfully")
                 return True
@@ -281,18 +357,19 @@ class WorkflowExecutionEngine:
             except Exception as e:
                 logger.error(f"Step {step.name} attempt {attempt + 1} failed: {str(e)}")
                 
-                # Update step execution as failed
-                step_execution.status = WorkflowExecutionStatus.FAILED
-                step_execution.completed_at = datetime.utcnow()
-                step_execution.error_message = str(e)
-                step_execution.logs = traceback.format_exc()
-                
-                if step_execution.started_at:
-                    step_execution.execution_time_seconds = (
-                        step_execution.completed_at - step_execution.started_at
-                    ).total_seconds()
-                
-                db.commit()
+                # Record the step execution as failed
+                completed_at = datetime.utcnow()
+                self.execution_log.append(StepRecord(
+                    execution_id=execution_id,
+                    step_id=step.id,
+                    attempt_number=attempt + 1,
+                    status=WorkflowExecutionStatus.FAILED,
+                    started_at=started_at,
+                    completed_at=completed_at,
+                    execution_time_seconds=(completed_at - started_at).total_seconds(),
+                    error_message=str(e),
+                    logs=traceback.format_exc()
+                ))
                 
                 # If not last attempt, wait before retry
                 if attempt < max_attempts - 1:
@@ -652,10 +729,15 @@ class WorkflowExecutionEngine:
     
     async def pause_execution(self, execution_id: int) -> bool:
         """Pause workflow execution"""
+        cancelled = False
         if execution_id in self.active_executions:
-            task = self.active_executions[execution_id]
-            task.cancel()
-            
+            self.active_executions[execution_id].cancel()
+            cancelled = True
+        # A worker in another process running it loses its lease and stops
+        if self.queue is not None and self.queue.cancel(execution_id):
+            cancelled = True
+        
+        if cancelled:
             db = SessionLocal()
             try:
                 crud_workflow_execution.update_execution_status(
@@ -702,6 +784,9 @@ class WorkflowExecutionEngine:
                 )
                 cleanup_count += 1
                 
+                if self.queue is not None:
+                    self.queue.cancel(execution.id)
+                
                 # Cancel if still in active executions
                 if execution.id in self.active_executions:
                     self.active_executions[execution.id].cancel()
@@ -0,0 +1,326 @@
+"""
+Workflow Execution Log
+
+Append-only log of step lifecycle records (started, completed, failed).
+WorkflowExecutionEngine appends to it instead of committing a
+WorkflowStepExecution row at every transition, and the log writes the
+records to workflow_step_executions in group commits: one transaction per
+batch, in its own session, with the started and finished records of an
+attempt collapsing into a single row when they land in the same batch.
+Under an event loop the flushes run on a worker thread, so the database
+round trip never blocks the loop.
+Dashboards read step records through the log as well, so they also see
+records that have not been flushed yet.
+
+Step payloads over the configured size are written to a file under the
+payload directory ("offload") or cut to a preview ("truncate") before they
+reach the database.
+"""
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from config.settings import get_settings
+from src.backend.database.database import SessionLocal
+from src.backend.models.workflow import WorkflowExecutionStatus, WorkflowStepExecution
+
+# Stay under SQLite's bound-parameter limit in multi-row statements
+MAX_BOUND_PARAMETERS = 900
+
+PAYLOAD_POLICIES = ("offload", "truncate")
+
+
+@dataclass
+class StepRecord:
+    """One step attempt's state; unset (None) fields keep their previous value"""
+    execution_id: int
+    step_id: int
+    attempt_number: int
+    status: WorkflowExecutionStatus
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    execution_time_seconds: Optional[float] = None
+    input_data: Optional[Dict[str, Any]] = None
+    output_data: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    logs: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        return self.execution_id, self.step_id, self.attempt_number
+
+    def merge(self, newer: "StepRecord") -> "StepRecord":
+        for f in fields(self):
+            value = getattr(newer, f.name)
+            if value is not None:
+                setattr(self, f.name, value)
+        return self
+
+    def values(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name) is not None}
+
+
+# Columns read for dashboards; payloads stay in the database
+_READ_COLUMNS = [
+    "execution_id", "step_id", "attempt_number", "status", "started_at",
+    "completed_at", "execution_time_seconds", "error_message"
+]
+
+
+class ExecutionLog:
+    """Buffered, group-committed writer and merged reader of step records"""
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 100, flush_interval_ms: int = 200,
+                 payload_max_bytes: int = 65536, payload_policy: str = "offload",
+                 payload_directory: str = "./data/workflow_payloads"):
+        if payload_policy not in PAYLOAD_POLICIES:
+            raise ValueError(f"Unknown payload policy: {payload_policy}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.payload_max_bytes = payload_max_bytes
+        self.payload_policy = payload_policy
+        self.payload_directory = Path(payload_directory)
+
+        self._pending: Dict[Tuple[int, int, int], StepRecord] = {}
+        self._in_flight: Dict[Tuple[int, int, int], StepRecord] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_tasks = set()
+
+        # Statistics
+        self.appended = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_errors = 0
+        self.offloaded = 0
+        self.truncated = 0
+
+    def append(self, record: StepRecord):
+        """Add a record; it reaches the database with the next group commit"""
+        self._limit_payload(record, "input_data")
+        self._limit_payload(record, "output_data")
+        with self._lock:
+            existing = self._pending.get(record.key)
+            self._pending[record.key] = existing.merge(record) if existing else record
+            self.appended += 1
+            full = len(self._pending) >= self.batch_size
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to
+            self.flush()
+            return
+        if full:
+            self._start_flush(loop)
+        else:
+            self._arm_timer(loop)
+
+    def _arm_timer(self, loop: asyncio.AbstractEventLoop):
+        with self._lock:
+            # A timer left on a loop that has gone away does not count
+            if self._timer is not None and self._loop is loop:
+                return
+            self._loop = loop
+            self._timer = loop.call_later(self.flush_interval, self._on_timer, loop)
+
+    def _on_timer(self, loop: asyncio.AbstractEventLoop):
+        with self._lock:
+            self._timer = None
+        self._start_flush(loop)
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        task = loop.create_task(self.flush_async())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _rearm_after_failure(self):
+        """Make sure requeued records are retried even if nothing else is appended"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._arm_timer, loop)
+        except RuntimeError:
+            pass  # Loop shut down meanwhile; the next flush() picks the records up
+
+    async def flush_async(self) -> int:
+        """flush() on a worker thread"""
+        return await asyncio.to_thread(self.flush)
+
+    def flush(self) -> int:
+        """Write everything buffered in one transaction; returns the rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if not batch:
+                return 0
+
+            db = None
+            try:
+                db = self.session_factory()
+                self._upsert(db, list(batch.values()))
+                db.commit()
+                self.flushes += 1
+                self.rows_written += len(batch)
+                return len(batch)
+            except IntegrityError as e:
+                # A bad record must not hold the rest back: write one by one, drop the offenders
+                db.rollback()
+                self.flush_errors += 1
+                logger.error(f"Group commit of {len(batch)} workflow step records failed, retrying singly: {e}")
+                written = 0
+                for record in batch.values():
+                    try:
+                        self._upsert(db, [record])
+                        db.commit()
+                        written += 1
+                    except IntegrityError as record_error:
+                        db.rollback()
+                        logger.error(f"Dropping workflow step record {record.key}: {record_error}")
+                self.flushes += 1
+                self.rows_written += written
+                return written
+            except Exception as e:
+                if db is not None:
+                    db.rollback()
+                self.flush_errors += 1
+                logger.error(f"Failed to flush {len(batch)} workflow step records: {e}")
+                with self._lock:
+                    # Keep them for the next flush, under anything newer
+                    for key, record in batch.items():
+                        newer = self._pending.get(key)
+                        self._pending[key] = record.merge(newer) if newer else record
+                self._rearm_after_failure()
+                return 0
+            finally:
+                if db is not None:
+                    db.close()
+                with self._lock:
+                    self._in_flight = {}
+
+    def _upsert(self, db, records: List[StepRecord]):
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        now = datetime.utcnow()
+
+        # Rows with different column sets go in separate statements so that
+        # a record never overwrites a column it does not carry
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for record in records:
+            values = record.values()
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+
+        for columns, rows in groups.items():
+            chunk_size = max(1, MAX_BOUND_PARAMETERS // len(columns))
+            for i in range(0, len(rows), chunk_size):
+                stmt = insert(WorkflowStepExecution).values(rows[i:i + chunk_size])
+                update_columns = {
+                    col: getattr(stmt.excluded, col)
+                    for col in columns if col not in ("execution_id", "step_id", "attempt_number")
+                }
+                update_columns["updated_at"] = now
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["execution_id", "step_id", "attempt_number"], set_=update_columns
+                )
+                db.execute(stmt)
+
+    def read(self, db, execution_ids: Iterable[int]) -> List[StepRecord]:
+        """
+        Step records of the given executions, flushed or not, without their
+        payloads, ordered by execution, step and attempt
+        """
+        execution_ids = list(execution_ids)
+        records: Dict[Tuple[int, int, int], StepRecord] = {}
+        columns = [getattr(WorkflowStepExecution, name) for name in _READ_COLUMNS]
+        for i in range(0, len(execution_ids), MAX_BOUND_PARAMETERS):
+            chunk = execution_ids[i:i + MAX_BOUND_PARAMETERS]
+            for row in db.query(*columns).filter(WorkflowStepExecution.execution_id.in_(chunk)):
+                record = StepRecord(**dict(zip(_READ_COLUMNS, row)))
+                records[record.key] = record
+
+        wanted = set(execution_ids)
+        with self._lock:
+            unflushed = list(self._in_flight.values()) + list(self._pending.values())
+        for record in unflushed:
+            if record.execution_id not in wanted:
+                continue
+            summary = StepRecord(**{name: getattr(record, name) for name in _READ_COLUMNS})
+            existing = records.get(record.key)
+            records[record.key] = existing.merge(summary) if existing else summary
+        return [records[key] for key in sorted(records)]
+
+    def _limit_payload(self, record: StepRecord, field_name: str):
+        payload = getattr(record, field_name)
+        if not payload:
+            return
+        encoded = json.dumps(payload, default=str)
+        size = len(encoded.encode("utf-8"))
+        if size <= self.payload_max_bytes:
+            return
+
+        kind = field_name.split("_")[0]
+        if self.payload_policy == "offload":
+            path = self.payload_directory / str(record.execution_id) / (
+                f"step{record.step_id}_attempt{record.attempt_number}_{kind}.json"
+            )
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(encoded, encoding="utf-8")
+                setattr(record, field_name, {"_payload": "offloaded", "path": str(path), "bytes": size})
+                self.offloaded += 1
+                return
+            except OSError as e:
+                logger.warning(f"Could not offload step payload to {path}, truncating instead: {e}")
+
+        setattr(record, field_name, {
+            "_payload": "truncated",
+            "bytes": size,
+            "preview": encoded[:self.payload_max_bytes]
+        })
+        self.truncated += 1
+
+    @staticmethod
+    def load_payload(value: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The full payload behind an offloaded reference; other values are returned as they are"""
+        if isinstance(value, dict) and value.get("_payload") == "offloaded":
+            return json.loads(Path(value["path"]).read_text(encoding="utf-8"))
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending) + len(self._in_flight)
+        return {
+            "pending": pending,
+            "appended": self.appended,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "records_per_flush": round(self.rows_written / self.flushes, 1) if self.flushes else 0.0,
+            "flush_errors": self.flush_errors,
+            "payloads_offloaded": self.offloaded,
+            "payloads_truncated": self.truncated
+        }
+
+
+# Global instance shared by the execution engine and the analytics service
+settings = get_settings()
+execution_log = ExecutionLog(
+    batch_size=settings.workflow_log_batch_size,
+    flush_interval_ms=settings.workflow_log_flush_interval_ms,
+    payload_max_bytes=settings.workflow_step_payload_max_bytes,
+    payload_policy=settings.workflow_step_payload_policy,
+    payload_directory=settings.workflow_payload_directory
+)
@@ -0,0 +1,404 @@
+"""
+Workflow Execution Queue
+
+Durable queue of workflow executions kept in the workflow_execution_queue
+table, so runs outlive the process that started them and can be spread over
+several worker processes.
+
+Workers claim runs under a time-limited lease and renew it with heartbeats.
+When a worker dies its leases expire and another worker picks the runs up
+again (at-least-once: a recovered run starts over from its first step).
+Claims use SELECT ... FOR UPDATE SKIP LOCKED where the database supports it
+(PostgreSQL) and always finish with a conditional UPDATE of the lease, which
+is what keeps two SQLite workers from claiming the same run.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, func, or_
+
+from src.backend.database.database import SessionLocal
+from src.backend.models.workflow import (
+    WorkflowExecution, WorkflowExecutionStatus, WorkflowQueueItem, WorkflowQueueStatus
+)
+
+# Candidates read per claim, relative to the free slots, so that runs of
+# workspaces at their concurrency cap do not starve the others
+CLAIM_SCAN_FACTOR = 4
+
+
+class WorkflowExecutionQueue:
+    """Lease-based access to the workflow_execution_queue table"""
+
+    def __init__(self, session_factory=SessionLocal, lease_seconds: float = 60, max_attempts: int = 3):
+        self.session_factory = session_factory
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    def enqueue(self, db, execution_id: int, workspace_id: Optional[int] = None,
+                priority: int = 0) -> WorkflowQueueItem:
+        """Queue an execution; commits ``db``"""
+        now = datetime.utcnow()
+        item = WorkflowQueueItem(
+            execution_id=execution_id,
+            workspace_id=workspace_id,
+            priority=priority,
+            status=WorkflowQueueStatus.QUEUED,
+            available_at=now,
+            enqueued_at=now,
+            max_attempts=self.max_attempts
+        )
+        db.add(item)
+        db.commit()
+        return item
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(
+                WorkflowQueueItem.status == WorkflowQueueStatus.QUEUED,
+                WorkflowQueueItem.available_at <= now
+            ),
+            and_(
+                WorkflowQueueItem.status == WorkflowQueueStatus.LEASED,
+                WorkflowQueueItem.lease_expires_at < now
+            )
+        )
+
+    def claim(self, worker_id: str, limit: int, workspace_limit: int = 0,
+              now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+        """
+        Lease up to ``limit`` runs to ``worker_id``, oldest first within a
+        priority, taking over expired leases. With ``workspace_limit`` no
+        workspace gets more than that many live leases across all workers.
+        Returns (queue item id, execution id) pairs.
+        """
+        if limit <= 0:
+            return []
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            running: Dict[Optional[int], int] = {}
+            if workspace_limit:
+                running = dict(
+                    db.query(WorkflowQueueItem.workspace_id, func.count(WorkflowQueueItem.id)).filter(
+                        and_(
+                            WorkflowQueueItem.status == WorkflowQueueStatus.LEASED,
+                            WorkflowQueueItem.lease_expires_at >= now
+                        )
+                    ).group_by(WorkflowQueueItem.workspace_id).all()
+                )
+
+            candidates = db.query(
+                WorkflowQueueItem.id,
+                WorkflowQueueItem.execution_id,
+                WorkflowQueueItem.workspace_id,
+                WorkflowQueueItem.attempts,
+                WorkflowQueueItem.max_attempts
+            ).filter(self._claimable(now)).order_by(
+                WorkflowQueueItem.priority.desc(), WorkflowQueueItem.id
+            ).limit(limit * CLAIM_SCAN_FACTOR).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for item_id, execution_id, workspace_id, attempts, max_attempts in candidates:
+                if len(claimed) >= limit:
+                    break
+                if attempts >= (max_attempts or self.max_attempts):
+                    self._dead_letter(db, item_id, execution_id, now)
+                    continue
+                if workspace_limit and workspace_id is not None and running.get(workspace_id, 0) >= workspace_limit:
+                    continue
+
+                # Only succeeds if no other worker claimed the row since we read it
+                updated = db.query(WorkflowQueueItem).filter(
+                    and_(WorkflowQueueItem.id == item_id, self._claimable(now))
+                ).update({
+                    WorkflowQueueItem.status: WorkflowQueueStatus.LEASED,
+                    WorkflowQueueItem.lease_owner: worker_id,
+                    WorkflowQueueItem.lease_expires_at: now + self.lease,
+                    WorkflowQueueItem.heartbeat_at: now,
+                    WorkflowQueueItem.attempts: WorkflowQueueItem.attempts + 1
+                }, synchronize_session=False)
+                if updated:
+                    running[workspace_id] = running.get(workspace_id, 0) + 1
+                    claimed.append((item_id, execution_id))
+
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _dead_letter(self, db, item_id: int, execution_id: int, now: datetime):
+        """Give up on a run whose leases kept expiring"""
+        updated = db.query(WorkflowQueueItem).filter(
+            and_(WorkflowQueueItem.id == item_id, self._claimable(now))
+        ).update({
+            WorkflowQueueItem.status: WorkflowQueueStatus.DEAD,
+            WorkflowQueueItem.lease_owner: None,
+            WorkflowQueueItem.last_error: "Lease expired on every attempt"
+        }, synchronize_session=False)
+        if updated:
+            db.query(WorkflowExecution).filter(WorkflowExecution.id == execution_id).update({
+                WorkflowExecution.status: WorkflowExecutionStatus.FAILED,
+                WorkflowExecution.error_message: "Execution abandoned: its worker stopped responding on every attempt",
+                WorkflowExecution.completed_at: now
+            }, synchronize_session=False)
+            logger.warning(f"Workflow execution {execution_id} dead-lettered after repeated lease expiry")
+
+    def heartbeat(self, worker_id: str, item_ids: List[int], now: Optional[datetime] = None) -> Set[int]:
+        """Extend the leases ``worker_id`` holds; returns the ids it still owns"""
+        if not item_ids:
+            return set()
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            owned = and_(
+                WorkflowQueueItem.id.in_(item_ids),
+                WorkflowQueueItem.lease_owner == worker_id,
+                WorkflowQueueItem.status == WorkflowQueueStatus.LEASED
+            )
+            db.query(WorkflowQueueItem).filter(owned).update({
+                WorkflowQueueItem.lease_expires_at: now + self.lease,
+                WorkflowQueueItem.heartbeat_at: now
+            }, synchronize_session=False)
+            still_owned = {item_id for (item_id,) in db.query(WorkflowQueueItem.id).filter(owned)}
+            db.commit()
+            return still_owned
+        finally:
+            db.close()
+
+    def complete(self, item_id: int, worker_id: str) -> bool:
+        """Remove a finished run from the queue if ``worker_id`` still holds its lease"""
+        db = self.session_factory()
+        try:
+            deleted = db.query(WorkflowQueueItem).filter(
+                and_(WorkflowQueueItem.id == item_id, WorkflowQueueItem.lease_owner == worker_id)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return bool(deleted)
+        finally:
+            db.close()
+
+    def release(self, item_ids: List[int], worker_id: str) -> int:
+        """Hand leased runs back on a clean shutdown, without using up an attempt"""
+        if not item_ids:
+            return 0
+        db = self.session_factory()
+        try:
+            released = db.query(WorkflowQueueItem).filter(
+                and_(
+                    WorkflowQueueItem.id.in_(item_ids),
+                    WorkflowQueueItem.lease_owner == worker_id,
+                    WorkflowQueueItem.status == WorkflowQueueStatus.LEASED
+                )
+            ).update({
+                WorkflowQueueItem.status: WorkflowQueueStatus.QUEUED,
+                WorkflowQueueItem.lease_owner: None,
+                WorkflowQueueItem.lease_expires_at: None,
+                WorkflowQueueItem.available_at: datetime.utcnow(),
+                WorkflowQueueItem.attempts: WorkflowQueueItem.attempts - 1
+            }, synchronize_session=False)
+            db.commit()
+            return released
+        finally:
+            db.close()
+
+    def cancel(self, execution_id: int) -> bool:
+        """Drop an execution from the queue; a worker running it loses its lease"""
+        db = self.session_factory()
+        try:
+            deleted = db.query(WorkflowQueueItem).filter(
+                WorkflowQueueItem.execution_id == execution_id
+            ).delete(synchronize_session=False)
+            db.commit()
+            return bool(deleted)
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            by_status = dict(
+                db.query(WorkflowQueueItem.status, func.count(WorkflowQueueItem.id))
+                .group_by(WorkflowQueueItem.status).all()
+            )
+            expired = db.query(func.count(WorkflowQueueItem.id)).filter(
+                and_(
+                    WorkflowQueueItem.status == WorkflowQueueStatus.LEASED,
+                    WorkflowQueueItem.lease_expires_at < now
+                )
+            ).scalar()
+            oldest = db.query(func.min(WorkflowQueueItem.enqueued_at)).filter(
+                WorkflowQueueItem.status == WorkflowQueueStatus.QUEUED
+            ).scalar()
+            workers = db.query(func.count(func.distinct(WorkflowQueueItem.lease_owner))).filter(
+                WorkflowQueueItem.status == WorkflowQueueStatus.LEASED
+            ).scalar()
+            return {
+                "queued": by_status.get(WorkflowQueueStatus.QUEUED, 0),
+                "leased": by_status.get(WorkflowQueueStatus.LEASED, 0),
+                "dead": by_status.get(WorkflowQueueStatus.DEAD, 0),
+                "expired_leases": expired,
+                "active_workers": workers,
+                "oldest_queued_seconds": (now - oldest).total_seconds() if oldest else 0.0
+            }
+        finally:
+            db.close()
+
+
+class WorkflowQueueWorker:
+    """
+    Drains the execution queue in one process: keeps up to ``concurrency``
+    runs going, heartbeats their leases and cancels any run whose lease was
+    lost (cancelled, or taken over after this worker stalled). Queue calls
+    are database round trips and run on worker threads, off the event loop.
+    """
+
+    def __init__(self, queue: WorkflowExecutionQueue, run_execution: Callable[[int], Awaitable[None]],
+                 worker_id: Optional[str] = None, concurrency: int = 10,
+                 workspace_concurrency: int = 0, poll_seconds: float = 2):
+        self.queue = queue
+        self.run_execution = run_execution
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.workspace_concurrency = workspace_concurrency
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = max(queue.lease.total_seconds() / 3, 0.05)
+
+        self._running: Dict[int, Tuple[int, asyncio.Task]] = {}
+        self._finishing: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Statistics
+        self.started = 0
+        self.completed = 0
+        self.leases_lost = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._claim_loop()),
+            asyncio.create_task(self._heartbeat_loop())
+        ]
+        logger.info(f"Workflow queue worker {self.worker_id} started (concurrency {self.concurrency})")
+
+    async def stop(self):
+        """Stop claiming, cancel the runs in progress and hand them back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        running = dict(self._running)
+        for _, task in running.values():
+            task.cancel()
+        await asyncio.gather(*(task for _, task in running.values()), return_exceptions=True)
+        released = await asyncio.to_thread(self.queue.release, list(running), self.worker_id)
+        logger.info(f"Workflow queue worker {self.worker_id} stopped, released {released} runs")
+
+    def notify(self):
+        """Wake the claim loop (new work was queued); safe to call from any thread"""
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    async def _claim_loop(self):
+        while True:
+            try:
+                free = self.concurrency - len(self._running)
+                claimed = await asyncio.to_thread(
+                    self.queue.claim, self.worker_id, free, self.workspace_concurrency
+                )
+                for item_id, execution_id in claimed:
+                    task = asyncio.create_task(self._run(item_id, execution_id))
+                    self._running[item_id] = (execution_id, task)
+                    self.started += 1
+                if claimed and len(claimed) == free:
+                    continue  # there may be more waiting once a slot frees up
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Workflow queue claim failed: {e}")
+
+            # asyncio.timeout rather than wait_for: on 3.11, wait_for can lose a
+            # cancellation that coincides with its timeout and stop() then hangs
+            try:
+                async with asyncio.timeout(self.poll_seconds):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _run(self, item_id: int, execution_id: int):
+        try:
+            try:
+                await self.run_execution(execution_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Workflow execution {execution_id} crashed: {e}")
+
+            # The run is over; retry settling its queue item rather than let the
+            # lease expire and the run execute again. It stays in _running
+            # meanwhile, so heartbeats keep the lease, but once complete() has
+            # deleted the row a heartbeat must not take it for a lost lease.
+            self._finishing.add(item_id)
+            delay = 0.5
+            while True:
+                try:
+                    await asyncio.to_thread(self.queue.complete, item_id, self.worker_id)
+                    break
+                except Exception as e:
+                    logger.error(f"Completing workflow execution {execution_id} in the queue failed, retrying: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30)
+
+            self.completed += 1
+            self._wakeup.set()
+        finally:
+            self._running.pop(item_id, None)
+            self._finishing.discard(item_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                running = list(self._running)
+                owned = await asyncio.to_thread(self.queue.heartbeat, self.worker_id, running)
+                for item_id in running:
+                    if item_id not in owned and item_id in self._running and item_id not in self._finishing:
+                        execution_id, task = self._running[item_id]
+                        logger.warning(f"Lost lease on workflow execution {execution_id}, stopping it")
+                        self.leases_lost += 1
+                        task.cancel()
+            except Exception as e:
+                logger.error(f"Workflow queue heartbeat failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "workspace_concurrency": self.workspace_concurrency,
+            "started": self.started,
+            "completed": self.completed,
+            "leases_lost": self.leases_lost
+        }
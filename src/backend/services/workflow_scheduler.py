@@ -7,6 +7,7 @@ and automatic workflow triggers based on time and events.
 
 import asyncio
 import json
+from dataclasses import asdict
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from croniter import croniter
@@ -17,26 +18,57 @@ from loguru import logger
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
+from config.settings import get_settings
 from src.backend.database.database import SessionLocal
 from src.backend.crud.crud_workflow import (
     crud_workflow, crud_workflow_trigger, crud_workflow_execution
 )
 from src.backend.models.workflow import (
-    WorkflowTrigger, WorkflowSchedule, TriggerType, WorkflowStatus
+    Workflow, WorkflowTrigger, WorkflowSchedule, TriggerType, WorkflowStatus
 )
 from src.backend.services.workflow_execution_engine import workflow_execution_engine
+from src.backend.services.schedule_heap import MisfirePolicy, ScheduleHeap, next_fire_time
+from src.backend.services.event_trigger_index import EventTriggerIndex
+
+# Trigger ids per IN (...) query, below SQLite's bound-parameter limit
+TRIGGER_LOAD_CHUNK = 500
 
 
 class WorkflowScheduler:
-    """Service for scheduling and managing workflow executions"""
+    """
+    Service for scheduling and managing workflow executions
+    
+    Schedule triggers are kept in a ScheduleHeap of next fire times: the loop
+    sleeps until the earliest one (or until a schedule edit wakes it), fires
+    what is due and reschedules just those triggers. Edits made through this
+    class apply immediately; edits made elsewhere are picked up by a periodic
+    resync that compares cron expression and timezone only.
+    
+    Enabled event triggers are kept in an EventTriggerIndex with precompiled
+    conditions, loaded on first use and rebuilt on the same resync.
+    """
     
     def __init__(self):
+        settings = get_settings()
         self.running = False
         self.scheduler_task = None
-        self.check_interval = 60  # Check every minute
+        self.check_interval = 60  # Event trigger checks and cleanup, every minute
         self.scheduled_jobs: Dict[str, Dict] = {}
         self.lock = threading.Lock()
         self.thread_pool = ThreadPoolExecutor(max_workers=5)
+        
+        # Next fire time of every enabled schedule trigger
+        self.schedule = ScheduleHeap()
+        self.misfire_policy = MisfirePolicy(settings.workflow_misfire_policy)
+        self.misfire_grace_seconds = settings.workflow_misfire_grace_seconds
+        self.max_catchup_runs = settings.workflow_max_catchup_runs
+        self.resync_interval = settings.workflow_schedule_resync_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        # Enabled event triggers by event type and workspace
+        self.event_triggers = EventTriggerIndex()
+        self._event_triggers_loaded = False
     
     async def start(self):
         """Start the workflow scheduler"""
@@ -45,6 +77,8 @@ class WorkflowScheduler:
             return
         
         self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
         self.scheduler_task = asyncio.create_task(self._scheduler_loop())
         logger.info("Workflow scheduler started")
     
@@ -64,80 +98,155 @@ class WorkflowScheduler:
     
     async def _scheduler_loop(self):
         """Main scheduler loop"""
+        next_resync = next_housekeeping = datetime.utcnow()
         while self.running:
             try:
-                await self._check_scheduled_workflows()
-                await self._check_event_triggers()
-                await self._cleanup_completed_schedules()
+                now = datetime.utcnow()
+                if now >= next_resync:
+                    await self._sync_schedules(now)
+                    self._load_event_triggers()
+                    next_resync = now + timedelta(seconds=self.resync_interval)
+                
+                await self._run_due_schedules(datetime.utcnow())
                 
-                # Wait for next check
-                await asyncio.sleep(self.check_interval)
+                if now >= next_housekeeping:
+                    await self._check_event_triggers()
+                    await self._cleanup_completed_schedules()
+                    next_housekeeping = now + timedelta(seconds=self.check_interval)
+                
+                # Sleep until the next schedule deadline, resync or housekeeping
+                deadline = min(
+                    d for d in (self.schedule.next_deadline(), next_resync, next_housekeeping) if d
+                )
+                await self._sleep_until(deadline)
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Scheduler loop error: {e}")
-                await asyncio.sleep(self.check_interval)
+                await asyncio.sleep(1)
+    
+    async def _sleep_until(self, deadline: datetime):
+        """Sleep until ``deadline`` (naive UTC) or until a schedule edit wakes the loop"""
+        timeout = max((deadline - datetime.utcnow()).total_seconds(), 0)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+    
+    def _wake(self):
+        """Make the loop recompute its deadline; safe to call from any thread"""
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
     
-    async def _check_scheduled_workflows(self):
-        """Check for scheduled workflows that need to be executed"""
+    def _schedule_trigger(self, trigger_id: int, cron_expression: str, timezone: Optional[str], after: datetime):
+        """Put a trigger on the heap; callers hold ``self.lock``"""
+        try:
+            self.schedule.upsert(trigger_id, cron_expression, timezone or "UTC", after)
+        except Exception as e:
+            logger.error(f"Error evaluating cron expression '{cron_expression}' of trigger {trigger_id}: {e}")
+            self.schedule.remove(trigger_id)
+    
+    async def _sync_schedules(self, now: datetime):
+        """Bring the heap in line with the enabled schedule triggers in the database"""
         db = SessionLocal()
         try:
-            now = datetime.utcnow()
-            
-            # Get scheduled triggers that are due
-            scheduled_triggers = db.query(WorkflowTrigger).filter(
+            rows = db.query(
+                WorkflowTrigger.id,
+                WorkflowTrigger.cron_expression,
+                WorkflowTrigger.timezone,
+                WorkflowTrigger.last_triggered_at
+            ).filter(
                 and_(
                     WorkflowTrigger.trigger_type == TriggerType.SCHEDULE,
                     WorkflowTrigger.is_enabled == True,
                     WorkflowTrigger.cron_expression.isnot(None)
                 )
             ).all()
-            
-            for trigger in scheduled_triggers:
-                try:
-                    if await self._should_execute_scheduled_trigger(trigger, now):
-                        await self._execute_scheduled_workflow(db, trigger)
-                except Exception as e:
-                    logger.error(f"Error processing scheduled trigger {trigger.id}: {e}")
-                    
         finally:
             db.close()
+        
+        with self.lock:
+            seen = set()
+            for trigger_id, cron_expression, timezone, last_triggered_at in rows:
+                seen.add(trigger_id)
+                entry = self.schedule.get(trigger_id)
+                if entry is not None:
+                    if entry.cron_expression == cron_expression and entry.timezone == (timezone or "UTC"):
+                        continue
+                    after = now
+                else:
+                    # Resume from the last run so runs missed while down get the misfire policy
+                    after = last_triggered_at or now
+                self._schedule_trigger(trigger_id, cron_expression, timezone, after)
+            
+            for trigger_id in list(self.schedule):
+                if trigger_id not in seen:
+                    self.schedule.remove(trigger_id)
     
-    async def _should_execute_scheduled_trigger(
-        self, 
-        trigger: WorkflowTrigger, 
-        current_time: datetime
-    ) -> bool:
-        """Check if a scheduled trigger should be executed"""
+    def _load_event_triggers(self):
+        """Rebuild the event trigger index from the database"""
+        db = SessionLocal()
         try:
-            # Parse cron expression
-            timezone = pytz.timezone(trigger.timezone)
-            local_time = current_time.replace(tzinfo=pytz.UTC).astimezone(timezone)
-            
-            cron = croniter(trigger.cron_expression, local_time)
-            
-            # Check if we're within the execution window
-            last_execution_time = cron.get_prev(datetime)
-            next_execution_time = cron.get_next(datetime)
-            
-            # If last triggered time is None or before the last scheduled time, execute
-            if (not trigger.last_triggered_at or 
-                trigger.last_triggered_at < last_execution_time.replace(tzinfo=None)):
-                
-                # Make sure we're not too early (within 1 minute of scheduled time)
-                time_until_next = (next_execution_time - local_time).total_seconds()
-                time_since_last = (local_time - last_execution_time).total_seconds()
-                
-                return 0 <= time_since_last <= 60  # Within 1 minute window
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error evaluating cron expression '{trigger.cron_expression}': {e}")
-            return False
+            rows = db.query(
+                WorkflowTrigger.id,
+                WorkflowTrigger.workflow_id,
+                Workflow.workspace_id,
+                WorkflowTrigger.config,
+                WorkflowTrigger.conditions
+            ).join(Workflow, Workflow.id == WorkflowTrigger.workflow_id).filter(
+                and_(
+                    WorkflowTrigger.trigger_type == TriggerType.EVENT,
+                    WorkflowTrigger.is_enabled == True
+                )
+            ).order_by(WorkflowTrigger.id).all()
+        finally:
+            db.close()
+        
+        with self.lock:
+            self.event_triggers.replace_all(rows)
+            self._event_triggers_loaded = True
+    
+    async def _run_due_schedules(self, now: datetime):
+        """Execute the schedule triggers whose fire time has passed"""
+        with self.lock:
+            due = self.schedule.pop_due(
+                now, self.misfire_policy, self.misfire_grace_seconds, self.max_catchup_runs
+            )
+        runs = {entry.trigger_id: fire_times for entry, fire_times in due if fire_times}
+        if not runs:
+            return
+        
+        db = SessionLocal()
+        try:
+            trigger_ids = list(runs)
+            triggers = {}
+            for start in range(0, len(trigger_ids), TRIGGER_LOAD_CHUNK):
+                chunk = trigger_ids[start:start + TRIGGER_LOAD_CHUNK]
+                for trigger in db.query(WorkflowTrigger).filter(WorkflowTrigger.id.in_(chunk)):
+                    triggers[trigger.id] = trigger
+            
+            for trigger_id, fire_times in runs.items():
+                trigger = triggers.get(trigger_id)
+                if trigger is None or not trigger.is_enabled or trigger.trigger_type != TriggerType.SCHEDULE:
+                    # Deleted or disabled outside the scheduler since the last resync
+                    with self.lock:
+                        self.schedule.remove(trigger_id)
+                    continue
+                for scheduled_for in fire_times:
+                    try:
+                        await self._execute_scheduled_workflow(db, trigger, scheduled_for)
+                    except Exception as e:
+                        logger.error(f"Error processing scheduled trigger {trigger.id}: {e}")
+        finally:
+            db.close()
     
-    async def _execute_scheduled_workflow(self, db: Session, trigger: WorkflowTrigger):
+    async def _execute_scheduled_workflow(self, db: Session, trigger: WorkflowTrigger,
+                                          scheduled_for: Optional[datetime] = None):
         """Execute a scheduled workflow"""
         try:
             # Get workflow
@@ -158,7 +267,11 @@ class WorkflowScheduler:
                 workflow_id=workflow.id,
                 trigger_id=trigger.id,
                 input_data=trigger.config.get('input_data', {}),
-                context={'triggered_by': 'scheduler', 'trigger_type': 'schedule'}
+                context={
+                    'triggered_by': 'scheduler',
+                    'trigger_type': 'schedule',
+                    'scheduled_for': scheduled_for.isoformat() if scheduled_for else None
+                }
             )
             
             # Update trigger last triggered time
@@ -306,6 +419,7 @@ class WorkflowScheduler:
             }
             
             trigger = crud_workflow_trigger.create(db, obj_in=trigger_data)
+            self.refresh_trigger(trigger)
             logger.info(f"Scheduled workflow {workflow_id} with trigger {trigger.id}")
             
             return trigger.id
@@ -320,6 +434,7 @@ class WorkflowScheduler:
             trigger = crud_workflow_trigger.get(db, id=trigger_id)
             if trigger and trigger.trigger_type == TriggerType.SCHEDULE:
                 crud_workflow_trigger.remove(db, id=trigger_id)
+                self.forget_trigger(trigger_id)
                 logger.info(f"Unscheduled workflow trigger {trigger_id}")
                 return True
             return False
@@ -362,7 +477,8 @@ class WorkflowScheduler:
                 updates["config"] = config
             
             if updates:
-                crud_workflow_trigger.update(db, db_obj=trigger, obj_in=updates)
+                trigger = crud_workflow_trigger.update(db, db_obj=trigger, obj_in=updates)
+                self.refresh_trigger(trigger)
                 logger.info(f"Updated schedule for trigger {trigger_id}")
             
             return True
@@ -370,6 +486,36 @@ class WorkflowScheduler:
         finally:
             db.close()
     
+    def refresh_trigger(self, trigger: WorkflowTrigger):
+        """
+        Re-index a trigger after it was created or edited. Call it while the
+        trigger's session is still open; edits that skip this are picked up
+        by the next resync.
+        """
+        is_schedule = trigger.trigger_type == TriggerType.SCHEDULE
+        is_event = trigger.trigger_type == TriggerType.EVENT
+        workspace_id = trigger.workflow.workspace_id if is_event and trigger.is_enabled else None
+        
+        with self.lock:
+            if trigger.is_enabled and trigger.cron_expression and is_schedule:
+                self._schedule_trigger(trigger.id, trigger.cron_expression, trigger.timezone, datetime.utcnow())
+            else:
+                self.schedule.remove(trigger.id)
+            
+            if trigger.is_enabled and is_event:
+                self.event_triggers.upsert(
+                    trigger.id, trigger.workflow_id, workspace_id, trigger.config, trigger.conditions
+                )
+            else:
+                self.event_triggers.remove(trigger.id)
+        self._wake()
+    
+    def forget_trigger(self, trigger_id: int):
+        """Drop a deleted trigger from the schedule and event index"""
+        with self.lock:
+            self.schedule.remove(trigger_id)
+            self.event_triggers.remove(trigger_id)
+    
     def get_scheduled_workflows(self, workspace_id: Optional[int] = None) -> List[Dict]:
         """Get all scheduled workflows"""
         db = SessionLocal()
@@ -379,7 +525,6 @@ class WorkflowScheduler:
             )
             
             if workspace_id:
-                from src.backend.models.workflow import Workflow
                 query = query.join(Workflow).filter(
                     Workflow.workspace_id == workspace_id
                 )
@@ -407,15 +552,15 @@ class WorkflowScheduler:
             db.close()
     
     def _get_next_run_time(self, trigger: WorkflowTrigger) -> Optional[datetime]:
-        """Get the next run time for a scheduled trigger"""
+        """Get the next run time (UTC) for a scheduled trigger"""
         if not trigger.cron_expression or not trigger.is_enabled:
             return None
         
+        entry = self.schedule.get(trigger.id)
+        if entry is not None:
+            return entry.next_fire
         try:
-            timezone = pytz.timezone(trigger.timezone)
-            now = datetime.utcnow().replace(tzinfo=pytz.UTC).astimezone(timezone)
-            cron = croniter(trigger.cron_expression, now)
-            return cron.get_next(datetime).replace(tzinfo=None)
+            return next_fire_time(trigger.cron_expression, trigger.timezone or "UTC", datetime.utcnow())
         except Exception:
             return None
     
@@ -434,6 +579,9 @@ class WorkflowScheduler:
                 )
             ).count()
             
+            with self.lock:
+                next_fire = self.schedule.next_deadline()
+            
             # Get recent executions
             recent_executions = db.query(crud_workflow_execution.model).filter(
                 crud_workflow_execution.model.started_at >= datetime.utcnow() - timedelta(hours=24)
@@ -444,7 +592,13 @@ class WorkflowScheduler:
                 "active_scheduled_workflows": active_scheduled,
                 "recent_executions_24h": recent_executions,
                 "scheduler_running": self.running,
-                "last_check": datetime.utcnow().isoformat()
+                "last_check": datetime.utcnow().isoformat(),
+                "schedule_heap": {
+                    "size": len(self.schedule),
+                    "next_fire_at": next_fire.isoformat() if next_fire else None,
+                    "misfire_policy": self.misfire_policy.value,
+                    **asdict(self.schedule.stats)
+                }
             }
             
         finally:
@@ -457,89 +611,50 @@ class WorkflowScheduler:
         workspace_id: Optional[int] = None
     ) -> List[int]:
         """Trigger workflows based on an event"""
-        db = SessionLocal()
-        try:
-            # Find triggers that match this event
-            query = db.query(WorkflowTrigger).filter(
-                and_(
-                    WorkflowTrigger.trigger_type == TriggerType.EVENT,
-                    WorkflowTrigger.is_enabled == True
-                )
-            )
-            
-            if workspace_id:
-                from src.backend.models.workflow import Workflow
-                query = query.join(Workflow).filter(
-                    Workflow.workspace_id == workspace_id
+        if not self._event_triggers_loaded:
+            self._load_event_triggers()
+        
+        with self.lock:
+            matches = self.event_triggers.match(event_type, event_data, workspace_id)
+        if not matches:
+            return []
+        
+        execution_ids = []
+        fired_trigger_ids = []
+        for trigger in matches:
+            try:
+                execution_id = await workflow_execution_engine.execute_workflow(
+                    workflow_id=trigger.workflow_id,
+                    trigger_id=trigger.trigger_id,
+                    input_data=event_data,
+                    context={
+                        'triggered_by': 'event',
+                        'event_type': event_type,
+                        'event_data': event_data
+                    }
                 )
+                execution_ids.append(execution_id)
+                fired_trigger_ids.append(trigger.trigger_id)
             
-            triggers = query.all()
-            execution_ids = []
-            
-            for trigger in triggers:
-                try:
-                    # Check if this trigger matches the event
-                    trigger_config = trigger.config or {}
-                    trigger_event_type = trigger_config.get('event_type')
-                    
-                    if trigger_event_type == event_type:
-                        # Check additional conditions if any
-                        if self._evaluate_event_conditions(trigger, event_data):
-                            # Execute workflow
-                            execution_id = await workflow_execution_engine.execute_workflow(
-                                workflow_id=trigger.workflow_id,
-                                trigger_id=trigger.id,
-                                input_data=event_data,
-                                context={
-                                    'triggered_by': 'event',
-                                    'event_type': event_type,
-                                    'event_data': event_data
-                                }
-                            )
-                            execution_ids.append(execution_id)
-                            
-                            # Update trigger stats
-                            trigger.last_triggered_at = datetime.utcnow()
-                            trigger.trigger_count += 1
-                
-                except Exception as e:
-                    logger.error(f"Error executing event trigger {trigger.id}: {e}")
-            
-            if execution_ids:
-                db.commit()
-                logger.info(f"Event '{event_type}' triggered {len(execution_ids)} workflows")
-            
-            return execution_ids
-            
-        finally:
-            db.close()
-    
-    def _evaluate_event_conditions(self, trigger: WorkflowTrigger, event_data: Dict) -> bool:
-        """Evaluate if event data matches trigger conditions"""
-        conditions = trigger.conditions or []
+            except Exception as e:
+                logger.error(f"Error executing event trigger {trigger.trigger_id}: {e}")
         
-        for condition in conditions:
-            field = condition.get('field')
-            operator = condition.get('operator')
-            value = condition.get('value')
-            
-            if field not in event_data:
-                return False
-            
-            event_value = event_data[field]
-            
-            if operator == 'equals' and event_value != value:
-                return False
-            elif operator == 'not_equals' and event_value == value:
-                return False
-            elif operator == 'contains' and value not in str(event_value):
-                return False
-            elif operator == 'greater_than' and event_value <= value:
-                return False
-            elif operator == 'less_than' and event_value >= value:
-                return False
+        if fired_trigger_ids:
+            # Update trigger stats
+            db = SessionLocal()
+            try:
+                db.query(WorkflowTrigger).filter(
+                    WorkflowTrigger.id.in_(fired_trigger_ids)
+                ).update({
+                    WorkflowTrigger.last_triggered_at: datetime.utcnow(),
+                    WorkflowTrigger.trigger_count: WorkflowTrigger.trigger_count + 1
+                }, synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+            logger.info(f"Event '{event_type}' triggered {len(execution_ids)} workflows")
         
-        return True
+        return execution_ids
 
 
 # Webhook handler for external triggers
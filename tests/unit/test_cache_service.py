@@ -0,0 +1,338 @@
+import asyncio
+import fnmatch
+import pickle
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.backend.services import cache_codec
+from src.backend.services.cache_codec import CacheCodec, CodecError, FLAG_ZSTD, FORMAT_JSON
+from src.backend.services.cache_service import (
+    CacheInvalidationService,
+    CacheService,
+    CircuitBreaker,
+    FileMetadataCacheService,
+    WorkspaceCacheService,
+    cache_result,
+    cache_service,
+    workspace_tag
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePipeline:
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def stage(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return stage
+
+    async def execute(self):
+        self.server.round_trips += 1
+        return [getattr(self.server, "_" + name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the asyncio Redis client"""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+        self.scans = 0
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        command = getattr(self, "_" + name)
+
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            return command(*args, **kwargs)
+        return call
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def _set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+
+    def _sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+        return len(members)
+
+    def _expire(self, key, ttl):
+        return key in self.data
+
+    def _smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def _delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    _unlink = _delete
+
+    def _info(self):
+        return {"used_memory_human": "1M"}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def scan_iter(self, match=None, count=None):
+        self.scans += 1
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+
+def make_service(client=None, breaker=None):
+    service = CacheService("redis://127.0.0.1:1/0", breaker=breaker or CircuitBreaker(), codec=CacheCodec())
+    if client is not None:
+        service._get_client = lambda: client
+    return service
+
+
+class TestCacheCodec:
+    VALUE = {
+        "id": 7,
+        "name": "report.pdf",
+        "tags": ["a", "b"],
+        "indexed_at": datetime(2026, 10, 16, 12, 30, 5),
+        "score": Decimal("0.75"),
+        "nested": {"1": None, "flag": True}
+    }
+
+    def test_round_trip_preserves_values(self):
+        codec = CacheCodec()
+        assert codec.decode(codec.encode(self.VALUE)) == self.VALUE
+
+    def test_json_fallback_round_trip(self):
+        codec = CacheCodec(use_msgpack=False)
+        payload = codec.encode(self.VALUE)
+        assert payload[1] & 0x0F == FORMAT_JSON
+        assert codec.decode(payload) == self.VALUE
+
+    @pytest.mark.skipif(not cache_codec.ZSTD_AVAILABLE, reason="zstandard not installed")
+    def test_large_values_are_compressed(self):
+        codec = CacheCodec(compression_threshold=256)
+        small = codec.encode({"a": 1})
+        large_value = [{"file_name": f"file_{i}.txt", "category": "documents"} for i in range(200)]
+        large = codec.encode(large_value)
+        assert not small[1] & FLAG_ZSTD
+        assert large[1] & FLAG_ZSTD
+        assert codec.decode(large) == large_value
+        assert len(large) < len(CacheCodec(compression_threshold=0).encode(large_value))
+
+    def test_legacy_and_corrupt_payloads_are_rejected(self):
+        codec = CacheCodec()
+        with pytest.raises(CodecError):
+            codec.decode(pickle.dumps({"a": 1}))
+        with pytest.raises(CodecError):
+            codec.decode(codec.encode({"a": 1})[:-2])
+        with pytest.raises(CodecError):
+            codec.decode(b"")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_retries_after_cooldown(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.is_open
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        breaker.record_failure()
+        assert breaker.is_open and breaker.times_opened == 1
+
+        clock.now = 25
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+class TestCacheService:
+    @pytest.mark.asyncio
+    async def test_get_set_round_trip_and_stats(self):
+        server = FakeRedis()
+        service = make_service(server)
+        assert await service.set("k", {"a": [1, 2]}) is True
+        assert await service.get("k") == {"a": [1, 2]}
+        assert await service.get("missing") is None
+
+        stats = await service.get_cache_stats()
+        assert stats["cache_hits"] == 1 and stats["cache_misses"] == 1
+        assert stats["avg_payload_bytes"] == len(server.data["k"])
+        assert stats["circuit_state"] == "closed" and stats["used_memory"] == "1M"
+
+    @pytest.mark.asyncio
+    async def test_many_operations_use_one_round_trip(self):
+        server = FakeRedis()
+        service = make_service(server)
+        assert await service.set_many({f"k{i}": i for i in range(20)}) is True
+        assert server.round_trips == 1
+
+        found = await service.get_many([f"k{i}" for i in range(25)])
+        assert server.round_trips == 2
+        assert found == {f"k{i}": i for i in range(20)}
+        assert service.cache_misses == 5
+
+    @pytest.mark.asyncio
+    async def test_unreadable_payload_is_a_miss(self):
+        server = FakeRedis()
+        server.data["old"] = pickle.dumps({"a": 1})
+        service = make_service(server)
+        assert await service.get("old") is None
+        assert service.decode_errors == 1
+
+    @pytest.mark.asyncio
+    async def test_unencodable_value_is_not_cached(self):
+        server = FakeRedis()
+        service = make_service(server)
+        assert await service.set("k", object()) is False
+        assert await service.set_many({"a": 1, "b": object()}, tags=["t"]) is False
+        assert server.data == {} and server.round_trips == 0
+        assert (await service.get_cache_stats())["encode_errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unreachable_server_opens_the_breaker(self):
+        clock = FakeClock()
+        service = make_service(breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=30, clock=clock))
+        attempts = 0
+        real_get_client = service._get_client
+
+        def counting_get_client():
+            nonlocal attempts
+            attempts += 1
+            return real_get_client()
+
+        service._get_client = counting_get_client
+        assert await service.get("k") is None
+        assert await service.set("k", 1) is False
+        assert not service._is_available()
+
+        # While open, calls return immediately without touching the network
+        assert await service.get("k") is None
+        assert await service.get_many(["a", "b"]) == {}
+        assert attempts == 2
+
+        clock.now = 31
+        assert service._is_available()
+        await service.delete("k")
+        assert attempts == 3 and not service._is_available()
+        await service.close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeRedis()
+    monkeypatch.setattr(cache_service, "_get_client", lambda: server)
+    monkeypatch.setattr(cache_service, "breaker", CircuitBreaker())
+    return server
+
+
+class TestTagInvalidation:
+    @pytest.mark.asyncio
+    async def test_workspace_invalidation_deletes_exactly_its_members(self, server):
+        await WorkspaceCacheService.set_workspace(5, {"id": 5})
+        await FileMetadataCacheService.set_workspace_files(5, 1, [{"id": 10}])
+        await WorkspaceCacheService.set_workspace(6, {"id": 6})
+        await FileMetadataCacheService.set_files_metadata({10: {"id": 10}, 11: {"id": 11}})
+
+        before = cache_service.invalidations
+        assert await CacheInvalidationService.invalidate_workspace_related(5) == 2
+        assert await WorkspaceCacheService.get_workspace(5) is None
+        assert await FileMetadataCacheService.get_workspace_files(5, 1) is None
+        assert await WorkspaceCacheService.get_workspace(6) == {"id": 6}
+        assert cache_service.invalidations == before + 1
+        assert cache_service.last_invalidation_keys == 2
+        assert server.scans == 0
+
+        assert await CacheInvalidationService.invalidate_file_related(10) == 1
+        assert await FileMetadataCacheService.get_files_metadata([10, 11]) == {11: {"id": 11}}
+
+    @pytest.mark.asyncio
+    async def test_invalidation_takes_two_round_trips(self, server):
+        for i in range(50):
+            await cache_service.set(f"ordnungshub:k{i}", i, tags=[workspace_tag(9)])
+        trips = server.round_trips
+        assert await cache_service.invalidate_tags(workspace_tag(9), "unused") == 50
+        assert server.round_trips - trips == 2
+        assert not any(key.startswith("ordnungshub:k") for key in server.data)
+
+    @pytest.mark.asyncio
+    async def test_delete_pattern_scans_incrementally(self, server):
+        for i in range(5):
+            server.data[f"legacy:{i}"] = b"x"
+        server.data["other"] = b"y"
+        assert await cache_service.delete_pattern("legacy:*") == 5
+        assert list(server.data) == ["other"]
+        assert server.scans == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_result_ignores_session_and_applies_tags(self, server):
+        calls = []
+
+        class Service:
+            @cache_result(ttl=60, key_prefix="report", tags=lambda workspace_id, **_: [workspace_tag(workspace_id)])
+            async def report(self, workspace_id, db):
+                calls.append(workspace_id)
+                return {"workspace_id": workspace_id}
+
+        from sqlalchemy.orm import Session
+        service = Service()
+        assert await service.report(3, Session()) == {"workspace_id": 3}
+        assert await Service().report(3, Session()) == {"workspace_id": 3}
+        assert calls == [3]
+
+        await CacheInvalidationService.invalidate_workspace_related(3)
+        await service.report(3, Session())
+        assert calls == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_cache_result_returns_unencodable_results_uncached(self, server):
+        marker = object()
+
+        @cache_result(ttl=60, key_prefix="orm")
+        async def load(user_id):
+            return marker
+
+        assert await load(1) is marker
+        assert server.data == {}
+
+    @pytest.mark.asyncio
+    async def test_cache_result_coalesces_concurrent_misses(self, server):
+        calls = 0
+
+        @cache_result(ttl=60, key_prefix="dashboard")
+        async def dashboard(user_id):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"user_id": user_id}
+
+        coalesced = cache_service.single_flight.coalesced
+        results = await asyncio.gather(*(dashboard(1) for _ in range(20)))
+        assert results == [{"user_id": 1}] * 20
+        assert calls == 1
+        assert cache_service.single_flight.coalesced - coalesced == 19
+        assert (await cache_service.get_cache_stats())["coalesced_requests"] >= 19
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+
+from src.backend.services.categorization_batcher import CategorizationBatcher
+from src.backend.services.enhanced_ai_service import EnhancedAIService
+
+ITEMS = [
+    ("report.txt", "/docs/report.txt", "Quarterly budget meeting with the client about revenue."),
+    ("script.py", "/code/script.py", "def handler(): call the api server and update the database"),
+    ("photo.jpg", "/pictures/photo.jpg", ""),
+]
+
+
+class RecordingService:
+    def __init__(self):
+        self.calls = []
+
+    async def smart_categorize_files(self, items, checksums=None):
+        self.calls.append(len(items))
+        return [{'category': filename} for filename, _, _ in items]
+
+
+class TestBatchCategorization:
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_file_results(self, tmp_path):
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        batch = await service.smart_categorize_files(ITEMS)
+        singles = [await service.smart_categorize_file(*item) for item in ITEMS]
+        assert batch == singles
+
+    @pytest.mark.asyncio
+    async def test_duplicate_content_is_analyzed_once(self, tmp_path):
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        preview = ITEMS[0][2]
+        results = await service.smart_categorize_files(
+            [("a.txt", "/a/a.txt", preview), ("b.txt", "/b/b.txt", preview)], ["same", "same"]
+        )
+        assert results[0]['subcategory'] == results[1]['subcategory']
+        assert service.categorization_cache.get_stats()['misses'] == 1
+
+
+class TestCategorizationBatcher:
+    @pytest.mark.asyncio
+    async def test_fills_batches_up_to_size(self):
+        service = RecordingService()
+        batcher = CategorizationBatcher(service, batch_size=4, max_delay=1.0)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.categorize(f"f{i}") for i in range(10)))
+        await batcher.close()
+
+        assert [r['category'] for r in results] == [f"f{i}" for i in range(10)]
+        assert service.calls == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    async def test_flushes_partial_batch_after_delay(self):
+        service = RecordingService()
+        batcher = CategorizationBatcher(service, batch_size=100, max_delay=0.05)
+        await batcher.start()
+        result = await asyncio.wait_for(batcher.categorize("only.txt"), timeout=1.0)
+        await batcher.close()
+
+        assert result == {'category': 'only.txt'}
+        assert service.calls == [1]
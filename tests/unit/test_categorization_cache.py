@@ -0,0 +1,66 @@
+import pytest
+
+from src.backend.services.categorization_cache import CategorizationCache
+from src.backend.services.enhanced_ai_service import EnhancedAIService
+
+VERSIONS = {'category': 0, 'priority': 0}
+
+
+class TestCategorizationCache:
+    def test_lru_eviction(self):
+        cache = CategorizationCache(max_entries=2)
+        cache.put("a", {"v": 1}, VERSIONS)
+        cache.put("b", {"v": 2}, VERSIONS)
+        assert cache.get("a", VERSIONS) == {"v": 1}
+        cache.put("c", {"v": 3}, VERSIONS)
+
+        assert cache.get("b", VERSIONS) is None
+        assert cache.get("a", VERSIONS) == {"v": 1}
+        stats = cache.get_stats()
+        assert (stats['entries'], stats['hits'], stats['misses'], stats['evictions']) == (2, 2, 1, 1)
+
+    def test_selective_invalidation(self):
+        cache = CategorizationCache()
+        cache.put("rules", {"v": 1}, VERSIONS)
+        cache.put("category", {"v": 2}, VERSIONS, models_used=["category"])
+        cache.put("priority", {"v": 3}, VERSIONS, models_used=["priority"])
+
+        assert cache.invalidate_models(["category"]) == 1
+        assert cache.get("rules", VERSIONS) is not None
+        assert cache.get("priority", VERSIONS) is not None
+        assert cache.get("category", VERSIONS) is None
+
+    def test_stale_model_version_misses(self):
+        cache = CategorizationCache()
+        cache.put("a", {"v": 1}, VERSIONS, models_used=["priority"])
+        assert cache.get("a", {'category': 0, 'priority': 1}) is None
+
+    def test_snapshot_round_trip(self, tmp_path):
+        path = tmp_path / "cache.json"
+        cache = CategorizationCache(path, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, {"key": key}, VERSIONS)
+        assert cache.save()
+        assert not cache.save()
+
+        restored = CategorizationCache(path, max_entries=2)
+        assert restored.load() == 2
+        assert restored.get("c", VERSIONS) == {"key": "c"}
+        assert restored.get("a", VERSIONS) is None
+
+
+class TestSmartCategorizeCache:
+    @pytest.mark.asyncio
+    async def test_identical_content_is_analyzed_once(self, tmp_path):
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        preview = "Meeting with the client about the project budget and contract deadline."
+
+        uncached = await service.smart_categorize_file("notes.txt", "/data/notes.txt", preview)
+        first = await service.smart_categorize_file("notes.txt", "/data/notes.txt", preview, checksum="abc")
+        second = await service.smart_categorize_file("copy.py", "/uploads/copy.py", preview, checksum="abc")
+
+        assert first == uncached
+        assert second['category'] == 'code'
+        assert second['subcategory'] == first['subcategory']
+        stats = service.categorization_cache.get_stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+
+from src.backend.database.connection_pool import AcquireHistogram, ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    async def execute(self, query, params=None):
+        return []
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    """Pool over in-memory connections, so acquisition is all that is measured"""
+
+    async def _open_connection(self):
+        return FakeConnection()
+
+
+def make_pool(**config):
+    return FakePool({"min_connections": 0, "max_connections": 2, "connection_timeout": 5, **config})
+
+
+class TestConnectionPool:
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_arrival_order(self):
+        pool = make_pool(max_connections=1)
+        held = await pool._acquire_connection()
+        order = []
+
+        async def acquirer(name):
+            async with pool.get_connection():
+                order.append(name)
+
+        tasks = [asyncio.ensure_future(acquirer(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        assert len(pool._waiters) == 5
+        await pool._release_connection(held)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2, 3, 4]
+        assert (await pool.get_metrics())["connection_metrics"]["total_connections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_release_wakes_a_waiter_without_polling(self):
+        pool = make_pool(max_connections=1)
+        held = await pool._acquire_connection()
+        waiter = asyncio.ensure_future(pool._acquire_connection())
+        await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        await pool._release_connection(held)
+        connection = await waiter
+        assert connection is held
+        assert time.perf_counter() - started < 0.05
+
+    @pytest.mark.asyncio
+    async def test_timeout_leaves_no_stale_waiter(self):
+        pool = make_pool(max_connections=1, connection_timeout=0.02)
+        held = await pool._acquire_connection()
+        with pytest.raises(TimeoutError):
+            await pool._acquire_connection()
+        assert not pool._waiters
+
+        await pool._release_connection(held)
+        assert len(pool._idle) == 1
+        metrics = await pool.get_metrics()
+        assert metrics["acquire_metrics"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_connection_is_replaced_on_release(self):
+        pool = make_pool(max_connections=1)
+        held = await pool._acquire_connection()
+        waiter = asyncio.ensure_future(pool._acquire_connection())
+        await asyncio.sleep(0)
+
+        held.health_status = "unhealthy"
+        await pool._release_connection(held)
+        replacement = await asyncio.wait_for(waiter, 1)
+        assert replacement is not held and held.connection.closed
+        assert pool._size == 1
+
+    @pytest.mark.asyncio
+    async def test_many_concurrent_acquirers_share_a_bounded_pool(self):
+        pool = make_pool(max_connections=20)
+        peak = 0
+
+        async def acquirer():
+            nonlocal peak
+            async with pool.get_connection():
+                peak = max(peak, len(pool.active_connections))
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(acquirer() for _ in range(500)))
+        metrics = await pool.get_metrics()
+        assert peak <= 20
+        assert metrics["connection_metrics"]["total_connections"] <= 20
+        assert metrics["acquire_metrics"]["count"] == 500
+        assert metrics["acquire_metrics"]["max_waiting"] > 0
+        await pool.close()
+
+
+class TestAcquireHistogram:
+    def test_percentiles_use_bucket_bounds(self):
+        histogram = AcquireHistogram()
+        for elapsed in [0.05] * 90 + [3.0] * 9 + [700.0]:
+            histogram.record(elapsed)
+        assert histogram.percentile(0.5) == 0.1
+        assert histogram.percentile(0.95) == 5
+        assert histogram.percentile(1.0) == 700.0
+        summary = histogram.to_dict()
+        assert summary["count"] == 100 and summary["buckets"]["le_1000ms"] == 1
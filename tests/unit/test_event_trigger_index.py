@@ -0,0 +1,60 @@
+import pytest
+
+from src.backend.services.event_trigger_index import EventTriggerIndex, compile_conditions
+
+
+@pytest.mark.parametrize("condition,event_data,expected", [
+    ({'field': 'status', 'operator': 'equals', 'value': 'done'}, {'status': 'done'}, True),
+    ({'field': 'status', 'operator': 'equals', 'value': 'done'}, {'status': 'open'}, False),
+    ({'field': 'status', 'operator': 'not_equals', 'value': 'done'}, {'status': 'open'}, True),
+    ({'field': 'name', 'operator': 'contains', 'value': 'rep'}, {'name': 'report'}, True),
+    ({'field': 'priority', 'operator': 'greater_than', 'value': 2}, {'priority': 2}, False),
+    ({'field': 'priority', 'operator': 'less_than', 'value': 2}, {'priority': 1}, True),
+    ({'field': 'priority', 'operator': 'less_than', 'value': 2}, {'priority': 'high'}, False),
+    ({'field': 'status', 'operator': 'unknown', 'value': 'x'}, {'status': 'open'}, True),
+    ({'field': 'status', 'operator': 'equals', 'value': 'done'}, {}, False),
+])
+def test_compiled_conditions(condition, event_data, expected):
+    assert compile_conditions([condition])(event_data) is expected
+
+
+def test_all_conditions_must_hold():
+    predicate = compile_conditions([
+        {'field': 'status', 'operator': 'equals', 'value': 'done'},
+        {'field': 'priority', 'operator': 'greater_than', 'value': 1},
+    ])
+    assert predicate({'status': 'done', 'priority': 3})
+    assert not predicate({'status': 'done', 'priority': 1})
+    assert compile_conditions(None)({})
+
+
+def make_index():
+    index = EventTriggerIndex()
+    index.replace_all([
+        (1, 10, 1, {'event_type': 'task.done'}, []),
+        (2, 20, 2, {'event_type': 'task.done'}, [{'field': 'priority', 'operator': 'greater_than', 'value': 3}]),
+        (3, 30, 1, {'event_type': 'file.upload'}, []),
+        (4, 40, 1, {}, []),
+    ])
+    return index
+
+
+def test_match_by_event_type_and_workspace():
+    index = make_index()
+    assert len(index) == 3 and 4 not in index
+    assert [t.trigger_id for t in index.match('task.done', {'priority': 5})] == [1, 2]
+    assert [t.trigger_id for t in index.match('task.done', {'priority': 1})] == [1]
+    assert [t.trigger_id for t in index.match('task.done', {'priority': 5}, workspace_id=2)] == [2]
+    assert index.match('task.created', {}) == []
+
+
+def test_edits_move_triggers_between_buckets():
+    index = make_index()
+    index.upsert(1, 10, 1, {'event_type': 'file.upload'}, [])
+    assert [t.trigger_id for t in index.match('task.done', {'priority': 5})] == [2]
+    assert [t.trigger_id for t in index.match('file.upload', {}, workspace_id=1)] == [3, 1]
+
+    index.remove(3)
+    index.remove(1)
+    assert index.match('file.upload', {}) == []
+    assert not index.remove(1)
@@ -0,0 +1,68 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from src.backend.services.file_scanner import CancellationToken, FileScannerService
+
+
+@pytest.fixture
+def scanner():
+    service = FileScannerService()
+    service.extraction_mode = 'process'
+    service.process_workers = 1
+    return service
+
+
+def stored(path, offset=0):
+    return datetime.fromtimestamp(os.stat(path).st_mtime + offset)
+
+
+def test_unchanged_and_oversized_files_need_no_extraction(scanner, tmp_path):
+    unchanged, changed, new, big = (tmp_path / name for name in ("a.txt", "b.txt", "c.txt", "d.bin"))
+    for path in (unchanged, changed, new):
+        path.write_text("abc")
+    big.write_text("x" * 10)
+    scanner.max_scan_file_size = 5
+    existing = {str(unchanged): stored(unchanged, 1), str(changed): stored(changed, -60)}
+
+    assert not scanner._needs_extraction(unchanged, existing)
+    assert scanner._needs_extraction(changed, existing)
+    assert scanner._needs_extraction(new, existing)
+    assert not scanner._needs_extraction(big, existing)
+    assert not scanner._needs_extraction(tmp_path / "missing.txt", existing)
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_sent_to_the_process_pool(scanner, tmp_path, monkeypatch):
+    unchanged, changed = tmp_path / "a.txt", tmp_path / "b.txt"
+    unchanged.write_text("a")
+    changed.write_text("b")
+    submitted = []
+
+    async def extract_batch(file_paths):
+        submitted.extend(file_paths)
+        return {}
+
+    async def existing_modified(file_paths, user_id):
+        return {str(unchanged): stored(unchanged, 1)}
+
+    monkeypatch.setattr(scanner, "_extract_batch_in_processes", extract_batch)
+    monkeypatch.setattr(scanner, "_load_existing_modified_times", existing_modified)
+    monkeypatch.setattr(scanner, "_process_single_file_optimized", lambda *args, **kwargs: _done())
+
+    await scanner._process_file_batch_optimized([unchanged, changed], 1, CancellationToken())
+    assert submitted == [changed]
+
+
+async def _done():
+    return False
+
+
+@pytest.mark.asyncio
+async def test_shutdown_stops_the_process_pool(scanner):
+    pool = scanner._get_process_pool()
+    await scanner.shutdown()
+    assert scanner._process_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
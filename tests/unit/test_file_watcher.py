@@ -0,0 +1,159 @@
+import asyncio
+import errno
+import sys
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.backend.services import file_watcher
+from src.backend.services.file_scanner import FileScannerService
+from src.backend.services.file_watcher import FileWatcher, WatchLimitReached
+
+
+class RecordingScanner:
+    """Stands in for FileScannerService and records what the watcher hands it"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.scanning = False
+        self.ignore_patterns = {'__pycache__', 'node_modules'}
+        self.batches = []
+        self.rescans = []
+
+    def _should_ignore_file(self, filename):
+        return filename.startswith('.') or filename.endswith('.tmp')
+
+    async def process_path_changes(self, user_id, changed_paths, deleted_paths=None, deleted_directories=None):
+        self.batches.append((
+            sorted(Path(p).name for p in changed_paths),
+            sorted(Path(p).name for p in deleted_paths or []),
+            sorted(Path(p).name for p in deleted_directories or []),
+        ))
+        return {'processed_files': len(changed_paths), 'removed_files': len(deleted_paths or [])}
+
+    async def scan_directory(self, directory, user_id, use_journal=None):
+        self.rescans.append((directory, use_journal))
+        return {}
+
+
+async def wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_event_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+class TestFileWatcher:
+    @pytest.mark.asyncio
+    async def test_events_are_coalesced_into_one_batch(self, tmp_path):
+        (tmp_path / "old.txt").write_text("old")
+        (tmp_path / "gone").mkdir()
+        scanner = RecordingScanner()
+        watcher = FileWatcher(scanner, 1, [str(tmp_path)], debounce_seconds=0.2)
+        await watcher.start()
+        assert watcher.mode == 'inotify'
+
+        for i in range(5):
+            (tmp_path / "a.txt").write_text(str(i))
+        (tmp_path / "ignored.tmp").write_text("x")
+        (tmp_path / "old.txt").unlink()
+        (tmp_path / "gone").rmdir()
+        (tmp_path / "new" / "sub").mkdir(parents=True)
+        (tmp_path / "new" / "sub" / "b.md").write_text("b")
+
+        await wait_for(lambda: scanner.batches)
+        await watcher.stop()
+
+        assert scanner.batches == [(["a.txt", "b.md"], ["old.txt"], ["gone"])]
+        assert watcher.stats['batches'] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_directories_are_watched(self, tmp_path):
+        scanner = RecordingScanner()
+        watcher = FileWatcher(scanner, 1, [str(tmp_path)], debounce_seconds=0.1)
+        await watcher.start()
+
+        (tmp_path / "later").mkdir()
+        await wait_for(lambda: watcher.get_status()['watched_directories'] == 2)
+        (tmp_path / "later" / "c.txt").write_text("c")
+        await wait_for(lambda: any("c.txt" in batch[0] for batch in scanner.batches))
+        await watcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_rescans_at_watch_limit(self, tmp_path, monkeypatch):
+        def refuse(self, path, mask=file_watcher.WATCH_MASK):
+            raise WatchLimitReached(errno.ENOSPC, "inotify watch limit reached", path)
+
+        monkeypatch.setattr(file_watcher.Inotify, "add_watch", refuse)
+        scanner = RecordingScanner()
+        watcher = FileWatcher(scanner, 1, [str(tmp_path)], rescan_interval=60)
+        await watcher.start()
+
+        await wait_for(lambda: scanner.rescans)
+        assert watcher.mode == 'rescan'
+        assert "watch limit" in watcher.get_status()['fallback_reason']
+        assert scanner.rescans == [(str(tmp_path.resolve()), True)]
+        await watcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_fallback_from_a_batch_ends_the_flush_task(self, tmp_path, monkeypatch):
+        add_watch = file_watcher.Inotify.add_watch
+
+        def refuse_subdirectories(self, path, mask=file_watcher.WATCH_MASK):
+            if Path(path).name == "sub":
+                raise WatchLimitReached(errno.ENOSPC, "inotify watch limit reached", path)
+            return add_watch(self, path, mask)
+
+        monkeypatch.setattr(file_watcher.Inotify, "add_watch", refuse_subdirectories)
+        scanner = RecordingScanner()
+        watcher = FileWatcher(scanner, 1, [str(tmp_path)], debounce_seconds=0.1, rescan_interval=60)
+        await watcher.start()
+        flush_task = watcher._task
+
+        (tmp_path / "new" / "sub").mkdir(parents=True)
+        await wait_for(lambda: watcher.mode == 'rescan')
+        await wait_for(flush_task.done)
+        assert watcher._task is not flush_task
+        await watcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_a_running_rescan(self, tmp_path, monkeypatch):
+        scanner = FileScannerService()
+        loading = asyncio.Event()
+
+        async def slow_journal(directory, user_id):
+            loading.set()
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(scanner, "_load_scan_journal", slow_journal)
+        watcher = FileWatcher(scanner, 1, [str(tmp_path)], rescan_interval=0.01)
+        watcher._start_fallback("test")
+        await asyncio.wait_for(loading.wait(), 3)
+
+        await asyncio.wait_for(watcher.stop(), 3)
+        assert watcher.mode == 'stopped'
+        assert scanner.scan_stats['cancelled'] and not scanner.scanning
+
+    @pytest.mark.asyncio
+    async def test_batch_waits_for_a_running_scan(self, tmp_path, monkeypatch):
+        scanner = FileScannerService()
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_journal(directory, user_id):
+            loading.set()
+            await release.wait()
+
+        monkeypatch.setattr(scanner, "_load_scan_journal", slow_journal)
+        scan = asyncio.create_task(scanner.scan_directory(str(tmp_path), 1, use_journal=True))
+        await asyncio.wait_for(loading.wait(), 3)
+
+        batch = asyncio.create_task(scanner.process_path_changes(1, []))
+        await asyncio.sleep(0.1)
+        assert not batch.done() and 'type' not in scanner.scan_stats
+
+        release.set()
+        await asyncio.wait_for(scan, 3)
+        assert (await asyncio.wait_for(batch, 3))['type'] == 'watch_batch'
+        assert not scanner.scanning
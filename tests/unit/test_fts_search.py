@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.file_metadata import FileMetadata
+from src.backend.crud.crud_file import file_metadata as crud_file
+from src.backend.database import fts_search
+from src.backend.database.fts_search import FTSSearchEngine, FTS_SCHEMA_VERSION, initialize_fts
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Temporary database with a few indexed files"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO users (id) VALUES (1)"))
+    FileMetadata.__table__.create(bind=engine)
+
+    session = sessionmaker(bind=engine)()
+    for name, description in [
+        ("budget_2024.xlsx", "annual budget spreadsheet"),
+        ("beach.jpg", "holiday photo"),
+        ("server.py", "api server entry point"),
+    ]:
+        session.add(FileMetadata(user_id=1, file_path=f"/data/{name}", file_name=name, ai_description=description))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def names(results):
+    return [result.file_name for result in results]
+
+
+class TestFTSInitialization:
+    def test_existing_rows_are_indexed_once(self, db):
+        engine = FTSSearchEngine(db)
+        assert engine.available
+        assert names(engine.search("budget", user_id=1)) == ["budget_2024.xlsx"]
+
+        version = db.execute(text("SELECT version FROM search_index_schema WHERE name = 'files_fts'")).scalar()
+        assert version == FTS_SCHEMA_VERSION
+
+    def test_later_engines_skip_schema_setup(self, db, monkeypatch):
+        FTSSearchEngine(db)
+        calls = []
+        monkeypatch.setattr(fts_search, "ensure_fts_schema", lambda connection: calls.append(1))
+        FTSSearchEngine(db).search("holiday", user_id=1)
+        assert calls == []
+
+    def test_outdated_schema_is_rebuilt(self, db):
+        db.execute(text("CREATE VIRTUAL TABLE files_fts USING fts5(file_name, file_id UNINDEXED)"))
+        db.commit()
+        assert initialize_fts(db.get_bind())
+        assert names(FTSSearchEngine(db).search("server", user_id=1)) == ["server.py"]
+
+
+class TestFTSSync:
+    def test_triggers_follow_updates_and_deletes(self, db):
+        engine = FTSSearchEngine(db)
+        db.add(FileMetadata(user_id=1, file_path="/data/notes.txt", file_name="notes.txt", ai_description="budget notes"))
+        photo = db.query(FileMetadata).filter_by(file_name="beach.jpg").one()
+        photo.ai_description = "budget receipt scan"
+        db.execute(text("DELETE FROM file_metadata WHERE file_name = 'budget_2024.xlsx'"))
+        db.commit()
+
+        assert sorted(names(engine.search("budget", user_id=1))) == ["beach.jpg", "notes.txt"]
+        assert engine.search("holiday", user_id=1) == []
+
+    def test_ranking_prefers_file_name_matches(self, db):
+        db.add(FileMetadata(user_id=1, file_path="/data/misc.txt", file_name="misc.txt", ai_description="server logs"))
+        db.commit()
+        results = FTSSearchEngine(db).search("server", user_id=1)
+        assert names(results) == ["server.py", "misc.txt"]
+        assert results[0].search_rank > results[1].search_rank > 0
+
+    def test_admin_operations(self, db):
+        assert crud_file.optimize_search_index(db, merge_pages=16)
+        assert crud_file.optimize_search_index(db)
+        assert crud_file.rebuild_search_index(db)
+        assert [f.file_name for f in crud_file.search_files(db, user_id=1, query="beach")] == ["beach.jpg"]
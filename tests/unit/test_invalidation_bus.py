@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+from src.backend.caching.advanced_cache import AdvancedCacheManager, CacheEntry
+from src.backend.caching.invalidation_bus import (
+    InvalidationBus,
+    RedisInvalidationBus,
+    SQLiteInvalidationBus,
+    create_invalidation_bus
+)
+
+
+async def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.002)
+    return True
+
+
+async def shutdown(*caches):
+    for cache in caches:
+        cache._maintenance_task.cancel()
+        await cache.invalidation_bus.close()
+
+
+def make_worker(path):
+    return AdvancedCacheManager(invalidation_bus=SQLiteInvalidationBus(str(path), poll_interval=0.005))
+
+
+class TestCrossWorkerInvalidation:
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_reaches_other_workers(self, tmp_path):
+        path = tmp_path / "bus.db"
+        worker_a, worker_b = make_worker(path), make_worker(path)
+        await worker_b.set("workspaces:1", {"name": "old"}, tags=["workspace:1"])
+        await worker_b.set("workspaces:2", {"name": "other"}, tags=["workspace:2"])
+        assert await wait_for(lambda: worker_a.invalidation_bus.received == 2)
+
+        started = time.monotonic()
+        await worker_a.invalidate_by_tags(["workspace:1"])
+        assert await wait_for(lambda: "workspaces:1" not in worker_b.memory_cache)
+        assert time.monotonic() - started < 0.5
+        assert "workspaces:2" in worker_b.memory_cache
+        # A worker does not receive its own messages
+        assert worker_b.metrics.remote_invalidations == 1
+        await shutdown(worker_a, worker_b)
+
+    @pytest.mark.asyncio
+    async def test_delete_is_broadcast(self, tmp_path):
+        path = tmp_path / "bus.db"
+        worker_a, worker_b = make_worker(path), make_worker(path)
+        await worker_b.set("users:1", {"v": 1})
+        assert await wait_for(lambda: worker_a.invalidation_bus.received == 1)
+
+        await worker_a.delete("users:1")
+        assert await wait_for(lambda: "users:1" not in worker_b.memory_cache)
+        assert worker_a.invalidation_bus.get_stats()['published'] == 1
+        assert worker_b.invalidation_bus.get_stats()['received'] == 1
+        await shutdown(worker_a, worker_b)
+
+    @pytest.mark.asyncio
+    async def test_overwrite_drops_stale_copies_on_other_workers(self, tmp_path):
+        path = tmp_path / "bus.db"
+        worker_a, worker_b = make_worker(path), make_worker(path)
+        await worker_b.set("users:1", {"v": 1})
+        assert await wait_for(lambda: worker_a.invalidation_bus.received == 1)
+
+        await worker_a.set("users:1", {"v": 2})
+        assert await wait_for(lambda: "users:1" not in worker_b.memory_cache)
+        assert worker_a.memory_cache["users:1"].data == {"v": 2}
+        await shutdown(worker_a, worker_b)
+
+
+class TestTieredCache:
+    @pytest.mark.asyncio
+    async def test_tag_index_follows_evictions_and_invalidations(self):
+        size = CacheEntry(data={"v": 0}, created_at=0, expires_at=0).size
+        cache = AdvancedCacheManager(max_memory_cache_size=size * 2)
+        await cache.set("tasks:1", {"v": 1}, tags=["t"])
+        await cache.set("tasks:2", {"v": 2}, tags=["t"])
+        await cache.set("tasks:3", {"v": 3}, tags=["t", "u"])
+        assert cache._tag_index["t"] == {"tasks:2", "tasks:3"}
+
+        assert await cache.invalidate_by_tags(["u"]) == 1
+        assert cache._tag_index == {"t": {"tasks:2"}}
+        assert await cache.invalidate_by_tags(["t"]) == 1
+        assert cache._tag_index == {} and cache._key_tags == {}
+        cache._maintenance_task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_per_tier_hit_ratios(self):
+        cache = AdvancedCacheManager()
+        await cache.set("users:1", {"v": 1})
+        await cache.get("users:1")
+        await cache.get("users:2")
+        tiers = cache.get_cache_stats()['tiers']
+        assert tiers['l1'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+        assert tiers['l2']['hits'] == 0
+        cache._maintenance_task.cancel()
+
+
+class TestBusFactory:
+    def test_auto_selection(self, tmp_path):
+        path = str(tmp_path / "bus.db")
+        assert create_invalidation_bus("auto", sqlite_path=path, workers=1) is None
+        assert isinstance(create_invalidation_bus("auto", sqlite_path=path, workers=4), SQLiteInvalidationBus)
+        assert isinstance(create_invalidation_bus("auto", redis_client=object()), RedisInvalidationBus)
+        assert create_invalidation_bus("redis") is None
+        assert create_invalidation_bus("none", redis_client=object()) is None
+
+    def test_base_bus_is_abstract(self):
+        with pytest.raises(TypeError):
+            InvalidationBus()
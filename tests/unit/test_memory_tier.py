@@ -0,0 +1,77 @@
+import pytest
+
+from src.backend.caching.memory_tier import MemoryTier, TinyLFU
+from src.backend.caching.advanced_cache import AdvancedCacheManager, CacheEntry
+
+
+class Entry:
+    def __init__(self, size):
+        self.size = size
+
+
+class TestMemoryTier:
+    def test_evicts_least_recently_used_first(self):
+        tier = MemoryTier(max_bytes=30)
+        for key in ("a", "b", "c"):
+            tier.put(key, Entry(10))
+        tier.get("a")
+        assert tier.put("d", Entry(10)) == ["b"]
+        assert "b" not in tier and "a" in tier
+        assert tier.size_bytes == 30
+
+    def test_large_entry_evicts_several_and_replacement_updates_bytes(self):
+        tier = MemoryTier(max_bytes=30)
+        for key in ("a", "b", "c"):
+            tier.put(key, Entry(10))
+        assert tier.put("big", Entry(25)) == ["a", "b", "c"]
+        tier.put("big", Entry(5))
+        assert tier.size_bytes == 5 and len(tier) == 1
+
+    def test_oversized_entry_is_rejected_and_drops_the_old_value(self):
+        tier = MemoryTier(max_bytes=10)
+        tier.put("a", Entry(5))
+        assert tier.put("a", Entry(11)) is None
+        assert "a" not in tier and tier.size_bytes == 0
+
+    def test_tinylfu_keeps_hot_keys_from_one_off_scans(self):
+        tier = MemoryTier(max_bytes=100, admission=TinyLFU(capacity=100))
+        for i in range(10):
+            tier.put(f"hot{i}", Entry(10))
+        for _ in range(5):
+            for i in range(10):
+                tier.get(f"hot{i}")
+        for i in range(200):
+            tier.put(f"scan{i}", Entry(10))
+        assert all(f"hot{i}" in tier for i in range(10))
+        assert tier.rejections == 200
+
+    def test_frequently_requested_newcomer_is_admitted(self):
+        tier = MemoryTier(max_bytes=10, admission=TinyLFU(capacity=16))
+        tier.put("old", Entry(10))
+        for _ in range(3):
+            tier.get("new")
+        assert tier.put("new", Entry(10)) == ["old"]
+
+    def test_sketch_ages(self):
+        sketch = TinyLFU(capacity=16, sample_multiplier=1)
+        for _ in range(15):
+            sketch.record("k")
+        assert sketch.resets == 0 and sketch.estimate("k") == 15
+        sketch.record("other")
+        assert sketch.resets == 1 and sketch.estimate("k") == 7
+
+
+class TestAdvancedCacheManager:
+    @pytest.mark.asyncio
+    async def test_memory_tier_accounting(self):
+        size = CacheEntry(data={"v": 0}, created_at=0, expires_at=0).size
+        cache = AdvancedCacheManager(max_memory_cache_size=size * 3)
+        for i in range(5):
+            await cache.set(f"users:{i}", {"v": i})
+        stats = cache.get_cache_stats()
+        assert stats['memory_cache_size'] == 3
+        assert stats['memory_usage_bytes'] == size * 3
+        assert stats['metrics']['evictions'] == 2
+        assert await cache.get("users:4", strategy=None) == {"v": 4}
+        assert await cache.delete("users:4")
+        assert cache.get_cache_stats()['memory_usage_bytes'] == size * 2
@@ -0,0 +1,47 @@
+import hashlib
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+from src.backend.services.metadata_extraction import (
+    extract_metadata, extract_metadata_chunk, result_to_metadata
+)
+
+TEXT_EXTENSIONS = frozenset({'.txt', '.md'})
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("meeting notes for the budget review")
+    binary_file = tmp_path / "photo.jpg"
+    binary_file.write_bytes(b"\xff\xd8\xff" + b"\x00" * 100)
+    return [str(text_file), str(binary_file), str(tmp_path / "missing.txt")]
+
+
+class TestMetadataExtraction:
+    def test_extract_text_file(self, sample_files):
+        result = extract_metadata(sample_files[0], TEXT_EXTENSIONS, 1024 * 1024, 10)
+        metadata = result_to_metadata(result)
+
+        assert metadata['size'] == 35
+        assert metadata['mime_type'] == 'text/plain'
+        assert metadata['content_preview'] == 'meeting no'
+        with open(sample_files[0], 'rb') as f:
+            assert metadata['checksum'] == hashlib.sha256(f.read()).hexdigest()
+
+    def test_binary_file_has_no_preview(self, sample_files):
+        metadata = result_to_metadata(extract_metadata(sample_files[1], TEXT_EXTENSIONS, 1024 * 1024, 10))
+        assert metadata['mime_type'] == 'image/jpeg'
+        assert 'content_preview' not in metadata
+
+    def test_missing_file(self, sample_files):
+        assert extract_metadata(sample_files[2], TEXT_EXTENSIONS, 1024 * 1024, 10) is None
+        assert result_to_metadata(None) == {}
+
+    def test_process_pool_matches_inline(self, sample_files):
+        inline = [extract_metadata(p, TEXT_EXTENSIONS, 1024 * 1024, 100) for p in sample_files]
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            remote = pool.submit(extract_metadata_chunk, sample_files, TEXT_EXTENSIONS, 1024 * 1024, 100).result()
+        # Reading the files updates atime, so compare everything else
+        strip_atime = lambda results: [r[:5] + r[6:] if r else r for r in results]
+        assert strip_atime(remote) == strip_atime(inline)
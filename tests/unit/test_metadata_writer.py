@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.file_metadata import FileMetadata
+from src.backend.crud.crud_file import file_metadata as crud_file
+from src.backend.schemas.file_metadata import FileMetadataCreate
+from src.backend.services import metadata_writer
+from src.backend.services.metadata_writer import FileMetadataWriter
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    """Temporary database with the file_metadata table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'files.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO users (id) VALUES (1)"))
+    FileMetadata.__table__.create(bind=engine)
+
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(metadata_writer, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+def make_record(name: str, category: str = "document") -> FileMetadataCreate:
+    return FileMetadataCreate(
+        user_id=1,
+        file_path=f"/data/{name}",
+        file_name=name,
+        file_size=10,
+        ai_category=category,
+    )
+
+
+class TestBulkUpsert:
+    @pytest.mark.parametrize("use_on_conflict", [True, False])
+    def test_insert_then_update(self, session_factory, use_on_conflict):
+        db = session_factory()
+        records = [make_record(f"f{i}.txt") for i in range(5)]
+        assert crud_file.bulk_upsert(db, records=records, use_on_conflict=use_on_conflict) == (5, 0)
+
+        changed = [make_record("f1.txt", "code"), make_record("new.txt")]
+        assert crud_file.bulk_upsert(db, records=changed, use_on_conflict=use_on_conflict) == (1, 1)
+
+        assert db.query(FileMetadata).count() == 6
+        assert crud_file.get_by_path(db, file_path="/data/f1.txt", user_id=1).ai_category == "code"
+        db.close()
+
+    def test_user_fields_are_preserved(self, session_factory):
+        db = session_factory()
+        crud_file.bulk_upsert(db, records=[make_record("a.txt")])
+        stored = crud_file.get_by_path(db, file_path="/data/a.txt", user_id=1)
+        stored.is_favorite = True
+        stored.user_category = "mine"
+        db.commit()
+
+        crud_file.bulk_upsert(db, records=[make_record("a.txt", "image")])
+        db.expire_all()
+        stored = crud_file.get_by_path(db, file_path="/data/a.txt", user_id=1)
+        assert stored.ai_category == "image"
+        assert stored.is_favorite is True
+        assert stored.user_category == "mine"
+        db.close()
+
+
+class TestFileMetadataWriter:
+    @pytest.mark.asyncio
+    async def test_batches_by_size(self, session_factory):
+        stats = {}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            writer = FileMetadataWriter(executor, batch_size=10, flush_interval=5.0, stats=stats)
+            await writer.start()
+            for i in range(25):
+                await writer.put(make_record(f"f{i}.txt"))
+            await writer.close()
+
+        assert writer.batches_flushed == 3
+        assert stats["new_files"] == 25
+        assert writer.failed_paths == []
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self, session_factory):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            writer = FileMetadataWriter(executor, batch_size=100, flush_interval=0.05)
+            await writer.start()
+            await writer.put(make_record("a.txt"))
+            await asyncio.sleep(0.2)
+            assert writer.batches_flushed == 1
+            await writer.close()
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.file_metadata import FileMetadata
+from src.backend.crud.crud_file import file_metadata as crud_file
+from src.backend.crud.pagination import InvalidCursorError
+
+
+@pytest.fixture
+def db(tmp_path):
+    """25 files that share one indexed_at second, so pages must break ties on id"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'files.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO users (id) VALUES (1)"))
+    FileMetadata.__table__.create(bind=engine)
+
+    session = sessionmaker(bind=engine)()
+    for i in range(25):
+        folder = "docs" if i % 2 else "media"
+        session.add(FileMetadata(
+            user_id=1, file_path=f"/{folder}/report_{i}.txt", file_name=f"report_{i}.txt",
+            file_size=(i % 5) * 1024 * 1024, ai_description="quarterly report", importance_score=i % 3
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def walk(fetch, limit):
+    """Follow next_cursor until the last page; returns all ids and the page count"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        ids.extend(item.id if hasattr(item, 'id') else item.file_id for item in page)
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids, pages
+
+
+class TestKeysetPagination:
+    def test_pages_cover_every_file_once(self, db):
+        ids, pages = walk(lambda **kw: crud_file.get_by_user(db, user_id=1, **kw), limit=7)
+        assert pages == 4
+        assert ids == sorted(ids, reverse=True) and len(set(ids)) == 25
+
+    def test_offset_and_cursor_agree(self, db):
+        first = crud_file.get_by_user(db, user_id=1, limit=10)
+        by_cursor = crud_file.get_by_user(db, user_id=1, limit=10, cursor=first.next_cursor)
+        by_offset = crud_file.get_by_user(db, user_id=1, skip=10, limit=10)
+        assert [f.id for f in by_cursor] == [f.id for f in by_offset]
+
+    def test_large_files_are_ordered_by_size_then_id(self, db):
+        ids, _ = walk(lambda **kw: crud_file.get_large_files(db, user_id=1, min_size_mb=1, **kw), limit=4)
+        sizes = [db.get(FileMetadata, file_id).file_size for file_id in ids]
+        assert len(ids) == 20
+        assert sizes == sorted(sizes, reverse=True)
+
+    @pytest.mark.parametrize("use_fts", [True, False])
+    def test_search_pages(self, db, use_fts):
+        ids, pages = walk(
+            lambda **kw: crud_file.search_files(db, user_id=1, query="quarterly", use_fts=use_fts, **kw), limit=10
+        )
+        assert pages == 3
+        assert sorted(ids) == list(range(1, 26))
+
+    def test_advanced_search_pages(self, db):
+        ids, _ = walk(lambda **kw: crud_file.advanced_search(db, user_id=1, query="report", **kw), limit=6)
+        assert sorted(ids) == list(range(1, 26))
+
+    def test_foreign_or_malformed_cursors_are_rejected(self, db):
+        cursor = crud_file.get_by_user(db, user_id=1, limit=5).next_cursor
+        with pytest.raises(InvalidCursorError):
+            crud_file.get_large_files(db, user_id=1, cursor=cursor)
+        with pytest.raises(InvalidCursorError):
+            crud_file.get_by_user(db, user_id=1, cursor="not-a-cursor")
+
+
+class TestIterByUser:
+    def test_streams_all_records_in_batches(self, db):
+        assert [f.id for f in crud_file.iter_by_user(db, user_id=1, batch_size=4)] == list(range(1, 26))
+
+    def test_directory_prefix(self, db):
+        paths = [f.file_path for f in crud_file.iter_by_user(db, user_id=1, directory="/docs", batch_size=5)]
+        assert len(paths) == 12
+        assert all(path.startswith("/docs/") for path in paths)
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+# The plugin package imports these at load time
+pytest.importorskip("semver")
+pytest.importorskip("aiohttp")
+pytest.importorskip("jsonschema")
+
+from src.backend.core.plugins.event_system import (
+    Event,
+    EventPriority,
+    PluginEventSystem,
+    _decode_event,
+    _encode_event,
+)
+from src.backend.core.plugins.plugin_queue import OverflowPolicy, PluginEventQueue
+
+
+def spill_queue(tmp_path, maxsize=2):
+    return PluginEventQueue(
+        "p1", maxsize, OverflowPolicy.SPILL_TO_DISK, tmp_path / "p1.jsonl", _encode_event, _decode_event
+    )
+
+
+class TestPluginEventQueue:
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_the_newest_events(self):
+        queue = PluginEventQueue("p1", maxsize=2)
+        for i in range(3):
+            await queue.put(i)
+        assert [await queue.get(), await queue.get()] == [1, 2]
+        assert queue.get_stats()["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_the_consumer(self):
+        queue = PluginEventQueue("p1", maxsize=1, policy=OverflowPolicy.BLOCK)
+        await queue.put(1)
+        producer = asyncio.ensure_future(queue.put(2))
+        await asyncio.sleep(0)
+        assert not producer.done()
+        assert await queue.get() == 1
+        await producer
+        assert await queue.get() == 2
+        assert queue.blocked == 1
+
+    @pytest.mark.asyncio
+    async def test_spilled_events_come_back_in_order(self, tmp_path):
+        queue = spill_queue(tmp_path)
+        for i in range(5):
+            await queue.put(Event(type=f"e{i}", data={"n": i}, priority=EventPriority.HIGH))
+        assert len(queue) == 5 and queue.get_stats()["spilled"] == 3
+
+        received = [await queue.get() for _ in range(5)]
+        assert [event.type for event in received] == ["e0", "e1", "e2", "e3", "e4"]
+        assert received[4].data == {"n": 4} and received[4].priority is EventPriority.HIGH
+        assert not (tmp_path / "p1.jsonl").exists()
+
+    @pytest.mark.asyncio
+    async def test_spill_file_survives_a_restart(self, tmp_path):
+        queue = spill_queue(tmp_path)
+        for i in range(4):
+            await queue.put(Event(type=f"e{i}"))
+
+        recovered = spill_queue(tmp_path)
+        assert len(recovered) == 2
+        assert [(await recovered.get()).type for _ in range(2)] == ["e2", "e3"]
+
+
+class TestFanOut:
+    @pytest.mark.asyncio
+    async def test_slow_plugin_does_not_delay_others(self):
+        events = PluginEventSystem()
+        release = asyncio.Event()
+        fast_received = asyncio.Event()
+
+        async def slow(event):
+            await release.wait()
+
+        events.add_handler("slow", "file.created", slow, EventPriority.HIGH)
+        fast_calls = []
+
+        def fast(event):
+            fast_calls.append(event.id)
+            if len(fast_calls) == 2:
+                fast_received.set()
+
+        events.add_handler("fast", "file.created", fast, EventPriority.LOW)
+        await events.start()
+        try:
+            await events.emit("file.created")
+            await events.emit("file.created")
+            await asyncio.wait_for(fast_received.wait(), 1)
+
+            stats = events.get_statistics()["plugin_queues"]
+            # The slow plugin is stuck on the first event with the second still queued
+            assert stats["slow"]["depth"] == 1 and stats["slow"]["delivered"] == 1
+            assert stats["fast"]["depth"] == 0 and stats["fast"]["delivered"] == 2
+            release.set()
+        finally:
+            await events.stop()
+
+    @pytest.mark.asyncio
+    async def test_subscriptions_and_targeted_events_are_delivered_per_plugin(self):
+        events = PluginEventSystem()
+        received = []
+        done = asyncio.Event()
+
+        def record(name):
+            def callback(event):
+                received.append((name, event.type))
+                if len(received) == 3:
+                    done.set()
+            return callback
+
+        events.add_handler("p1", "task.done", record("p1-handler"))
+        events.add_handler("p2", "task.done", record("p2-handler"))
+        events.subscribe("p3", "task.#", record("p3-subscription"))
+        await events.start()
+        try:
+            await events.emit("task.done", target_plugin="p2")
+            await events.emit("task.done.late", target_plugin="p2")
+            await asyncio.wait_for(done.wait(), 1)
+        finally:
+            await events.stop()
+        assert sorted(received) == [
+            ("p2-handler", "task.done"),
+            ("p3-subscription", "task.done"),
+            ("p3-subscription", "task.done.late")
+        ]
@@ -0,0 +1,93 @@
+import pytest
+
+from src.backend.database.connection_pool import ConnectionPool, StatementCache
+from src.backend.database.query_fingerprint import fingerprint, normalize_sql
+
+
+class TestNormalizeSql:
+    def test_literals_and_bind_markers_become_placeholders(self):
+        assert normalize_sql("SELECT * FROM t1 WHERE id = 42 AND name = 'O''Brien'") == \
+            "select * from t1 where id = ? and name = ?"
+        assert normalize_sql("select * from t1 where id = $1 and name = :name") == \
+            "select * from t1 where id = ? and name = ?"
+
+    def test_lists_comments_and_whitespace_collapse(self):
+        assert normalize_sql("SELECT a FROM t WHERE x IN (1, 2, 3) -- hot path") == \
+            "select a from t where x in (...)"
+        assert normalize_sql("INSERT INTO t (a, b)\n VALUES (1, 'x'), (2, 'y'), (3, 'z')") == \
+            "insert into t (a, b) values (?, ?), ..."
+
+    def test_queries_differing_only_in_literals_share_a_fingerprint(self):
+        assert fingerprint("SELECT * FROM files WHERE id = 7")[0] == \
+            fingerprint("select *  from files where id = 8")[0]
+        assert fingerprint("SELECT * FROM files WHERE id = 7")[0] != \
+            fingerprint("SELECT * FROM tasks WHERE id = 7")[0]
+
+
+class TestStatementCache:
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = StatementCache(capacity=2)
+        assert cache.put("a", 1) is None
+        assert cache.put("b", 2) is None
+        assert cache.get("a") == 1
+        assert cache.put("c", 3) == 2
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+
+
+def make_sqlite_pool(tmp_path, **config):
+    return ConnectionPool({
+        "database_url": f"sqlite:///{tmp_path / 'pool.db'}",
+        "min_connections": 0,
+        "max_connections": 1,
+        **config
+    })
+
+
+class TestPoolQueryStats:
+    @pytest.mark.asyncio
+    async def test_inlined_literals_are_grouped_with_percentiles(self, tmp_path):
+        pool = make_sqlite_pool(tmp_path)
+        async with pool.get_connection() as connection:
+            await connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+            await connection.execute_many("INSERT INTO items (id, name) VALUES (?, ?)", [(i, f"n{i}") for i in range(20)])
+            for i in range(20):
+                rows = await connection.execute(f"SELECT name FROM items WHERE id = {i}")
+                assert rows == [(f"n{i}",)]
+
+        metrics = await pool.get_metrics()
+        grouped = [q for q in metrics["slow_queries"] if q["query"] == "select name from items where id = ?"]
+        assert len(grouped) == 1
+        assert grouped[0]["execution_count"] == 20
+        assert 0 <= grouped[0]["p50_ms"] <= grouped[0]["p95_ms"] <= grouped[0]["p99_ms"]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_repeated_statements_hit_the_connection_cache(self, tmp_path):
+        pool = make_sqlite_pool(tmp_path, statement_cache_size=2)
+        async with pool.get_connection() as connection:
+            await connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            for i in range(5):
+                await connection.execute("SELECT id FROM items WHERE id = ?", (i,))
+            await connection.execute("SELECT count(*) FROM items")
+            await connection.execute("SELECT max(id) FROM items")
+
+        cache = (await pool.get_metrics())["statement_cache"]
+        assert cache["hits"] == 4
+        assert cache["misses"] == 4
+        assert cache["evictions"] == 2
+        assert cache["cached_statements"] == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_transactions_use_the_sync_driver(self, tmp_path):
+        pool = make_sqlite_pool(tmp_path)
+        async with pool.get_connection() as connection:
+            assert connection.driver == "sqlite3"
+            await connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            await connection.begin_transaction()
+            await connection.execute("INSERT INTO items (id) VALUES (1)")
+            await connection.rollback()
+            assert await connection.execute("SELECT count(*) FROM items") == [(0,)]
+            assert connection.is_healthy()
+        await pool.close()
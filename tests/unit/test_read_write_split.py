@@ -0,0 +1,138 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, String, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from src.backend.database.database import (
+    ReadRoutingSession,
+    create_reader_engine,
+    create_writer_engine,
+    get_db,
+)
+from src.backend.database.fts_search import FTSSearchEngine, get_search_generation
+from src.backend.models.file_metadata import FileMetadata
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'split.db'}"
+    writer = create_writer_engine(url)
+    Base.metadata.create_all(writer)
+    reader = create_reader_engine(url)
+    yield writer, reader
+    reader.dispose()
+    writer.dispose()
+
+
+class TestReadWriteSplit:
+    def test_reader_connections_are_read_only_and_see_writer_commits(self, engines):
+        writer, reader = engines
+        with writer.connect() as connection:
+            connection.execute(text("INSERT INTO items (id, name) VALUES (1, 'a')"))
+            connection.commit()
+        with reader.connect() as connection:
+            assert connection.execute(text("SELECT name FROM items")).scalars().all() == ["a"]
+            with pytest.raises(OperationalError):
+                connection.execute(text("INSERT INTO items (id, name) VALUES (2, 'b')"))
+
+    def test_writer_pool_holds_a_single_connection(self, engines):
+        writer, reader = engines
+        assert writer.pool.size() == 1
+        assert reader.pool.size() == 4
+
+    def test_nested_writer_sessions_do_not_wait_for_each_other(self, engines):
+        writer, _ = engines
+        factory = sessionmaker(bind=writer)
+        outer, inner = factory(), factory()
+        try:
+            outer.execute(select(Item)).all()
+            inner.add(Item(id=1, name="nested"))
+            inner.commit()
+            assert outer.execute(select(Item.name)).scalars().all() == ["nested"]
+        finally:
+            inner.close()
+            outer.close()
+
+    def test_routing_session_reads_from_readers_and_flushes_to_writer(self, engines):
+        writer, reader = engines
+        session = sessionmaker(class_=ReadRoutingSession, bind=writer, read_bind=reader)()
+        try:
+            assert session.get_bind(clause=select(Item)) is reader
+            assert session.get_bind(clause=text("DELETE FROM items")) is writer
+
+            session.add(Item(id=1, name="written in a GET"))
+            session.commit()
+            assert session.execute(select(Item.name)).scalars().all() == ["written in a GET"]
+        finally:
+            session.close()
+
+    def test_routing_session_reads_its_own_writes_until_the_transaction_ends(self, engines):
+        writer, reader = engines
+        session = sessionmaker(class_=ReadRoutingSession, bind=writer, read_bind=reader)()
+        try:
+            session.add(Item(id=1, name="uncommitted"))
+            session.flush()
+            assert session.get_bind(clause=select(Item)) is writer
+            assert session.execute(select(Item.name)).scalars().all() == ["uncommitted"]
+
+            session.commit()
+            assert session.get_bind(clause=select(Item)) is reader
+        finally:
+            session.close()
+
+
+    def test_bare_get_bind_does_not_move_reads_to_the_writer(self, engines):
+        writer, reader = engines
+        session = sessionmaker(class_=ReadRoutingSession, bind=writer, read_bind=reader)()
+        try:
+            assert session.get_bind() is writer
+            assert session.get_bind(clause=select(Item)) is reader
+        finally:
+            session.close()
+
+    def test_search_stays_on_the_reader(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'search.db'}"
+        writer = create_writer_engine(url)
+        with writer.begin() as connection:
+            connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("INSERT INTO users (id) VALUES (1)"))
+        FileMetadata.__table__.create(bind=writer)
+        reader = create_reader_engine(url)
+        session = sessionmaker(class_=ReadRoutingSession, bind=writer, read_bind=reader)()
+        try:
+            engine = FTSSearchEngine(session)
+            with writer.begin() as connection:
+                connection.execute(FileMetadata.__table__.insert().values(
+                    user_id=1, file_path="/data/budget.xlsx", file_name="budget.xlsx"
+                ))
+            assert [result.file_name for result in engine.search("budget", user_id=1)] == ["budget.xlsx"]
+            assert get_search_generation(session, 1) == 1
+            assert not session._wrote
+        finally:
+            session.close()
+            reader.dispose()
+            writer.dispose()
+
+
+class TestGetDbRouting:
+    def test_session_type_follows_the_request_method(self):
+        app = FastAPI()
+
+        @app.api_route("/session", methods=["GET", "POST"])
+        def session_type(db=Depends(get_db)):
+            return {"routing": isinstance(db, ReadRoutingSession)}
+
+        client = TestClient(app)
+        assert client.get("/session").json() == {"routing": True}
+        assert client.post("/session").json() == {"routing": False}
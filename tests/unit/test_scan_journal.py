@@ -0,0 +1,98 @@
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.scan_journal import ScanJournalEntry
+from src.backend.services.scan_journal import ScanJournal
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Create a test database containing only the scan journal table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'journal.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO users (id) VALUES (1)"))
+    ScanJournalEntry.__table__.create(bind=engine)
+
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "share"
+    (root / "docs" / "deep").mkdir(parents=True)
+    (root / "a.txt").write_text("a")
+    (root / "docs" / "b.md").write_text("b")
+    (root / "docs" / "deep" / "c.py").write_text("c")
+    (root / ".git").mkdir()
+    (root / ".git" / "HEAD").write_text("ref")
+    return root
+
+
+def run_scan(db, root, trust=True, fail=()):
+    journal = ScanJournal(1, root, trust_directory_mtime=trust)
+    journal.load(db)
+    changed = list(journal.walk(
+        True,
+        include_dir=lambda d: not d.startswith('.'),
+        include_file=lambda f: not f.startswith('.'),
+        is_cancelled=lambda: False
+    ))
+    for path in changed:
+        if path.name not in fail:
+            journal.mark_processed(path)
+    result = journal.save(db)
+    return journal, sorted(p.name for p in changed), result
+
+
+class TestScanJournal:
+    def test_first_scan_reports_all_files(self, db_session, tree):
+        journal, changed, _ = run_scan(db_session, tree)
+        assert changed == ["a.txt", "b.md", "c.py"]
+        assert journal.skipped_files == 0
+
+    def test_unchanged_rescan_skips_everything(self, db_session, tree):
+        run_scan(db_session, tree)
+        journal, changed, result = run_scan(db_session, tree)
+        assert changed == []
+        assert journal.skipped_files == 3
+        assert result == {'upserted': 0, 'removed': 0}
+
+    def test_modified_file_detected_without_trusting_dirs(self, db_session, tree):
+        run_scan(db_session, tree)
+        target = tree / "docs" / "b.md"
+        target.write_text("changed content")
+        os.utime(target, (1, 1))
+        _, changed, _ = run_scan(db_session, tree, trust=False)
+        assert changed == ["b.md"]
+
+    def test_file_edited_in_place_detected_in_unchanged_directory(self, db_session, tree):
+        run_scan(db_session, tree)
+        docs = tree / "docs"
+        docs_mtime = os.stat(docs).st_mtime
+        target = docs / "b.md"
+        target.write_text("changed content")
+        os.utime(target, (1, 1))
+        os.utime(docs, (docs_mtime, docs_mtime))
+
+        journal, changed, _ = run_scan(db_session, tree)
+        assert changed == ["b.md"]
+        assert journal.skipped_files == 2
+
+    def test_new_and_removed_files(self, db_session, tree):
+        run_scan(db_session, tree)
+        (tree / "docs" / "deep" / "c.py").unlink()
+        (tree / "docs" / "new.txt").write_text("new")
+        _, changed, result = run_scan(db_session, tree)
+        assert changed == ["new.txt"]
+        assert result['removed'] == 1
+
+    def test_failed_files_are_retried(self, db_session, tree):
+        run_scan(db_session, tree, fail=("b.md",))
+        _, changed, _ = run_scan(db_session, tree)
+        assert changed == ["b.md"]
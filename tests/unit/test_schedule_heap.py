@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("croniter")
+
+from src.backend.services.schedule_heap import MisfirePolicy, ScheduleHeap, next_fire_time
+
+START = datetime(2026, 1, 1, 12, 0, 30)
+
+
+def test_next_fire_time_honours_timezone():
+    # 09:00 in New York is 14:00 UTC in January
+    assert next_fire_time("0 9 * * *", "America/New_York", START) == datetime(2026, 1, 1, 14, 0)
+
+
+def test_deadline_is_the_earliest_entry():
+    heap = ScheduleHeap()
+    heap.upsert(1, "0 * * * *", "UTC", START)
+    heap.upsert(2, "*/5 * * * *", "UTC", START)
+    assert heap.next_deadline() == datetime(2026, 1, 1, 12, 5)
+
+
+def test_edits_and_removals_supersede_queued_items():
+    heap = ScheduleHeap()
+    heap.upsert(1, "*/5 * * * *", "UTC", START)
+    heap.upsert(2, "0 * * * *", "UTC", START)
+    heap.upsert(1, "0 0 * * *", "UTC", START)
+    assert heap.next_deadline() == datetime(2026, 1, 1, 13, 0)
+
+    heap.remove(2)
+    assert heap.next_deadline() == datetime(2026, 1, 2, 0, 0)
+    assert heap.pop_due(datetime(2026, 1, 1, 23, 0)) == []
+
+
+def test_pop_due_reschedules_fired_entries():
+    heap = ScheduleHeap()
+    heap.upsert(1, "*/5 * * * *", "UTC", START)
+    due = heap.pop_due(datetime(2026, 1, 1, 12, 5, 1))
+    assert [(entry.trigger_id, runs) for entry, runs in due] == [(1, [datetime(2026, 1, 1, 12, 5)])]
+    assert heap.next_deadline() == datetime(2026, 1, 1, 12, 10)
+    assert heap.stats.fired == 1
+
+
+@pytest.mark.parametrize("policy,expected", [
+    (MisfirePolicy.FIRE_ONCE, [datetime(2026, 1, 1, 12, 5)]),
+    (MisfirePolicy.FIRE_ALL, [datetime(2026, 1, 1, 12, minute) for minute in (5, 10, 15)]),
+    (MisfirePolicy.SKIP, []),
+])
+def test_misfire_policies(policy, expected):
+    heap = ScheduleHeap()
+    heap.upsert(1, "*/5 * * * *", "UTC", START)
+    now = datetime(2026, 1, 1, 12, 17)
+    [(_, runs)] = heap.pop_due(now, policy, grace_seconds=60, max_catchup=3)
+    assert runs == expected
+    assert heap.next_deadline() == datetime(2026, 1, 1, 12, 20)
+    assert heap.stats.misfired == 1
+
+
+def test_runs_within_grace_are_not_misfires():
+    heap = ScheduleHeap()
+    heap.upsert(1, "*/5 * * * *", "UTC", START)
+    [(_, runs)] = heap.pop_due(datetime(2026, 1, 1, 12, 5, 30), MisfirePolicy.SKIP, grace_seconds=60)
+    assert runs == [datetime(2026, 1, 1, 12, 5)]
+    assert heap.stats.misfired == 0
+
+
+def test_fire_all_gives_up_past_the_catchup_limit():
+    heap = ScheduleHeap()
+    heap.upsert(1, "* * * * *", "UTC", START)
+    now = START + timedelta(hours=1)
+    [(_, runs)] = heap.pop_due(now, MisfirePolicy.FIRE_ALL, max_catchup=2)
+    assert len(runs) == 2
+    assert heap.next_deadline() == datetime(2026, 1, 1, 13, 1)
+    assert heap.stats.skipped == 1
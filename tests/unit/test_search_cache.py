@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.file_metadata import FileMetadata
+from src.backend.database.fts_search import get_search_generation
+from src.backend.services.search_cache import PrefixTrie, SearchCache, normalize_query, suggestion_terms
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO users (id) VALUES (1), (2)"))
+    FileMetadata.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestPrefixTrie:
+    def test_completions_are_ranked_by_frequency(self):
+        trie = PrefixTrie(["budget", "budget", "build", "beach", "budget", "build"])
+        assert trie.complete("bu", limit=5) == ["budget", "build"]
+        assert trie.complete("B", limit=1) == ["budget"]
+        assert trie.complete("x") == []
+
+    def test_suggestion_terms(self):
+        assert suggestion_terms("Budget_Report-2024.xlsx", "finance, q1, Taxes") == [
+            "budget_report", "2024", "xlsx", "finance", "taxes"
+        ]
+
+
+class TestSearchCache:
+    def test_entries_expire_with_the_generation(self):
+        cache = SearchCache(max_entries=10)
+        key = ("files", normalize_query("  Budget  Report "))
+        cache.put(1, 3, key, ["a"])
+        assert cache.get(1, 3, ("files", "budget report")) == ["a"]
+        assert cache.get(2, 3, key) is None
+        assert cache.get(1, 4, key) is None
+        assert cache.get(1, 3, key) is None
+
+    def test_untracked_generation_is_never_cached(self):
+        cache = SearchCache()
+        cache.put(1, None, "k", ["a"])
+        assert cache.get(1, None, "k") is None
+        assert cache.get_stats()['entries'] == 0
+
+    def test_lru_eviction(self):
+        cache = SearchCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(1, 0, key, key)
+        assert cache.get(1, 0, "a") is None
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_suggestion_trie_is_rebuilt_only_when_stale(self):
+        cache = SearchCache()
+        loads = []
+
+        def load():
+            loads.append(1)
+            return ["report", "readme", "report"]
+
+        assert cache.suggest(1, 5, "re", 5, load) == ["report", "readme"]
+        assert cache.suggest(1, 5, "rea", 5, load) == ["readme"]
+        assert len(loads) == 1
+        cache.suggest(1, 6, "re", 5, load)
+        assert len(loads) == 2
+
+
+class TestSearchGeneration:
+    def test_file_changes_bump_only_the_owners_generation(self, db):
+        assert get_search_generation(db, 1) == 0
+        db.add(FileMetadata(user_id=1, file_path="/a.txt", file_name="a.txt"))
+        db.commit()
+        after_insert = get_search_generation(db, 1)
+        assert after_insert > 0
+
+        db.query(FileMetadata).filter_by(file_name="a.txt").one().ai_description = "changed"
+        db.commit()
+        after_update = get_search_generation(db, 1)
+        assert after_update > after_insert
+
+        db.execute(text("DELETE FROM file_metadata"))
+        db.commit()
+        assert get_search_generation(db, 1) > after_update
+        assert get_search_generation(db, 2) == 0
@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.file_metadata import FileMetadata
+from src.backend.services import enhanced_ai_service as enhanced_ai_module
+from src.backend.services.similarity_index import SimilarityIndex, SIMILARITY_AVAILABLE
+from src.backend.services.enhanced_ai_service import EnhancedAIService
+
+pytestmark = pytest.mark.skipif(not SIMILARITY_AVAILABLE, reason="scikit-learn/scipy not installed")
+
+FILES = [
+    {'file_path': '/docs/budget_2024.xlsx', 'filename': 'budget_2024.xlsx', 'description': 'annual budget spreadsheet'},
+    {'file_path': '/docs/budget_2025.xlsx', 'filename': 'budget_2025.xlsx', 'description': 'draft budget forecast'},
+    {'file_path': '/photos/beach.jpg', 'filename': 'beach.jpg', 'description': 'holiday photo at the beach'},
+    {'file_path': '/code/server.py', 'filename': 'server.py', 'description': 'api server entry point'},
+]
+
+
+def documents(items):
+    return [(item['file_path'], f"{item['filename']} {item['description']}", item) for item in items]
+
+
+class TestSimilarityIndex:
+    def test_query_returns_best_matches_first(self):
+        index = SimilarityIndex()
+        index.add(documents(FILES))
+        results = index.query("budget forecast", limit=2)
+        assert [info['filename'] for info, _ in results] == ['budget_2025.xlsx', 'budget_2024.xlsx']
+        assert results[0][1] >= results[1][1]
+
+    def test_small_additions_reuse_the_vocabulary(self):
+        index = SimilarityIndex(refit_ratio=0.5)
+        index.add(documents(FILES))
+        vectorizer = index.vectorizer
+        extra = {'file_path': '/docs/budget_notes.txt', 'filename': 'budget_notes.txt', 'description': 'budget'}
+        assert index.add(documents([extra])) == 1
+        assert index.vectorizer is vectorizer
+        assert '/docs/budget_notes.txt' in [info['file_path'] for info, _ in index.query("budget", limit=5)]
+
+    def test_unchanged_documents_are_not_reindexed(self):
+        index = SimilarityIndex()
+        index.add(documents(FILES))
+        assert index.add(documents(FILES)) == 0
+
+    def test_removed_documents_are_not_returned(self):
+        index = SimilarityIndex()
+        index.add(documents(FILES))
+        index.remove(['/docs/budget_2025.xlsx'])
+        index.remove_under('/code')
+        names = [info['filename'] for info, _ in index.query("budget server", limit=5)]
+        assert names == ['budget_2024.xlsx']
+        assert len(index) == 2
+
+    def test_save_and_load(self, tmp_path):
+        index = SimilarityIndex()
+        index.add(documents(FILES))
+        index.save(tmp_path / "user_1.pkl")
+
+        restored = SimilarityIndex.load(tmp_path / "user_1.pkl")
+        assert restored.query("beach holiday", limit=1)[0][0]['filename'] == 'beach.jpg'
+
+
+class TestFindSimilarFiles:
+    @pytest.mark.asyncio
+    async def test_user_index_persists_between_queries(self, tmp_path):
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        classifier_vectorizer = service.text_vectorizer
+
+        assert await service.update_similarity_index(7, FILES) == len(FILES)
+        first = await service.find_similar_files("budget", limit=2, user_id=7)
+        assert {f['filename'] for f in first} == {'budget_2024.xlsx', 'budget_2025.xlsx'}
+        assert (tmp_path / "similarity" / "user_7.pkl").exists()
+
+        reloaded = EnhancedAIService(model_cache_dir=str(tmp_path))
+        second = await reloaded.find_similar_files("beach photo", limit=1, user_id=7)
+        assert second[0]['filename'] == 'beach.jpg'
+        assert 'similarity_score' in second[0]
+        # The classifiers' vectorizer is no longer refitted by similarity searches
+        assert service.text_vectorizer is classifier_vectorizer
+        assert not hasattr(classifier_vectorizer, 'vocabulary_')
+
+    @pytest.mark.asyncio
+    async def test_request_files_are_not_written_into_the_user_index(self, tmp_path):
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        await service.update_similarity_index(7, FILES[:2])
+
+        injected = [{'file_path': '/evil/budget.txt', 'filename': 'budget.txt', 'description': 'budget'}]
+        result = await service.find_similar_files("budget", injected, limit=5, user_id=7)
+        assert [f['filename'] for f in result] == ['budget.txt']
+        assert len(service.get_similarity_index(7)) == 2
+
+    @pytest.mark.asyncio
+    async def test_user_index_is_built_from_the_stored_catalog(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("CREATE TABLE workspaces (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO users (id) VALUES (7)"))
+        FileMetadata.__table__.create(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        db.add_all([
+            FileMetadata(user_id=7, file_path='/docs/budget_2024.xlsx', file_name='budget_2024.xlsx',
+                         ai_description='annual budget spreadsheet'),
+            FileMetadata(user_id=7, file_path='/photos/beach.jpg', file_name='beach.jpg',
+                         ai_tags='holiday,photo,beach'),
+        ])
+        db.commit()
+        db.close()
+        monkeypatch.setattr(enhanced_ai_module, "ReadSessionLocal", session_factory)
+
+        service = EnhancedAIService(model_cache_dir=str(tmp_path))
+        result = await service.find_similar_files("holiday photo", limit=1, user_id=7)
+        assert [f['filename'] for f in result] == ['beach.jpg']
+        assert len(service.get_similarity_index(7)) == 2
+        assert (tmp_path / "similarity" / "user_7.pkl").exists()
+        engine.dispose()
@@ -0,0 +1,103 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from src.backend.caching.advanced_cache import AdvancedCacheManager, CacheStrategy
+from src.backend.caching.single_flight import SingleFlight, should_refresh_early
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        runs = 0
+
+        async def fetch():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return runs
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(50)))
+        assert results == [1] * 50
+        assert flight.get_stats() == {'calls': 1, 'coalesced': 49, 'in_flight': 0}
+
+        # A later call runs again
+        assert await flight.do("k", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert "k" not in flight
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_the_fetch(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "value"
+
+        first = asyncio.ensure_future(flight.do("k", fetch))
+        second = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "value"
+
+
+class TestEarlyExpiration:
+    def test_refresh_probability_rises_towards_expiry(self):
+        random.seed(7)
+        now = 1000.0
+        far = sum(should_refresh_early(now + 100, 0.01, now) for _ in range(1000))
+        near = sum(should_refresh_early(now + 0.01, 1.0, now) for _ in range(1000))
+        assert far == 0
+        assert near > 950
+
+    def test_disabled_beta_only_refreshes_at_expiry(self):
+        assert not should_refresh_early(10.0, 5.0, 9.99, beta=0)
+        assert should_refresh_early(10.0, 5.0, 10.0, beta=0)
+
+
+class TestAdvancedCacheCoalescing:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_fetch_once(self):
+        cache = AdvancedCacheManager()
+        fetches = 0
+
+        async def fetch():
+            nonlocal fetches
+            fetches += 1
+            await asyncio.sleep(0.01)
+            return {"dashboard": True}
+
+        results = await asyncio.gather(*(
+            cache.get("users:1", fetch, strategy=CacheStrategy.CACHE_FIRST) for _ in range(20)
+        ))
+        assert results == [{"dashboard": True}] * 20
+        assert fetches == 1
+        assert cache.get_cache_stats()['metrics']['coalesced'] == 19
+
+    @pytest.mark.asyncio
+    async def test_hot_entry_is_refreshed_before_it_expires(self):
+        cache = AdvancedCacheManager(early_expiration_beta=1.0)
+        await cache.set("workspaces:1", "old", ttl=1, fetch_duration=1e6)
+
+        async def fetch():
+            return "new"
+
+        # Still fresh, but a slow fetch this close to expiry is refreshed early
+        assert await cache.get("workspaces:1", fetch, strategy=CacheStrategy.STALE_WHILE_REVALIDATE) == "old"
+        await asyncio.gather(*cache.revalidation_tasks.values())
+        assert cache.metrics.early_revalidations == 1
+        entry = cache.memory_cache.get("workspaces:1")
+        assert entry.data == "new" and entry.expires_at > time.time()
@@ -0,0 +1,87 @@
+import pytest
+
+# The plugin package imports these at load time
+pytest.importorskip("semver")
+pytest.importorskip("aiohttp")
+pytest.importorskip("jsonschema")
+
+from src.backend.core.plugins.event_system import EventPriority, PluginEventSystem
+from src.backend.core.plugins.topic_trie import TopicTrie
+
+
+def trie_of(*patterns):
+    trie = TopicTrie()
+    for pattern in patterns:
+        trie.add(pattern)
+    return trie
+
+
+class TestTopicTrie:
+    def test_star_matches_exactly_one_segment(self):
+        trie = trie_of("file.*", "file.*.pdf")
+        assert trie.match("file.created") == {"file.*"}
+        assert trie.match("file.created.pdf") == {"file.*.pdf"}
+        assert trie.match("file") == set()
+
+    def test_hash_matches_zero_or_more_segments(self):
+        trie = trie_of("file.#", "#.deleted", "a.#.z")
+        assert trie.match("file") == {"file.#"}
+        assert trie.match("file.a.b.deleted") == {"file.#", "#.deleted"}
+        assert trie.match("a.z") == {"a.#.z"}
+        assert trie.match("a.b.c.z") == {"a.#.z"}
+
+    def test_lone_star_and_segment_globs(self):
+        trie = trie_of("*", "file_*.created", "workspace.created")
+        assert trie.match("anything.at.all") == {"*"}
+        assert trie.match("file_upload.created") == {"*", "file_*.created"}
+        assert trie.match("workspace.created") == {"*", "workspace.created"}
+
+    def test_remove_prunes_empty_branches(self):
+        trie = trie_of("a.b.c", "a.*")
+        assert trie.remove("a.b.c")
+        assert not trie.remove("a.b.c")
+        assert "a.b" not in trie._root.children["a"].children
+        assert trie.match("a.b") == {"a.*"}
+        assert len(trie) == 1
+
+
+class TestEventDispatch:
+    @pytest.mark.asyncio
+    async def test_handlers_run_in_priority_order_and_cache_follows_registration(self):
+        events = PluginEventSystem()
+        calls = []
+        events.add_handler("p1", "file.created", lambda e: calls.append("low"), EventPriority.LOW)
+        events.add_handler("p2", "*", lambda e: calls.append("global"))
+        high = events.add_handler("p3", "file.created", lambda e: calls.append("high"), EventPriority.HIGH)
+
+        await events.emit_sync("file.created")
+        assert calls == ["high", "global", "low"]
+
+        events.remove_handler(high)
+        calls.clear()
+        await events.emit_sync("file.created")
+        assert calls == ["global", "low"]
+
+    @pytest.mark.asyncio
+    async def test_subscriptions_match_through_the_trie(self):
+        events = PluginEventSystem()
+        received = []
+        events.subscribe("p1", "file.#", lambda e: received.append(("p1", e.type)))
+        subscription = events.subscribe("p2", "file.*", lambda e: received.append(("p2", e.type)))
+        events.subscribe("p3", "task.*", lambda e: received.append(("p3", e.type)), max_events=1)
+
+        await events.emit_sync("file.created")
+        await events.emit_sync("file.created.pdf")
+        await events.emit_sync("task.done")
+        await events.emit_sync("task.done")
+        assert received == [
+            ("p1", "file.created"), ("p2", "file.created"),
+            ("p1", "file.created.pdf"),
+            ("p3", "task.done")
+        ]
+        assert "task.*" not in events.subscriptions
+
+        assert events.unsubscribe(subscription)
+        received.clear()
+        await events.emit_sync("file.created")
+        assert received == [("p1", "file.created")]
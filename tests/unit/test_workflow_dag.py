@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.backend.services.workflow_dag import DagExecutor, WorkflowCycleError, topological_order
+
+
+def step(step_id, *depends_on, seconds=0.0, ok=True):
+    return SimpleNamespace(id=step_id, depends_on=list(depends_on), seconds=seconds, ok=ok)
+
+
+def recorder(log):
+    async def run_step(s):
+        log.append(("start", s.id))
+        await asyncio.sleep(s.seconds)
+        log.append(("end", s.id))
+        return s.ok
+    return run_step
+
+
+def test_topological_order_keeps_step_order_for_ties():
+    order, unrunnable = topological_order([step(1, 3), step(2), step(3), step(4, 1)])
+    assert order == [2, 3, 1, 4]
+    assert unrunnable == set()
+
+
+def test_cycles_are_rejected_up_front():
+    with pytest.raises(WorkflowCycleError) as error:
+        DagExecutor([step(1), step(2, 3), step(3, 2), step(4, 3)], recorder([]))
+    assert error.value.step_ids == [2, 3, 4]
+
+
+def test_missing_dependencies_make_steps_unrunnable():
+    _, unrunnable = topological_order([step(1, 99), step(2, 1), step(3)])
+    assert unrunnable == {1, 2}
+
+
+@pytest.mark.asyncio
+async def test_step_starts_when_its_last_dependency_completes():
+    log = []
+    steps = [step(1, seconds=0.2), step(2, seconds=0.01), step(3, 2, seconds=0.01), step(4, 1, 3)]
+    result = await DagExecutor(steps, recorder(log)).run()
+
+    # 3 only waits for 2, not for the slow 1 started alongside it
+    assert log.index(("start", 3)) < log.index(("end", 1))
+    assert log.index(("start", 4)) > log.index(("end", 1))
+    assert result.completed == [2, 3, 1, 4]
+    assert result.critical_path == [1, 4]
+
+
+@pytest.mark.asyncio
+async def test_max_parallelism_is_respected():
+    log = []
+    steps = [step(i, seconds=0.01) for i in range(1, 6)]
+    result = await DagExecutor(steps, recorder(log), max_parallelism=2).run()
+    assert result.max_concurrency == 2
+    assert sorted(result.completed) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_failed_and_skipped_steps_block_their_dependents():
+    async def should_run(s):
+        return s.id != 3
+
+    steps = [step(1, ok=False), step(2, 1), step(3), step(4, 3), step(5)]
+    result = await DagExecutor(steps, recorder([]), should_run).run()
+    assert result.failed == [1]
+    assert result.skipped == [3]
+    assert result.completed == [5]
+    assert result.blocked == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_exception_cancels_running_steps():
+    cancelled = asyncio.Event()
+
+    async def run_step(s):
+        if s.id == 1:
+            raise RuntimeError("boom")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return True
+
+    with pytest.raises(RuntimeError):
+        await DagExecutor([step(1), step(2)], run_step).run()
+    assert cancelled.is_set()
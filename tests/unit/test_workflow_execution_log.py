@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.workflow import WorkflowExecutionStatus, WorkflowStepExecution
+from src.backend.services.workflow_execution_log import ExecutionLog, StepRecord
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """A database with the step executions table and the tables it references"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE workflow_executions (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("CREATE TABLE workflow_steps (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO workflow_executions (id) VALUES (1), (2)"))
+        conn.execute(text("INSERT INTO workflow_steps (id) VALUES " + ", ".join(f"({i})" for i in range(1, 6))))
+    WorkflowStepExecution.__table__.create(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def rows(session_factory):
+    db = session_factory()
+    try:
+        return db.query(WorkflowStepExecution).order_by(WorkflowStepExecution.step_id).all()
+    finally:
+        db.close()
+
+
+def started(execution_id, step_id, at, input_data=None):
+    return StepRecord(execution_id, step_id, 1, WorkflowExecutionStatus.RUNNING,
+                      started_at=at, input_data=input_data)
+
+
+def completed(execution_id, step_id, at, seconds=1.0, output_data=None):
+    return StepRecord(execution_id, step_id, 1, WorkflowExecutionStatus.COMPLETED,
+                      completed_at=at, execution_time_seconds=seconds, output_data=output_data)
+
+
+@pytest.mark.asyncio
+async def test_start_and_finish_in_one_batch_write_one_row(session_factory):
+    log = ExecutionLog(session_factory, flush_interval_ms=10_000)
+    now = datetime.utcnow()
+    log.append(started(1, 1, now, {"a": 1}))
+    log.append(completed(1, 1, now + timedelta(seconds=2), 2.0, {"b": 2}))
+    assert rows(session_factory) == []
+
+    assert log.flush() == 1
+    [row] = rows(session_factory)
+    assert row.status is WorkflowExecutionStatus.COMPLETED
+    assert row.started_at == now and row.execution_time_seconds == 2.0
+    assert row.input_data == {"a": 1} and row.output_data == {"b": 2}
+    assert log.get_stats()["flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_read_includes_records_not_yet_flushed(session_factory):
+    log = ExecutionLog(session_factory, flush_interval_ms=10_000)
+    now = datetime.utcnow()
+    log.append(started(1, 1, now))
+    log.flush()
+    log.append(completed(1, 1, now, 3.0))
+    log.append(started(1, 2, now))
+    log.append(started(2, 3, now))
+
+    db = session_factory()
+    try:
+        records = log.read(db, [1])
+    finally:
+        db.close()
+    assert [(r.step_id, r.status) for r in records] == [
+        (1, WorkflowExecutionStatus.COMPLETED),
+        (2, WorkflowExecutionStatus.RUNNING)
+    ]
+    assert records[0].started_at == now and records[0].execution_time_seconds == 3.0
+    assert records[0].input_data is None  # payloads are not read back for dashboards
+
+
+def test_completion_flushed_later_keeps_the_start(session_factory):
+    # Without a running event loop every append is written straight away
+    log = ExecutionLog(session_factory)
+    now = datetime.utcnow()
+    log.append(started(1, 1, now, {"a": 1}))
+    log.append(completed(1, 1, now + timedelta(seconds=1), output_data={"b": 2}))
+
+    [row] = rows(session_factory)
+    assert row.status is WorkflowExecutionStatus.COMPLETED
+    assert row.started_at == now
+    assert row.input_data == {"a": 1} and row.output_data == {"b": 2}
+    assert log.get_stats()["flushes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_without_waiting(session_factory):
+    log = ExecutionLog(session_factory, batch_size=3, flush_interval_ms=10_000)
+    now = datetime.utcnow()
+    for step_id in (1, 2):
+        log.append(started(1, step_id, now))
+    assert rows(session_factory) == []
+
+    log.append(started(1, 3, now))
+    await asyncio.sleep(0.1)  # flushed on a worker thread
+    assert [row.step_id for row in rows(session_factory)] == [1, 2, 3]
+    assert log.get_stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_records_are_flushed_after_the_interval(session_factory):
+    log = ExecutionLog(session_factory, flush_interval_ms=50)
+    log.append(started(1, 1, datetime.utcnow()))
+    log.append(started(1, 2, datetime.utcnow()))
+    assert rows(session_factory) == []
+
+    await asyncio.sleep(0.2)
+    assert len(rows(session_factory)) == 2
+    assert log.get_stats()["flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_without_new_records(session_factory):
+    failures = []
+
+    def flaky_factory():
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("database unavailable")
+        return session_factory()
+
+    log = ExecutionLog(flaky_factory, flush_interval_ms=50)
+    log.append(started(1, 1, datetime.utcnow()))
+    await asyncio.sleep(0.3)
+
+    assert [row.step_id for row in rows(session_factory)] == [1]
+    stats = log.get_stats()
+    assert stats["flush_errors"] == 1 and stats["pending"] == 0
+
+
+def test_bad_record_does_not_hold_back_the_batch(session_factory):
+    log = ExecutionLog(session_factory)
+    log._pending = {
+        record.key: record for record in (started(1, 1, datetime.utcnow()), started(1, 99, datetime.utcnow()))
+    }
+    assert log.flush() == 1
+    assert [row.step_id for row in rows(session_factory)] == [1]
+    assert log.get_stats()["flush_errors"] == 1
+
+
+def test_large_payloads_are_offloaded(session_factory, tmp_path):
+    log = ExecutionLog(session_factory, payload_max_bytes=64, payload_directory=str(tmp_path / "payloads"))
+    payload = {"text": "x" * 200}
+    log.append(completed(1, 1, datetime.utcnow(), output_data=payload))
+
+    [row] = rows(session_factory)
+    assert row.output_data["_payload"] == "offloaded"
+    assert row.output_data["path"].endswith("step1_attempt1_output.json")
+    assert ExecutionLog.load_payload(row.output_data) == payload
+    assert log.get_stats()["payloads_offloaded"] == 1
+
+
+def test_large_payloads_are_truncated(session_factory):
+    log = ExecutionLog(session_factory, payload_max_bytes=64, payload_policy="truncate")
+    log.append(started(1, 1, datetime.utcnow(), {"text": "x" * 200, "small": True}))
+
+    [row] = rows(session_factory)
+    assert row.input_data["_payload"] == "truncated"
+    assert len(row.input_data["preview"]) == 64
+    assert ExecutionLog.load_payload(row.input_data) == row.input_data
+
+
+def test_unknown_payload_policy_is_rejected(session_factory):
+    with pytest.raises(ValueError):
+        ExecutionLog(session_factory, payload_policy="drop")
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.models.workflow import WorkflowQueueItem, WorkflowQueueStatus
+from src.backend.services.workflow_queue import WorkflowExecutionQueue, WorkflowQueueWorker
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """A database with the queue table and a minimal executions table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE workflow_executions (id INTEGER PRIMARY KEY, status VARCHAR(20), "
+            "error_message TEXT, completed_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO workflow_executions (id, status) VALUES "
+                          + ", ".join(f"({i}, 'PENDING')" for i in range(1, 11))))
+    WorkflowQueueItem.__table__.create(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def make_queue(session_factory, items, lease_seconds=60, max_attempts=3):
+    queue = WorkflowExecutionQueue(session_factory, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    db = session_factory()
+    for execution_id, workspace_id, priority in items:
+        queue.enqueue(db, execution_id, workspace_id=workspace_id, priority=priority)
+    db.close()
+    return queue
+
+
+def executions(claimed):
+    return [execution_id for _, execution_id in claimed]
+
+
+def test_claims_by_priority_then_age_without_double_leasing(session_factory):
+    queue = make_queue(session_factory, [(1, 1, 0), (2, 1, 5), (3, 2, 0)])
+    assert executions(queue.claim("a", 2)) == [2, 1]
+    assert executions(queue.claim("b", 5)) == [3]
+    assert queue.claim("c", 5) == []
+    assert queue.get_stats()["leased"] == 3
+
+
+def test_workspace_concurrency_cap_spans_workers(session_factory):
+    queue = make_queue(session_factory, [(1, 1, 0), (2, 1, 0), (3, 1, 0), (4, 2, 0)])
+    assert executions(queue.claim("a", 1, workspace_limit=2)) == [1]
+    assert executions(queue.claim("b", 5, workspace_limit=2)) == [2, 4]
+    assert executions(queue.claim("c", 5)) == [3]  # no cap for this worker
+
+
+def test_expired_lease_is_recovered_by_another_worker(session_factory):
+    queue = make_queue(session_factory, [(1, 1, 0)], lease_seconds=30)
+    [(item_id, _)] = queue.claim("crashed", 1)
+
+    later = datetime.utcnow() + timedelta(seconds=31)
+    assert executions(queue.claim("survivor", 1, now=later)) == [1]
+    assert queue.heartbeat("crashed", [item_id], now=later) == set()
+    assert not queue.complete(item_id, "crashed")
+    assert queue.complete(item_id, "survivor")
+    assert queue.get_stats()["leased"] == 0
+
+
+def test_run_is_dead_lettered_after_max_attempts(session_factory):
+    queue = make_queue(session_factory, [(1, 1, 0)], lease_seconds=30, max_attempts=2)
+    now = datetime.utcnow()
+    for attempt in range(2):
+        assert executions(queue.claim(f"w{attempt}", 1, now=now)) == [1]
+        now += timedelta(seconds=31)
+    assert queue.claim("w2", 1, now=now) == []
+
+    stats = queue.get_stats()
+    assert stats["dead"] == 1 and stats["leased"] == 0
+    db = session_factory()
+    assert db.execute(text("SELECT status FROM workflow_executions WHERE id = 1")).scalar() == "FAILED"
+    db.close()
+
+
+def test_release_returns_runs_without_using_an_attempt(session_factory):
+    queue = make_queue(session_factory, [(1, 1, 0)])
+    [(item_id, _)] = queue.claim("a", 1)
+    assert queue.release([item_id], "a") == 1
+
+    db = session_factory()
+    item = db.get(WorkflowQueueItem, item_id)
+    assert item.status is WorkflowQueueStatus.QUEUED and item.attempts == 0
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_queue_and_stops_runs_whose_lease_is_lost(session_factory):
+    queue = make_queue(session_factory, [(i, 1, 0) for i in range(1, 5)], lease_seconds=0.3)
+    ran = []
+    blocked = asyncio.Event()
+
+    async def run_execution(execution_id):
+        if execution_id == 4:
+            blocked.set()
+            await asyncio.Event().wait()
+        ran.append(execution_id)
+
+    worker = WorkflowQueueWorker(queue, run_execution, worker_id="w", concurrency=2, poll_seconds=0.05)
+    await worker.start()
+    try:
+        await asyncio.wait_for(blocked.wait(), 2)
+        queue.cancel(4)
+        for _ in range(40):
+            if worker.leases_lost:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+
+    assert sorted(ran) == [1, 2, 3]
+    assert worker.leases_lost == 1
+    assert queue.get_stats()["queued"] == queue.get_stats()["leased"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_completion_is_retried_without_rerunning(session_factory, monkeypatch):
+    queue = make_queue(session_factory, [(1, 1, 0)])
+    ran = []
+    complete = queue.complete
+    failures = []
+
+    def flaky_complete(item_id, worker_id):
+        if not failures:
+            failures.append(item_id)
+            raise RuntimeError("database is locked")
+        return complete(item_id, worker_id)
+
+    monkeypatch.setattr(queue, "complete", flaky_complete)
+
+    async def run_execution(execution_id):
+        ran.append(execution_id)
+
+    worker = WorkflowQueueWorker(queue, run_execution, worker_id="w", concurrency=1, poll_seconds=0.05)
+    await worker.start()
+    try:
+        for _ in range(40):
+            if worker.completed:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+
+    assert ran == [1] and failures == [1]
+    assert worker.completed == 1
+    stats = queue.get_stats()
+    assert stats["queued"] == stats["leased"] == 0
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_during_slow_completion_is_not_a_lost_lease(session_factory, monkeypatch):
+    queue = make_queue(session_factory, [(1, 1, 0)], lease_seconds=0.15)
+    complete = queue.complete
+
+    def slow_complete(item_id, worker_id):
+        deleted = complete(item_id, worker_id)
+        time.sleep(0.25)  # heartbeats run while the row is already gone
+        return deleted
+
+    monkeypatch.setattr(queue, "complete", slow_complete)
+
+    async def run_execution(execution_id):
+        pass
+
+    worker = WorkflowQueueWorker(queue, run_execution, worker_id="w", concurrency=1, poll_seconds=0.05)
+    await worker.start()
+    try:
+        for _ in range(40):
+            if worker.completed:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+
+    assert worker.completed == 1 and worker.leases_lost == 0
+    assert worker.get_stats()["running"] == 0